@@ -0,0 +1,24 @@
+-- 004_graph_spec_sink.sql
+-- Staging tables for asset and edge specs written by the LangGraph service sink.
+-- Rows are upserted in batches on idempotency_key; the web app promotes them
+-- into public.assets / public.asset_edges once endpoint asset ids are resolved.
+CREATE TABLE IF NOT EXISTS public.graph_asset_specs (
+  idempotency_key text PRIMARY KEY,
+  project_id text,
+  type text NOT NULL,
+  spec jsonb NOT NULL,
+  run_id text,
+  updated_at timestamptz DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_graph_asset_specs_project ON public.graph_asset_specs(project_id);
+CREATE INDEX IF NOT EXISTS idx_graph_asset_specs_run ON public.graph_asset_specs(run_id);
+
+CREATE TABLE IF NOT EXISTS public.graph_edge_specs (
+  idempotency_key text PRIMARY KEY,
+  edge_type text NOT NULL,
+  spec jsonb NOT NULL,
+  run_id text,
+  updated_at timestamptz DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_graph_edge_specs_type ON public.graph_edge_specs(edge_type);
+CREATE INDEX IF NOT EXISTS idx_graph_edge_specs_run ON public.graph_edge_specs(run_id);
@@ -0,0 +1,38 @@
+-- 005_graph_run_state.sql
+-- Run state shared by every LangGraph service worker: threads, run records,
+-- events published while runs execute, the run queue workers claim from, and
+-- profile artifacts. Any worker can accept, execute or stream any run.
+CREATE TABLE IF NOT EXISTS public.graph_threads (
+  thread_id text PRIMARY KEY,
+  record jsonb NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS public.graph_runs (
+  run_id text PRIMARY KEY,
+  graph_id text NOT NULL,
+  record jsonb NOT NULL,
+  updated_at timestamptz DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.graph_run_events (
+  seq bigserial PRIMARY KEY,
+  run_id text NOT NULL,
+  event jsonb NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_graph_run_events_run ON public.graph_run_events(run_id, seq);
+
+CREATE TABLE IF NOT EXISTS public.graph_run_queue (
+  run_id text PRIMARY KEY,
+  graph_id text NOT NULL,
+  input jsonb,
+  profile boolean NOT NULL DEFAULT false,
+  enqueued_at timestamptz NOT NULL DEFAULT now(),
+  claimed_by text,
+  heartbeat_at timestamptz
+);
+CREATE INDEX IF NOT EXISTS idx_graph_run_queue_unclaimed ON public.graph_run_queue(enqueued_at) WHERE claimed_by IS NULL;
+
+CREATE TABLE IF NOT EXISTS public.graph_run_profiles (
+  run_id text PRIMARY KEY,
+  artifact jsonb NOT NULL
+);
@@ -0,0 +1,4 @@
+-- 006_graph_run_updates.sql
+-- Workers poll for runs updated since their last poll to push status changes
+-- to WebSocket subscribers.
+CREATE INDEX IF NOT EXISTS idx_graph_runs_updated ON public.graph_runs(updated_at);
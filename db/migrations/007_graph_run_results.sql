@@ -0,0 +1,21 @@
+-- 007_graph_run_results.sql
+-- Completed run results, kept apart from the run record and pre-serialized:
+-- one row per top-level field and one per item of each large list, so a
+-- client can fetch only the fields it asks for and page through lists.
+-- Bodies are JSON text, not jsonb, so they are served exactly as stored.
+CREATE TABLE IF NOT EXISTS public.graph_run_result_fields (
+  run_id text NOT NULL,
+  path text NOT NULL,
+  kind text NOT NULL CHECK (kind IN ('json','list','object')),
+  body text,
+  length integer NOT NULL,
+  PRIMARY KEY (run_id, path)
+);
+
+CREATE TABLE IF NOT EXISTS public.graph_run_result_items (
+  run_id text NOT NULL,
+  path text NOT NULL,
+  idx integer NOT NULL,
+  body text NOT NULL,
+  PRIMARY KEY (run_id, path, idx)
+);
@@ -0,0 +1,4 @@
+-- 008_graph_run_project_results.sql
+-- WBS extraction diffs against the project's most recently completed run
+-- that stored a WBS structure, looked up by project.
+CREATE INDEX IF NOT EXISTS idx_graph_runs_project ON public.graph_runs((record->>'project_id'), updated_at DESC);
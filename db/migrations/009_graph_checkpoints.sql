@@ -0,0 +1,65 @@
+-- 009_graph_checkpoints.sql
+-- Graph checkpoints and approvals engine state, kept next to the run state
+-- (005_graph_run_state.sql) so a run claimed on another host resumes from its
+-- last checkpoint and every worker sees the same approval workflows.
+
+-- Checkpoint headers; channel values live in graph_checkpoint_deltas, one row
+-- per channel version, with list channels that only grew storing the new tail
+CREATE TABLE IF NOT EXISTS public.graph_checkpoints (
+  thread_id text NOT NULL,
+  checkpoint_id text NOT NULL,
+  parent_id text,
+  header bytea NOT NULL,
+  metadata bytea NOT NULL,
+  PRIMARY KEY (thread_id, checkpoint_id)
+);
+
+CREATE TABLE IF NOT EXISTS public.graph_checkpoint_deltas (
+  thread_id text NOT NULL,
+  channel text NOT NULL,
+  version bigint NOT NULL,
+  kind text NOT NULL CHECK (kind IN ('set', 'append')),
+  value bytea NOT NULL,
+  PRIMARY KEY (thread_id, channel, version)
+);
+
+CREATE TABLE IF NOT EXISTS public.graph_checkpoint_writes (
+  thread_id text NOT NULL,
+  checkpoint_id text NOT NULL,
+  task_id text NOT NULL,
+  idx integer NOT NULL,
+  channel text NOT NULL,
+  value bytea NOT NULL,
+  PRIMARY KEY (thread_id, checkpoint_id, task_id, idx)
+);
+
+CREATE TABLE IF NOT EXISTS public.graph_checkpoint_runs (
+  run_id text PRIMARY KEY,
+  graph_id text NOT NULL,
+  status text NOT NULL,
+  updated_at timestamptz DEFAULT now()
+);
+
+-- Approvals engine: compiled workflow definitions, workflow records stamped
+-- with the project version that saved them, and each project's current
+-- version, so a worker re-reads only workflows saved since it last looked
+CREATE TABLE IF NOT EXISTS public.graph_approval_definitions (
+  project_id text NOT NULL,
+  key text NOT NULL,
+  steps jsonb NOT NULL,
+  PRIMARY KEY (project_id, key)
+);
+
+CREATE TABLE IF NOT EXISTS public.graph_approval_workflows (
+  project_id text NOT NULL,
+  workflow_id text NOT NULL,
+  record jsonb NOT NULL,
+  version bigint NOT NULL,
+  PRIMARY KEY (project_id, workflow_id)
+);
+CREATE INDEX IF NOT EXISTS idx_graph_approval_workflows_version ON public.graph_approval_workflows(project_id, version);
+
+CREATE TABLE IF NOT EXISTS public.graph_approval_versions (
+  project_id text PRIMARY KEY,
+  version bigint NOT NULL
+);
@@ -0,0 +1,289 @@
+from typing import Dict, List, Any, Tuple
+import random
+import re
+
+# Citations as they appear in real specifications - families with clause suffixes, joint and foreign standards
+STANDARDS = (
+    "AS 1289.5.4.1", "AS 1289.2.1.1", "AS 1289.5.1.1", "AS 3600", "AS 1379", "AS 1012.9", "AS 1012.3.1",
+    "AS 4100", "AS/NZS 1554.1", "AS 3000", "AS/NZS 3017", "AS 2870", "AS 3798", "ISO 9001", "ISO 14001",
+    "ISO 45001", "BS 8500", "EN 206", "ASTM D698", "ASTM C39"
+)
+
+DISCIPLINE_SENTENCES = (
+    "The earthworks shall be placed in layers not exceeding 200 mm compacted thickness.",
+    "Concrete placement shall not commence until the reinforcement has been inspected.",
+    "Pavement layers shall be tested for compaction at the frequency nominated.",
+    "Drainage pipes shall be bedded on compacted granular material.",
+    "Structural steel connections shall be bolted using snug tight procedures unless noted.",
+    "Reinforcement shall be supported on bar chairs at spacings not exceeding 800 mm.",
+    "Electrical cabling shall be installed in conduit and segregated from communications cabling.",
+    "Lighting circuits shall be tested before energisation.",
+    "Mechanical plant shall be installed level and aligned to the manufacturer's tolerances.",
+    "HVAC ductwork shall be pressure tested prior to insulation.",
+    "Excavation below the design level shall be backfilled with approved material.",
+    "Testing shall be carried out by a NATA accredited laboratory.",
+    "Commissioning records shall be provided before handover.",
+)
+
+REQUIREMENT_SENTENCES = (
+    "The Contractor must submit the method statement 10 working days before starting the work.",
+    "A hold point applies and work shall not proceed until released by the Superintendent.",
+    "Nonconforming work is required to be removed and replaced at the Contractor's cost.",
+    "Samples shall be retained for the duration of the defects liability period.",
+    "Hazard identification and risk assessment shall be completed before each activity.",
+    "Dust and noise shall be controlled so that no risk of nuisance arises to neighbours.",
+)
+
+FILLER_WORDS = (
+    "the", "works", "site", "material", "approved", "contractor", "specification", "drawing", "level",
+    "surface", "layer", "design", "installation", "inspection", "quality", "record", "lot", "area",
+    "temporary", "existing", "adjacent", "structure", "provide", "ensure", "accordance", "with"
+)
+
+COMPANIES = ("Transport for NSW", "Main Roads WA", "Riverside Council", "Harbour Water Corporation",
+             "Coastal Civil Pty Ltd", "Summit Constructions", "Meridian Engineering", "Aurora Consulting Group")
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(FILLER_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+def _citation(rng: random.Random) -> str:
+    return rng.choice(STANDARDS)
+
+def _clause(rng: random.Random) -> str:
+    return ".".join(str(rng.randint(1, 12)) for _ in range(rng.randint(1, 3)))
+
+def _chainage(rng: random.Random) -> str:
+    start = rng.randint(0, 20000)
+    end = start + rng.randint(20, 800)
+    return f"CH {start // 1000}+{start % 1000:03d} to CH {end // 1000}+{end % 1000:03d}"
+
+def _body(rng: random.Random, words: int, clause_density: float, standards_density: float) -> List[str]:
+    """Paragraphs totalling about `words` words, citing clauses and standards at the given rates per 100 words"""
+    lines: List[str] = []
+    written = 0
+    section = 0
+    while written < words:
+        section += 1
+        lines.append(f"\n## {section}. {rng.choice(['General', 'Materials', 'Execution', 'Testing', 'Tolerances', 'Records'])}\n")
+        for _ in range(rng.randint(3, 8)):
+            sentence = rng.choice(DISCIPLINE_SENTENCES + REQUIREMENT_SENTENCES) + " " + _sentence(rng, rng.randint(8, 20))
+            n = len(sentence.split())
+            if rng.random() < standards_density * n / 100:
+                sentence += f" Testing shall be in accordance with {_citation(rng)}."
+            if rng.random() < clause_density * n / 100:
+                sentence += f" Refer to Clause {_clause(rng)}."
+            if rng.random() < 0.05:
+                sentence += f" Applies to Zone {rng.choice('ABCD')} from {_chainage(rng)}."
+            lines.append(sentence)
+            written += len(sentence.split())
+    return lines
+
+def make_specification(rng: random.Random, doc_id: str, words: int, clause_density: float, standards_density: float) -> Dict[str, Any]:
+    heading = rng.choice(["Earthworks", "Concrete Works", "Structural Steelwork", "Electrical Installation", "Pavements", "Drainage"])
+    lines = [f"# Technical Specification - {heading}", ""]
+    lines += _body(rng, words, clause_density, standards_density)
+    return {"id": doc_id, "filename": f"{doc_id}_specification.pdf", "document_type": "specification", "content": "\n".join(lines)}
+
+def make_contract(rng: random.Random, doc_id: str, words: int, clause_density: float, standards_density: float) -> Dict[str, Any]:
+    value = rng.randint(1, 400) * 250000
+    lines = [
+        "# Contract Agreement",
+        "",
+        f"Project: {rng.choice(['Riverside', 'Northern', 'Harbour', 'Western'])} {rng.choice(['Bridge', 'Motorway', 'Pump Station', 'Interchange'])} Upgrade",
+        f"Site Address: {rng.randint(1, 400)} {rng.choice(['Main', 'Station', 'Harbour', 'Ridge'])} Road, {rng.choice(['Parramatta', 'Perth', 'Geelong', 'Townsville'])}",
+        f"Principal: {rng.choice(COMPANIES[:4])}",
+        f"Contractor: {rng.choice(COMPANIES[4:6])}",
+        f"Consultant: {rng.choice(COMPANIES[6:])}",
+        f"Contract Sum: ${value:,}.00",
+        f"Commencement Date: {rng.randint(1, 28)} March 2025",
+        f"Completion Date: {rng.randint(1, 28)} June 2027",
+        "Defects Liability Period: 12 months from practical completion",
+        f"Scope of Works: Design and construction of the {rng.choice(['bridge', 'road', 'pipeline'])} including earthworks, drainage, pavements and services relocation",
+        ""
+    ]
+    lines += _body(rng, words, clause_density, standards_density)
+    return {"id": doc_id, "filename": f"{doc_id}_contract.pdf", "document_type": "contract", "content": "\n".join(lines)}
+
+def make_itp(rng: random.Random, doc_id: str, words: int, clause_density: float, standards_density: float) -> Dict[str, Any]:
+    lines = [f"# Inspection and Test Plan - {rng.choice(['Earthworks', 'Concrete', 'Steelwork'])}", "",
+             "| Item | Activity | Type | Test method | Acceptance | Frequency |", "|---|---|---|---|---|---|"]
+    written = 0
+    item = 0
+    while written < words:
+        item += 1
+        row = (f"| {item} | {rng.choice(DISCIPLINE_SENTENCES)} | {rng.choice(['Hold', 'Witness', 'Record', 'Surveillance'])} "
+               f"| {_citation(rng)} | Clause {_clause(rng)} | 1 per {rng.choice(['lot', '500 m2', '50 m3', 'pour'])} |")
+        lines.append(row)
+        written += len(row.split())
+    return {"id": doc_id, "filename": f"{doc_id}_itp.pdf", "document_type": "itp", "content": "\n".join(lines)}
+
+DOCUMENT_MAKERS = {"specification": make_specification, "contract": make_contract, "itp": make_itp}
+
+def generate_corpus(documents: int = 10, words_per_document: int = 1000, seed: int = 1234,
+                    clause_density: float = 2.0, standards_density: float = 3.0,
+                    mix: Dict[str, float] = None) -> List[Dict[str, Any]]:
+    """Generate a reproducible set of construction documents.
+
+    `clause_density` and `standards_density` are citations per 100 words;
+    `mix` weights the document types and defaults to mostly specifications.
+    """
+    rng = random.Random(seed)
+    mix = mix or {"specification": 0.6, "contract": 0.2, "itp": 0.2}
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+
+    corpus = []
+    for i in range(documents):
+        # The first document is always a contract so project details are present
+        kind = "contract" if i == 0 else rng.choices(kinds, weights)[0]
+        corpus.append(DOCUMENT_MAKERS[kind](rng, f"doc-{i:05d}", words_per_document, clause_density, standards_density))
+    return corpus
+
+def write_mailbox(path: str, messages: int = 100, attachment_kb: int = 256, duplicate_rate: float = 0.3,
+                  seed: int = 1234) -> Dict[str, Any]:
+    """Write an mbox of project correspondence: drawing PDFs, text specifications and reply chains.
+
+    `duplicate_rate` is the share of attachments that repeat an earlier one,
+    as when a drawing is forwarded around. Returns counts for the fixture.
+    """
+    from email.message import EmailMessage
+    from email.utils import format_datetime
+    from datetime import datetime, timedelta, timezone
+
+    rng = random.Random(seed)
+    sent = datetime(2025, 3, 3, 8, 0, tzinfo=timezone.utc)
+    attachments = []
+    counts = {"messages": messages, "attachments": 0, "duplicates": 0}
+    with open(path, "wb") as f:
+        for i in range(messages):
+            msg = EmailMessage()
+            msg["Message-ID"] = f"<msg-{i:06d}@fixture.example>"
+            if i and rng.random() < 0.4:
+                msg["In-Reply-To"] = f"<msg-{rng.randrange(i):06d}@fixture.example>"
+            msg["From"] = f"{rng.choice(COMPANIES)} <site{rng.randint(1, 20)}@fixture.example>"
+            msg["To"] = "project@fixture.example"
+            msg["Subject"] = f"{rng.choice(['RFI', 'Transmittal', 'Drawing issue', 'Test results', 'Site instruction'])} {i:04d}"
+            msg["Date"] = format_datetime(sent + timedelta(minutes=17 * i))
+            body = "\n".join(_sentence(rng, rng.randint(8, 20)) for _ in range(rng.randint(2, 6)))
+            msg.set_content(body)
+            if rng.random() < 0.3:
+                msg.add_alternative(f"<html><body><p>{body}</p></body></html>", subtype="html")
+
+            for _ in range(rng.choice((0, 1, 1, 2, 3))):
+                counts["attachments"] += 1
+                if attachments and rng.random() < duplicate_rate:
+                    counts["duplicates"] += 1
+                    kind, name, data = rng.choice(attachments)
+                elif rng.random() < 0.6:
+                    kind, name = "drawing", f"DWG-{rng.randint(1000, 9999)}_R{rng.randint(1, 5)}.pdf"
+                    data = b"%PDF-1.4\n" + rng.randbytes(attachment_kb * 1024)
+                    attachments.append((kind, name, data))
+                else:
+                    doc = make_specification(rng, f"spec-{i}", rng.randint(200, 800), 2.0, 3.0)
+                    kind, name, data = "text", f"SPEC-{rng.randint(100, 999)}_R1.txt", doc["content"]
+                    attachments.append((kind, name, data))
+                if kind == "drawing":
+                    msg.add_attachment(data, maintype="application", subtype="pdf", filename=name)
+                else:
+                    msg.add_attachment(data, subtype="plain", filename=name)
+
+            raw = msg.as_bytes(policy=msg.policy.clone(linesep="\n"))
+            # mboxrd escaping of body lines that look like separators
+            raw = re.sub(rb"^(>*From )", rb">\1", raw, flags=re.MULTILINE)
+            f.write(b"From fixture@example " + sent.strftime("%a %b %d %H:%M:%S %Y").encode() + b"\n" + raw + b"\n")
+    return counts
+
+def generate_test_results(itps: List[Dict[str, Any]], lots_per_itp: int = 10, results_per_lot: int = 20,
+                          failure_rate: float = 0.02, seed: int = 1234) -> Tuple[List[Dict[str, Any]], Dict[str, List[Any]]]:
+    """Generate lots and columnar test results for the tested items of each ITP.
+
+    Values fall well inside each item's limits, except in the `failure_rate`
+    share of lots whose mean drifts onto a limit. Lot quantities call for
+    `results_per_lot` tests per item, and the same share of lots is under-tested.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    lots = []
+    columns: Dict[str, List[Any]] = {"id": [], "lot_id": [], "characteristic": [], "value": []}
+    for itp in itps:
+        tested = [item for item in itp["items"] if item.get("limits")]
+        by_quantity = [item["frequency"] for item in tested if item["frequency"].get("per_quantity")]
+        for n in range(lots_per_itp):
+            lot = {"id": f"{itp['id']}-LOT{n:04d}", "itp_id": itp["id"]}
+            if by_quantity:
+                lot["unit"] = by_quantity[0]["unit"]
+                lot["quantity"] = results_per_lot * by_quantity[0]["per_quantity"] / by_quantity[0]["count"]
+            lots.append(lot)
+
+            for item in tested:
+                lo, hi = item["limits"]["min"], item["limits"]["max"]
+                if lo is not None and hi is not None:
+                    centre, sd = (lo + hi) / 2, (hi - lo) / 12
+                elif lo is not None:
+                    centre, sd = lo + 0.1 * (abs(lo) or 1), 0.025 * (abs(lo) or 1)
+                else:
+                    centre, sd = hi - 0.1 * (abs(hi) or 1), 0.025 * (abs(hi) or 1)
+                if rng.random() < failure_rate:
+                    centre = lo if lo is not None else hi
+                count = results_per_lot
+                if rng.random() < failure_rate:
+                    count -= int(rng.integers(1, results_per_lot // 2 + 1))
+                start = len(columns["id"])
+                columns["id"].extend(f"TR-{i:07d}" for i in range(start, start + count))
+                columns["lot_id"].extend([lot["id"]] * count)
+                columns["characteristic"].extend([item["limits"]["characteristic"]] * count)
+                columns["value"].extend(np.round(rng.normal(centre, sd, count), 2).tolist())
+    return lots, columns
+
+def generate_approval_workflows(workflows: int = 1000, events: int = 500, approvers: int = 40,
+                                seed: int = 1234) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Generate approval workflows on a few shared templates, and decision events against them.
+
+    Templates mix any/all/majority steps over named approvers and roles;
+    events are decisions by approvers on a step of the workflow, so some
+    apply and some are ignored as out of turn.
+    """
+    rng = random.Random(seed)
+    users = [f"user-{i:03d}" for i in range(approvers)]
+    roles = ["Superintendent", "Quality Manager", "Structural Engineer"]
+    templates = []
+    for _ in range(5):
+        templates.append([
+            {
+                "step_number": n,
+                "name": f"Step {n}",
+                "approvers": rng.sample(users, rng.randint(1, 3)),
+                "roles": rng.sample(roles, rng.randint(0, 1)),
+                "approval_type": rng.choice(["any", "all", "majority"]),
+                "due_days": rng.choice([1, 2, 5, 10]),
+                "escalation_approvers": rng.sample(users, 1)
+            }
+            for n in range(1, rng.randint(2, 4) + 1)
+        ])
+
+    definitions = []
+    for i in range(workflows):
+        kind = rng.choice(["document", "itp_document", "inspection_point"])
+        definitions.append({
+            "id": f"wf-{i:06d}",
+            "name": f"{kind} approval {i:06d}",
+            "target_asset_id": f"asset-{i:06d}",
+            "target_asset_type": kind,
+            "steps": rng.choice(templates),
+            "started_at": 1_700_000_000 + rng.randrange(30 * 86400)
+        })
+
+    decisions = []
+    for _ in range(events):
+        definition = rng.choice(definitions)
+        step = rng.choice(definition["steps"])
+        decisions.append({
+            "type": "decision",
+            "workflow_id": definition["id"],
+            "approver_id": rng.choice(step["approvers"]),
+            "decision": "approved" if rng.random() < 0.9 else "rejected",
+            "at": 1_700_000_000 + 31 * 86400
+        })
+    return definitions, decisions
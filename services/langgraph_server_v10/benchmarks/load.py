@@ -0,0 +1,363 @@
+"""Load harness for the v10 HTTP/SSE server.
+
+Starts runs in bursts, attaches SSE subscribers and pollers to every run and
+reports run start latency, time to first event, time to completion,
+throughput, event-loop lag and memory over time.
+
+    python -m benchmarks.load                                # app in-process
+    python -m benchmarks.load --serve                        # uvicorn on loopback, same process
+    python -m benchmarks.load --url http://127.0.0.1:8777    # an already running server
+
+In-process and --serve runs share the event loop with the app, so the loop
+lag measured is the server's; against --url it is only the harness's own.
+"""
+from typing import Dict, List, Any, Optional, AsyncIterator, Tuple
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import sys
+import tempfile
+import time
+import numpy as np
+import httpx
+from benchmarks.corpus import generate_corpus
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        # Peak rather than current outside Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _parse_sse(lines: List[str]) -> Tuple[str, str]:
+    event, data = "message", []
+    for line in lines:
+        if line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+    return event, "\n".join(data)
+
+async def _sse_events(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[str, str]]:
+    buffer = ""
+    async for chunk in chunks:
+        buffer += chunk.decode("utf-8") if isinstance(chunk, bytes) else chunk
+        while "\n\n" in buffer:
+            block, buffer = buffer.split("\n\n", 1)
+            if block.strip():
+                yield _parse_sse(block.splitlines())
+
+class InProcessClient:
+    """Calls the ASGI app directly; SSE bodies are read from the app as they are sent.
+
+    httpx's ASGITransport buffers a response until the app finishes it, which
+    would hide time to first event, so streams bypass it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load", timeout=None)
+
+    async def post(self, path: str, body: Dict[str, Any]) -> httpx.Response:
+        return await self.http.post(path, json=body)
+
+    async def get(self, path: str) -> httpx.Response:
+        return await self.http.get(path)
+
+    async def stream(self, path: str) -> AsyncIterator[bytes]:
+        queue: asyncio.Queue = asyncio.Queue()
+        disconnected = asyncio.Event()
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                if message.get("body"):
+                    await queue.put(message["body"])
+                if not message.get("more_body", False):
+                    await queue.put(None)
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+            "headers": [(b"host", b"load"), (b"accept", b"text/event-stream")],
+            "client": ("127.0.0.1", 0), "server": ("load", 80)
+        }
+        task = asyncio.ensure_future(self.app(scope, receive, send))
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            disconnected.set()
+            if not task.done():
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def close(self) -> None:
+        await self.http.aclose()
+
+class HttpClient:
+    """Talks to a server over the network"""
+
+    def __init__(self, url: str, connections: int = 1000):
+        limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+        self.http = httpx.AsyncClient(base_url=url, timeout=None, limits=limits)
+
+    async def post(self, path: str, body: Dict[str, Any]) -> httpx.Response:
+        return await self.http.post(path, json=body)
+
+    async def get(self, path: str) -> httpx.Response:
+        return await self.http.get(path)
+
+    async def stream(self, path: str) -> AsyncIterator[bytes]:
+        async with self.http.stream("GET", path, headers={"accept": "text/event-stream"}) as response:
+            async for chunk in response.aiter_raw():
+                yield chunk
+
+    async def close(self) -> None:
+        await self.http.aclose()
+
+def percentiles(values: List[float]) -> Dict[str, Any]:
+    if not values:
+        return {"count": 0}
+    data = np.asarray(values, dtype=np.float64) * 1000
+    return {
+        "count": len(values),
+        "p50_ms": round(float(np.percentile(data, 50)), 2),
+        "p90_ms": round(float(np.percentile(data, 90)), 2),
+        "p99_ms": round(float(np.percentile(data, 99)), 2),
+        "max_ms": round(float(data.max()), 2)
+    }
+
+class LoadRun:
+    def __init__(self, client, options: argparse.Namespace):
+        self.client = client
+        self.options = options
+        self.documents = generate_corpus(documents=options.documents, words_per_document=options.words, seed=options.seed)
+        self.samples: Dict[str, List[float]] = {
+            "run_start": [], "first_event": [], "completion": [], "poll": []
+        }
+        self.status: Dict[str, int] = {}
+        self.requests = 0
+        self.errors: List[str] = []
+
+    def _body(self, i: int, graph_id: str) -> Dict[str, Any]:
+        project_id = f"load-{i}"
+        if graph_id == "orchestrator":
+            return {"project_id": project_id, "document_ids": [doc["id"] for doc in self.documents]}
+        return {"project_id": project_id, "txt_project_documents": self.documents}
+
+    async def _subscribe(self, run_id: str, started: float, first: bool) -> None:
+        seen_first = False
+        try:
+            async for event, _ in _sse_events(self.client.stream(f"/v10/runs/{run_id}/events")):
+                now = time.perf_counter()
+                if not seen_first:
+                    seen_first = True
+                    self.samples["first_event"].append(now - started)
+                if event in ("end", "error"):
+                    # One subscriber per run reports completion
+                    if first:
+                        self.samples["completion"].append(now - started)
+                        self.status[event] = self.status.get(event, 0) + 1
+                    break
+        except Exception as e:
+            self.errors.append(f"stream {run_id}: {e!r}")
+        self.requests += 1
+
+    async def _poll(self, run_id: str) -> None:
+        deadline = time.perf_counter() + self.options.run_timeout
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                response = await self.client.get(f"/v10/runs/{run_id}")
+            except Exception as e:
+                self.errors.append(f"poll {run_id}: {e!r}")
+                return
+            self.samples["poll"].append(time.perf_counter() - t0)
+            self.requests += 1
+            if response.json().get("status") in ("completed", "failed"):
+                return
+            await asyncio.sleep(self.options.poll_interval)
+
+    async def drive(self, i: int) -> None:
+        graph_id = self.options.graphs[i % len(self.options.graphs)]
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(f"/v10/graphs/{graph_id}/runs", self._body(i, graph_id))
+            response.raise_for_status()
+        except Exception as e:
+            self.errors.append(f"start {graph_id}: {e!r}")
+            return
+        self.samples["run_start"].append(time.perf_counter() - started)
+        self.requests += 1
+        run_id = response.json()["id"]
+
+        tasks = [self._subscribe(run_id, started, n == 0) for n in range(self.options.subscribers)]
+        tasks += [self._poll(run_id) for _ in range(self.options.pollers)]
+        try:
+            await asyncio.wait_for(asyncio.gather(*tasks), self.options.run_timeout)
+        except asyncio.TimeoutError:
+            self.errors.append(f"run {run_id} timed out")
+
+async def _monitor_loop_lag(lags: List[float], stop: asyncio.Event, interval: float = 0.01) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - expected))
+
+async def _sample_memory(samples: List[Tuple[float, float]], stop: asyncio.Event, started: float, interval: float) -> None:
+    while not stop.is_set():
+        samples.append((round(time.perf_counter() - started, 3), round(_rss_mb(), 2)))
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+async def run_load(client, options: argparse.Namespace) -> Dict[str, Any]:
+    """Drive the server with bursts of runs and return the measurements"""
+    load = LoadRun(client, options)
+    lags: List[float] = []
+    memory: List[Tuple[float, float]] = []
+    stop = asyncio.Event()
+    started = time.perf_counter()
+    monitors = [
+        asyncio.ensure_future(_monitor_loop_lag(lags, stop)),
+        asyncio.ensure_future(_sample_memory(memory, stop, started, options.sample_interval))
+    ]
+
+    tasks = []
+    for i in range(options.runs):
+        tasks.append(asyncio.ensure_future(load.drive(i)))
+        if (i + 1) % options.burst == 0 and i + 1 < options.runs:
+            await asyncio.sleep(options.burst_interval)
+    await asyncio.gather(*tasks)
+
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*monitors)
+
+    completed = load.status.get("end", 0)
+    return {
+        "options": {k: v for k, v in vars(options).items() if k != "output"},
+        "elapsed_s": round(elapsed, 3),
+        "runs_started": len(load.samples["run_start"]),
+        "runs_completed": completed,
+        "runs_failed": load.status.get("error", 0),
+        "throughput_runs_per_s": round(completed / elapsed, 2) if elapsed else 0.0,
+        "throughput_requests_per_s": round(load.requests / elapsed, 2) if elapsed else 0.0,
+        "run_start": percentiles(load.samples["run_start"]),
+        "time_to_first_event": percentiles(load.samples["first_event"]),
+        "time_to_completion": percentiles(load.samples["completion"]),
+        "poll": percentiles(load.samples["poll"]),
+        "event_loop_lag": percentiles(lags),
+        "memory_mb": {
+            "start": memory[0][1] if memory else None,
+            "peak": max(m for _, m in memory) if memory else None,
+            "end": memory[-1][1] if memory else None,
+            "growth": round(memory[-1][1] - memory[0][1], 2) if memory else None,
+            "samples": memory
+        },
+        "errors": load.errors[:50],
+        "error_count": len(load.errors)
+    }
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(f"runs: {report['runs_started']} started, {report['runs_completed']} completed, {report['runs_failed']} failed "
+          f"in {report['elapsed_s']} s")
+    print(f"throughput: {report['throughput_runs_per_s']} runs/s, {report['throughput_requests_per_s']} requests/s")
+    print(f"{'':<22} {'count':>7} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for key in ("run_start", "time_to_first_event", "time_to_completion", "poll", "event_loop_lag"):
+        stats = report[key]
+        if not stats["count"]:
+            print(f"{key:<22} {0:>7}")
+            continue
+        print(f"{key:<22} {stats['count']:>7} {stats['p50_ms']:>10} {stats['p90_ms']:>10} {stats['p99_ms']:>10} {stats['max_ms']:>10}")
+    memory = report["memory_mb"]
+    print(f"memory: {memory['start']} MB at start, {memory['peak']} MB peak, {memory['end']} MB at end ({memory['growth']:+} MB)")
+    if report["error_count"]:
+        print(f"errors: {report['error_count']}, first: {report['errors'][0]}", file=sys.stderr)
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _load_app():
+    # Keep checkpoints and indexes of a load run out of the working tree
+    scratch = tempfile.mkdtemp(prefix="v10-load-")
+    os.environ.setdefault("CHECKPOINT_DB_PATH", str(Path(scratch) / "checkpoints.sqlite"))
+    os.environ.setdefault("RUN_STORE_URL", f"sqlite:///{Path(scratch) / 'runs.sqlite'}")
+    os.environ.setdefault("LBS_INDEX_DIR", str(Path(scratch) / "lbs_indexes"))
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    from server.app import app
+    return app
+
+async def main_async(options: argparse.Namespace) -> Dict[str, Any]:
+    server = None
+    if options.url:
+        client = HttpClient(options.url)
+    elif options.serve:
+        import uvicorn
+        port = _free_port()
+        server = uvicorn.Server(uvicorn.Config(_load_app(), host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+        serving = asyncio.ensure_future(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.05)
+        client = HttpClient(f"http://127.0.0.1:{port}")
+    else:
+        client = InProcessClient(_load_app())
+
+    try:
+        return await run_load(client, options)
+    finally:
+        await client.close()
+        if server is not None:
+            server.should_exit = True
+            await serving
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the v10 server")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="base URL of a running server")
+    target.add_argument("--serve", action="store_true", help="serve the app with uvicorn on a loopback port")
+    parser.add_argument("--graph", dest="graphs", action="append", help="graph id to start runs on; repeat to mix")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--burst", type=int, default=10, help="runs started together")
+    parser.add_argument("--burst-interval", type=float, default=1.0, help="seconds between bursts")
+    parser.add_argument("--subscribers", type=int, default=3, help="SSE subscribers per run")
+    parser.add_argument("--pollers", type=int, default=1, help="GET /v10/runs/{id} pollers per run")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--documents", type=int, default=3, help="documents per run")
+    parser.add_argument("--words", type=int, default=500, help="words per document")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--run-timeout", type=float, default=120.0)
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="seconds between memory samples")
+    parser.add_argument("--output", help="write the full report as JSON")
+    options = parser.parse_args(argv)
+    options.graphs = options.graphs or ["orchestrator"]
+
+    report = asyncio.run(main_async(options))
+    _print_report(report)
+    if options.output:
+        Path(options.output).write_text(json.dumps(report, indent=2))
+    return 1 if report["error_count"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Run the benchmark suite and optionally check it against the stored baseline.
+
+    python -m benchmarks.run                     # small and medium corpora
+    python -m benchmarks.run --sizes large --only node.
+    python -m benchmarks.run --check             # exit 1 on regressions that persist when re-measured
+    python -m benchmarks.run --save-baseline     # record a new baseline
+"""
+from typing import Dict, Any
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+from benchmarks.suite import SIZES, DEFAULT_SIZES, run_suite, compare
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+def _print_result(key: str, result: Dict[str, Any]) -> None:
+    print(f"{key:<62} {result['median_s'] * 1000:>10.2f} ms  {result['peak_kb']:>10.1f} KiB", flush=True)
+
+def _print_comparison(rows) -> None:
+    print()
+    print(f"{'benchmark':<62} {'time':>9} {'memory':>9}  status")
+    for row in rows:
+        if row["status"] == "new":
+            print(f"{row['benchmark']:<62} {'-':>9} {'-':>9}  new")
+            continue
+        print(f"{row['benchmark']:<62} {row['time_change']:>+9.1%} {row['memory_change']:>+9.1%}  {row['status']}")
+
+def _remeasure(keys, sizes, only, repeat, seed) -> Dict[str, Dict[str, Any]]:
+    # Thread scheduling and memory layout differ from one interpreter to the next,
+    # so a fresh process re-measures; the same process would repeat its own luck
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_suite, sizes, only=only, repeat=repeat, seed=seed, progress=_print_result, keys=keys).result()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Graph node and function benchmarks")
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES), help=f"comma separated, from {', '.join(SIZES)}")
+    parser.add_argument("--only", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--check", action="store_true", help="compare with the baseline and fail on regressions")
+    parser.add_argument("--confirm", type=int, default=4,
+                        help="with --check, re-measure apparent regressions this many times, each in a fresh process; "
+                             "only those seen every time fail")
+    parser.add_argument("--save-baseline", action="store_true", help="merge these results into the baseline")
+    args = parser.parse_args(argv)
+
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+
+    results = run_suite(sizes, only=args.only, repeat=args.repeat, seed=args.seed, progress=_print_result)
+    meta = {"python": platform.python_version(), "machine": platform.machine(), "seed": args.seed, "sizes": sizes}
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.is_file() else {}
+        baseline.setdefault("thresholds", {"time": 0.25, "memory": 0.2, "min_delta_s": 0.0005, "min_delta_kb": 64, "noise": 3.0})
+        baseline["meta"] = meta
+        baseline.setdefault("results", {}).update(results)
+        baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"\nBaseline written to {baseline_path}")
+
+    if args.check:
+        if not baseline_path.is_file():
+            print(f"\nNo baseline at {baseline_path}; run with --save-baseline first", file=sys.stderr)
+            return 2
+        baseline = json.loads(baseline_path.read_text())
+        rows = compare(results, baseline)
+        for _ in range(args.confirm):
+            flagged = {row["benchmark"] for row in rows if row["status"] == "regressed"}
+            if not flagged:
+                break
+            # A busy machine or an unlucky process slows single benchmarks down; a real regression shows up again
+            print(f"\nRe-measuring {len(flagged)} apparent regression(s)", flush=True)
+            again = _remeasure(flagged, sizes, args.only, args.repeat, args.seed)
+            remeasured = {row["benchmark"]: row for row in compare(again, baseline)}
+            rows = [remeasured.get(row["benchmark"], row) for row in rows]
+        _print_comparison(rows)
+        regressed = [row["benchmark"] for row in rows if row["status"] == "regressed"]
+        if regressed:
+            print(f"\n{len(regressed)} regression(s): {', '.join(regressed)}", file=sys.stderr)
+            return 1
+        print("\nNo regressions")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
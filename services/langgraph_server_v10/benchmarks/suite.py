@@ -0,0 +1,311 @@
+from typing import Dict, List, Any, Callable, Optional, Set, Tuple
+import asyncio
+import gc
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from graphs import memo
+from graphs.document_extraction import extract_document_metadata, extract_structured_content
+from graphs.standards_extraction import StandardsExtractionState, extract_standards_from_content, standards_extraction_node
+from graphs.project_details import ProjectDetailsExtractionState, extract_parties, project_details_extraction_node
+from graphs.wbs_extraction import WbsExtractionState, analyze_project_scope, generate_wbs_hierarchy, wbs_extraction_node
+from graphs.lbs_extraction import LbsExtractionState, parse_locations, lbs_extraction_node
+from graphs.itp_generation import ItpGenerationState, generate_itps, itp_generation_node
+from graphs.plan_generation import render_plan_sections
+from graphs.retrieval import ChunkIndex, chunk_documents, create_embedder
+from graphs import email_ingest
+from graphs.email_ingest import AttachmentSpool, EmailIngestState, ingest_mailbox, email_ingest_node
+from graphs.conformance_checker import ConformanceCheckState, check_conformance, conformance_check_node
+from graphs.approvals_engine import ApprovalsEngine
+from benchmarks.corpus import generate_corpus, generate_approval_workflows, generate_test_results, write_mailbox
+
+# Corpus sizes every benchmark runs at; "large" is opt-in because it takes minutes
+SIZES = {
+    "small": {"documents": 10, "words_per_document": 500},
+    "medium": {"documents": 30, "words_per_document": 1000},
+    "large": {"documents": 150, "words_per_document": 3000},
+}
+DEFAULT_SIZES = ("small", "medium")
+
+# name -> (kind, setup); setup takes the corpus and returns the zero-argument callable to time,
+# or a (callable, teardown) pair when it changes process-wide state that must be put back
+BENCHMARKS: Dict[str, Dict[str, Any]] = {}
+
+def benchmark(name: str, kind: str = "function") -> Callable:
+    def decorator(setup: Callable[[List[Dict[str, Any]]], Callable[[], Any]]) -> Callable:
+        BENCHMARKS[name] = {"kind": kind, "setup": setup}
+        return setup
+    return decorator
+
+def _unwrapped(node: Callable) -> Callable:
+    # Memoized nodes would only measure cache hits
+    return getattr(node, "__wrapped__", node)
+
+def _combined(corpus: List[Dict[str, Any]]) -> str:
+    return " ".join(doc["content"] for doc in corpus)
+
+def _wbs(corpus: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return generate_wbs_hierarchy(analyze_project_scope(corpus), "bench")
+
+def _mailbox(corpus: List[Dict[str, Any]]) -> Tuple[str, str]:
+    # Ten messages per corpus document, written once per setup into a scratch
+    # directory the teardown removes; the spool goes next to it
+    scratch = tempfile.mkdtemp(prefix="bench-mailbox-")
+    path = os.path.join(scratch, "mailbox.mbox")
+    write_mailbox(path, messages=10 * len(corpus), attachment_kb=64)
+    return scratch, path
+
+def _standards(corpus: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return _unwrapped(standards_extraction_node)(
+        StandardsExtractionState(project_id="bench", txt_project_documents=corpus)
+    )["standards_from_project_documents"]
+
+def _test_results(corpus: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # Lots scale with the corpus; twenty results per lot and tested item
+    wbs, standards = _wbs(corpus), _standards(corpus)
+    itps = generate_itps(wbs, standards)
+    lots, results = generate_test_results(itps, lots_per_itp=25 * len(corpus), results_per_lot=20)
+    return {"test_results": results, "lots": lots, "generated_itps": itps, "standards_from_project_documents": standards}
+
+# Functions
+
+@benchmark("document_extraction.extract_structured_content")
+def _(corpus):
+    return lambda: [extract_structured_content(doc["content"]) for doc in corpus]
+
+@benchmark("document_extraction.extract_document_metadata")
+def _(corpus):
+    return lambda: [extract_document_metadata(doc["content"], doc["filename"]) for doc in corpus]
+
+@benchmark("standards_extraction.extract_standards_from_content")
+def _(corpus):
+    return lambda: [extract_standards_from_content(doc["content"]) for doc in corpus]
+
+@benchmark("project_details.extract_parties")
+def _(corpus):
+    content = _combined(corpus)
+    return lambda: extract_parties(content)
+
+@benchmark("wbs_extraction.analyze_project_scope")
+def _(corpus):
+    return lambda: analyze_project_scope(corpus)
+
+@benchmark("wbs_extraction.generate_wbs_hierarchy")
+def _(corpus):
+    scope_info = analyze_project_scope(corpus)
+    return lambda: generate_wbs_hierarchy(scope_info, "bench")
+
+@benchmark("lbs_extraction.parse_locations")
+def _(corpus):
+    return lambda: [parse_locations(doc["content"]) for doc in corpus]
+
+@benchmark("itp_generation.generate_itps")
+def _(corpus):
+    wbs, standards = _wbs(corpus), _standards(corpus)
+    return lambda: generate_itps(wbs, standards)
+
+@benchmark("retrieval.build_and_search")
+def _(corpus):
+    chunks = chunk_documents(corpus)
+    queries = ["contract value", "commencement date", "compaction testing", "reinforcement inspection"]
+    return lambda: ChunkIndex.build(chunks, create_embedder("tfidf")).search(queries, 5)
+
+@benchmark("email_ingest.ingest_mailbox")
+def _(corpus):
+    scratch, path = _mailbox(corpus)
+    spool = AttachmentSpool(os.path.join(scratch, "spool"))
+    return (lambda: sum(1 for _ in ingest_mailbox(path, spool))), (lambda: shutil.rmtree(scratch, ignore_errors=True))
+
+@benchmark("conformance_checker.check_conformance")
+def _(corpus):
+    inputs = _test_results(corpus)
+    return lambda: check_conformance(inputs["test_results"], inputs["lots"], inputs["generated_itps"], inputs["standards_from_project_documents"])
+
+@benchmark("approvals_engine.index_workflows")
+def _(corpus):
+    definitions, _ = generate_approval_workflows(workflows=200 * len(corpus), events=0)
+
+    def run():
+        engine = ApprovalsEngine()
+        for definition in definitions:
+            engine.upsert_workflow(definition)
+        return engine
+    return run
+
+@benchmark("approvals_engine.apply_events")
+def _(corpus):
+    # A batch of decisions against a large indexed project, then the inbox and escalation queries
+    definitions, events = generate_approval_workflows(workflows=200 * len(corpus), events=20 * len(corpus))
+    engine = ApprovalsEngine()
+    for definition in definitions:
+        engine.upsert_workflow(definition)
+    touched = json.dumps({e["workflow_id"]: engine.workflows[e["workflow_id"]] for e in events})
+
+    def run():
+        # Each call puts the touched workflows back to their pending state first
+        engine.refresh({}, json.loads(touched))
+        engine.apply_events(events)
+        return engine.inbox("user-000", ["Superintendent"]), engine.due_before(1_700_000_000 + 10 * 86400)
+    return run
+
+# Nodes, with their state built once in setup
+
+@benchmark("node.standards_extraction", kind="node")
+def _(corpus):
+    state = StandardsExtractionState(project_id="bench", txt_project_documents=corpus)
+    return lambda: _unwrapped(standards_extraction_node)(state)
+
+@benchmark("node.project_details", kind="node")
+def _(corpus):
+    state = ProjectDetailsExtractionState(project_id="bench", txt_project_documents=corpus)
+    return lambda: _unwrapped(project_details_extraction_node)(state)
+
+@benchmark("node.wbs_extraction", kind="node")
+def _(corpus):
+    state = WbsExtractionState(project_id="bench", txt_project_documents=corpus)
+    return lambda: _unwrapped(wbs_extraction_node)(state)
+
+@benchmark("node.lbs_extraction", kind="node")
+def _(corpus):
+    state = LbsExtractionState(project_id="bench", txt_project_documents=corpus)
+    return lambda: lbs_extraction_node(state)
+
+@benchmark("node.itp_generation", kind="node")
+def _(corpus):
+    state = ItpGenerationState(project_id="bench", wbs_structure=_wbs(corpus), standards_from_project_documents=_standards(corpus))
+    return lambda: itp_generation_node(state)
+
+@benchmark("node.plan_sections", kind="node")
+def _(corpus):
+    wbs, standards = _wbs(corpus), _standards(corpus)
+    inputs = {
+        "project_details": _unwrapped(project_details_extraction_node)(
+            ProjectDetailsExtractionState(project_id="bench", txt_project_documents=corpus)
+        )["project_details"],
+        "standards_from_project_documents": standards,
+        "wbs_structure": wbs,
+        "generated_itps": generate_itps(wbs, standards)
+    }
+
+    # Section cache disabled so every section renders; the process-wide
+    # cache is swapped once here, not inside the timed call
+    previous = memo.node_cache
+    memo.configure_node_cache(max_entries=0)
+
+    def restore():
+        memo.node_cache = previous
+    return (lambda: asyncio.run(render_plan_sections(inputs))), restore
+
+@benchmark("node.email_ingest", kind="node")
+def _(corpus):
+    scratch, path = _mailbox(corpus)
+    state = EmailIngestState(project_id="bench", mailbox_path=path)
+
+    # The spool and mailbox directories are process-wide; point them at the
+    # scratch directory once here and put them back afterwards
+    previous = (email_ingest.spool_root, email_ingest.mailbox_root)
+    email_ingest.configure_email_ingest(spool_dir=os.path.join(scratch, "spool"), mailbox_dir=scratch)
+
+    def restore():
+        email_ingest.spool_root, email_ingest.mailbox_root = previous
+        shutil.rmtree(scratch, ignore_errors=True)
+    return (lambda: asyncio.run(email_ingest_node(state))), restore
+
+@benchmark("node.conformance_checker", kind="node")
+def _(corpus):
+    state = ConformanceCheckState(project_id="bench", **_test_results(corpus))
+    return lambda: conformance_check_node(state)
+
+def measure(fn: Callable[[], Any], repeat: int = 10, min_time: float = 0.5) -> Dict[str, Any]:
+    """Time fn after a warm-up call, then record its peak traced allocation in a separate call"""
+    fn()
+    times: List[float] = []
+    started = time.perf_counter()
+    while len(times) < repeat or (time.perf_counter() - started < min_time and len(times) < repeat * 20):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    quartiles = statistics.quantiles(times, n=4, method="inclusive")
+    return {
+        "runs": len(times),
+        "median_s": statistics.median(times),
+        # Spread of the middle half of the timings; compare widens its allowance by it
+        "iqr_s": quartiles[2] - quartiles[0],
+        "min_s": min(times),
+        "mean_s": statistics.fmean(times),
+        "peak_kb": round(peak / 1024, 1)
+    }
+
+def run_suite(sizes=DEFAULT_SIZES, only: Optional[str] = None, repeat: int = 10, seed: int = 1234,
+              progress: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+              keys: Optional[Set[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Run every benchmark matching `only` (and listed in `keys`, when given) at each corpus size; results are keyed `name@size`"""
+    results = {}
+    for size in sizes:
+        if keys is not None and not any(key.endswith(f"@{size}") for key in keys):
+            continue
+        corpus = generate_corpus(seed=seed, **SIZES[size])
+        for name, spec in BENCHMARKS.items():
+            if only and only not in name:
+                continue
+            if keys is not None and f"{name}@{size}" not in keys:
+                continue
+            prepared = spec["setup"](corpus)
+            fn, teardown = prepared if isinstance(prepared, tuple) else (prepared, None)
+            try:
+                result = {"kind": spec["kind"], "size": size, **measure(fn, repeat=repeat)}
+            finally:
+                if teardown:
+                    teardown()
+            results[f"{name}@{size}"] = result
+            if progress:
+                progress(f"{name}@{size}", result)
+    return results
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Compare results against a baseline; each row says whether time or memory regressed past the thresholds"""
+    thresholds = baseline.get("thresholds", {})
+    time_ratio = 1 + thresholds.get("time", 0.25)
+    memory_ratio = 1 + thresholds.get("memory", 0.2)
+    # Differences below the noise floor never count, however large the ratio
+    min_delta_s = thresholds.get("min_delta_s", 0.0005)
+    min_delta_kb = thresholds.get("min_delta_kb", 64)
+    # A slowdown must also exceed this many interquartile ranges of the noisier run
+    noise = thresholds.get("noise", 3.0)
+
+    rows = []
+    for key, result in results.items():
+        base = baseline.get("results", {}).get(key)
+        if not base:
+            rows.append({"benchmark": key, "status": "new", "median_s": result["median_s"], "peak_kb": result["peak_kb"]})
+            continue
+        spread = noise * max(result.get("iqr_s", 0.0), base.get("iqr_s", 0.0))
+        slower = result["median_s"] > base["median_s"] * time_ratio and result["median_s"] - base["median_s"] > max(min_delta_s, spread)
+        larger = result["peak_kb"] > base["peak_kb"] * memory_ratio and result["peak_kb"] - base["peak_kb"] > min_delta_kb
+        rows.append({
+            "benchmark": key,
+            "status": "regressed" if slower or larger else "ok",
+            "median_s": result["median_s"],
+            "baseline_median_s": base["median_s"],
+            "time_change": result["median_s"] / base["median_s"] - 1 if base["median_s"] else 0.0,
+            "peak_kb": result["peak_kb"],
+            "baseline_peak_kb": base["peak_kb"],
+            "memory_change": result["peak_kb"] / base["peak_kb"] - 1 if base["peak_kb"] else 0.0,
+            "slower": slower,
+            "larger": larger
+        })
+    return rows
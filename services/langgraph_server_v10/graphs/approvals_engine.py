@@ -0,0 +1,713 @@
+from typing import Dict, List, Any, Optional, Tuple, Iterable
+from contextlib import contextmanager
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from graphs.state import GraphState
+from graphs.edges import EdgeBuffer
+
+APPROVED = "approved"
+REJECTED = "rejected"
+IN_PROGRESS = "in_progress"
+CANCELLED = "cancelled"
+
+# Per-project engine state: SQLite files in state_root for workers on one
+# host, or the Postgres tables of state_store when workers run on several
+state_root = "approvals_state"
+state_store: Optional["PostgresApprovalsState"] = None
+
+def configure_approvals_engine(state_dir: Optional[str] = None, store_url: Optional[str] = None) -> None:
+    """Set where per-project approval engine state is kept: Postgres for a postgresql:// URL, else a directory"""
+    global state_root, state_store
+    if state_dir:
+        state_root = state_dir
+    if store_url and store_url.startswith(("postgres://", "postgresql://")):
+        state_store = PostgresApprovalsState(store_url)
+    else:
+        state_store = None
+
+class ApprovalsEngineState(GraphState):
+    project_id: str
+    # Workflow definitions to add or replace, in the approval_workflow asset shape
+    workflows: List[Dict[str, Any]] = []
+    events: List[Dict[str, Any]] = []
+    # Escalate steps that are due at or before this time (ISO 8601)
+    now: Optional[str] = None
+    workflow_updates: List[Dict[str, Any]] = []
+    escalations: List[Dict[str, Any]] = []
+    approval_stats: Dict[str, Any] = {}
+    approval_asset_specs: List[Dict[str, Any]] = []
+    edges: List[Dict[str, Any]] = []
+    error: str = ""
+    done: bool = False
+
+def _timestamp(value: Any) -> float:
+    if value is None:
+        return time.time()
+    if isinstance(value, (int, float)):
+        return float(value)
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts is not None else None
+
+def _role_seat(role: str) -> str:
+    return f"role:{role}"
+
+@dataclass(frozen=True)
+class CompiledStep:
+    number: int
+    name: str
+    # Users and roles that hold a vote; a role seat is filled by any one of its members
+    seats: Tuple[str, ...]
+    approve_at: int
+    reject_at: int
+    due_seconds: Optional[float]
+    escalation_approvers: Tuple[str, ...]
+
+class CompiledWorkflow:
+    """A workflow definition as a state machine over its steps.
+
+    States are step indexes plus the terminal `approved` and `rejected`.
+    Each step's approval rule is reduced to vote thresholds at compile
+    time, so a transition is two integer comparisons.
+    """
+
+    def __init__(self, steps: List[Dict[str, Any]]):
+        compiled = []
+        for step in sorted(steps, key=lambda s: s.get("step_number", 0)):
+            seats = tuple(dict.fromkeys(
+                [str(a) for a in step.get("approvers") or ()] + [_role_seat(r) for r in step.get("roles") or ()]
+            ))
+            if not seats:
+                raise ValueError(f"Step {step.get('step_number')} has no approvers")
+            n = len(seats)
+            rule = step.get("approval_type", "any")
+            if rule == "any":
+                approve_at, reject_at = 1, n
+            elif rule == "all":
+                approve_at, reject_at = n, 1
+            elif rule == "majority":
+                # Rejected once a majority of approvals is out of reach
+                approve_at, reject_at = n // 2 + 1, n - n // 2
+            else:
+                raise ValueError(f"Unknown approval type: {rule}")
+            due_days = step.get("due_days")
+            compiled.append(CompiledStep(
+                number=step.get("step_number", len(compiled) + 1),
+                name=step.get("name", ""),
+                seats=seats,
+                approve_at=approve_at,
+                reject_at=reject_at,
+                due_seconds=float(due_days) * 86400 if due_days is not None else None,
+                escalation_approvers=tuple(str(a) for a in step.get("escalation_approvers") or ())
+            ))
+        if not compiled:
+            raise ValueError("Workflow has no steps")
+        self.steps: Tuple[CompiledStep, ...] = tuple(compiled)
+
+    def transition(self, step_index: int, votes: Dict[str, str]) -> Optional[str]:
+        """The state a step moves to once its votes are counted, None while it waits"""
+        step = self.steps[step_index]
+        approvals = sum(1 for seat in step.seats if votes.get(seat) == APPROVED)
+        rejections = sum(1 for seat in step.seats if votes.get(seat) == REJECTED)
+        if rejections >= step.reject_at:
+            return REJECTED
+        if approvals >= step.approve_at:
+            return APPROVED if step_index + 1 == len(self.steps) else str(step_index + 1)
+        return None
+
+def definition_key(steps: List[Dict[str, Any]]) -> str:
+    # Workflows on the same template share one compiled machine
+    return hashlib.sha1(json.dumps(steps, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+class ApprovalsEngine:
+    """Pending approvals for one project, indexed by approver, role and due date.
+
+    Incoming events are grouped by workflow and only those workflows are
+    taken out of the indexes, advanced through their compiled machine and
+    re-indexed; inbox and due-date queries read the indexes directly.
+    """
+
+    def __init__(self):
+        self.definitions: Dict[str, List[Dict[str, Any]]] = {}
+        self.machines: Dict[str, CompiledWorkflow] = {}
+        self.workflows: Dict[str, Dict[str, Any]] = {}
+        self.by_approver: Dict[str, set] = {}
+        self.by_role: Dict[str, set] = {}
+        # Sorted (due timestamp, workflow id) for workflows waiting on a step with a due date
+        self.due: List[Tuple[float, str]] = []
+        self.due_at: Dict[str, float] = {}
+        # Bulk loads append unsorted; the list is sorted on next use
+        self.due_sorted = True
+
+    # Indexes
+
+    def _pending_seats(self, workflow: Dict[str, Any]) -> Iterable[str]:
+        step = self.machines[workflow["definition"]].steps[workflow["step"]]
+        votes = workflow["votes"]
+        delegations = workflow["delegations"]
+        for seat in step.seats:
+            if seat not in votes:
+                yield delegations.get(seat, seat)
+        if workflow["escalated"]:
+            yield from step.escalation_approvers
+
+    def _index(self, wid: str) -> None:
+        workflow = self.workflows[wid]
+        if workflow["status"] != IN_PROGRESS:
+            return
+        for seat in self._pending_seats(workflow):
+            if seat.startswith("role:"):
+                self.by_role.setdefault(seat[5:], set()).add(wid)
+            else:
+                self.by_approver.setdefault(seat, set()).add(wid)
+        step = self.machines[workflow["definition"]].steps[workflow["step"]]
+        if step.due_seconds is not None:
+            due = workflow["step_started_at"] + step.due_seconds
+            self.due_at[wid] = due
+            if self.due_sorted:
+                insort(self.due, (due, wid))
+            else:
+                self.due.append((due, wid))
+
+    def _unindex(self, wid: str) -> None:
+        workflow = self.workflows[wid]
+        if workflow["status"] != IN_PROGRESS:
+            return
+        for seat in self._pending_seats(workflow):
+            index, key = (self.by_role, seat[5:]) if seat.startswith("role:") else (self.by_approver, seat)
+            pending = index.get(key)
+            if pending is not None:
+                pending.discard(wid)
+                if not pending:
+                    del index[key]
+        due = self.due_at.pop(wid, None)
+        if due is not None:
+            self._sort_due()
+            i = bisect_left(self.due, (due, wid))
+            if i < len(self.due) and self.due[i] == (due, wid):
+                del self.due[i]
+
+    # Workflows and events
+
+    def upsert_workflow(self, definition: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a workflow, or replace the definition of an existing one and restart it"""
+        wid = str(definition.get("id") or definition["name"])
+        steps = definition["steps"]
+        key = definition_key(steps)
+        if key not in self.machines:
+            self.machines[key] = CompiledWorkflow(steps)
+            self.definitions[key] = steps
+        existing = self.workflows.get(wid)
+        if existing is not None:
+            if existing["definition"] == key:
+                return existing
+            self._unindex(wid)
+        started = _timestamp(definition.get("started_at"))
+        workflow = {
+            "id": wid,
+            "name": definition.get("name", wid),
+            "target_asset_id": definition.get("target_asset_id"),
+            "target_asset_type": definition.get("target_asset_type"),
+            "definition": key,
+            "status": IN_PROGRESS,
+            "step": 0,
+            "step_started_at": started,
+            "votes": {},
+            "delegations": {},
+            "escalated": False,
+            "decisions": []
+        }
+        self.workflows[wid] = workflow
+        self._index(wid)
+        return workflow
+
+    def _seat_for(self, workflow: Dict[str, Any], step: CompiledStep, event: Dict[str, Any]) -> Optional[str]:
+        approver = str(event.get("approver_id") or "")
+        if approver in step.seats:
+            return approver
+        for seat, delegate in workflow["delegations"].items():
+            if delegate == approver:
+                return seat
+        role = event.get("role")
+        if role and _role_seat(role) in step.seats:
+            return _role_seat(role)
+        return None
+
+    def _apply(self, workflow: Dict[str, Any], event: Dict[str, Any]) -> bool:
+        kind = event.get("type")
+        at = _timestamp(event.get("at"))
+        if kind == "resubmitted":
+            if workflow["status"] == IN_PROGRESS:
+                return False
+            workflow.update(status=IN_PROGRESS, step=0, step_started_at=at, votes={}, delegations={}, escalated=False)
+            return True
+        if workflow["status"] != IN_PROGRESS:
+            return False
+        if kind == "cancelled":
+            workflow["status"] = CANCELLED
+            return True
+
+        machine = self.machines[workflow["definition"]]
+        step = machine.steps[workflow["step"]]
+        if kind == "delegated":
+            seat = str(event.get("from") or event.get("approver_id") or "")
+            if seat not in step.seats or seat in workflow["votes"]:
+                return False
+            workflow["delegations"][seat] = str(event["to"])
+            return True
+        if kind != "decision" or event.get("decision") not in (APPROVED, REJECTED):
+            return False
+
+        decision = event["decision"]
+        seat = self._seat_for(workflow, step, event)
+        if seat is None:
+            # Escalation approvers decide the step outright
+            if not (workflow["escalated"] and str(event.get("approver_id")) in step.escalation_approvers):
+                return False
+            outcome = REJECTED if decision == REJECTED else (APPROVED if workflow["step"] + 1 == len(machine.steps) else str(workflow["step"] + 1))
+        elif seat in workflow["votes"]:
+            return False
+        else:
+            workflow["votes"][seat] = decision
+            outcome = machine.transition(workflow["step"], workflow["votes"])
+
+        workflow["decisions"].append({
+            "step_number": step.number,
+            "approver_id": event.get("approver_id"),
+            "seat": seat,
+            "decision": decision,
+            "comments": event.get("comments"),
+            "at": at
+        })
+        if outcome in (APPROVED, REJECTED):
+            workflow["status"] = outcome
+        elif outcome is not None:
+            workflow.update(step=int(outcome), step_started_at=at, votes={}, delegations={}, escalated=False)
+        return True
+
+    def apply_events(self, events: List[Dict[str, Any]]) -> Tuple[List[str], int]:
+        """Apply events to the workflows they name; returns the changed ids and the events ignored"""
+        by_workflow: Dict[str, List[Dict[str, Any]]] = {}
+        ignored = 0
+        for event in events:
+            wid = str(event.get("workflow_id") or "")
+            if wid in self.workflows:
+                by_workflow.setdefault(wid, []).append(event)
+            else:
+                ignored += 1
+
+        changed = []
+        for wid, workflow_events in by_workflow.items():
+            workflow = self.workflows[wid]
+            self._unindex(wid)
+            applied = 0
+            for event in workflow_events:
+                applied += self._apply(workflow, event)
+            self._index(wid)
+            ignored += len(workflow_events) - applied
+            if applied:
+                changed.append(wid)
+        return changed, ignored
+
+    def escalate(self, now: float) -> List[Dict[str, Any]]:
+        """Escalate every step due at or before `now` that has not been escalated yet"""
+        escalations = []
+        for due, wid in self.due[:self._due_until(now)]:
+            workflow = self.workflows[wid]
+            if workflow["escalated"]:
+                continue
+            step = self.machines[workflow["definition"]].steps[workflow["step"]]
+            # The due date is unchanged; only the escalation approvers join the inbox index
+            workflow["escalated"] = True
+            for approver in step.escalation_approvers:
+                self.by_approver.setdefault(approver, set()).add(wid)
+            escalations.append({
+                "workflow_id": wid,
+                "step_number": step.number,
+                "due_at": _iso(due),
+                "pending": sorted(seat for seat in step.seats if seat not in workflow["votes"]),
+                "escalated_to": list(step.escalation_approvers)
+            })
+        return escalations
+
+    def _sort_due(self) -> None:
+        if not self.due_sorted:
+            self.due.sort()
+            self.due_sorted = True
+
+    def _due_until(self, ts: float) -> int:
+        self._sort_due()
+        # End of the due-date prefix at or before ts; the id bound sorts after every workflow id
+        return bisect_right(self.due, (ts, "\U0010ffff"))
+
+    # Queries
+
+    def inbox(self, approver_id: Optional[str] = None, roles: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """Workflows waiting on an approver or any of their roles, soonest due first"""
+        wids = set(self.by_approver.get(approver_id, ())) if approver_id else set()
+        for role in roles:
+            wids |= self.by_role.get(role, set())
+        return [self.describe(wid) for wid in sorted(wids, key=lambda wid: (self.due_at.get(wid, float("inf")), wid))]
+
+    def due_before(self, before: float) -> List[Dict[str, Any]]:
+        """Pending workflows whose current step is due at or before a time"""
+        return [self.describe(wid) for _, wid in self.due[:self._due_until(before)]]
+
+    def describe(self, wid: str) -> Dict[str, Any]:
+        workflow = self.workflows[wid]
+        machine = self.machines[workflow["definition"]]
+        step = machine.steps[min(workflow["step"], len(machine.steps) - 1)]
+        return {
+            "id": wid,
+            "name": workflow["name"],
+            "target_asset_id": workflow["target_asset_id"],
+            "target_asset_type": workflow["target_asset_type"],
+            "status": workflow["status"],
+            "current_step": step.number,
+            "step_name": step.name,
+            "pending": sorted(set(self._pending_seats(workflow))) if workflow["status"] == IN_PROGRESS else [],
+            "due_at": _iso(self.due_at.get(wid)),
+            "escalated": workflow["escalated"]
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for workflow in self.workflows.values():
+            counts[workflow["status"]] = counts.get(workflow["status"], 0) + 1
+        return {
+            "workflows": len(self.workflows),
+            "definitions": len(self.machines),
+            "by_status": counts,
+            "approvers_waited_on": len(self.by_approver),
+            "roles_waited_on": len(self.by_role)
+        }
+
+    def refresh(self, definitions: Dict[str, List[Dict[str, Any]]], workflows: Dict[str, Dict[str, Any]]) -> None:
+        """Take in definitions and workflow records saved elsewhere, re-indexing only those workflows"""
+        for key, steps in definitions.items():
+            if key not in self.machines:
+                self.definitions[key] = steps
+                self.machines[key] = CompiledWorkflow(steps)
+        if workflows:
+            self.due_sorted = False
+        for wid, record in workflows.items():
+            if wid in self.workflows:
+                self._unindex(wid)
+            self.workflows[wid] = record
+            self._index(wid)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS definitions (
+	key TEXT PRIMARY KEY,
+	steps TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workflows (
+	id TEXT PRIMARY KEY,
+	record TEXT NOT NULL,
+	version INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_workflows_version ON workflows(version);
+CREATE TABLE IF NOT EXISTS engine_version (
+	id INTEGER PRIMARY KEY CHECK (id = 1),
+	version INTEGER NOT NULL
+);
+"""
+
+class SqliteApprovalsState:
+    """One SQLite file per project in a directory every worker on the host can reach"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @contextmanager
+    def session(self, project_id: str, write: bool = False):
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, re.sub(r"[^A-Za-z0-9_-]", "_", project_id) + ".sqlite")
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            if not write:
+                yield conn
+                return
+            # Taken up front, so concurrent runs on a project apply their events one after another
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def version(self, conn: sqlite3.Connection, project_id: str) -> int:
+        row = conn.execute("SELECT version FROM engine_version WHERE id = 1").fetchone()
+        return row[0] if row else 0
+
+    def definitions(self, conn: sqlite3.Connection, project_id: str) -> Dict[str, List[Dict[str, Any]]]:
+        return {key: json.loads(steps) for key, steps in conn.execute("SELECT key, steps FROM definitions")}
+
+    def workflows_since(self, conn: sqlite3.Connection, project_id: str, version: int) -> Dict[str, Dict[str, Any]]:
+        return {wid: json.loads(record) for wid, record in conn.execute("SELECT id, record FROM workflows WHERE version > ?", (version,))}
+
+    def save(self, conn: sqlite3.Connection, project_id: str, definitions: Dict[str, List[Dict[str, Any]]],
+             workflows: Dict[str, Dict[str, Any]], version: int) -> None:
+        conn.executemany(
+            "INSERT OR IGNORE INTO definitions (key, steps) VALUES (?, ?)",
+            [(key, json.dumps(steps)) for key, steps in definitions.items()]
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO workflows (id, record, version) VALUES (?, ?, ?)",
+            [(wid, json.dumps(record, separators=(",", ":")), version) for wid, record in workflows.items()]
+        )
+        conn.execute("INSERT OR REPLACE INTO engine_version (id, version) VALUES (1, ?)", (version,))
+
+class PostgresApprovalsState:
+    """Approval tables of db/migrations/009_graph_checkpoints.sql, shared by workers on every host"""
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 4):
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError as e:
+            raise RuntimeError("Postgres approvals state requires psycopg and psycopg-pool") from e
+        self.pool = ConnectionPool(dsn, min_size=min_size, max_size=max_size, open=False)
+        self._opened = False
+
+    @contextmanager
+    def session(self, project_id: str, write: bool = False):
+        # Only called with _engines_lock held
+        if not self._opened:
+            self.pool.open()
+            self._opened = True
+        with self.pool.connection() as conn:
+            with conn.transaction():
+                if write:
+                    # Held until commit, so concurrent runs on a project apply their events one after another
+                    conn.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"approvals:{project_id}",))
+                yield conn
+
+    def version(self, conn, project_id: str) -> int:
+        row = conn.execute("SELECT version FROM public.graph_approval_versions WHERE project_id = %s", (project_id,)).fetchone()
+        return row[0] if row else 0
+
+    def definitions(self, conn, project_id: str) -> Dict[str, List[Dict[str, Any]]]:
+        rows = conn.execute("SELECT key, steps FROM public.graph_approval_definitions WHERE project_id = %s", (project_id,))
+        return {key: steps for key, steps in rows}
+
+    def workflows_since(self, conn, project_id: str, version: int) -> Dict[str, Dict[str, Any]]:
+        rows = conn.execute(
+            "SELECT workflow_id, record FROM public.graph_approval_workflows WHERE project_id = %s AND version > %s",
+            (project_id, version)
+        )
+        return {wid: record for wid, record in rows}
+
+    def save(self, conn, project_id: str, definitions: Dict[str, List[Dict[str, Any]]],
+             workflows: Dict[str, Dict[str, Any]], version: int) -> None:
+        with conn.cursor() as cur:
+            cur.executemany(
+                "INSERT INTO public.graph_approval_definitions (project_id, key, steps) VALUES (%s, %s, %s::jsonb) ON CONFLICT DO NOTHING",
+                [(project_id, key, json.dumps(steps)) for key, steps in definitions.items()]
+            )
+            cur.executemany(
+                "INSERT INTO public.graph_approval_workflows (project_id, workflow_id, record, version) VALUES (%s, %s, %s::jsonb, %s) "
+                "ON CONFLICT (project_id, workflow_id) DO UPDATE SET record = EXCLUDED.record, version = EXCLUDED.version",
+                [(project_id, wid, json.dumps(record, separators=(",", ":")), version) for wid, record in workflows.items()]
+            )
+        conn.execute(
+            "INSERT INTO public.graph_approval_versions (project_id, version) VALUES (%s, %s) "
+            "ON CONFLICT (project_id) DO UPDATE SET version = EXCLUDED.version",
+            (project_id, version)
+        )
+
+# project_id -> (stored version, engine); one lock covers every cached engine in the process
+_engines: Dict[str, Tuple[int, ApprovalsEngine]] = {}
+_engines_lock = threading.RLock()
+
+def _state():
+    return state_store if state_store is not None else SqliteApprovalsState(state_root)
+
+def _load(store, conn, project_id: str) -> ApprovalsEngine:
+    # Only workflows saved since this process last saw the project are read and re-indexed
+    version = store.version(conn, project_id)
+    cached_version, engine = _engines.get(project_id, (0, None))
+    if engine is None:
+        engine, cached_version = ApprovalsEngine(), -1
+    if version != cached_version:
+        definitions = {key: steps for key, steps in store.definitions(conn, project_id).items() if key not in engine.machines}
+        engine.refresh(definitions, store.workflows_since(conn, project_id, cached_version))
+        _engines[project_id] = (version, engine)
+    return engine
+
+def _save(store, conn, project_id: str, engine: ApprovalsEngine, changed: Iterable[str]) -> None:
+    version = _engines.get(project_id, (0, None))[0] + 1
+    store.save(conn, project_id, engine.definitions, {wid: engine.workflows[wid] for wid in changed}, version)
+    _engines[project_id] = (version, engine)
+
+def load_engine(project_id: str) -> ApprovalsEngine:
+    """The project's engine, brought up to date with workflows other workers saved"""
+    with _engines_lock:
+        store = _state()
+        with store.session(project_id) as conn:
+            return _load(store, conn, project_id)
+
+def approvals_inbox(project_id: str, approver_id: Optional[str] = None, roles: Iterable[str] = ()) -> List[Dict[str, Any]]:
+    """Workflows in a project waiting on an approver or any of their roles"""
+    with _engines_lock:
+        return load_engine(project_id).inbox(approver_id, roles)
+
+def approvals_due(project_id: str, before: Any) -> List[Dict[str, Any]]:
+    """Workflows in a project whose current step is due at or before a time"""
+    with _engines_lock:
+        return load_engine(project_id).due_before(_timestamp(before))
+
+def approvals_engine_node(state: ApprovalsEngineState) -> Dict[str, Any]:
+    """Apply workflow definitions and approval events, then escalate overdue steps"""
+    try:
+        if not state.workflows and not state.events and not state.now:
+            return {"workflow_updates": [], "error": "No workflows or events provided"}
+
+        # Load, apply and save in one write transaction so concurrent runs on a project do not lose events
+        with _engines_lock:
+            store = _state()
+            try:
+                with store.session(state.project_id, write=True) as conn:
+                    engine = _load(store, conn, state.project_id)
+                    changed: Dict[str, int] = {}
+                    engine.due_sorted = False
+                    for definition in state.workflows:
+                        before = engine.workflows.get(str(definition.get("id") or definition["name"]))
+                        workflow = engine.upsert_workflow(definition)
+                        if workflow is not before:
+                            changed[workflow["id"]] = 0
+                    # Only decisions made in this run become edges
+                    decided = {
+                        wid: len(engine.workflows[wid]["decisions"])
+                        for wid in {str(e.get("workflow_id")) for e in state.events} if wid in engine.workflows
+                    }
+                    applied, ignored = engine.apply_events(state.events)
+                    for wid in applied:
+                        changed.setdefault(wid, decided[wid])
+                    escalations = engine.escalate(_timestamp(state.now)) if state.now else []
+                    for escalation in escalations:
+                        changed.setdefault(escalation["workflow_id"], len(engine.workflows[escalation["workflow_id"]]["decisions"]))
+                    _save(store, conn, state.project_id, engine, changed)
+            except BaseException:
+                # The cached engine may hold changes that were not saved
+                _engines.pop(state.project_id, None)
+                raise
+
+        updates = []
+        for wid, first_decision in changed.items():
+            workflow = engine.workflows[wid]
+            updates.append({
+                **engine.describe(wid),
+                "steps": engine.definitions[workflow["definition"]],
+                "decisions": [{**d, "at": _iso(d["at"])} for d in workflow["decisions"][first_decision:]]
+            })
+        return {
+            "workflow_updates": updates,
+            "escalations": escalations,
+            "approval_stats": {**engine.stats(), "events": len(state.events), "events_ignored": ignored, "changed": len(updates)},
+            "done": True
+        }
+
+    except Exception as e:
+        return {
+            "error": f"Approvals engine failed: {str(e)}",
+            "workflow_updates": [],
+            "done": True
+        }
+
+def create_approval_asset_specs(state: ApprovalsEngineState) -> List[Dict[str, Any]]:
+    """Create asset write specifications for workflows whose state changed"""
+    specs = []
+
+    for workflow in state.workflow_updates:
+        specs.append({
+            "asset": {
+                "type": "approval_workflow",
+                "name": workflow["name"],
+                "project_id": state.project_id,
+                "content": {
+                    "name": workflow["name"],
+                    "target_asset_id": workflow["target_asset_id"],
+                    "target_asset_type": workflow["target_asset_type"],
+                    "steps": workflow["steps"],
+                    "status": workflow["status"],
+                    "current_step": workflow["current_step"],
+                    "pending_approvers": workflow["pending"],
+                    "sla_due_at": workflow["due_at"],
+                    "escalated": workflow["escalated"]
+                }
+            },
+            "idempotency_key": f"workflow:{state.project_id}:{workflow['id']}"
+        })
+
+    return specs
+
+def create_approval_edge_specs(state: ApprovalsEngineState) -> List[Dict[str, Any]]:
+    """Create edges from workflows to their targets and to the approvers who decided"""
+    edges = EdgeBuffer()
+
+    for workflow in state.workflow_updates:
+        if workflow["target_asset_id"]:
+            edges.add(
+                "",  # Will be set to workflow asset ID
+                workflow["target_asset_id"],
+                "APPLIES_TO",
+                f"workflow_target:{state.project_id}:{workflow['id']}",
+                {"target_asset_type": workflow["target_asset_type"]}
+            )
+        for decision in workflow["decisions"]:
+            edges.add(
+                "",  # Will be set to workflow asset ID
+                "",  # Will be set to approver user asset ID
+                "APPROVED_BY" if decision["decision"] == APPROVED else "REVIEWED_BY",
+                f"workflow_decision:{state.project_id}:{workflow['id']}:{decision['step_number']}:{decision['approver_id']}",
+                {
+                    "approver_id": decision["approver_id"],
+                    "step_number": decision["step_number"],
+                    "decision": decision["decision"],
+                    "comments": decision["comments"],
+                    "approved_at": decision["at"]
+                }
+            )
+
+    return edges.to_list()
+
+# Graph definition
+def create_approvals_engine_graph(checkpointer=None):
+    """Create the approvals engine graph"""
+    from langgraph.graph import StateGraph
+
+    graph = StateGraph(ApprovalsEngineState)
+
+    # Add nodes
+    graph.add_node("apply_approval_events", approvals_engine_node)
+    graph.add_node("create_approval_assets", lambda state: {
+        "approval_asset_specs": create_approval_asset_specs(state)
+    })
+    graph.add_node("create_approval_edges", lambda state: {
+        "edges": create_approval_edge_specs(state)
+    })
+
+    # Define flow
+    graph.set_entry_point("apply_approval_events")
+    graph.add_edge("apply_approval_events", "create_approval_assets")
+    graph.add_edge("create_approval_assets", "create_approval_edges")
+
+    return graph.compile(checkpointer=checkpointer)
@@ -0,0 +1,412 @@
+from typing import Dict, List, Any, Optional, Tuple, Union
+import time
+import numpy as np
+from graphs.state import GraphState
+from graphs.edges import EdgeBuffer
+from graphs.itp_templates import spec_family, compile_itp_template
+
+# Lots need at least this many results of a characteristic for a characteristic value
+MIN_CHARACTERISTIC_SAMPLES = 3
+
+# One-sided 95% Student t quantiles by degrees of freedom; the normal quantile beyond the table
+_T95 = np.array([
+    np.nan, 6.314, 2.920, 2.353, 2.132, 2.015, 1.943, 1.895, 1.860, 1.833, 1.812,
+    1.796, 1.782, 1.771, 1.761, 1.753, 1.746, 1.740, 1.734, 1.729, 1.725,
+    1.721, 1.717, 1.714, 1.711, 1.708, 1.706, 1.703, 1.701, 1.699, 1.697
+])
+_Z95 = 1.645
+
+_RESULT_COLUMNS = ("id", "lot_id", "characteristic", "test_method", "value")
+
+class ConformanceCheckState(GraphState):
+    project_id: str
+    # Either a list of result records or a dict of equal-length columns with the same keys
+    test_results: Union[List[Dict[str, Any]], Dict[str, List[Any]]] = []
+    lots: List[Dict[str, Any]] = []
+    generated_itps: List[Dict[str, Any]] = []
+    standards_from_project_documents: List[Dict[str, Any]] = []
+    nonconformances: List[Dict[str, Any]] = []
+    conformance_summary: Dict[str, Any] = {}
+    ncr_asset_specs: List[Dict[str, Any]] = []
+    edges: List[Dict[str, Any]] = []
+    error: str = ""
+    done: bool = False
+
+class AcceptanceCriteria:
+    """Tested ITP items as arrays, looked up by (ITP row, characteristic code).
+
+    Each ITP contributes one row of criteria. An extra last row holds the
+    project-wide criteria compiled from the extracted standards, used for
+    results whose lot has no ITP.
+    """
+
+    def __init__(self, itps: List[Dict[str, Any]], standards: List[Dict[str, Any]]):
+        self.itp_rows: Dict[str, int] = {itp["id"]: i for i, itp in enumerate(itps)}
+        self.wbs_rows: Dict[str, int] = {itp["wbs_node_id"]: i for i, itp in enumerate(itps) if itp.get("wbs_node_id")}
+        self.fallback_row = len(itps)
+        self.characteristics: Dict[str, int] = {}
+        self.methods: Dict[str, Optional[str]] = {}
+        self.items: List[Dict[str, Any]] = []
+        cells: List[Tuple[int, int]] = []
+
+        families = tuple(dict.fromkeys(spec_family(std["standard_code"]) for std in standards if std.get("standard_code")))
+        project_items = [{**item, "code": None} for item in compile_itp_template(families, None)["items"]] if families else []
+        rows = [(i, itp["id"], itp["items"]) for i, itp in enumerate(itps)] + [(self.fallback_row, None, project_items)]
+
+        seen = set()
+        for row, itp_id, items in rows:
+            for item in items:
+                limits = item.get("limits")
+                if not limits or (limits.get("min") is None and limits.get("max") is None):
+                    continue
+                characteristic = limits["characteristic"]
+                code = self.characteristics.setdefault(characteristic, len(self.characteristics))
+                # The first item for a characteristic wins within an ITP
+                if (row, code) in seen:
+                    continue
+                seen.add((row, code))
+                # A method used for several characteristics cannot identify one
+                method = item.get("test_method")
+                if method and self.methods.setdefault(method, characteristic) != characteristic:
+                    self.methods[method] = None
+                cells.append((row, code))
+                self.items.append({
+                    "itp_id": itp_id,
+                    "item_code": item.get("code"),
+                    "characteristic": characteristic,
+                    "test_method": item.get("test_method"),
+                    "spec_ref": item.get("spec_ref"),
+                    "min": limits.get("min"),
+                    "max": limits.get("max"),
+                    "unit": limits.get("unit"),
+                    "frequency": item.get("frequency") or {}
+                })
+
+        self.cells = cells
+        self.lo = np.array([-np.inf if c["min"] is None else c["min"] for c in self.items], dtype=np.float64)
+        self.hi = np.array([np.inf if c["max"] is None else c["max"] for c in self.items], dtype=np.float64)
+        self.itp_criteria: Dict[int, List[int]] = {}
+        for index, (row, _) in enumerate(cells):
+            self.itp_criteria.setdefault(row, []).append(index)
+
+    def table(self, characteristics: int) -> np.ndarray:
+        """Criterion index for every (ITP row, characteristic code), -1 where none applies"""
+        table = np.full((self.fallback_row + 1, max(characteristics, 1)), -1, dtype=np.int32)
+        for index, (row, code) in enumerate(self.cells):
+            table[row, code] = index
+        return table
+
+    def lot_row(self, lot: Dict[str, Any]) -> int:
+        if lot.get("itp_id") in self.itp_rows:
+            return self.itp_rows[lot["itp_id"]]
+        if lot.get("wbs_node_id") in self.wbs_rows:
+            return self.wbs_rows[lot["wbs_node_id"]]
+        return self.fallback_row
+
+def _factorize(values: List[Any], codes: Dict[Any, int]) -> np.ndarray:
+    """Integer codes for values, extending `codes` with unseen ones"""
+    return np.fromiter((codes.setdefault(v, len(codes)) for v in values), dtype=np.int32, count=len(values))
+
+def _values(values: List[Any]) -> Tuple[np.ndarray, int]:
+    """Result values as floats and the number that are not numbers, such as "<0.5"; those become NaN"""
+    try:
+        array = np.array(values, dtype=np.float64)
+        if array.ndim == 1:
+            return array, 0
+    except (TypeError, ValueError):
+        pass
+    array = np.full(len(values), np.nan)
+    invalid = 0
+    for i, value in enumerate(values):
+        if value is None:
+            continue
+        try:
+            array[i] = float(value)
+        except (TypeError, ValueError):
+            invalid += 1
+    return array, invalid
+
+def load_results(test_results: Union[List[Dict[str, Any]], Dict[str, List[Any]]], criteria: AcceptanceCriteria,
+                 lots: Dict[str, int]) -> Dict[str, Any]:
+    """Load test results into columns with lots and characteristics as integer codes.
+
+    Results name either the characteristic tested or the test method; a
+    method is resolved to the characteristic the ITP items test with it.
+    Values that are not numbers are loaded as NaN, so they go unchecked,
+    and are counted as invalid.
+    """
+    if isinstance(test_results, dict):
+        size = len(test_results.get("value") or [])
+        columns = {key: test_results.get(key) or [None] * size for key in _RESULT_COLUMNS}
+    else:
+        columns = {key: [r.get(key) for r in test_results] for key in _RESULT_COLUMNS}
+        size = len(test_results)
+
+    methods = criteria.methods
+    characteristics = [c or methods.get(m) for c, m in zip(columns["characteristic"], columns["test_method"])]
+    values, invalid = _values(columns["value"])
+    return {
+        "size": size,
+        "ids": columns["id"],
+        "lot": _factorize(columns["lot_id"], lots),
+        "characteristic": _factorize(characteristics, criteria.characteristics),
+        "value": values,
+        "invalid": invalid
+    }
+
+def _characteristic_values(values: np.ndarray, groups: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Mean, standard deviation and lower/upper characteristic values per group.
+
+    The characteristic values are the one-sided 95% confidence bounds on the
+    group mean, so a lot conforms only if its mean is shown to be within the
+    limit, not merely measured there.
+    """
+    means = np.bincount(groups, weights=values, minlength=len(counts)) / counts
+    squares = np.bincount(groups, weights=(values - means[groups]) ** 2, minlength=len(counts))
+    dof = counts - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stds = np.sqrt(squares / dof)
+    t = np.where(dof < len(_T95), _T95[np.minimum(dof, len(_T95) - 1)], _Z95)
+    bounds = t * stds / np.sqrt(counts)
+    return means, stds, means - bounds, means + bounds
+
+def check_conformance(test_results: Union[List[Dict[str, Any]], Dict[str, List[Any]]], lots: List[Dict[str, Any]],
+                      itps: List[Dict[str, Any]], standards: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Check test results against ITP and standard acceptance criteria.
+
+    Results are grouped by lot and criterion and every check runs over whole
+    columns: individual limits, lot characteristic values and test frequency
+    against lot quantities. Only the nonconformances are turned into records.
+    """
+    started = time.perf_counter()
+    criteria = AcceptanceCriteria(itps, standards)
+    lot_codes: Dict[Any, int] = {lot["id"]: i for i, lot in enumerate(lots)}
+    results = load_results(test_results, criteria, lot_codes)
+    # Lots only named by results come after the given ones and use project-wide criteria
+    lot_ids = list(lot_codes)
+    n_criteria = len(criteria.items)
+
+    lot_rows = np.full(len(lot_ids), criteria.fallback_row, dtype=np.int32)
+    for i, lot in enumerate(lots):
+        lot_rows[i] = criteria.lot_row(lot)
+
+    values = results["value"]
+    table = criteria.table(len(criteria.characteristics))
+    crit = table[lot_rows[results["lot"]], results["characteristic"]]
+    matched = np.nonzero((crit >= 0) & ~np.isnan(values))[0]
+    crit = crit[matched]
+    lot = results["lot"][matched]
+    values = values[matched]
+    lo = criteria.lo[crit]
+    hi = criteria.hi[crit]
+
+    nonconformances: List[Dict[str, Any]] = []
+
+    def record(kind: str, lot_code: int, index: int, **fields) -> Dict[str, Any]:
+        item = criteria.items[index]
+        return {
+            "type": kind,
+            "lot_id": lot_ids[lot_code],
+            "itp_id": item["itp_id"],
+            "item_code": item["item_code"],
+            "characteristic": item["characteristic"],
+            "test_method": item["test_method"],
+            "spec_ref": item["spec_ref"],
+            "min": item["min"],
+            "max": item["max"],
+            "unit": item["unit"],
+            **fields
+        }
+
+    # Individual results outside their limits
+    ids = results["ids"]
+    for i in np.nonzero((values < lo) | (values > hi))[0].tolist():
+        row = int(matched[i])
+        nonconformances.append(record("limit", int(lot[i]), int(crit[i]), result_id=ids[row], value=float(values[i])))
+
+    # Lot characteristic values, one group per (lot, criterion)
+    keys = lot.astype(np.int64) * max(n_criteria, 1) + crit
+    group_keys, groups, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    means, stds, lower, upper = _characteristic_values(values, groups, counts)
+    group_crit = (group_keys % max(n_criteria, 1)).astype(np.int32)
+    group_lot = (group_keys // max(n_criteria, 1)).astype(np.int32)
+    below = lower < criteria.lo[group_crit]
+    above = upper > criteria.hi[group_crit]
+    failing = np.nonzero((counts >= MIN_CHARACTERISTIC_SAMPLES) & (below | above))[0]
+    for g in failing.tolist():
+        nonconformances.append(record(
+            "characteristic", int(group_lot[g]), int(group_crit[g]),
+            samples=int(counts[g]),
+            mean=float(means[g]),
+            std=float(stds[g]),
+            characteristic_value=float(lower[g] if below[g] else upper[g])
+        ))
+
+    # Test frequency against lot quantity, for lots whose ITP item sets one
+    units: Dict[Any, int] = {}
+    pair_lot: List[int] = []
+    pair_crit: List[int] = []
+    for i in range(len(lots)):
+        for index in criteria.itp_criteria.get(int(lot_rows[i]), ()):
+            pair_lot.append(i)
+            pair_crit.append(index)
+    freq_checked = 0
+    if pair_lot:
+        pair_lot_a = np.array(pair_lot, dtype=np.int32)
+        pair_crit_a = np.array(pair_crit, dtype=np.int32)
+        quantities = np.array([lot.get("quantity") for lot in lots], dtype=np.float64)
+        lot_units = _factorize([lot.get("unit") for lot in lots], units)
+        frequencies = [c["frequency"] for c in criteria.items]
+        per_quantity = np.array([f.get("per_quantity") for f in frequencies], dtype=np.float64)
+        per_count = np.array([f.get("count") or 0 for f in frequencies], dtype=np.float64)
+        freq_units = _factorize([f.get("unit") for f in frequencies], units)
+
+        q = quantities[pair_lot_a]
+        pq = per_quantity[pair_crit_a]
+        by_quantity = ~np.isnan(pq) & ~np.isnan(q) & (lot_units[pair_lot_a] == freq_units[pair_crit_a])
+        per_lot = np.isnan(pq) & (freq_units[pair_crit_a] == units.get("lot", -1))
+        with np.errstate(invalid="ignore"):
+            required = np.where(by_quantity, per_count[pair_crit_a] * np.ceil(q / pq), per_count[pair_crit_a])
+        checked = by_quantity | per_lot
+
+        # Tests per pair from the (lot, criterion) group counts
+        pair_keys = pair_lot_a.astype(np.int64) * max(n_criteria, 1) + pair_crit_a
+        actual = np.zeros(len(pair_keys), dtype=np.int64)
+        if len(group_keys):
+            found = np.minimum(np.searchsorted(group_keys, pair_keys), len(group_keys) - 1)
+            hit = group_keys[found] == pair_keys
+            actual[hit] = counts[found[hit]]
+        freq_checked = int(checked.sum())
+        for p in np.nonzero(checked & (actual < required))[0].tolist():
+            lot_record = lots[pair_lot[p]]
+            nonconformances.append(record(
+                "frequency", pair_lot[p], pair_crit[p],
+                required=int(required[p]),
+                actual=int(actual[p]),
+                quantity=lot_record.get("quantity"),
+                quantity_unit=lot_record.get("unit")
+            ))
+
+    by_type: Dict[str, int] = {}
+    for nc in nonconformances:
+        by_type[nc["type"]] = by_type.get(nc["type"], 0) + 1
+    summary = {
+        "results": results["size"],
+        "results_checked": int(len(matched)),
+        "results_unmatched": int(results["size"] - len(matched)),
+        # Of the unmatched, results whose value is not a number
+        "results_invalid": results["invalid"],
+        "lots": len(lot_ids),
+        "criteria": n_criteria,
+        "lot_characteristics_checked": int((counts >= MIN_CHARACTERISTIC_SAMPLES).sum()),
+        "frequency_checks": freq_checked,
+        "nonconformances": by_type,
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+    return nonconformances, summary
+
+def conformance_check_node(state: ConformanceCheckState) -> Dict[str, Any]:
+    """Check project test results against their acceptance criteria"""
+    try:
+        if not state.test_results:
+            return {"nonconformances": [], "error": "No test results provided"}
+
+        nonconformances, summary = check_conformance(
+            state.test_results, state.lots, state.generated_itps, state.standards_from_project_documents
+        )
+        return {
+            "nonconformances": nonconformances,
+            "conformance_summary": summary,
+            "done": True
+        }
+
+    except Exception as e:
+        return {
+            "error": f"Conformance check failed: {str(e)}",
+            "nonconformances": [],
+            "done": True
+        }
+
+def _ncr_groups(nonconformances: List[Dict[str, Any]]) -> Dict[Tuple[Any, str], List[Dict[str, Any]]]:
+    # One NCR per lot and ITP item; project-wide criteria have no item so use the characteristic
+    groups: Dict[Tuple[Any, str], List[Dict[str, Any]]] = {}
+    for nc in nonconformances:
+        groups.setdefault((nc["lot_id"], nc["item_code"] or nc["characteristic"]), []).append(nc)
+    return groups
+
+def create_ncr_asset_specs(state: ConformanceCheckState) -> List[Dict[str, Any]]:
+    """Create asset write specifications for one NCR per lot and failed ITP item"""
+    specs = []
+
+    for (lot_id, ref), ncs in _ncr_groups(state.nonconformances).items():
+        first = ncs[0]
+        types = sorted({nc["type"] for nc in ncs})
+        specs.append({
+            "asset": {
+                "type": "ncr",
+                "name": f"NCR - {first['characteristic']} - lot {lot_id}",
+                "project_id": state.project_id,
+                "content": {
+                    "lot_id": lot_id,
+                    "itp_id": first["itp_id"],
+                    "itp_item_ref": first["item_code"],
+                    "characteristic": first["characteristic"],
+                    "test_method": first["test_method"],
+                    "spec_ref": first["spec_ref"],
+                    "acceptance": {"min": first["min"], "max": first["max"], "unit": first["unit"]},
+                    "nonconformance_types": types,
+                    "failed_result_ids": [nc["result_id"] for nc in ncs if nc["type"] == "limit"],
+                    "findings": [nc for nc in ncs if nc["type"] != "limit"],
+                    "status": "open"
+                }
+            },
+            "idempotency_key": f"ncr:{state.project_id}:{lot_id}:{ref}"
+        })
+
+    return specs
+
+def create_ncr_edge_specs(state: ConformanceCheckState) -> List[Dict[str, Any]]:
+    """Create edges from NCRs to their lots and the inspection points they violate"""
+    edges = EdgeBuffer()
+
+    for (lot_id, ref), ncs in _ncr_groups(state.nonconformances).items():
+        edges.add(
+            "",  # Will be set to NCR asset ID
+            "",  # Will be set to lot asset ID
+            "APPLIES_TO",
+            f"ncr_lot:{state.project_id}:{lot_id}:{ref}",
+            {"lot_id": lot_id}
+        )
+        if ncs[0]["item_code"]:
+            edges.add(
+                "",  # Will be set to NCR asset ID
+                "",  # Will be set to inspection point asset ID
+                "VIOLATES",
+                f"ncr_point:{state.project_id}:{lot_id}:{ref}",
+                {"itp_item_ref": ncs[0]["item_code"], "count": len(ncs)}
+            )
+
+    return edges.to_list()
+
+# Graph definition
+def create_conformance_checker_graph(checkpointer=None):
+    """Create the conformance checker graph"""
+    from langgraph.graph import StateGraph
+
+    graph = StateGraph(ConformanceCheckState)
+
+    # Add nodes
+    graph.add_node("check_conformance", conformance_check_node)
+    graph.add_node("create_ncr_assets", lambda state: {
+        "ncr_asset_specs": create_ncr_asset_specs(state)
+    })
+    graph.add_node("create_ncr_edges", lambda state: {
+        "edges": create_ncr_edge_specs(state)
+    })
+
+    # Define flow
+    graph.set_entry_point("check_conformance")
+    graph.add_edge("check_conformance", "create_ncr_assets")
+    graph.add_edge("create_ncr_assets", "create_ncr_edges")
+
+    return graph.compile(checkpointer=checkpointer)
@@ -3,6 +3,7 @@ from pydantic import BaseModel
 import asyncio
 import re
 import json
+from graphs.state import GraphState, append
 
 class Document(BaseModel):
     id: str
@@ -11,12 +12,15 @@ class Document(BaseModel):
     project_id: str
     metadata: Dict[str, Any] = {}
 
-class ExtractionState(BaseModel):
+class ExtractionState(GraphState):
     project_id: str
     document_ids: List[str] = []
+    # Documents whose text is already available, e.g. email attachments: {id, file_name, content, metadata}
+    source_documents: List[Dict[str, Any]] = []
     document_metadata: List[Dict[str, Any]] = []
-    txt_project_documents: Annotated[List[Document], "add"] = []
-    failed_documents: Annotated[List[Dict[str, str]], "add"] = []
+    txt_project_documents: Annotated[List[Document], append] = []
+    failed_documents: Annotated[List[Dict[str, str]], append] = []
+    asset_specs: List[Dict[str, Any]] = []
     error: str = ""
     done: bool = False
 
@@ -75,11 +79,11 @@ def extract_structured_content(content: str) -> Dict[str, Any]:
 
     # Extract standards references
     standards = re.findall(r'(AS\s*\d+|ISO\s*\d+|BS\s*\d+|EN\s*\d+)', content)
-    structured["entities"]["standards"] = list(set(standards))
+    structured["entities"]["standards"] = sorted(set(standards))
 
     # Extract clause references
     clauses = re.findall(r'clause\s*(\d+(?:\.\d+)*)', content, re.IGNORECASE)
-    structured["entities"]["clauses"] = list(set(clauses))
+    structured["entities"]["clauses"] = sorted(set(clauses))
 
     # Extract requirements (simplified)
     req_matches = re.findall(r'(?:shall|must|should|required|requirement).*?([^\n\.]{20,100})', content, re.IGNORECASE)
@@ -95,6 +99,7 @@ def document_extraction_node(state: ExtractionState) -> Dict[str, Any]:
     """Extract text content from documents with enhanced processing"""
     documents = []
     metadata_list = []
+    failed_documents = []
 
     for doc_id in state.document_ids:
         try:
@@ -148,16 +153,44 @@ Clause 4.2 requires that all concrete work be tested in accordance with AS 3600.
             })
 
         except Exception as e:
-            state.failed_documents.append({
+            failed_documents.append({
                 "uuid": doc_id,
                 "file_name": f"document_{doc_id}.pdf",
                 "error": str(e)
             })
 
+    for source in state.source_documents:
+        try:
+            content = source.get("content") or ""
+            metadata = {
+                **extract_document_metadata(content, source["file_name"]),
+                **source.get("metadata", {})
+            }
+            documents.append(Document(
+                id=source["id"],
+                file_name=source["file_name"],
+                content=content,
+                project_id=state.project_id,
+                metadata={
+                    **metadata,
+                    "structured": extract_structured_content(content)
+                }
+            ))
+            metadata_list.append({
+                "document_id": source["id"],
+                **metadata
+            })
+        except Exception as e:
+            failed_documents.append({
+                "uuid": source.get("id", ""),
+                "file_name": source.get("file_name", ""),
+                "error": str(e)
+            })
+
     return {
         "txt_project_documents": documents,
         "document_metadata": metadata_list,
-        "failed_documents": state.failed_documents,
+        "failed_documents": failed_documents,
         "done": True
     }
 
@@ -184,7 +217,7 @@ def create_asset_write_specs(state: ExtractionState) -> List[Dict[str, Any]]:
     return specs
 
 # Graph definition
-def create_document_extraction_graph():
+def create_document_extraction_graph(checkpointer=None):
     """Create the document extraction graph"""
     from langgraph.graph import StateGraph
 
@@ -200,4 +233,4 @@ def create_document_extraction_graph():
     graph.set_entry_point("extract")
     graph.add_edge("extract", "create_assets")
 
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
@@ -0,0 +1,120 @@
+from typing import Dict, List, Any, Optional, Iterable, Iterator
+
+class EdgeBuffer:
+    """Append-only edge buffer deduplicated by idempotency_key.
+
+    Edges are stored column-wise and only materialized as edge spec dicts
+    when iterated, so large projects do not hold one dict per edge until
+    they are actually emitted.
+    """
+
+    __slots__ = ("_index", "_keys", "_from", "_to", "_types", "_properties", "_operations")
+
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._from: List[str] = []
+        self._to: List[str] = []
+        self._types: List[str] = []
+        self._properties: List[Dict[str, Any]] = []
+        self._operations: List[Optional[str]] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, idempotency_key: str) -> bool:
+        return idempotency_key in self._index
+
+    def add(self, from_asset_id: str, to_asset_id: str, edge_type: str, idempotency_key: str,
+            properties: Optional[Dict[str, Any]] = None, operation: Optional[str] = None) -> bool:
+        """Append an edge, returning False if its idempotency_key is already buffered"""
+        if idempotency_key in self._index:
+            return False
+
+        self._index[idempotency_key] = len(self._keys)
+        self._keys.append(idempotency_key)
+        self._from.append(from_asset_id)
+        self._to.append(to_asset_id)
+        self._types.append(edge_type)
+        self._properties.append(properties if properties is not None else {})
+        self._operations.append(operation)
+        return True
+
+    def extend(self, edges: Iterable[Dict[str, Any]]) -> None:
+        """Append already materialized edge specs"""
+        for edge in edges:
+            self.add(
+                edge.get("from_asset_id", ""),
+                edge.get("to_asset_id", ""),
+                edge["edge_type"],
+                edge["idempotency_key"],
+                edge.get("properties"),
+                edge.get("operation")
+            )
+
+    def _edge(self, i: int) -> Dict[str, Any]:
+        edge = {
+            "from_asset_id": self._from[i],
+            "to_asset_id": self._to[i],
+            "edge_type": self._types[i],
+            "properties": self._properties[i],
+            "idempotency_key": self._keys[i]
+        }
+        if self._operations[i]:
+            edge["operation"] = self._operations[i]
+        return edge
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self._keys)):
+            yield self._edge(i)
+
+    def difference(self, other: "EdgeBuffer", operation: Optional[str] = None) -> "EdgeBuffer":
+        """Return the edges in this buffer whose keys are not in other"""
+        result = EdgeBuffer()
+        for i, key in enumerate(self._keys):
+            if key not in other._index:
+                result.add(self._from[i], self._to[i], self._types[i], key, self._properties[i], operation or self._operations[i])
+        return result
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Materialize every buffered edge spec"""
+        return list(self)
+
+def add_parent_edges(buffer: EdgeBuffer, project_id: str, nodes: Iterable[Dict[str, Any]],
+                     operation: Optional[str] = None) -> EdgeBuffer:
+    """Append PARENT_OF edges for WBS nodes that have a parent"""
+    for node in nodes:
+        parent_id = node.get("parentId")
+        if not parent_id:
+            continue
+        buffer.add(
+            "",  # Will be set to child asset ID
+            "",  # Will be set to parent asset ID
+            "PARENT_OF",
+            f"wbs_edge:{project_id}:{node['id']}:{parent_id}",
+            {
+                "hierarchy_level": node["node_type"],
+                "child_wbs_id": node["id"],
+                "parent_wbs_id": parent_id
+            },
+            operation
+        )
+    return buffer
+
+def add_document_reference_edges(buffer: EdgeBuffer, key_prefix: str, edge_type: str, project_id: str,
+                                 source_key: str, document_ids: Iterable[str],
+                                 properties: Dict[str, Any]) -> EdgeBuffer:
+    """Append edges from one source asset to each of its documents.
+
+    Each edge gets its own copy of properties, so changing one edge
+    downstream leaves the others alone.
+    """
+    for doc_id in document_ids:
+        buffer.add(
+            "",  # Will be set to source asset ID
+            doc_id,
+            edge_type,
+            f"{key_prefix}:{project_id}:{source_key}:{doc_id}",
+            dict(properties)
+        )
+    return buffer
@@ -0,0 +1,671 @@
+from typing import Dict, List, Any, BinaryIO, Callable, Iterator, Optional, Set, Tuple
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesHeaderParser
+from email.utils import getaddresses, parsedate_to_datetime
+from functools import lru_cache
+import asyncio
+import binascii
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+import time
+from pydantic import BaseModel
+from graphs.state import GraphState
+from graphs.document_extraction import create_document_extraction_graph
+from graphs.edges import EdgeBuffer
+
+# Lines are read in bounded chunks, so a binary part without line breaks is never held whole
+_MAX_LINE = 64 * 1024
+_READ_SIZE = 1024 * 1024
+_MAX_BODY_BYTES = 64 * 1024
+# Text read back from a spooled text attachment for document extraction
+_MAX_TEXT_BYTES = 1024 * 1024
+TEXT_ATTACHMENT_TYPES = ("text/plain", "text/csv", "text/markdown")
+TEXT_ATTACHMENT_EXTENSIONS = (".txt", ".csv", ".md")
+
+_HEADER_PARSER = BytesHeaderParser(policy=policy.default)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+spool_root = os.path.join(tempfile.gettempdir(), "email_spool")
+mailbox_root: Optional[str] = None
+
+def configure_email_ingest(spool_dir: Optional[str] = None, mailbox_dir: Optional[str] = None) -> None:
+    """Set where attachments are spooled and the only directory mailboxes may be read from"""
+    global spool_root, mailbox_root
+    if spool_dir:
+        spool_root = spool_dir
+    mailbox_root = os.path.realpath(mailbox_dir) if mailbox_dir else None
+
+class EmailIngestState(GraphState):
+    project_id: str
+    # An mbox file, a Maildir or a directory of .eml files
+    mailbox_path: str
+    batch_size: int = 25
+    messages: List[Dict[str, Any]] = []
+    txt_project_documents: List[Dict[str, Any]] = []
+    asset_specs: List[Dict[str, Any]] = []
+    email_asset_specs: List[Dict[str, Any]] = []
+    edges: List[Dict[str, Any]] = []
+    ingest_stats: Dict[str, Any] = {}
+    error: str = ""
+    done: bool = False
+
+class AttachmentSpool:
+    """Content-addressed attachment store on disk; identical attachments are stored once.
+
+    The spool is shared by every project and run, so a file already being
+    in it says nothing about whether a project has a document for it.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def open(self) -> "SpoolFile":
+        return SpoolFile(self)
+
+class SpoolFile:
+    """Attachment being written to the spool, hashed as it streams in"""
+
+    def __init__(self, spool: AttachmentSpool):
+        self.spool = spool
+        fd, self.tmp_path = tempfile.mkstemp(dir=spool.tmp_dir)
+        self.file = os.fdopen(fd, "wb")
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        self.hash.update(data)
+        self.file.write(data)
+        self.size += len(data)
+
+    def commit(self) -> Dict[str, Any]:
+        """Move the file to its content address; `spooled` is False when an identical file was already there"""
+        self.file.close()
+        sha256 = self.hash.hexdigest()
+        path = self.spool.path(sha256)
+        spooled = not os.path.exists(path)
+        if spooled:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self.tmp_path, path)
+        else:
+            os.remove(self.tmp_path)
+        return {"sha256": sha256, "size": self.size, "path": path, "spooled": spooled}
+
+    def discard(self) -> None:
+        self.file.close()
+        os.remove(self.tmp_path)
+
+class _TextBuffer:
+    def __init__(self, limit: int):
+        self.parts: List[bytes] = []
+        self.remaining = limit
+
+    def write(self, data: bytes) -> None:
+        if self.remaining > 0:
+            self.parts.append(data[:self.remaining])
+            self.remaining -= len(data)
+
+    def text(self, charset: Optional[str]) -> str:
+        # Bodies read the same whichever line endings the mailbox was saved with
+        data = b"".join(self.parts).replace(b"\r\n", b"\n")
+        try:
+            return data.decode(charset or "utf-8", errors="replace")
+        except LookupError:
+            return data.decode("utf-8", errors="replace")
+
+class _Base64Decoder:
+    # Lines are decoded in blocks of about this many bytes rather than one by one
+    BLOCK = 256 * 1024
+
+    def __init__(self, write: Callable[[bytes], None]):
+        self.write = write
+        self.lines: List[bytes] = []
+        self.buffered = 0
+        self.carry = b""
+
+    def feed(self, line: bytes) -> None:
+        self.lines.append(line)
+        self.buffered += len(line)
+        if self.buffered >= self.BLOCK:
+            self._decode()
+
+    def _decode(self) -> None:
+        data = self.carry + b"".join(self.lines).translate(None, b" \t\r\n")
+        self.lines.clear()
+        self.buffered = 0
+        # Decode whole 4-character groups; the rest waits for the next block
+        end = len(data) - len(data) % 4
+        self.carry = data[end:]
+        if end:
+            self.write(binascii.a2b_base64(data[:end]))
+
+    def close(self) -> None:
+        self._decode()
+        if self.carry.rstrip(b"="):
+            self.write(binascii.a2b_base64(self.carry + b"=" * (-len(self.carry) % 4)))
+
+class _LineDecoder:
+    """7bit, 8bit, binary and quoted-printable bodies"""
+
+    def __init__(self, write: Callable[[bytes], None], quoted_printable: bool):
+        self.write = write
+        self.quoted_printable = quoted_printable
+        self.pending_eol = b""
+
+    def feed(self, data: bytes) -> None:
+        for line in data.splitlines(keepends=True):
+            body = line.rstrip(b"\r\n")
+            eol = line[len(body):]
+            # The line break before a boundary belongs to the boundary, so each
+            # break is only written once the next line shows the body goes on
+            if self.pending_eol:
+                self.write(self.pending_eol)
+            if self.quoted_printable:
+                if body.endswith(b"="):
+                    body, eol = body[:-1], b""
+                body = binascii.a2b_qp(body)
+            if body:
+                self.write(body)
+            self.pending_eol = eol
+
+    def close(self) -> None:
+        pass
+
+class _LineReader:
+    """Buffered reader over one message at a time; in an mbox a message ends at the next "From " line"""
+
+    def __init__(self, source: BinaryIO, mbox: bool = False):
+        self.source = source
+        self.mbox = mbox
+        self.buf = b""
+        self.pos = 0
+        self.eof = False
+        self.line_start = True
+        # Whether the line last returned began a line, so boundaries are not matched mid-line
+        self.starts_line = True
+        self.in_message = not mbox
+        # Lines starting with these may end a part or a message, or need unescaping; read_block stops before them
+        self.markers = (b"\n-", b"\nFrom ", b"\n>") if mbox else (b"\n-",)
+        # marker -> its next position in buf, so each stretch of buf is searched once
+        self.found: Dict[bytes, int] = {}
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        data = self.source.read(_READ_SIZE)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        self.found.clear()
+        return True
+
+    def _at_separator(self) -> bool:
+        if not (self.mbox and self.line_start):
+            return False
+        while len(self.buf) - self.pos < 5 and self._fill():
+            pass
+        return self.buf.startswith(b"From ", self.pos)
+
+    def readline(self) -> bytes:
+        """Next line, or at most _MAX_LINE bytes of it; b"" at the end of the message"""
+        if self._at_separator():
+            return b""
+        while True:
+            end = self.buf.find(b"\n", self.pos, self.pos + _MAX_LINE)
+            if end >= 0:
+                end += 1
+                break
+            if len(self.buf) - self.pos >= _MAX_LINE or not self._fill():
+                end = min(len(self.buf), self.pos + _MAX_LINE)
+                break
+        line = self.buf[self.pos:end]
+        self.pos = end
+        if not line:
+            return b""
+        self.starts_line = self.line_start
+        self.line_start = line.endswith(b"\n")
+        if self.mbox and self.starts_line and line.startswith(b">") and line.lstrip(b">").startswith(b"From "):
+            line = line[1:]
+        return line
+
+    def read_block(self) -> bytes:
+        """Whole lines up to the next one that could be a boundary or separator, or b"" if that is the next line.
+
+        Part bodies are read through this in large blocks found with bytes.find,
+        so a big attachment costs a handful of calls instead of one per line.
+        """
+        if not self.line_start:
+            return b""
+        if self.pos >= len(self.buf) and not self._fill():
+            return b""
+        if any(self.buf.startswith(marker[1:], self.pos) for marker in self.markers):
+            return b""
+        # The line at pos was checked above; later lines are found by the break before them
+        end = len(self.buf)
+        for marker in self.markers:
+            i = self.found.get(marker)
+            if i is None or (i != -1 and i < self.pos):
+                i = self.found[marker] = self.buf.find(marker, self.pos)
+            if i >= 0:
+                end = min(end, i + 1)
+        if end == len(self.buf):
+            # No marker in the buffer; stop after its last complete line
+            end = self.buf.rfind(b"\n", self.pos) + 1
+            if end <= 0:
+                return b""
+        block = self.buf[self.pos:end]
+        self.pos = end
+        self.starts_line = True
+        return block
+
+    def next_message(self) -> bool:
+        """Skip what is left of the current message and the separator of the next; False at end of file"""
+        if self.in_message:
+            while self.read_block() or self.readline():
+                pass
+        if self.pos >= len(self.buf) and not self._fill():
+            return False
+        if self._at_separator():
+            self.line_start = False
+            self.readline()
+        self.line_start = self.starts_line = True
+        self.in_message = True
+        return True
+
+def iter_mailbox(path: str) -> Iterator[_LineReader]:
+    """One line reader per message of an mbox file, a Maildir or a directory of .eml files"""
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            # Maildir tmp/ holds messages still being delivered
+            dirs[:] = sorted(d for d in dirs if d != "tmp")
+            for name in sorted(files):
+                if name.startswith("."):
+                    continue
+                with open(os.path.join(root, name), "rb") as f:
+                    yield _LineReader(f)
+        return
+    with open(path, "rb") as f:
+        reader = _LineReader(f, mbox=True)
+        while reader.next_message():
+            yield reader
+
+def _read_headers(lines: _LineReader) -> EmailMessage:
+    raw = []
+    while True:
+        line = lines.readline()
+        if not line.strip(b"\r\n"):
+            break
+        raw.append(line)
+    return _HEADER_PARSER.parsebytes(b"".join(raw))
+
+def _boundary(lines: _LineReader, line: bytes, boundaries: List[bytes]) -> Optional[Tuple[bytes, bool]]:
+    # Callers check line.startswith(b"--") first, which rules out almost every line cheaply
+    if not boundaries or not lines.starts_line:
+        return None
+    marker = line.rstrip()
+    # Innermost first; a part ends at its own boundary or at any enclosing one
+    for boundary in reversed(boundaries):
+        if marker == b"--" + boundary:
+            return boundary, False
+        if marker == b"--" + boundary + b"--":
+            return boundary, True
+    return None
+
+def _skip_to_boundary(lines: _LineReader, boundaries: List[bytes]) -> Optional[Tuple[bytes, bool]]:
+    while True:
+        if lines.read_block():
+            continue
+        line = lines.readline()
+        if not line:
+            return None
+        if line.startswith(b"--"):
+            hit = _boundary(lines, line, boundaries)
+            if hit:
+                return hit
+
+def _header(headers: EmailMessage, name: str) -> str:
+    try:
+        return str(headers.get(name) or "").strip()
+    except Exception:
+        # Malformed encoded words
+        return ""
+
+def _parse_entity(lines: _LineReader, headers: EmailMessage, boundaries: List[bytes],
+                  message: Dict[str, Any], spool: AttachmentSpool) -> Optional[Tuple[bytes, bool]]:
+    """Consume one MIME entity; returns the boundary that ended it, or None at the end of the message"""
+    boundary = headers.get_param("boundary") if headers.get_content_maintype() == "multipart" else None
+    if boundary:
+        inner = boundaries + [str(boundary).encode("latin-1", "replace")]
+        hit = _skip_to_boundary(lines, inner)
+        while hit is not None and hit[0] == inner[-1] and not hit[1]:
+            hit = _parse_entity(lines, _read_headers(lines), inner, message, spool)
+        if hit is not None and hit[0] == inner[-1]:
+            # Epilogue after the closing delimiter
+            hit = _skip_to_boundary(lines, boundaries)
+        return hit
+
+    if headers.get_content_type() == "message/rfc822":
+        # Attachments of forwarded messages count as attachments of this one
+        return _parse_entity(lines, _read_headers(lines), boundaries, message, spool)
+
+    content_type = headers.get_content_type()
+    filename = headers.get_filename()
+    target = None
+    if headers.get_content_disposition() == "attachment" or filename or headers.get_content_maintype() != "text":
+        target = spool.open()
+    elif content_type in ("text/plain", "text/html") and not message["_body_type"]:
+        target = _TextBuffer(_MAX_BODY_BYTES)
+    elif content_type == "text/plain" and message["_body_type"] == "text/html":
+        # Prefer the plain alternative
+        target = _TextBuffer(_MAX_BODY_BYTES)
+
+    encoding = _header(headers, "Content-Transfer-Encoding").lower()
+    decoder = None
+    if target is not None:
+        decoder = _Base64Decoder(target.write) if encoding == "base64" else _LineDecoder(target.write, encoding == "quoted-printable")
+
+    try:
+        while True:
+            block = lines.read_block()
+            if block:
+                if decoder:
+                    decoder.feed(block)
+                continue
+            line = lines.readline()
+            if not line:
+                hit = None
+                break
+            if line.startswith(b"--"):
+                hit = _boundary(lines, line, boundaries)
+                if hit:
+                    break
+            if decoder:
+                decoder.feed(line)
+        if decoder:
+            decoder.close()
+    except Exception:
+        if isinstance(target, SpoolFile):
+            target.discard()
+        raise
+
+    if isinstance(target, SpoolFile):
+        stored = target.commit()
+        message["attachments"].append({
+            "filename": filename or f"attachment-{len(message['attachments']) + 1}{mimetypes.guess_extension(content_type) or ''}",
+            "content_type": content_type,
+            "charset": headers.get_content_charset(),
+            **stored
+        })
+    elif target is not None:
+        body = target.text(headers.get_content_charset())
+        message["body"] = _TAG_RE.sub(" ", body) if content_type == "text/html" else body
+        message["_body_type"] = content_type
+    return hit
+
+def parse_message(lines: _LineReader, spool: AttachmentSpool) -> Dict[str, Any]:
+    """Parse one raw message from lines, spooling attachment bodies as they are decoded"""
+    headers = _read_headers(lines)
+    date = _header(headers, "Date")
+    try:
+        timestamp = parsedate_to_datetime(date).isoformat() if date else None
+    except (TypeError, ValueError):
+        timestamp = None
+    message = {
+        "message_id": _header(headers, "Message-ID").strip("<>"),
+        "in_reply_to": _header(headers, "In-Reply-To").strip("<>") or None,
+        "subject": _header(headers, "Subject"),
+        "from": _header(headers, "From"),
+        "to": [address for _, address in getaddresses([_header(headers, "To"), _header(headers, "Cc")]) if address],
+        "timestamp": timestamp,
+        "body": "",
+        "attachments": [],
+        "_body_type": None
+    }
+    _parse_entity(lines, headers, [], message, spool)
+    del message["_body_type"]
+    if not message["message_id"]:
+        # Stable id for messages without a Message-ID header
+        digest = hashlib.sha256(f"{message['from']}|{date}|{message['subject']}".encode()).hexdigest()[:32]
+        message["message_id"] = f"generated-{digest}"
+    return message
+
+def _is_text_attachment(attachment: Dict[str, Any]) -> bool:
+    return (attachment["content_type"] in TEXT_ATTACHMENT_TYPES
+            or attachment["filename"].lower().endswith(TEXT_ATTACHMENT_EXTENSIONS))
+
+def attachment_document(message: Dict[str, Any], attachment: Dict[str, Any]) -> Dict[str, Any]:
+    """Source document for document extraction; only text attachments have their content read back"""
+    content = ""
+    if _is_text_attachment(attachment):
+        with open(attachment["path"], "rb") as f:
+            content = f.read(_MAX_TEXT_BYTES).decode(attachment.get("charset") or "utf-8", errors="replace")
+    return {
+        "id": f"att-{attachment['sha256'][:32]}",
+        "file_name": attachment["filename"],
+        "content": content,
+        "metadata": {
+            "source": "email",
+            "message_id": message["message_id"],
+            "sha256": attachment["sha256"],
+            "size": attachment["size"],
+            "content_type": attachment["content_type"],
+            "spool_path": attachment["path"]
+        }
+    }
+
+def ingest_mailbox(path: str, spool: AttachmentSpool) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """Yield each parsed message with the documents for its attachments not seen earlier in this mailbox.
+
+    Every distinct attachment of the mailbox becomes a document once per
+    ingest, whether or not its content was already spooled by another run or
+    project; the document ids and asset keys are stable, so ingesting the
+    same mailbox again updates rather than duplicates them.
+    """
+    seen: Set[str] = set()
+    for lines in iter_mailbox(path):
+        try:
+            message = parse_message(lines, spool)
+        except Exception as e:
+            yield {"message_id": None, "error": str(e), "attachments": []}, []
+            continue
+        documents = []
+        for attachment in message["attachments"]:
+            attachment["duplicate"] = attachment["sha256"] in seen
+            if not attachment["duplicate"]:
+                seen.add(attachment["sha256"])
+                documents.append(attachment_document(message, attachment))
+        yield message, documents
+
+@lru_cache(maxsize=None)
+def get_document_extraction_graph():
+    return create_document_extraction_graph()
+
+def _mailbox_path(path: str) -> str:
+    if not mailbox_root:
+        # Without a mailbox directory any file the server can read would be accepted
+        raise ValueError("No mailbox directory is configured (EMAIL_MAILBOX_DIR)")
+    resolved = os.path.realpath(path)
+    if os.path.commonpath([resolved, mailbox_root]) != mailbox_root:
+        raise ValueError(f"Mailbox {path} is outside the configured mailbox directory")
+    if not os.path.exists(resolved):
+        raise ValueError(f"Mailbox {path} does not exist")
+    return resolved
+
+async def email_ingest_node(state: EmailIngestState) -> Dict[str, Any]:
+    """Parse the mailbox in a worker thread while batches of new attachments go through document extraction"""
+    try:
+        path = _mailbox_path(state.mailbox_path)
+    except ValueError as e:
+        return {"error": str(e), "done": True}
+
+    loop = asyncio.get_running_loop()
+    spool = AttachmentSpool(spool_root)
+    # Bounded, so parsing waits for extraction instead of queueing up documents
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(state.batch_size, 1) * 4)
+    started = time.perf_counter()
+    stop = threading.Event()
+
+    def produce() -> None:
+        try:
+            for item in ingest_mailbox(path, spool):
+                asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+                if stop.is_set():
+                    break
+        finally:
+            asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()
+
+    extraction = get_document_extraction_graph()
+    slots = asyncio.Semaphore(2)
+    tasks: List[asyncio.Task] = []
+
+    async def extract(batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            return await extraction.ainvoke({"project_id": state.project_id, "source_documents": batch})
+        finally:
+            slots.release()
+
+    async def submit(batch: List[Dict[str, Any]]) -> None:
+        await slots.acquire()
+        tasks.append(asyncio.create_task(extract(batch)))
+
+    producer = loop.run_in_executor(None, produce)
+    messages: List[Dict[str, Any]] = []
+    batch: List[Dict[str, Any]] = []
+    attachments = duplicates = spooled_bytes = 0
+    try:
+        while (item := await queue.get()) is not None:
+            message, documents = item
+            messages.append(message)
+            for attachment in message["attachments"]:
+                attachments += 1
+                duplicates += attachment["duplicate"]
+                spooled_bytes += attachment["size"] if attachment["spooled"] else 0
+            batch.extend(documents)
+            if len(batch) >= state.batch_size:
+                await submit(batch)
+                batch = []
+        if batch:
+            await submit(batch)
+    finally:
+        # If the run is cancelled, make room so the parsing thread can see stop and exit
+        stop.set()
+        while not queue.empty():
+            queue.get_nowait()
+
+    errors = []
+    try:
+        await producer
+    except Exception as e:
+        errors.append(f"Mailbox read failed: {e}")
+
+    documents, asset_specs = [], []
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(result, Exception):
+            errors.append(f"Document extraction failed: {result}")
+            continue
+        documents += [doc.dict() if isinstance(doc, BaseModel) else doc for doc in result.get("txt_project_documents") or []]
+        asset_specs += result.get("asset_specs") or []
+        errors += [f"Document {f['uuid']} failed: {f['error']}" for f in result.get("failed_documents") or []]
+    errors += [f"Message could not be parsed: {m['error']}" for m in messages if m.get("error")]
+
+    elapsed = time.perf_counter() - started
+    return {
+        "messages": [m for m in messages if not m.get("error")],
+        "txt_project_documents": documents,
+        "asset_specs": asset_specs,
+        "ingest_stats": {
+            "messages": len(messages),
+            "attachments": attachments,
+            "duplicate_attachments": duplicates,
+            "spooled_bytes": spooled_bytes,
+            "documents": len(documents),
+            "batches": len(tasks),
+            "seconds": round(elapsed, 4),
+            "messages_per_second": round(len(messages) / elapsed, 2) if elapsed else None
+        },
+        "error": "; ".join(errors),
+        "done": True
+    }
+
+def create_email_asset_specs(state: EmailIngestState) -> List[Dict[str, Any]]:
+    """Create correspondence asset specs, one per message"""
+    return [
+        {
+            "asset": {
+                "type": "correspondence",
+                "name": message["subject"] or "(no subject)",
+                "project_id": state.project_id,
+                "content": {
+                    "message_id": message["message_id"],
+                    "in_reply_to": message["in_reply_to"],
+                    "subject": message["subject"],
+                    "from": message["from"],
+                    "to": message["to"],
+                    "body": message["body"],
+                    "attachments": [
+                        {k: a[k] for k in ("filename", "content_type", "sha256", "size")}
+                        for a in message["attachments"]
+                    ],
+                    "timestamp": message["timestamp"]
+                }
+            },
+            "idempotency_key": f"email:{state.project_id}:{message['message_id']}"
+        }
+        for message in state.messages
+    ]
+
+def create_email_edge_specs(state: EmailIngestState) -> List[Dict[str, Any]]:
+    """Create PART_OF edges from attachment documents to their messages"""
+    # Only documents this run extracted; a failed extraction leaves no document to link
+    extracted = {doc.get("id") for doc in state.txt_project_documents}
+    edges = EdgeBuffer()
+    for message in state.messages:
+        for attachment in message["attachments"]:
+            if f"att-{attachment['sha256'][:32]}" not in extracted:
+                continue
+            edges.add(
+                "",  # Will be set to attachment document asset ID
+                "",  # Will be set to correspondence asset ID
+                "PART_OF",
+                f"email_attachment:{state.project_id}:{message['message_id']}:{attachment['sha256']}",
+                {
+                    "message_id": message["message_id"],
+                    "document_id": f"att-{attachment['sha256'][:32]}",
+                    "filename": attachment["filename"]
+                }
+            )
+    return edges.to_list()
+
+# Graph definition
+def create_email_ingest_graph(checkpointer=None):
+    """Create the email ingest graph"""
+    from langgraph.graph import StateGraph
+
+    graph = StateGraph(EmailIngestState)
+
+    # Add nodes
+    graph.add_node("ingest_mailbox", email_ingest_node)
+    graph.add_node("create_email_assets", lambda state: {
+        "email_asset_specs": create_email_asset_specs(state)
+    })
+    graph.add_node("create_email_edges", lambda state: {
+        "edges": create_email_edge_specs(state)
+    })
+
+    # Define flow
+    graph.set_entry_point("ingest_mailbox")
+    graph.add_edge("ingest_mailbox", "create_email_assets")
+    graph.add_edge("create_email_assets", "create_email_edges")
+
+    return graph.compile(checkpointer=checkpointer)
@@ -0,0 +1,22 @@
+from typing import Dict, Any, Callable, Iterator, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Set by whoever drives the run; nodes and nested graphs inherit it through
+# the asyncio task / executor context, so events reach the run from any depth
+_run_event_handler: ContextVar[Optional[Callable[[Dict[str, Any]], None]]] = ContextVar("run_event_handler", default=None)
+
+def emit_run_event(event: Dict[str, Any]) -> None:
+    """Publish an event on the current run, if anyone is listening"""
+    handler = _run_event_handler.get()
+    if handler is not None:
+        handler(event)
+
+@contextmanager
+def run_event_handler(handler: Callable[[Dict[str, Any]], None]) -> Iterator[None]:
+    """Route events emitted while the block runs to handler"""
+    token = _run_event_handler.set(handler)
+    try:
+        yield
+    finally:
+        _run_event_handler.reset(token)
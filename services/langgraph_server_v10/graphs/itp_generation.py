@@ -1,11 +1,191 @@
-from langgraph.graph import Graph
+from typing import Dict, List, Any, Optional, Tuple
+from graphs.state import GraphState
+from graphs.wbs_index import WbsIndex, build_wbs_index
+from graphs.edges import EdgeBuffer
+from graphs.itp_templates import spec_family, compile_itp_template
 
-def create_itp_generation_graph():
-    g = Graph()
-    async def run(config):
-        return {"generated_itps": [], "edges": []}
-    g.add_node("run", run)
-    g.set_entry_point("run")
-    return g
+class ItpGenerationState(GraphState):
+    project_id: str
+    wbs_structure: Optional[Dict[str, Any]] = None
+    standards_from_project_documents: List[Dict[str, Any]] = []
+    generated_itps: List[Dict[str, Any]] = []
+    itp_asset_specs: List[Dict[str, Any]] = []
+    edges: List[Dict[str, Any]] = []
+    error: str = ""
+    done: bool = False
 
+def select_itp_targets(index: WbsIndex) -> List[str]:
+    """Return the deepest ITP-required nodes - those with no ITP-required descendant"""
+    targets = []
+    for node_id in index.itp_required:
+        start, end = index.itp_range[node_id]
+        if end - start == 1:
+            targets.append(node_id)
+    return targets
 
+def _node_families(index: WbsIndex, node_id: str, fallback: Tuple[str, ...]) -> Tuple[str, ...]:
+    # A node without specifications inherits those of its nearest ancestor that has some
+    for path_id in reversed(index.paths[node_id]):
+        specs = index.nodes[path_id].get("applicable_specifications")
+        if specs:
+            return tuple(dict.fromkeys(spec_family(spec) for spec in specs))
+    return fallback
+
+def _node_discipline(index: WbsIndex, node_id: str) -> Optional[str]:
+    root = index.nodes[index.paths[node_id][0]]
+    return root["name"] if root.get("node_type") == "discipline" else None
+
+def generate_itps(wbs_structure: Optional[Dict[str, Any]], standards: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Generate one ITP per deepest ITP-required WBS node.
+
+    Targets are grouped by discipline and specification families first, so
+    each distinct template is compiled (or fetched from the template cache)
+    once per batch rather than once per node.
+    """
+    index = build_wbs_index(wbs_structure)
+    project_families = tuple(dict.fromkeys(spec_family(std["standard_code"]) for std in standards if std.get("standard_code")))
+
+    groups: Dict[Tuple[Tuple[str, ...], Optional[str]], List[str]] = {}
+    for node_id in select_itp_targets(index):
+        key = (_node_families(index, node_id, project_families), _node_discipline(index, node_id))
+        groups.setdefault(key, []).append(node_id)
+
+    itps = []
+    for (families, discipline), node_ids in groups.items():
+        template = compile_itp_template(families, discipline)
+        for node_id in node_ids:
+            node = index.nodes[node_id]
+            itp_id = f"ITP-{node_id}"
+            itps.append({
+                "id": itp_id,
+                "wbs_node_id": node_id,
+                "title": f"ITP - {node['name']}",
+                "discipline": discipline,
+                "specifications": list(families),
+                "activity_ids": index.get_leaves_under(node_id),
+                # Template items are shared; only the numbering is per ITP
+                "items": [
+                    {**item, "item_no": i, "code": f"{itp_id}-{i:02d}"}
+                    for i, item in enumerate(template["items"], 1)
+                ],
+                "hold_points": template["point_counts"]["hold"],
+                "witness_points": template["point_counts"]["witness"]
+            })
+
+    # Keep WBS order regardless of grouping
+    itps.sort(key=lambda itp: index.tin[itp["wbs_node_id"]])
+    return itps
+
+def itp_generation_node(state: ItpGenerationState) -> Dict[str, Any]:
+    """Generate ITPs from the WBS and applicable standards"""
+    try:
+        if not state.wbs_structure:
+            return {"generated_itps": [], "error": "No WBS structure provided"}
+
+        return {
+            "generated_itps": generate_itps(state.wbs_structure, state.standards_from_project_documents),
+            "done": True
+        }
+
+    except Exception as e:
+        return {
+            "error": f"ITP generation failed: {str(e)}",
+            "generated_itps": [],
+            "done": True
+        }
+
+def create_itp_asset_specs(state: ItpGenerationState) -> List[Dict[str, Any]]:
+    """Create asset write specifications for ITP documents and their hold/witness points"""
+    specs = []
+
+    for itp in state.generated_itps:
+        specs.append({
+            "asset": {
+                "type": "itp_document",
+                "name": itp["title"],
+                "project_id": state.project_id,
+                "content": {
+                    "itp_code": itp["id"],
+                    "wbs_id": itp["wbs_node_id"],
+                    "discipline": itp["discipline"],
+                    "specifications": itp["specifications"],
+                    "activity_ids": itp["activity_ids"],
+                    "items": itp["items"],
+                    "hold_points": itp["hold_points"],
+                    "witness_points": itp["witness_points"]
+                }
+            },
+            "idempotency_key": f"itp:{state.project_id}:{itp['wbs_node_id']}"
+        })
+
+        for item in itp["items"]:
+            if item["point_type"] not in ("hold", "witness"):
+                continue
+            specs.append({
+                "asset": {
+                    "type": "inspection_point",
+                    "name": item["activity"],
+                    "project_id": state.project_id,
+                    "content": {
+                        "code": item["code"],
+                        "title": item["activity"],
+                        "point_type": item["point_type"],
+                        "itp_item_ref": item["code"],
+                        "spec_ref": item["spec_ref"],
+                        "notified_at": None,
+                        "released_at": None,
+                        "status": "pending"
+                    }
+                },
+                "idempotency_key": f"inspection_point:{state.project_id}:{item['code']}"
+            })
+
+    return specs
+
+def create_itp_edge_specs(state: ItpGenerationState) -> List[Dict[str, Any]]:
+    """Create edges from ITPs to their inspection points and source WBS nodes"""
+    edges = EdgeBuffer()
+
+    for itp in state.generated_itps:
+        edges.add(
+            "",  # Will be set to ITP asset ID
+            "",  # Will be set to WBS node asset ID
+            "GENERATED_FROM",
+            f"itp_wbs:{state.project_id}:{itp['id']}:{itp['wbs_node_id']}",
+            {"wbs_id": itp["wbs_node_id"]}
+        )
+        for item in itp["items"]:
+            if item["point_type"] not in ("hold", "witness"):
+                continue
+            edges.add(
+                "",  # Will be set to ITP asset ID
+                "",  # Will be set to inspection point asset ID
+                "PARENT_OF",
+                f"itp_point:{state.project_id}:{itp['id']}:{item['code']}",
+                {"point_type": item["point_type"], "item_no": item["item_no"]}
+            )
+
+    return edges.to_list()
+
+# Graph definition
+def create_itp_generation_graph(checkpointer=None):
+    """Create the ITP generation graph"""
+    from langgraph.graph import StateGraph
+
+    graph = StateGraph(ItpGenerationState)
+
+    # Add nodes
+    graph.add_node("generate_itps", itp_generation_node)
+    graph.add_node("create_itp_assets", lambda state: {
+        "itp_asset_specs": create_itp_asset_specs(state)
+    })
+    graph.add_node("create_itp_edges", lambda state: {
+        "edges": create_itp_edge_specs(state)
+    })
+
+    # Define flow
+    graph.set_entry_point("generate_itps")
+    graph.add_edge("generate_itps", "create_itp_assets")
+    graph.add_edge("create_itp_assets", "create_itp_edges")
+
+    return graph.compile(checkpointer=checkpointer)
@@ -0,0 +1,175 @@
+from typing import Dict, List, Any, Optional, Tuple
+from functools import lru_cache
+import re
+
+# Inspection point types, in increasing order of who must attend
+POINT_TYPES = ("record", "surveillance", "witness", "hold")
+
+def _item(key: str, activity: str, point_type: str, test_method: str, acceptance_criteria: str,
+          frequency: Dict[str, Any], responsibility: str = "Contractor",
+          limits: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {
+        "key": key,
+        "activity": activity,
+        "point_type": point_type,
+        "test_method": test_method,
+        "acceptance_criteria": acceptance_criteria,
+        "frequency": frequency,
+        "responsibility": responsibility,
+        "limits": limits,
+        "spec_ref": None
+    }
+
+def _per(count: int, unit: str, per_quantity: Optional[float] = None) -> Dict[str, Any]:
+    # `count` tests for every `per_quantity` `unit`s of work; no quantity means per unit (lot, pour, ...)
+    return {"count": count, "per_quantity": per_quantity, "unit": unit}
+
+def _limit(characteristic: str, unit: str, min: Optional[float] = None, max: Optional[float] = None) -> Dict[str, Any]:
+    return {"characteristic": characteristic, "min": min, "max": max, "unit": unit}
+
+# Items every ITP starts and ends with
+PRELIMINARY_ITEMS = (
+    _item("method_statement", "Method statement and ITP reviewed and approved", "hold",
+          "Document review", "Approved prior to commencement of the lot", _per(1, "lot"), "Superintendent"),
+    _item("materials_approval", "Material submittals and certificates approved", "hold",
+          "Document review", "Certificates conform to the specification", _per(1, "lot"), "Superintendent"),
+)
+
+CLOSEOUT_ITEMS = (
+    _item("conformance_records", "Lot conformance records and as-built information compiled", "record",
+          "Document review", "All ITP items signed off and records filed", _per(1, "lot")),
+    _item("lot_release", "Lot conformance review and release", "hold",
+          "Document review", "No open nonconformances against the lot", _per(1, "lot"), "Superintendent"),
+)
+
+DISCIPLINE_TEMPLATES: Dict[str, Tuple[Dict[str, Any], ...]] = {
+    "Civil": (
+        _item("set_out", "Set-out survey of works", "witness",
+              "Survey", "Within 50 mm of design position", _per(1, "lot"), "Surveyor",
+              _limit("horizontal_position_deviation", "mm", max=50)),
+        _item("foundation_inspection", "Subgrade / foundation inspection prior to placement", "hold",
+              "Visual inspection and proof roll", "No visible deflection or unsuitable material", _per(1, "lot"), "Geotechnical Engineer"),
+    ),
+    "Structural": (
+        _item("formwork_inspection", "Formwork and falsework inspection", "witness",
+              "Visual inspection", "Formwork true to line and level, falsework certified", _per(1, "pour"), "Structural Engineer"),
+        _item("reinforcement_inspection", "Reinforcement inspection prior to pour", "hold",
+              "Visual inspection and measurement", "Bar size, spacing and laps per drawings", _per(1, "pour"), "Structural Engineer"),
+    ),
+    "Electrical": (
+        _item("cable_installation", "Cable installation and segregation", "surveillance",
+              "Visual inspection", "Cables installed and segregated per drawings", _per(1, "lot"), "Electrical Supervisor"),
+        _item("pre_energisation", "Pre-energisation inspection", "hold",
+              "Visual inspection and test records review", "All tests passed and circuits labelled", _per(1, "circuit"), "Electrical Engineer"),
+    ),
+    "Mechanical": (
+        _item("equipment_installation", "Equipment installation and alignment", "witness",
+              "Visual inspection and measurement", "Installed level and aligned per manufacturer", _per(1, "item"), "Mechanical Supervisor"),
+        _item("pressure_test", "Pipework pressure test", "hold",
+              "Hydrostatic pressure test", "No pressure drop over the test period", _per(1, "system"), "Mechanical Engineer",
+              _limit("pressure_drop", "kPa", max=0)),
+    ),
+}
+
+# Items contributed by each referenced specification, keyed by normalized family code
+SPEC_TEMPLATES: Dict[str, Tuple[Dict[str, Any], ...]] = {
+    "AS 1289": (
+        _item("compaction", "Field density / compaction testing", "witness",
+              "AS 1289.5.4.1", "Relative compaction not less than 95% (standard)", _per(1, "m2", 500), "Testing Laboratory",
+              _limit("relative_compaction", "%", min=95)),
+        _item("moisture_content", "Moisture content at placement", "surveillance",
+              "AS 1289.2.1.1", "Within -2% to +1% of optimum moisture content", _per(1, "m2", 500), "Testing Laboratory",
+              _limit("moisture_variation", "%", min=-2, max=1)),
+        _item("proof_roll", "Proof roll of completed layer", "hold",
+              "Visual inspection under loaded roller", "No visible deflection or heaving", _per(1, "layer"), "Geotechnical Engineer"),
+    ),
+    "AS 1379": (
+        _item("concrete_supply", "Concrete delivery dockets checked", "record",
+              "Docket review", "Mix, grade and batch time match the approved mix", _per(1, "truck")),
+        _item("slump", "Slump test on delivery", "witness",
+              "AS 1012.3.1", "Slump within 80 +/- 15 mm", _per(1, "m3", 50), "Testing Laboratory",
+              _limit("slump", "mm", min=65, max=95)),
+    ),
+    "AS 3600": (
+        _item("cover", "Cover to reinforcement", "witness",
+              "Measurement", "Cover not less than 40 mm", _per(1, "pour"), "Structural Engineer",
+              _limit("cover", "mm", min=40)),
+        _item("compressive_strength", "Compressive strength cylinders", "witness",
+              "AS 1012.9", "28 day strength not less than 32 MPa", _per(1, "m3", 50), "Testing Laboratory",
+              _limit("compressive_strength_28d", "MPa", min=32)),
+        _item("curing", "Curing of placed concrete", "surveillance",
+              "Visual inspection", "Continuous curing for at least 7 days", _per(1, "pour")),
+    ),
+    "AS 4100": (
+        _item("bolt_tension", "Bolt tensioning", "witness",
+              "Part-turn or direct tension indication", "Minimum bolt tension achieved", _per(1, "connection"), "Structural Engineer"),
+        _item("weld_inspection", "Weld inspection", "hold",
+              "AS/NZS 1554.1 visual and NDE", "Welds meet SP category acceptance", _per(1, "connection"), "Welding Inspector"),
+        _item("coating_thickness", "Protective coating dry film thickness", "witness",
+              "DFT gauge", "DFT not less than 125 um", _per(5, "m2", 10), "Coating Inspector",
+              _limit("dry_film_thickness", "um", min=125)),
+    ),
+    "AS 3000": (
+        _item("insulation_resistance", "Insulation resistance test", "witness",
+              "AS/NZS 3017", "Insulation resistance not less than 1 MOhm", _per(1, "circuit"), "Electrical Supervisor",
+              _limit("insulation_resistance", "MOhm", min=1)),
+        _item("earth_continuity", "Earth continuity test", "witness",
+              "AS/NZS 3017", "Earth resistance not more than 0.5 Ohm", _per(1, "circuit"), "Electrical Supervisor",
+              _limit("earth_resistance", "Ohm", max=0.5)),
+    ),
+    "ISO 9001": (
+        _item("nonconformance_closeout", "Nonconformances closed out", "hold",
+              "Register review", "All NCRs against the lot closed", _per(1, "lot"), "Quality Manager"),
+    ),
+    "ISO 14001": (
+        _item("environmental_controls", "Environmental controls in place", "surveillance",
+              "Site inspection", "Erosion, sediment and dust controls per EMP", _per(1, "week"), "Environmental Officer"),
+    ),
+}
+
+_SPEC_FAMILY_RE = re.compile(r"^\s*(AS/NZS|AS|ISO|BS|EN|ASTM)\s*([A-Z]?\d+)", re.IGNORECASE)
+
+def spec_family(spec_code: str) -> str:
+    """Normalize a specification reference to its family code, e.g. 'AS1289.5.4.1' -> 'AS 1289'"""
+    match = _SPEC_FAMILY_RE.match(spec_code)
+    if not match:
+        return spec_code.strip().upper()
+    org = match.group(1).upper()
+    if org == "AS/NZS":
+        org = "AS"
+    return f"{org} {match.group(2).upper()}"
+
+@lru_cache(maxsize=1024)
+def compile_spec_template(family: str) -> Tuple[Dict[str, Any], ...]:
+    """Compile the items of one specification family, tagged with their spec reference"""
+    items = SPEC_TEMPLATES.get(family)
+    if items is None:
+        # Specifications without a template still get a compliance check
+        items = (
+            _item("compliance", f"Compliance with {family}", "witness",
+                  "Inspection per specification", f"Works comply with {family}", _per(1, "lot")),
+        )
+    return tuple({**item, "key": f"{family}:{item['key']}", "spec_ref": family} for item in items)
+
+@lru_cache(maxsize=4096)
+def compile_itp_template(families: Tuple[str, ...], discipline: Optional[str]) -> Dict[str, Any]:
+    """Compile the ordered item list for a discipline and a set of specification families.
+
+    Compiled templates are cached, so every WBS node sharing the same
+    discipline and specifications reuses one item list.
+    """
+    items: List[Dict[str, Any]] = list(PRELIMINARY_ITEMS)
+    items.extend(DISCIPLINE_TEMPLATES.get(discipline or "", ()))
+    for family in families:
+        items.extend(compile_spec_template(family))
+    items.extend(CLOSEOUT_ITEMS)
+
+    point_counts = {point_type: 0 for point_type in POINT_TYPES}
+    for item in items:
+        point_counts[item["point_type"]] += 1
+
+    return {
+        "items": tuple(items),
+        "point_counts": point_counts,
+        "specifications": families
+    }
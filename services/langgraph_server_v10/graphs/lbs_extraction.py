@@ -1,11 +1,255 @@
-from langgraph.graph import Graph
+from typing import Dict, List, Any, Optional, Tuple
+import re
+from graphs.state import GraphState
+from graphs.wbs_diff import stable_node_id
+from graphs.edges import EdgeBuffer
 
-def create_lbs_extraction_graph():
-    g = Graph()
-    async def run(config):
-        return {"mapping_content": {"lot_cards": []}, "edges": []}
-    g.add_node("run", run)
-    g.set_entry_point("run")
-    return g
+FEET_TO_METRES = 0.3048
 
+class LbsExtractionState(GraphState):
+    project_id: str
+    txt_project_documents: List[Dict[str, Any]] = []
+    lbs_structure: Optional[Dict[str, Any]] = None
+    lbs_asset_specs: List[Dict[str, Any]] = []
+    edges: List[Dict[str, Any]] = []
+    error: str = ""
+    done: bool = False
 
+# "CH 1+250", "Ch. 1250.5", "chainage 12+340.2"; an optional second value makes a range
+_CHAINAGE_VALUE = r"(\d+)(?:\s*\+\s*(\d+(?:\.\d+)?)|(\.\d+))?"
+_CHAINAGE_RE = re.compile(
+    rf"\b(?:CH|Chainage)[.:]?\s*{_CHAINAGE_VALUE}(?:\s*(?:to|-|–)\s*(?:CH|Chainage)?[.:]?\s*{_CHAINAGE_VALUE})?",
+    re.IGNORECASE
+)
+# US stationing, "STA 12+50" = 1250 ft
+_STATION_VALUE = r"(\d+)\s*\+\s*(\d+(?:\.\d+)?)"
+_STATION_RE = re.compile(
+    rf"\b(?:STA|Station)[.:]?\s*{_STATION_VALUE}(?:\s*(?:to|-|–)\s*(?:STA|Station)?[.:]?\s*{_STATION_VALUE})?",
+    re.IGNORECASE
+)
+_GRID_RE = re.compile(
+    r"\bE(?:asting)?\s*[:=]?\s*(\d{6}(?:\.\d+)?)\s*[,;]?\s*N(?:orthing)?\s*[:=]?\s*(\d{7}(?:\.\d+)?)",
+    re.IGNORECASE
+)
+_LATLON_RE = re.compile(r"(-?\d{1,2}\.\d{4,})\s*,\s*(-?\d{1,3}\.\d{4,})")
+_ZONE_RE = re.compile(r"\b(Zone|Area|Precinct)\s+([A-Z0-9]{1,3})\b")
+
+def _chainage(whole: str, plus: Optional[str], fraction: Optional[str]) -> float:
+    if plus is not None:
+        # km+metres notation
+        return int(whole) * 1000 + float(plus)
+    return float(whole + (fraction or ""))
+
+def _format_chainage(value: float) -> str:
+    km, metres = divmod(value, 1000)
+    formatted = f"{metres:06.2f}"
+    if formatted.endswith(".00"):
+        formatted = formatted[:-3]
+    return f"CH {int(km)}+{formatted}"
+
+def parse_locations(content: str) -> List[Dict[str, Any]]:
+    """Find chainages, stations, grid references and zones in document content, line by line"""
+    locations = []
+
+    for line in content.splitlines():
+        zones = [f"{kind} {code}" for kind, code in _ZONE_RE.findall(line)]
+        zone = zones[0] if zones else None
+        for name in zones:
+            locations.append({"kind": "zone", "name": name})
+
+        for match in _CHAINAGE_RE.finditer(line):
+            start = _chainage(*match.group(1, 2, 3))
+            end = _chainage(*match.group(4, 5, 6)) if match.group(4) else start
+            locations.append({"kind": "chainage", "start": min(start, end), "end": max(start, end),
+                              "zone": zone, "reference": match.group(0).strip()})
+
+        for match in _STATION_RE.finditer(line):
+            start = (int(match.group(1)) * 100 + float(match.group(2))) * FEET_TO_METRES
+            end = (int(match.group(3)) * 100 + float(match.group(4))) * FEET_TO_METRES if match.group(3) else start
+            locations.append({"kind": "chainage", "start": round(min(start, end), 3), "end": round(max(start, end), 3),
+                              "zone": zone, "reference": match.group(0).strip()})
+
+        for easting, northing in _GRID_RE.findall(line):
+            locations.append({"kind": "point", "coordinates": {"easting": float(easting), "northing": float(northing)},
+                              "zone": zone, "reference": f"E {easting} N {northing}"})
+
+        for lat, lon in _LATLON_RE.findall(line):
+            lat_value, lon_value = float(lat), float(lon)
+            if abs(lat_value) <= 90 and abs(lon_value) <= 180:
+                locations.append({"kind": "point", "coordinates": {"lat": lat_value, "lon": lon_value},
+                                  "zone": zone, "reference": f"{lat}, {lon}"})
+
+    return locations
+
+def generate_lbs_hierarchy(project_id: str, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build a site > zone > chainage/element hierarchy from the locations found in documents"""
+    site_id = stable_node_id(["site", project_id])
+    nodes: Dict[str, Dict[str, Any]] = {
+        site_id: {
+            "id": site_id,
+            "parentId": None,
+            "node_type": "site",
+            "name": "Project Site",
+            "description": "Project site",
+            "source_document_ids": []
+        }
+    }
+
+    def add_node(node_id: str, node: Dict[str, Any], doc_id: Optional[str]) -> None:
+        # The same location cited by several documents is one node
+        existing = nodes.setdefault(node_id, {"id": node_id, **node, "source_document_ids": []})
+        if doc_id and doc_id not in existing["source_document_ids"]:
+            existing["source_document_ids"].append(doc_id)
+
+    def zone_id(name: str) -> str:
+        return stable_node_id(["site", project_id, name])
+
+    for doc in documents:
+        doc_id = doc.get("id")
+        for location in parse_locations(doc.get("content", "")):
+            if location["kind"] == "zone":
+                add_node(zone_id(location["name"]), {
+                    "parentId": site_id,
+                    "node_type": "zone",
+                    "name": location["name"],
+                    "description": f"{location['name']} of the works"
+                }, doc_id)
+                continue
+
+            parent_id = zone_id(location["zone"]) if location["zone"] else site_id
+            if location["kind"] == "chainage":
+                start, end = location["start"], location["end"]
+                name = _format_chainage(start) if start == end else f"{_format_chainage(start)} to {_format_chainage(end)}"
+                add_node(stable_node_id(["site", project_id, location["zone"] or "", name]), {
+                    "parentId": parent_id,
+                    "node_type": "chainage",
+                    "name": name,
+                    "description": location["reference"],
+                    "chainage_start": start,
+                    "chainage_end": end
+                }, doc_id)
+            else:
+                add_node(stable_node_id(["site", project_id, location["zone"] or "", location["reference"]]), {
+                    "parentId": parent_id,
+                    "node_type": "element",
+                    "name": location["reference"],
+                    "description": f"Location at {location['reference']}",
+                    "coordinates": location["coordinates"]
+                }, doc_id)
+
+    node_list = list(nodes.values())
+    return {
+        "nodes": node_list,
+        "metadata": {
+            "total_nodes": len(node_list),
+            "zones_count": sum(1 for n in node_list if n["node_type"] == "zone"),
+            "chainage_count": sum(1 for n in node_list if n["node_type"] == "chainage"),
+            "point_count": sum(1 for n in node_list if n["node_type"] == "element"),
+            "chainage_unit": "m"
+        }
+    }
+
+def lbs_extraction_node(state: LbsExtractionState) -> Dict[str, Any]:
+    """Extract the location breakdown structure from project documents"""
+    try:
+        if not state.txt_project_documents:
+            return {"lbs_structure": None, "error": "No documents provided"}
+
+        lbs_structure = generate_lbs_hierarchy(state.project_id, state.txt_project_documents)
+
+        return {
+            "lbs_structure": lbs_structure,
+            "done": True
+        }
+
+    except Exception as e:
+        return {
+            "error": f"LBS extraction failed: {str(e)}",
+            "lbs_structure": None,
+            "done": True
+        }
+
+def create_lbs_asset_specs(state: LbsExtractionState) -> List[Dict[str, Any]]:
+    """Create asset write specifications for the LBS plan and its nodes"""
+    if not state.lbs_structure:
+        return []
+
+    specs = [{
+        "asset": {
+            "type": "plan",
+            "subtype": "lbs",
+            "name": "Location Breakdown Structure",
+            "project_id": state.project_id,
+            "content": state.lbs_structure
+        },
+        "idempotency_key": f"lbs_plan:{state.project_id}"
+    }]
+
+    for node in state.lbs_structure["nodes"]:
+        specs.append({
+            "asset": {
+                "type": "lbs_node",
+                "subtype": node["node_type"],
+                "name": node["name"],
+                "project_id": state.project_id,
+                "content": {
+                    "lbs_id": node["id"],
+                    "parent_lbs_id": node.get("parentId"),
+                    "node_type": node["node_type"],
+                    "description": node["description"],
+                    "chainage_start": node.get("chainage_start"),
+                    "chainage_end": node.get("chainage_end"),
+                    "coordinates": node.get("coordinates"),
+                    "source_document_ids": node["source_document_ids"]
+                }
+            },
+            "idempotency_key": f"lbs_node:{state.project_id}:{node['id']}"
+        })
+
+    return specs
+
+def create_lbs_edge_specs(state: LbsExtractionState) -> List[Dict[str, Any]]:
+    """Create PARENT_OF edges for the LBS hierarchy"""
+    if not state.lbs_structure:
+        return []
+
+    edges = EdgeBuffer()
+    for node in state.lbs_structure["nodes"]:
+        if not node.get("parentId"):
+            continue
+        edges.add(
+            "",  # Will be set to child asset ID
+            "",  # Will be set to parent asset ID
+            "PARENT_OF",
+            f"lbs_edge:{state.project_id}:{node['id']}:{node['parentId']}",
+            {
+                "hierarchy_level": node["node_type"],
+                "child_lbs_id": node["id"],
+                "parent_lbs_id": node["parentId"]
+            }
+        )
+
+    return edges.to_list()
+
+# Graph definition
+def create_lbs_extraction_graph(checkpointer=None):
+    """Create the LBS extraction graph"""
+    from langgraph.graph import StateGraph
+
+    graph = StateGraph(LbsExtractionState)
+
+    # Add nodes
+    graph.add_node("extract_lbs", lbs_extraction_node)
+    graph.add_node("create_lbs_assets", lambda state: {
+        "lbs_asset_specs": create_lbs_asset_specs(state)
+    })
+    graph.add_node("create_lbs_edges", lambda state: {
+        "edges": create_lbs_edge_specs(state)
+    })
+
+    # Define flow
+    graph.set_entry_point("extract_lbs")
+    graph.add_edge("extract_lbs", "create_lbs_assets")
+    graph.add_edge("create_lbs_assets", "create_lbs_edges")
+
+    return graph.compile(checkpointer=checkpointer)
@@ -0,0 +1,122 @@
+from typing import Dict, List, Any, Optional, Tuple
+import json
+import numpy as np
+
+# Coordinate reference systems point locations are grouped by
+CRS_GRID = "grid"      # easting / northing
+CRS_WGS84 = "wgs84"    # longitude / latitude
+
+class LbsIndex:
+    """Range indexes over the nodes of a location breakdown structure.
+
+    Chainage intervals are sorted by start with a running maximum of their
+    ends, so an overlap query is two binary searches plus a vectorized filter
+    over the candidate slice. Point locations are kept per coordinate system,
+    sorted by x, so a bounding box query only tests the points inside its x
+    range.
+    """
+
+    def __init__(self, nodes: List[Dict[str, Any]]):
+        self.nodes: Dict[str, Dict[str, Any]] = {n["id"]: n for n in nodes}
+
+        intervals = [
+            (float(n["chainage_start"]), float(n.get("chainage_end", n["chainage_start"])), n["id"])
+            for n in nodes if n.get("chainage_start") is not None
+        ]
+        intervals.sort()
+        self.interval_ids: List[str] = [node_id for _, _, node_id in intervals]
+        self.starts = np.array([start for start, _, _ in intervals], dtype=np.float64)
+        self.ends = np.array([end for _, end, _ in intervals], dtype=np.float64)
+        self.max_ends = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+        points: Dict[str, List[Tuple[float, float, str]]] = {}
+        for n in nodes:
+            location = _point(n.get("coordinates"))
+            if location:
+                crs, x, y = location
+                points.setdefault(crs, []).append((x, y, n["id"]))
+
+        self.points: Dict[str, Dict[str, Any]] = {}
+        for crs, entries in points.items():
+            entries.sort()
+            self.points[crs] = {
+                "xs": np.array([x for x, _, _ in entries], dtype=np.float64),
+                "ys": np.array([y for _, y, _ in entries], dtype=np.float64),
+                "ids": [node_id for _, _, node_id in entries]
+            }
+
+    def query_chainage(self, start: float, end: Optional[float] = None) -> List[str]:
+        """Return ids of chainage nodes overlapping [start, end], ordered by chainage"""
+        if end is None:
+            end = start
+        if end < start:
+            start, end = end, start
+        # Intervals before `lo` all end before `start`; intervals from `hi` start after `end`
+        lo = int(np.searchsorted(self.max_ends, start, side="left"))
+        hi = int(np.searchsorted(self.starts, end, side="right"))
+        if lo >= hi:
+            return []
+        hits = np.nonzero(self.ends[lo:hi] >= start)[0] + lo
+        return [self.interval_ids[i] for i in hits]
+
+    def query_within(self, min_x: float, min_y: float, max_x: float, max_y: float, crs: str = CRS_GRID) -> List[str]:
+        """Return ids of point locations inside a bounding box"""
+        points = self.points.get(crs)
+        if not points:
+            return []
+        lo = int(np.searchsorted(points["xs"], min_x, side="left"))
+        hi = int(np.searchsorted(points["xs"], max_x, side="right"))
+        ys = points["ys"][lo:hi]
+        hits = np.nonzero((ys >= min_y) & (ys <= max_y))[0] + lo
+        return [points["ids"][i] for i in hits]
+
+    def save(self, path: str) -> None:
+        """Persist the nodes and index arrays to an .npz file"""
+        arrays = {
+            "nodes": np.array(json.dumps(list(self.nodes.values()), default=str)),
+            "interval_ids": np.array(self.interval_ids, dtype=str),
+            "starts": self.starts,
+            "ends": self.ends,
+            "max_ends": self.max_ends,
+            "crs": np.array(list(self.points), dtype=str)
+        }
+        for crs, points in self.points.items():
+            arrays[f"{crs}_xs"] = points["xs"]
+            arrays[f"{crs}_ys"] = points["ys"]
+            arrays[f"{crs}_ids"] = np.array(points["ids"], dtype=str)
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "LbsIndex":
+        """Load an index saved with `save` without re-sorting"""
+        index = cls.__new__(cls)
+        with np.load(path, allow_pickle=False) as data:
+            index.nodes = {n["id"]: n for n in json.loads(str(data["nodes"]))}
+            index.interval_ids = data["interval_ids"].tolist()
+            index.starts = data["starts"]
+            index.ends = data["ends"]
+            index.max_ends = data["max_ends"]
+            index.points = {
+                crs: {
+                    "xs": data[f"{crs}_xs"],
+                    "ys": data[f"{crs}_ys"],
+                    "ids": data[f"{crs}_ids"].tolist()
+                }
+                for crs in data["crs"].tolist()
+            }
+        return index
+
+def _point(coordinates: Optional[Dict[str, Any]]) -> Optional[Tuple[str, float, float]]:
+    if not coordinates:
+        return None
+    if coordinates.get("easting") is not None and coordinates.get("northing") is not None:
+        return CRS_GRID, float(coordinates["easting"]), float(coordinates["northing"])
+    if coordinates.get("lon") is not None and coordinates.get("lat") is not None:
+        return CRS_WGS84, float(coordinates["lon"]), float(coordinates["lat"])
+    return None
+
+def build_lbs_index(lbs_structure: Optional[Dict[str, Any]]) -> LbsIndex:
+    """Build range indexes for an LBS structure"""
+    nodes = (lbs_structure or {}).get("nodes") or []
+    return LbsIndex(nodes)
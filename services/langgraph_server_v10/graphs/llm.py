@@ -0,0 +1,361 @@
+from typing import Dict, List, Any, Optional, AsyncIterator, Set, Tuple
+from functools import partial
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+# Chat messages are plain {"role": ..., "content": ...} dicts
+Message = Dict[str, str]
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count used for rate limiting - about four characters per token"""
+    return max(1, len(text) // 4)
+
+def prompt_key(model: str, messages: List[Message], params: Dict[str, Any]) -> str:
+    """Hash a request; identical model, messages and parameters give the same key"""
+    payload = json.dumps({"model": model, "messages": messages, "params": params}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class TokenBucket:
+    """Async token bucket refilling at `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        # A request larger than the bucket waits for a full bucket instead of forever
+        amount = min(amount, self.capacity)
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        # The lock keeps waiters in arrival order
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+class PromptCache:
+    """Exact-match response cache in a local SQLite file, evicting least recently used entries past `max_bytes`"""
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS prompt_cache ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS prompt_cache_last_used ON prompt_cache (last_used)")
+        self.size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM prompt_cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute("SELECT response FROM prompt_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE prompt_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        size = len(response.encode("utf-8"))
+        with self.lock:
+            previous = self.conn.execute("SELECT size FROM prompt_cache WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT INTO prompt_cache (key, response, size, last_used) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET response = excluded.response, size = excluded.size, last_used = excluded.last_used",
+                (key, response, size, time.time())
+            )
+            self.size += size - (previous[0] if previous else 0)
+            while self.size > self.max_bytes:
+                oldest = self.conn.execute(
+                    "SELECT key, size FROM prompt_cache WHERE key != ? ORDER BY last_used LIMIT 64", (key,)
+                ).fetchall()
+                if not oldest:
+                    break
+                for old_key, old_size in oldest:
+                    if self.size <= self.max_bytes:
+                        break
+                    self.conn.execute("DELETE FROM prompt_cache WHERE key = ?", (old_key,))
+                    self.size -= old_size
+
+    def report(self) -> Dict[str, Any]:
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM prompt_cache").fetchone()[0]
+        return {"entries": entries, "bytes": self.size}
+
+    def close(self) -> None:
+        self.conn.close()
+
+class FakeBackend:
+    """Offline backend for tests and local runs.
+
+    Responses recorded with `LLMClient(record_path=...)` are replayed by
+    prompt key; anything not recorded gets a deterministic response derived
+    from the key, so repeated runs produce identical output.
+    """
+
+    def __init__(self, replay_path: Optional[str] = None, latency: float = 0.0):
+        self.latency = latency
+        self.responses: Dict[str, str] = {}
+        if replay_path and Path(replay_path).is_file():
+            with open(replay_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.responses[entry["key"]] = entry["response"]
+
+    def respond(self, key: str, messages: List[Message]) -> str:
+        if key in self.responses:
+            return self.responses[key]
+        prompt = messages[-1]["content"] if messages else ""
+        return f"[fake {key[:12]}] {prompt[:200]}"
+
+    async def abatch(self, requests: List[Tuple[str, List[Message], Dict[str, Any]]]) -> List[str]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self.respond(key, messages) for key, messages, _ in requests]
+
+    async def astream(self, key: str, messages: List[Message], params: Dict[str, Any]) -> AsyncIterator[str]:
+        for i, word in enumerate(self.respond(key, messages).split(" ")):
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            yield word if i == 0 else " " + word
+
+class OpenAIBackend:
+    """OpenAI chat models through langchain-openai"""
+
+    def __init__(self, model: str, **kwargs):
+        self.model = model
+        self.kwargs = kwargs
+        self._llm = None
+
+    def _chat(self, params: Dict[str, Any]):
+        if self._llm is None:
+            # Imported here so the fake backend works without the OpenAI client configured
+            from langchain_openai import ChatOpenAI
+            self._llm = ChatOpenAI(model=self.model, **self.kwargs)
+        return self._llm.bind(**params) if params else self._llm
+
+    async def abatch(self, requests: List[Tuple[str, List[Message], Dict[str, Any]]]) -> List[str]:
+        # Requests sharing parameters go out in one batch call
+        groups: Dict[str, List[int]] = {}
+        for i, (_, _, params) in enumerate(requests):
+            groups.setdefault(json.dumps(params, sort_keys=True), []).append(i)
+
+        results: List[str] = [""] * len(requests)
+        for indices in groups.values():
+            chat = self._chat(requests[indices[0]][2])
+            replies = await chat.abatch([requests[i][1] for i in indices], config={"max_concurrency": len(indices)})
+            for i, reply in zip(indices, replies):
+                results[i] = reply.content
+        return results
+
+    async def astream(self, key: str, messages: List[Message], params: Dict[str, Any]) -> AsyncIterator[str]:
+        async for chunk in self._chat(params).astream(messages):
+            if chunk.content:
+                yield chunk.content
+
+class LLMClient:
+    """Shared entry point for model calls from graph nodes.
+
+    Calls are answered from the prompt cache where possible; identical calls
+    already in flight share one backend request. The rest are collected for
+    up to `batch_window` seconds into batches of `batch_size`, and each batch
+    waits for a concurrency slot and for the request and token rate limits
+    before it is sent.
+    """
+
+    def __init__(self, backend: Any, model: str, cache: Optional[PromptCache] = None,
+                 max_concurrency: int = 4, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None, batch_size: int = 8,
+                 batch_window: float = 0.02, record_path: Optional[str] = None):
+        self.backend = backend
+        self.model = model
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.record_path = record_path
+        self.request_limit = TokenBucket(requests_per_minute / 60.0, max(1.0, requests_per_minute / 60.0 * batch_size)) if requests_per_minute else None
+        self.token_limit = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute / 6.0) if tokens_per_minute else None
+        self.stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "backend_requests": 0, "batches": 0,
+                      "streams": 0, "prompt_tokens": 0, "completion_tokens": 0, "errors": 0}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._record_lock = threading.Lock()
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        # Futures, locks and timers belong to one event loop; start fresh when called from another
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight: Dict[str, asyncio.Future] = {}
+            self._pending: List[Tuple[str, List[Message], Dict[str, Any], asyncio.Future]] = []
+            self._timer: Optional[asyncio.TimerHandle] = None
+            # The loop only keeps weak references to tasks; these are the batches in flight
+            self._sending: Set[asyncio.Task] = set()
+            if self.request_limit:
+                self.request_limit.lock = None
+            if self.token_limit:
+                self.token_limit.lock = None
+        return loop
+
+    async def complete(self, messages: List[Message], **params) -> str:
+        """Return the model's reply to `messages`"""
+        loop = self._bind_loop()
+        key = prompt_key(self.model, messages, params)
+        self.stats["requests"] += 1
+
+        if self.cache:
+            cached = await loop.run_in_executor(None, self.cache.get, key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                return cached
+
+        if key in self._inflight:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self._inflight[key])
+
+        future = loop.create_future()
+        self._inflight[key] = future
+        self._pending.append((key, messages, params, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush_pending()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.batch_window, self._flush_pending)
+        return await asyncio.shield(future)
+
+    async def complete_many(self, requests: List[List[Message]], **params) -> List[str]:
+        """Complete several prompts; they are batched together"""
+        return list(await asyncio.gather(*(self.complete(messages, **params) for messages in requests)))
+
+    def _flush_pending(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            task = asyncio.ensure_future(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(partial(self._sent, batch))
+
+    def _sent(self, batch: List[Tuple[str, List[Message], Dict[str, Any], asyncio.Future]], task: asyncio.Task) -> None:
+        self._sending.discard(task)
+        if not task.cancelled() and task.exception() is None:
+            return
+        # Backend errors are handed to the callers in _send; anything else
+        # (a failed cache write, cancellation) must not leave callers waiting
+        if not task.cancelled():
+            self.stats["errors"] += 1
+        for key, _, _, future in batch:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if not future.done():
+                if task.cancelled():
+                    future.cancel()
+                else:
+                    future.set_exception(task.exception())
+
+    async def _acquire(self, requests: int, tokens: int) -> None:
+        if self.request_limit:
+            await self.request_limit.acquire(requests)
+        if self.token_limit:
+            await self.token_limit.acquire(tokens)
+
+    async def _send(self, batch: List[Tuple[str, List[Message], Dict[str, Any], asyncio.Future]]) -> None:
+        prompt_tokens = sum(estimate_tokens(m["content"]) for _, messages, _, _ in batch for m in messages)
+        try:
+            async with self._semaphore:
+                await self._acquire(len(batch), prompt_tokens)
+                self.stats["batches"] += 1
+                self.stats["backend_requests"] += len(batch)
+                replies = await self.backend.abatch([(key, messages, params) for key, messages, params, _ in batch])
+        except Exception as e:
+            self.stats["errors"] += 1
+            for key, _, _, future in batch:
+                self._inflight.pop(key, None)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["completion_tokens"] += sum(estimate_tokens(reply) for reply in replies)
+        for (key, _, _, future), reply in zip(batch, replies):
+            self._inflight.pop(key, None)
+            if not future.done():
+                future.set_result(reply)
+        await asyncio.get_running_loop().run_in_executor(None, self._store, [(key, reply) for (key, _, _, _), reply in zip(batch, replies)])
+
+    def _store(self, entries: List[Tuple[str, str]]) -> None:
+        if self.cache:
+            for key, reply in entries:
+                self.cache.put(key, reply)
+        if self.record_path:
+            with self._record_lock, open(self.record_path, "a", encoding="utf-8") as f:
+                for key, reply in entries:
+                    f.write(json.dumps({"key": key, "response": reply}) + "\n")
+
+    async def stream(self, messages: List[Message], **params) -> AsyncIterator[str]:
+        """Yield the reply to `messages` as it is generated; cached replies arrive as one chunk"""
+        loop = self._bind_loop()
+        key = prompt_key(self.model, messages, params)
+        self.stats["requests"] += 1
+        self.stats["streams"] += 1
+
+        if self.cache:
+            cached = await loop.run_in_executor(None, self.cache.get, key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                yield cached
+                return
+
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        chunks: List[str] = []
+        async with self._semaphore:
+            await self._acquire(1, prompt_tokens)
+            self.stats["backend_requests"] += 1
+            async for chunk in self.backend.astream(key, messages, params):
+                chunks.append(chunk)
+                yield chunk
+
+        reply = "".join(chunks)
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["completion_tokens"] += estimate_tokens(reply)
+        await loop.run_in_executor(None, self._store, [(key, reply)])
+
+    def report(self) -> Dict[str, Any]:
+        report = {"model": self.model, "backend": type(self.backend).__name__, **self.stats}
+        if self.cache:
+            report["cache"] = self.cache.report()
+        return report
+
+llm_client = LLMClient(FakeBackend(), model="fake")
+
+def configure_llm_client(backend: str = "fake", model: str = "gpt-4o-mini", cache_dir: Optional[str] = None,
+                         cache_max_bytes: int = 512 * 1024 * 1024, replay_path: Optional[str] = None,
+                         **options) -> LLMClient:
+    """Replace the process-wide LLM client"""
+    global llm_client
+    if backend == "openai":
+        backend_impl = OpenAIBackend(model)
+    elif backend == "fake":
+        backend_impl = FakeBackend(replay_path)
+    else:
+        raise ValueError(f"Unknown LLM backend: {backend}")
+    cache = PromptCache(str(Path(cache_dir) / "prompt_cache.sqlite"), cache_max_bytes) if cache_dir else None
+    llm_client = LLMClient(backend_impl, model=model, cache=cache, **options)
+    return llm_client
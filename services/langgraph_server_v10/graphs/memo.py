@@ -0,0 +1,159 @@
+from typing import Dict, Any, Optional, Callable, Iterable, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import functools
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import threading
+
+class NodeCache:
+    """Bounded LRU of pickled node outputs with an optional on-disk tier.
+
+    Outputs are stored pickled, so every hit hands back a fresh copy and the
+    byte bound is exact. Disk entries live under `<disk_dir>/<node>/<version>/`;
+    directories of other code versions are removed the first time a node
+    version is used.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 256 * 1024 * 1024, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self.size = 0
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.lock = threading.Lock()
+        self._pruned: set = set()
+
+    def _node_stats(self, node: str) -> Dict[str, int]:
+        return self.stats.setdefault(node, {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0})
+
+    def _disk_path(self, node: str, version: str, key: str) -> Optional[Path]:
+        if self.disk_dir is None:
+            return None
+        node_dir = self.disk_dir / node
+        if (node, version) not in self._pruned:
+            self._pruned.add((node, version))
+            if node_dir.is_dir():
+                for stale in node_dir.iterdir():
+                    if stale.name != version:
+                        shutil.rmtree(stale, ignore_errors=True)
+        return node_dir / version / f"{key}.pkl"
+
+    def _remember(self, entry: Tuple[str, str], blob: bytes) -> None:
+        if entry in self.entries:
+            self.size -= len(self.entries.pop(entry))
+        self.entries[entry] = blob
+        self.size += len(blob)
+        while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def get(self, node: str, version: str, key: str) -> Optional[Any]:
+        entry = (node + ":" + version, key)
+        with self.lock:
+            stats = self._node_stats(node)
+            blob = self.entries.get(entry)
+            if blob is not None:
+                self.entries.move_to_end(entry)
+                stats["hits"] += 1
+                return pickle.loads(blob)
+            path = self._disk_path(node, version, key)
+
+        if path is not None and path.is_file():
+            try:
+                blob = path.read_bytes()
+                value = pickle.loads(blob)
+            except Exception:
+                value = None
+            if value is not None:
+                with self.lock:
+                    self._remember(entry, blob)
+                    stats["disk_hits"] += 1
+                return value
+
+        with self.lock:
+            stats["misses"] += 1
+        return None
+
+    def put(self, node: str, version: str, key: str, value: Any) -> None:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self._remember((node + ":" + version, key), blob)
+            self._node_stats(node)["stores"] += 1
+            path = self._disk_path(node, version, key)
+
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(blob)
+            os.replace(tmp, path)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+            self.stats.clear()
+
+    def report(self) -> Dict[str, Any]:
+        """Per-node hit counts and hit rates"""
+        with self.lock:
+            nodes = {}
+            for node, stats in self.stats.items():
+                lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+                hit_rate = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+                nodes[node] = {**stats, "hit_rate": round(hit_rate, 4)}
+            return {"entries": len(self.entries), "bytes": self.size, "nodes": nodes}
+
+node_cache = NodeCache()
+
+def configure_node_cache(max_entries: int = 256, max_bytes: int = 256 * 1024 * 1024, disk_dir: Optional[str] = None) -> NodeCache:
+    """Replace the process-wide node cache"""
+    global node_cache
+    node_cache = NodeCache(max_entries=max_entries, max_bytes=max_bytes, disk_dir=disk_dir)
+    return node_cache
+
+def code_version(modules: Iterable[str]) -> str:
+    """Hash the source of the given modules"""
+    digest = hashlib.sha1()
+    for name in modules:
+        digest.update(inspect.getsource(importlib.import_module(name)).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def fingerprint(values: Dict[str, Any]) -> str:
+    """Hash the canonical JSON form of the given input values"""
+    payload = json.dumps(values, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+def memoize_node(name: str, fields: Iterable[str], depends_on: Iterable[str] = ()) -> Callable:
+    """Cache a graph node's output keyed on the given state fields and the node's code.
+
+    The code version covers the node's own module and `depends_on` modules, so
+    editing any of them invalidates earlier entries. Outputs carrying an
+    `error` are not cached.
+    """
+    fields = tuple(fields)
+
+    def decorator(fn: Callable) -> Callable:
+        version = code_version((fn.__module__, *depends_on))
+
+        @functools.wraps(fn)
+        def wrapper(state):
+            key = fingerprint({f: getattr(state, f) for f in fields})
+            cached = node_cache.get(name, version, key)
+            if cached is not None:
+                return cached
+            result = fn(state)
+            if not result.get("error"):
+                node_cache.put(name, version, key, result)
+            return result
+
+        wrapper.code_version = version
+        return wrapper
+
+    return decorator
@@ -1,121 +1,207 @@
 from typing import Dict, List, Any, Optional, Annotated
+from functools import lru_cache
 from pydantic import BaseModel
 import asyncio
-
-class OrchestratorState(BaseModel):
+from graphs.state import GraphState, append
+from graphs.document_extraction import create_document_extraction_graph
+from graphs.project_details import create_project_details_extraction_graph
+from graphs.standards_extraction import create_standards_extraction_graph
+from graphs.wbs_extraction import create_wbs_extraction_graph
+from graphs.plan_generation import create_plan_generation_graph
+from graphs.itp_generation import create_itp_generation_graph
+from graphs.lbs_extraction import create_lbs_extraction_graph
+
+class OrchestratorState(GraphState):
     project_id: str
     document_ids: Optional[List[str]] = []
-    txt_project_documents: Annotated[List[Dict[str, Any]], "add"] = []
-    standards_from_project_documents: Annotated[List[Dict[str, Any]], "add"] = []
+    # List fields use append reducers so parallel branches merge their writes
+    txt_project_documents: Annotated[List[Dict[str, Any]], append] = []
+    standards_from_project_documents: Annotated[List[Dict[str, Any]], append] = []
+    project_details: Optional[Dict[str, Any]] = None
     wbs_structure: Optional[Dict[str, Any]] = None
-    edges: List[Dict[str, Any]] = []
+    lbs_structure: Optional[Dict[str, Any]] = None
+    previous_wbs_structure: Optional[Dict[str, Any]] = None
+    retrieval_k: int = 0
+    asset_specs: Annotated[List[Dict[str, Any]], append] = []
+    edges: Annotated[List[Dict[str, Any]], append] = []
+    errors: Annotated[List[str], append] = []
+    plan_html: Optional[str] = None
+    generated_itps: List[Dict[str, Any]] = []
+
+@lru_cache(maxsize=None)
+def get_subgraphs() -> Dict[str, Any]:
+    """Compile the stage graphs once so every orchestrator run embeds the same instances"""
+    return {
+        "document_extraction": create_document_extraction_graph(),
+        "project_details": create_project_details_extraction_graph(),
+        "standards_extraction": create_standards_extraction_graph(),
+        "wbs_extraction": create_wbs_extraction_graph(),
+        "lbs_extraction": create_lbs_extraction_graph(),
+        "plan_generation": create_plan_generation_graph(),
+        "itp_generation": create_itp_generation_graph()
+    }
+
+def _errors(result: Dict[str, Any]) -> List[str]:
+    return [result["error"]] if result.get("error") else []
 
-def document_extraction_step(state: OrchestratorState) -> Dict[str, Any]:
+async def document_extraction_step(state: OrchestratorState) -> Dict[str, Any]:
     """Step 1: Extract content from documents"""
     if not state.document_ids:
         return {"txt_project_documents": []}
 
-    # Simulate document extraction
-    documents = []
-    for doc_id in state.document_ids:
-        documents.append({
-            "id": doc_id,
-            "file_name": f"document_{doc_id}.pdf",
-            "content": f"Extracted content for {doc_id}",
-            "project_id": state.project_id
-        })
+    result = await get_subgraphs()["document_extraction"].ainvoke({
+        "project_id": state.project_id,
+        "document_ids": state.document_ids
+    })
+
+    documents = [doc.dict() if isinstance(doc, BaseModel) else doc for doc in result.get("txt_project_documents") or []]
+    errors = [f"Document {f['uuid']} failed: {f['error']}" for f in result.get("failed_documents") or []]
+
+    return {
+        "txt_project_documents": documents,
+        "asset_specs": result.get("asset_specs") or [],
+        "errors": errors + _errors(result)
+    }
 
-    return {"txt_project_documents": documents}
+async def project_details_step(state: OrchestratorState) -> Dict[str, Any]:
+    """Step 2a: Extract project details"""
+    if not state.txt_project_documents:
+        return {"project_details": None}
+
+    result = await get_subgraphs()["project_details"].ainvoke({
+        "project_id": state.project_id,
+        "txt_project_documents": state.txt_project_documents,
+        "retrieval_k": state.retrieval_k
+    })
+
+    spec = result.get("project_details_asset_spec")
+    return {
+        "project_details": result.get("project_details"),
+        "asset_specs": [spec] if spec else [],
+        "errors": _errors(result)
+    }
 
-def standards_extraction_step(state: OrchestratorState) -> Dict[str, Any]:
-    """Step 2: Extract applicable standards"""
+async def standards_extraction_step(state: OrchestratorState) -> Dict[str, Any]:
+    """Step 2b: Extract applicable standards"""
     if not state.txt_project_documents:
         return {"standards_from_project_documents": []}
 
-    # Simulate standards extraction
-    standards = [{
-        "standard_code": "AS1289",
-        "uuid": "as1289-uuid",
-        "spec_name": "Methods of testing soils",
-        "org_identifier": "Standards Australia",
-        "section_reference": "1.1",
-        "context": "Soil testing methods",
-        "found_in_database": True,
-        "document_ids": [doc["id"] for doc in state.txt_project_documents]
-    }]
-
-    return {"standards_from_project_documents": standards}
-
-def wbs_extraction_step(state: OrchestratorState) -> Dict[str, Any]:
-    """Step 3: Generate Work Breakdown Structure"""
+    result = await get_subgraphs()["standards_extraction"].ainvoke({
+        "project_id": state.project_id,
+        "txt_project_documents": state.txt_project_documents
+    })
+
+    return {
+        "standards_from_project_documents": result.get("standards_from_project_documents") or [],
+        "asset_specs": result.get("standards_asset_specs") or [],
+        "edges": result.get("standards_doc_ref_edges") or [],
+        "errors": _errors(result)
+    }
+
+async def wbs_extraction_step(state: OrchestratorState) -> Dict[str, Any]:
+    """Step 2c: Generate Work Breakdown Structure"""
     if not state.txt_project_documents:
         return {"wbs_structure": None}
 
-    # Simulate WBS generation
-    wbs = {
-        "nodes": [
-            {
-                "id": "1",
-                "parentId": None,
-                "node_type": "discipline",
-                "name": "Civil Works",
-                "source_reference_uuids": [doc["id"] for doc in state.txt_project_documents],
-                "source_reference_hints": ["Civil engineering specifications"],
-                "description": "All civil engineering works",
-                "applicable_specifications": ["AS1289"],
-                "itp_required": True,
-                "is_leaf_node": False
-            },
-            {
-                "id": "1.1",
-                "parentId": "1",
-                "node_type": "work_package",
-                "name": "Earthworks",
-                "source_reference_uuids": [doc["id"] for doc in state.txt_project_documents],
-                "description": "Excavation and earthmoving",
-                "applicable_specifications": ["AS1289"],
-                "itp_required": True,
-                "is_leaf_node": True
-            }
-        ]
+    result = await get_subgraphs()["wbs_extraction"].ainvoke({
+        "project_id": state.project_id,
+        "txt_project_documents": state.txt_project_documents,
+        "previous_wbs_structure": state.previous_wbs_structure
+    })
+
+    return {
+        "wbs_structure": result.get("wbs_structure"),
+        "asset_specs": result.get("wbs_asset_specs") or [],
+        # The WBS graph's own PARENT_OF edges, keyed per project like its node assets
+        "edges": (result.get("wbs_edge_specs") or []) + (result.get("doc_ref_edges") or []),
+        "errors": _errors(result)
     }
 
-    # Generate edges for WBS hierarchy
-    edges = []
-    for node in wbs["nodes"]:
-        if node["parentId"]:
-            edges.append({
-                "from_asset_id": f"wbs_{node['id']}",
-                "to_asset_id": f"wbs_{node['parentId']}",
-                "edge_type": "PARENT_OF",
-                "properties": {},
-                "idempotency_key": f"parent_of:{node['id']}:{node['parentId']}"
-            })
-
-    return {"wbs_structure": wbs, "edges": edges}
-
-def plan_generation_step(state: OrchestratorState) -> Dict[str, Any]:
-    """Step 4: Generate project plans"""
-    # Simulate plan generation
-    return {"plan_html": "<h1>Project Quality Plan</h1><p>Generated plan content...</p>"}
+async def lbs_extraction_step(state: OrchestratorState) -> Dict[str, Any]:
+    """Step 2d: Extract the Location Breakdown Structure"""
+    if not state.txt_project_documents:
+        return {"lbs_structure": None}
+
+    result = await get_subgraphs()["lbs_extraction"].ainvoke({
+        "project_id": state.project_id,
+        "txt_project_documents": state.txt_project_documents
+    })
+
+    return {
+        "lbs_structure": result.get("lbs_structure"),
+        "asset_specs": result.get("lbs_asset_specs") or [],
+        "edges": result.get("edges") or [],
+        "errors": _errors(result)
+    }
+
+async def itp_generation_step(state: OrchestratorState) -> Dict[str, Any]:
+    """Step 3: Generate ITPs for the WBS once all branches have joined"""
+    if not state.wbs_structure:
+        return {"generated_itps": []}
+
+    result = await get_subgraphs()["itp_generation"].ainvoke({
+        "project_id": state.project_id,
+        "wbs_structure": state.wbs_structure,
+        "standards_from_project_documents": state.standards_from_project_documents
+    })
+
+    return {
+        "generated_itps": result.get("generated_itps") or [],
+        "asset_specs": result.get("itp_asset_specs") or [],
+        "edges": result.get("edges") or [],
+        "errors": _errors(result)
+    }
+
+async def plan_generation_step(state: OrchestratorState) -> Dict[str, Any]:
+    """Step 4: Generate the quality, environmental and safety plans"""
+    result = await get_subgraphs()["plan_generation"].ainvoke({
+        "project_id": state.project_id,
+        "project_details": state.project_details,
+        "standards_from_project_documents": state.standards_from_project_documents,
+        "wbs_structure": state.wbs_structure,
+        "generated_itps": state.generated_itps
+    })
+
+    return {
+        "plan_html": result.get("plan_html"),
+        "asset_specs": result.get("plan_asset_specs") or [],
+        "edges": result.get("edges") or [],
+        "errors": _errors(result)
+    }
 
 # Graph definition
-def create_orchestrator_graph():
-    """Create the main orchestrator graph"""
+def create_orchestrator_graph(checkpointer=None):
+    """Create the main orchestrator graph.
+
+    Each stage embeds the compiled stage graph in-process, so documents and
+    intermediate results are passed between stages by reference instead of
+    through separate runs.
+    """
     from langgraph.graph import StateGraph
 
     graph = StateGraph(OrchestratorState)
 
     # Add nodes
     graph.add_node("document_extraction", document_extraction_step)
+    graph.add_node("project_details_extraction", project_details_step)
     graph.add_node("standards_extraction", standards_extraction_step)
     graph.add_node("wbs_extraction", wbs_extraction_step)
+    graph.add_node("lbs_extraction", lbs_extraction_step)
     graph.add_node("plan_generation", plan_generation_step)
+    graph.add_node("itp_generation", itp_generation_step)
 
-    # Define flow
+    # Define flow - project details, standards and WBS only depend on the
+    # extracted documents, so they fan out in the same step and join before
+    # ITP generation; the plans include the ITP register, so they come last.
+    # Nothing downstream needs the LBS, so that branch finishes on its own
     graph.set_entry_point("document_extraction")
+    graph.add_edge("document_extraction", "project_details_extraction")
     graph.add_edge("document_extraction", "standards_extraction")
-    graph.add_edge("standards_extraction", "wbs_extraction")
-    graph.add_edge("wbs_extraction", "plan_generation")
-
-    return graph.compile()
+    graph.add_edge("document_extraction", "wbs_extraction")
+    graph.add_edge("document_extraction", "lbs_extraction")
+    graph.add_edge(["project_details_extraction", "standards_extraction", "wbs_extraction"], "itp_generation")
+    graph.add_edge("itp_generation", "plan_generation")
+    graph.set_finish_point("plan_generation")
+    graph.set_finish_point("lbs_extraction")
+
+    return graph.compile(checkpointer=checkpointer)
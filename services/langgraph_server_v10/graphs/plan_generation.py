@@ -1,11 +1,140 @@
-from langgraph.graph import Graph
+from typing import Dict, List, Any, Optional
+import asyncio
+import graphs.memo as memo
+from graphs.state import GraphState
+from graphs.memo import code_version, fingerprint
+from graphs.events import emit_run_event
+from graphs.plan_templates import PLAN_TYPES, SECTIONS, render_section, assemble_plan
 
-def create_plan_generation_graph():
-    g = Graph()
-    async def run(config):
-        return {"plan_html": "<div>Plan TBD</div>", "edges": []}
-    g.add_node("run", run)
-    g.set_entry_point("run")
-    return g
+# Sections are re-rendered when their inputs or the templates change
+SECTION_VERSION = code_version(["graphs.plan_templates"])
 
+class PlanGenerationState(GraphState):
+    project_id: str
+    project_details: Optional[Dict[str, Any]] = None
+    standards_from_project_documents: List[Dict[str, Any]] = []
+    wbs_structure: Optional[Dict[str, Any]] = None
+    generated_itps: List[Dict[str, Any]] = []
+    plan_sections: List[Dict[str, Any]] = []
+    plans: Dict[str, str] = {}
+    plan_html: Optional[str] = None
+    plan_asset_specs: List[Dict[str, Any]] = []
+    edges: List[Dict[str, Any]] = []
+    error: str = ""
+    done: bool = False
 
+def _section_event(section: Dict[str, Any], html: str, cached: bool) -> Dict[str, Any]:
+    return {
+        "plan_type": section["plan_type"],
+        "section_id": section["section_id"],
+        "title": section["title"],
+        "html": html,
+        "cached": cached
+    }
+
+async def render_plan_sections(inputs: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Render every plan section, reusing cached sections whose inputs are unchanged.
+
+    Cache misses render concurrently in the default executor, and each section
+    is published as a `plan_section` run event as soon as it is ready, so
+    clients can show the plan filling in while the slower sections finish.
+    """
+    loop = asyncio.get_running_loop()
+    rendered: Dict[int, Dict[str, Any]] = {}
+    pending = {}
+
+    for i, section in enumerate(SECTIONS):
+        selected = section["select"](inputs)
+        key = fingerprint({"plan_type": section["plan_type"], "section_id": section["section_id"], "inputs": selected})
+        html = memo.node_cache.get("plan_section", SECTION_VERSION, key)
+        if html is not None:
+            rendered[i] = _section_event(section, html, True)
+            emit_run_event({"type": "plan_section", **rendered[i]})
+            continue
+        pending[loop.run_in_executor(None, render_section, section, selected)] = (i, key)
+
+    async def finish(future: asyncio.Future) -> None:
+        html = await future
+        i, key = pending[future]
+        memo.node_cache.put("plan_section", SECTION_VERSION, key, html)
+        rendered[i] = _section_event(SECTIONS[i], html, False)
+        emit_run_event({"type": "plan_section", **rendered[i]})
+
+    for done in asyncio.as_completed([finish(future) for future in pending]):
+        await done
+
+    return [rendered[i] for i in range(len(SECTIONS))]
+
+async def render_sections_node(state: PlanGenerationState) -> Dict[str, Any]:
+    """Render the sections of the quality, environmental and safety plans"""
+    try:
+        sections = await render_plan_sections({
+            "project_details": state.project_details,
+            "standards_from_project_documents": state.standards_from_project_documents,
+            "wbs_structure": state.wbs_structure,
+            "generated_itps": state.generated_itps
+        })
+        return {"plan_sections": sections}
+
+    except Exception as e:
+        return {
+            "error": f"Plan generation failed: {str(e)}",
+            "plan_sections": [],
+            "done": True
+        }
+
+def assemble_plans_node(state: PlanGenerationState) -> Dict[str, Any]:
+    """Join rendered sections into one document per plan type"""
+    if not state.plan_sections:
+        return {"plans": {}, "plan_html": None, "done": True}
+
+    plans = {
+        plan_type: assemble_plan(plan_type, [s["html"] for s in state.plan_sections if s["plan_type"] == plan_type])
+        for plan_type in PLAN_TYPES
+    }
+    return {"plans": plans, "plan_html": plans["quality"], "done": True}
+
+def create_plan_asset_specs(state: PlanGenerationState) -> List[Dict[str, Any]]:
+    """Create asset write specifications for the generated plans"""
+    specs = []
+
+    for plan_type, html in state.plans.items():
+        specs.append({
+            "asset": {
+                "type": "plan",
+                "subtype": plan_type,
+                "name": PLAN_TYPES[plan_type],
+                "project_id": state.project_id,
+                "content": {
+                    "html": html,
+                    "sections": [
+                        {"section_id": s["section_id"], "title": s["title"]}
+                        for s in state.plan_sections if s["plan_type"] == plan_type
+                    ]
+                }
+            },
+            "idempotency_key": f"plan:{state.project_id}:{plan_type}"
+        })
+
+    return specs
+
+# Graph definition
+def create_plan_generation_graph(checkpointer=None):
+    """Create the plan generation graph"""
+    from langgraph.graph import StateGraph
+
+    graph = StateGraph(PlanGenerationState)
+
+    # Add nodes
+    graph.add_node("render_sections", render_sections_node)
+    graph.add_node("assemble_plans", assemble_plans_node)
+    graph.add_node("create_plan_assets", lambda state: {
+        "plan_asset_specs": create_plan_asset_specs(state)
+    })
+
+    # Define flow
+    graph.set_entry_point("render_sections")
+    graph.add_edge("render_sections", "assemble_plans")
+    graph.add_edge("assemble_plans", "create_plan_assets")
+
+    return graph.compile(checkpointer=checkpointer)
@@ -0,0 +1,182 @@
+from typing import Dict, List, Any, Callable, Optional
+from html import escape
+from string import Template
+
+PLAN_TYPES = {
+    "quality": "Project Quality Plan",
+    "environmental": "Environmental Management Plan",
+    "safety": "Work Health and Safety Plan"
+}
+
+# Templates are parsed once at import; sections only substitute into them
+PLAN_TEMPLATE = Template('<div class="plan plan-$plan_type">\n<h1>$title</h1>\n$sections\n</div>')
+SECTION_TEMPLATE = Template('<section id="$plan_type-$section_id" class="plan-section">\n<h2>$title</h2>\n$body\n</section>')
+TABLE_TEMPLATE = Template('<table>\n<thead><tr>$header</tr></thead>\n<tbody>\n$rows\n</tbody>\n</table>')
+ROW_TEMPLATE = Template("<tr>$cells</tr>")
+EMPTY_TEMPLATE = Template('<p class="plan-empty">$message</p>')
+
+ENVIRONMENTAL_CATEGORIES = ("Environmental Management",)
+SAFETY_CATEGORIES = ("Health & Safety",)
+
+DEFAULT_ENVIRONMENTAL_CONTROLS = (
+    "Erosion and sediment controls installed before earthworks",
+    "Dust suppression during dry and windy conditions",
+    "Noise and vibration monitoring near sensitive receivers",
+    "Spill kits at refuelling and chemical storage areas",
+    "Waste segregation and disposal records"
+)
+
+def _table(header: List[str], rows: List[List[Any]]) -> str:
+    return TABLE_TEMPLATE.substitute(
+        header="".join(f"<th>{escape(h)}</th>" for h in header),
+        rows="\n".join(
+            ROW_TEMPLATE.substitute(cells="".join(f"<td>{escape(str(cell))}</td>" for cell in row))
+            for row in rows
+        )
+    )
+
+def _empty(message: str) -> str:
+    return EMPTY_TEMPLATE.substitute(message=escape(message))
+
+# Section input selectors - a section is re-rendered only when its selected inputs change
+
+def select_project_details(inputs: Dict[str, Any]) -> Any:
+    return inputs.get("project_details")
+
+def select_standards(inputs: Dict[str, Any]) -> Any:
+    return [
+        {k: std.get(k) for k in ("standard_code", "spec_name", "category", "compliance_level")}
+        for std in inputs.get("standards_from_project_documents") or []
+    ]
+
+def select_wbs_nodes(inputs: Dict[str, Any]) -> Any:
+    return [
+        {k: node.get(k) for k in ("id", "parentId", "node_type", "name", "itp_required")}
+        for node in (inputs.get("wbs_structure") or {}).get("nodes") or []
+    ]
+
+def select_itps(inputs: Dict[str, Any]) -> Any:
+    return inputs.get("generated_itps") or []
+
+# Section renderers
+
+def render_overview(details: Optional[Dict[str, Any]]) -> str:
+    if not details:
+        return _empty("Project details have not been extracted yet.")
+    parties = details.get("parties") or {}
+    dates = details.get("key_dates") or {}
+    rows = [
+        ["Project", details.get("project_name") or "-"],
+        ["Location", details.get("project_address") or "-"],
+        ["Client", ", ".join(parties.get("client") or []) or "-"],
+        ["Contractor", ", ".join(parties.get("contractor") or []) or "-"],
+        ["Contract value", details.get("contract_value") or "-"],
+        ["Commencement", dates.get("commencement_date") or "-"],
+        ["Completion", dates.get("completion_date") or "-"],
+        ["Scope", details.get("scope_summary") or "-"]
+    ]
+    return _table(["Item", "Detail"], rows)
+
+def _standards_table(standards: List[Dict[str, Any]], categories: Optional[tuple] = None) -> str:
+    if categories is not None:
+        standards = [std for std in standards if std.get("category") in categories]
+    if not standards:
+        return _empty("No applicable standards identified.")
+    standards = sorted(standards, key=lambda std: std.get("standard_code") or "")
+    return _table(
+        ["Standard", "Title", "Category", "Compliance"],
+        [[std["standard_code"], std.get("spec_name") or "", std.get("category") or "", std.get("compliance_level") or ""] for std in standards]
+    )
+
+def render_standards(standards: List[Dict[str, Any]]) -> str:
+    return _standards_table(standards)
+
+def render_environmental_standards(standards: List[Dict[str, Any]]) -> str:
+    return _standards_table(standards, ENVIRONMENTAL_CATEGORIES)
+
+def render_safety_standards(standards: List[Dict[str, Any]]) -> str:
+    return _standards_table(standards, SAFETY_CATEGORIES)
+
+def render_wbs(nodes: List[Dict[str, Any]]) -> str:
+    if not nodes:
+        return _empty("The work breakdown structure has not been generated yet.")
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for node in nodes:
+        children.setdefault(node.get("parentId"), []).append(node)
+
+    # Disciplines and work packages; activities are summarized as counts
+    parts = ["<ul>"]
+    for discipline in children.get(None, []):
+        parts.append(f"<li>{escape(discipline['name'])}<ul>")
+        for package in children.get(discipline["id"], []):
+            count = len(children.get(package["id"], []))
+            marker = " (ITP)" if package.get("itp_required") else ""
+            parts.append(f"<li>{escape(package['name'])}{marker} - {count} activities</li>")
+        parts.append("</ul></li>")
+    parts.append("</ul>")
+    return "\n".join(parts)
+
+def render_itp_register(itps: List[Dict[str, Any]]) -> str:
+    if not itps:
+        return _empty("No inspection and test plans are required.")
+    return _table(
+        ["ITP", "Title", "Specifications", "Hold points", "Witness points"],
+        [[itp["id"], itp["title"], ", ".join(itp["specifications"]) or "-", itp["hold_points"], itp["witness_points"]] for itp in itps]
+    )
+
+def render_hold_witness(itps: List[Dict[str, Any]]) -> str:
+    rows = [
+        [item["code"], item["activity"], item["point_type"].title(), item["responsibility"]]
+        for itp in itps for item in itp["items"] if item["point_type"] in ("hold", "witness")
+    ]
+    if not rows:
+        return _empty("No hold or witness points.")
+    return _table(["Code", "Activity", "Type", "Responsibility"], rows)
+
+def render_environmental_controls(itps: List[Dict[str, Any]]) -> str:
+    controls = list(DEFAULT_ENVIRONMENTAL_CONTROLS)
+    for itp in itps:
+        for item in itp["items"]:
+            if item.get("spec_ref") == "ISO 14001":
+                controls.append(f"{item['activity']} ({itp['title']})")
+    return "<ul>\n" + "\n".join(f"<li>{escape(control)}</li>" for control in controls) + "\n</ul>"
+
+def render_high_risk_activities(nodes: List[Dict[str, Any]]) -> str:
+    packages = [node for node in nodes if node.get("node_type") == "work_package"
+                and node["name"].endswith(("Construction", "Commissioning"))]
+    if not packages:
+        return _empty("No high risk construction activities identified.")
+    return _table(
+        ["Work package", "Controls"],
+        [[package["name"], "Safe Work Method Statement, pre-start briefing, permit to work"] for package in packages]
+    )
+
+def _section(plan_type: str, section_id: str, title: str, select: Callable, render: Callable) -> Dict[str, Any]:
+    return {"plan_type": plan_type, "section_id": section_id, "title": title, "select": select, "render": render}
+
+SECTIONS = (
+    _section("quality", "overview", "Project Overview", select_project_details, render_overview),
+    _section("quality", "standards", "Applicable Standards", select_standards, render_standards),
+    _section("quality", "wbs", "Work Breakdown Structure", select_wbs_nodes, render_wbs),
+    _section("quality", "itp_register", "Inspection and Test Plan Register", select_itps, render_itp_register),
+    _section("quality", "hold_witness", "Hold and Witness Points", select_itps, render_hold_witness),
+    _section("environmental", "overview", "Project Overview", select_project_details, render_overview),
+    _section("environmental", "standards", "Environmental Standards", select_standards, render_environmental_standards),
+    _section("environmental", "controls", "Environmental Controls", select_itps, render_environmental_controls),
+    _section("safety", "overview", "Project Overview", select_project_details, render_overview),
+    _section("safety", "standards", "Safety Standards", select_standards, render_safety_standards),
+    _section("safety", "high_risk", "High Risk Activities", select_wbs_nodes, render_high_risk_activities),
+)
+
+def render_section(section: Dict[str, Any], selected: Any) -> str:
+    """Render one plan section from its selected inputs"""
+    return SECTION_TEMPLATE.substitute(
+        plan_type=section["plan_type"],
+        section_id=section["section_id"],
+        title=escape(section["title"]),
+        body=section["render"](selected)
+    )
+
+def assemble_plan(plan_type: str, section_html: List[str]) -> str:
+    """Join rendered sections into a plan document"""
+    return PLAN_TEMPLATE.substitute(plan_type=plan_type, title=escape(PLAN_TYPES[plan_type]), sections="\n".join(section_html))
@@ -2,14 +2,30 @@ from typing import Dict, List, Any, Optional
 from pydantic import BaseModel
 import re
 import json
+from graphs.state import GraphState
+from graphs.memo import memoize_node
+from graphs.retrieval import retrieve_passages
 
-class ProjectDetailsExtractionState(BaseModel):
+class ProjectDetailsExtractionState(GraphState):
     project_id: str
     txt_project_documents: List[Dict[str, Any]] = []
+    # Above zero, only the top chunks for each detail query are scanned instead of every document
+    retrieval_k: int = 0
     project_details: Optional[Dict[str, Any]] = None
+    project_details_asset_spec: Dict[str, Any] = {}
     error: str = ""
     done: bool = False
 
+# One query per detail the extractors look for
+PROJECT_DETAIL_QUERIES = [
+    "project name title of the works",
+    "site location address of the project",
+    "client principal contractor parties to the contract",
+    "contract value sum price amount",
+    "commencement date completion date practical completion defects liability period",
+    "scope of works description summary"
+]
+
 def extract_project_name(content: str) -> Optional[str]:
     """Extract project name from document content"""
     # Look for project name patterns
@@ -152,14 +168,19 @@ def generate_project_html(project_details: Dict[str, Any]) -> str:
 
     return html
 
+@memoize_node("project_details", fields=("txt_project_documents", "retrieval_k"), depends_on=("graphs.retrieval",))
 def project_details_extraction_node(state: ProjectDetailsExtractionState) -> Dict[str, Any]:
     """Extract project details from documents"""
     try:
         if not state.txt_project_documents:
             return {"project_details": None, "error": "No documents provided"}
 
-        # Combine all document content
-        combined_content = " ".join([doc.get("content", "") for doc in state.txt_project_documents])
+        # Combine all document content, or just the passages relevant to each detail
+        if state.retrieval_k > 0:
+            passages = retrieve_passages(state.txt_project_documents, PROJECT_DETAIL_QUERIES, state.retrieval_k)
+            combined_content = "\n\n".join(chunk["text"] for chunk in passages)
+        else:
+            combined_content = " ".join([doc.get("content", "") for doc in state.txt_project_documents])
 
         # Extract various project details
         project_name = extract_project_name(combined_content)
@@ -213,7 +234,7 @@ def create_project_details_asset_spec(state: ProjectDetailsExtractionState) -> D
     return spec
 
 # Graph definition
-def create_project_details_extraction_graph():
+def create_project_details_extraction_graph(checkpointer=None):
     """Create the project details extraction graph"""
     from langgraph.graph import StateGraph
 
@@ -229,4 +250,4 @@ def create_project_details_extraction_graph():
     graph.set_entry_point("extract_details")
     graph.add_edge("extract_details", "create_asset")
 
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
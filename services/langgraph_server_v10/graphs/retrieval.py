@@ -0,0 +1,257 @@
+from typing import Dict, List, Any, Optional, Tuple
+from collections import Counter, OrderedDict
+from pathlib import Path
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import zlib
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+def chunk_document(doc: Dict[str, Any], max_words: int = 200, overlap: int = 40) -> List[Dict[str, Any]]:
+    """Split a document into overlapping word windows that prefer to end on paragraph breaks"""
+    if not 0 <= overlap < max_words:
+        # A window made of nothing but overlap never advances
+        raise ValueError(f"chunk overlap must be at least 0 and less than max_words ({max_words}), got {overlap}")
+    doc_id = doc.get("id")
+    # Words keep their trailing whitespace so chunk text keeps the document's line breaks
+    paragraphs = [re.findall(r"\S+\s*", p.strip() + "\n\n") for p in re.split(r"\n\s*\n", doc.get("content", "")) if p.strip()]
+
+    chunks: List[Dict[str, Any]] = []
+    window: List[str] = []
+    fresh = 0  # words in the window not already emitted with the previous chunk
+
+    def emit() -> None:
+        nonlocal window, fresh
+        chunks.append({"id": f"{doc_id}:{len(chunks)}", "document_id": doc_id, "index": len(chunks), "text": "".join(window).strip()})
+        window = window[-overlap:] if overlap else []
+        fresh = 0
+
+    for words in paragraphs:
+        # A paragraph that does not fit starts a new chunk, carrying the overlap along
+        if fresh and len(window) + len(words) > max_words:
+            emit()
+        while len(window) + len(words) > max_words:
+            take = max_words - len(window)
+            window.extend(words[:take])
+            words = words[take:]
+            fresh += take
+            emit()
+        window.extend(words)
+        fresh += len(words)
+    if fresh:
+        emit()
+
+    return chunks
+
+def chunk_documents(documents: List[Dict[str, Any]], max_words: int = 200, overlap: int = 40) -> List[Dict[str, Any]]:
+    return [chunk for doc in documents for chunk in chunk_document(doc, max_words, overlap)]
+
+class HashingEmbedder:
+    """Stateless bag-of-words embedder - unigrams and bigrams hashed into `dim` signed buckets, log-scaled and L2-normalized"""
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def _buckets(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        tokens = tokenize(text)
+        counts = Counter(tokens)
+        counts.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        if not counts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        # crc32 rather than hash() so vectors are stable across processes
+        hashes = np.fromiter((zlib.crc32(term.encode("utf-8")) for term in counts), dtype=np.int64, count=len(counts))
+        freqs = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        signs = np.where(hashes & (1 << 31), -1.0, 1.0).astype(np.float32)
+        return hashes % self.dim, signs * (1.0 + np.log(freqs))
+
+    def fit(self, texts: List[str]) -> "HashingEmbedder":
+        return self
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            cols, values = self._buckets(text)
+            matrix[row] = np.bincount(cols, weights=values, minlength=self.dim)
+        return self._weight(matrix)
+
+    def _weight(self, matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    def state(self) -> Dict[str, Any]:
+        return {"name": self.name, "dim": self.dim}
+
+class TfidfEmbedder(HashingEmbedder):
+    """Hashing embedder with inverse document frequency weights fitted on the indexed chunks"""
+
+    name = "tfidf"
+
+    def __init__(self, dim: int = 1024, idf: Optional[np.ndarray] = None):
+        super().__init__(dim)
+        self.idf = idf if idf is not None else np.ones(dim, dtype=np.float32)
+
+    def fit(self, texts: List[str]) -> "TfidfEmbedder":
+        df = np.zeros(self.dim, dtype=np.float32)
+        for text in texts:
+            cols, _ = self._buckets(text)
+            df[np.unique(cols)] += 1
+        self.idf = (np.log((1.0 + len(texts)) / (1.0 + df)) + 1.0).astype(np.float32)
+        return self
+
+    def _weight(self, matrix: np.ndarray) -> np.ndarray:
+        return super()._weight(matrix * self.idf)
+
+    def state(self) -> Dict[str, Any]:
+        return {"name": self.name, "dim": self.dim, "idf": self.idf.tolist()}
+
+EMBEDDERS = {"hashing": HashingEmbedder, "tfidf": TfidfEmbedder}
+
+def create_embedder(name: str = "tfidf", dim: int = 1024) -> HashingEmbedder:
+    if name not in EMBEDDERS:
+        raise ValueError(f"Unknown embedder: {name}")
+    return EMBEDDERS[name](dim)
+
+def _load_embedder(state: Dict[str, Any]) -> HashingEmbedder:
+    if state["name"] == "tfidf":
+        return TfidfEmbedder(state["dim"], np.asarray(state["idf"], dtype=np.float32))
+    return EMBEDDERS[state["name"]](state["dim"])
+
+class ChunkIndex:
+    """Chunk embeddings in one float32 matrix, optionally memory-mapped from disk.
+
+    Search embeds all queries at once and scores them against the matrix in
+    row blocks, keeping a running top-k per query, so memory stays bounded by
+    the block size however large the corpus is.
+    """
+
+    def __init__(self, chunks: List[Dict[str, Any]], vectors: np.ndarray, embedder: HashingEmbedder):
+        self.chunks = chunks
+        self.vectors = vectors
+        self.embedder = embedder
+
+    @classmethod
+    def build(cls, chunks: List[Dict[str, Any]], embedder: HashingEmbedder, path: Optional[str] = None) -> "ChunkIndex":
+        texts = [chunk["text"] for chunk in chunks]
+        embedder.fit(texts)
+        vectors = embedder.embed(texts)
+        if path is None:
+            return cls(chunks, vectors, embedder)
+
+        # Written to a sibling directory first so readers never see a partial index
+        target = Path(path)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.mkdir(parents=True, exist_ok=True)
+        matrix = np.lib.format.open_memmap(tmp / "vectors.npy", mode="w+", dtype=np.float32, shape=vectors.shape)
+        matrix[:] = vectors
+        matrix.flush()
+        del matrix
+        (tmp / "chunks.json").write_text(json.dumps(chunks), encoding="utf-8")
+        (tmp / "embedder.json").write_text(json.dumps(embedder.state()), encoding="utf-8")
+        try:
+            os.replace(tmp, target)
+        except OSError:
+            # Another worker built the same corpus first
+            shutil.rmtree(tmp, ignore_errors=True)
+        return cls.load(str(target))
+
+    @classmethod
+    def load(cls, path: str) -> "ChunkIndex":
+        """Open a saved index; vectors stay on disk and are paged in on demand"""
+        target = Path(path)
+        chunks = json.loads((target / "chunks.json").read_text(encoding="utf-8"))
+        embedder = _load_embedder(json.loads((target / "embedder.json").read_text(encoding="utf-8")))
+        vectors = np.load(target / "vectors.npy", mmap_mode="r")
+        return cls(chunks, vectors, embedder)
+
+    def search(self, queries: List[str], k: int = 5, block_rows: int = 8192) -> List[List[Tuple[Dict[str, Any], float]]]:
+        """Return the k most similar chunks for each query, best first"""
+        n = len(self.chunks)
+        k = min(k, n)
+        if not queries or k == 0:
+            return [[] for _ in queries]
+
+        q = self.embedder.embed(queries).T
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+
+        for start in range(0, n, block_rows):
+            scores = np.asarray(self.vectors[start:start + block_rows] @ q).T
+            take = min(k, scores.shape[1])
+            top = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+            best_rows = np.concatenate([best_rows, top + start], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        return [
+            [(self.chunks[row], float(score)) for row, score in zip(rows, scores)]
+            for rows, scores in zip(best_rows.tolist(), best_scores.tolist())
+        ]
+
+# Indexes are keyed by corpus, so every node of a run shares the index built by the first
+_indexes: "OrderedDict[str, ChunkIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+_settings: Dict[str, Any] = {"index_dir": None, "embedder": "tfidf", "dim": 1024, "max_indexes": 16}
+
+def configure_retrieval(index_dir: Optional[str] = None, embedder: str = "tfidf", dim: int = 1024, max_indexes: int = 16) -> None:
+    """Set where chunk indexes are stored and how chunks are embedded"""
+    if embedder not in EMBEDDERS:
+        raise ValueError(f"Unknown embedder: {embedder}")
+    with _indexes_lock:
+        _settings.update(index_dir=index_dir, embedder=embedder, dim=dim, max_indexes=max_indexes)
+        _indexes.clear()
+
+def corpus_key(documents: List[Dict[str, Any]]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{_settings['embedder']}:{_settings['dim']}".encode("utf-8"))
+    for doc in documents:
+        digest.update(str(doc.get("id")).encode("utf-8"))
+        digest.update(hashlib.blake2b(doc.get("content", "").encode("utf-8"), digest_size=16).digest())
+    return digest.hexdigest()
+
+def get_chunk_index(documents: List[Dict[str, Any]]) -> ChunkIndex:
+    """Return the chunk index for a set of documents, building it on first use"""
+    key = corpus_key(documents)
+    with _indexes_lock:
+        if key in _indexes:
+            _indexes.move_to_end(key)
+            return _indexes[key]
+
+    path = Path(_settings["index_dir"]) / key if _settings["index_dir"] else None
+    if path is not None and (path / "vectors.npy").is_file():
+        index = ChunkIndex.load(str(path))
+    else:
+        index = ChunkIndex.build(chunk_documents(documents), create_embedder(_settings["embedder"], _settings["dim"]),
+                                 str(path) if path is not None else None)
+
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > _settings["max_indexes"]:
+            _indexes.popitem(last=False)
+    return index
+
+def retrieve_passages(documents: List[Dict[str, Any]], queries: List[str], k: int = 5) -> List[Dict[str, Any]]:
+    """Return the union of the top-k chunks for each query, in document order"""
+    if not documents:
+        return []
+    selected: Dict[str, Dict[str, Any]] = {}
+    for hits in get_chunk_index(documents).search(queries, k):
+        for chunk, _ in hits:
+            selected[chunk["id"]] = chunk
+    order = {doc.get("id"): i for i, doc in enumerate(documents)}
+    return sorted(selected.values(), key=lambda chunk: (order.get(chunk["document_id"], 0), chunk["index"]))
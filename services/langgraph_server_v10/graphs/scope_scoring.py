@@ -0,0 +1,121 @@
+from typing import Dict, List, Any
+from collections import Counter
+import math
+import re
+import numpy as np
+
+# Vocabulary per discipline - terms shared by several disciplines split their weight
+DISCIPLINE_TERMS = {
+    "Civil": ["civil", "earthworks", "concrete", "pavement", "drainage"],
+    "Structural": ["structural", "steel", "concrete", "reinforcement"],
+    "Electrical": ["electrical", "power", "cabling", "lighting"],
+    "Mechanical": ["mechanical", "hvac", "plumbing", "ventilation"]
+}
+
+WORK_TYPE_TERMS = {
+    "Design": ["design", "drawing", "drawings", "calculation", "calculations"],
+    "Construction": ["construction", "install", "installation", "excavation", "placement", "erection"],
+    "Testing": ["test", "testing", "tested", "inspection", "sampling", "compaction"],
+    "Commissioning": ["commissioning", "handover", "energisation", "energization"]
+}
+
+# A discipline needs at least this share of all discipline term hits to get a branch
+DISCIPLINE_MIN_SHARE = 0.1
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+_SPEC_RE = re.compile(r"((?:AS|ISO|BS)\s*\d+(?:\.\d+)*)")
+
+def _build_vocabulary(*groups: Dict[str, List[str]]) -> Dict[str, int]:
+    vocabulary: Dict[str, int] = {}
+    for group in groups:
+        for terms in group.values():
+            for term in terms:
+                vocabulary.setdefault(term, len(vocabulary))
+    return vocabulary
+
+def _build_weights(vocabulary: Dict[str, int], group: Dict[str, List[str]]) -> np.ndarray:
+    weights = np.zeros((len(vocabulary), len(group)), dtype=np.float64)
+    for col, terms in enumerate(group.values()):
+        for term in terms:
+            weights[vocabulary[term], col] = 1.0
+    shared = weights.sum(axis=1, keepdims=True)
+    return weights / np.maximum(shared, 1.0)
+
+_VOCABULARY = _build_vocabulary(DISCIPLINE_TERMS, WORK_TYPE_TERMS)
+_DISCIPLINE_WEIGHTS = _build_weights(_VOCABULARY, DISCIPLINE_TERMS)
+_WORK_TYPE_WEIGHTS = _build_weights(_VOCABULARY, WORK_TYPE_TERMS)
+
+def count_terms(contents: List[str]) -> Dict[str, Any]:
+    """Tokenize each document once and count vocabulary terms and specification citations"""
+    term_counts = np.zeros((len(contents), len(_VOCABULARY)), dtype=np.int64)
+    token_totals = np.zeros(len(contents), dtype=np.int64)
+    spec_counts: Dict[str, int] = {}
+
+    for row, content in enumerate(contents):
+        tokens = Counter(_TOKEN_RE.findall(content.lower()))
+        token_totals[row] = sum(tokens.values())
+
+        # Only distinct tokens are looked up; the row is filled with one scatter
+        cols = np.fromiter((_VOCABULARY.get(t, -1) for t in tokens), dtype=np.int64, count=len(tokens))
+        freqs = np.fromiter(tokens.values(), dtype=np.int64, count=len(tokens))
+        known = cols >= 0
+        term_counts[row, cols[known]] = freqs[known]
+
+        for spec in _SPEC_RE.findall(content):
+            spec_counts[spec] = spec_counts.get(spec, 0) + 1
+
+    return {
+        "term_counts": term_counts,
+        "token_totals": token_totals,
+        "spec_counts": spec_counts
+    }
+
+def _normalized_entropy(weights: np.ndarray) -> float:
+    active = weights[weights > 0]
+    if len(active) < 2:
+        return 0.0
+    active = active / active.sum()
+    return float(-(active * np.log(active)).sum() / math.log(len(active)))
+
+def score_scope(contents: List[str]) -> Dict[str, Any]:
+    """Score disciplines, work types and complexity for a document corpus"""
+    counts = count_terms(contents)
+    term_counts = counts["term_counts"]
+
+    # (documents x vocabulary) @ (vocabulary x labels) -> per-document label scores
+    discipline_scores = (term_counts @ _DISCIPLINE_WEIGHTS).sum(axis=0)
+    work_type_scores = (term_counts @ _WORK_TYPE_WEIGHTS).sum(axis=0)
+
+    discipline_total = discipline_scores.sum()
+    discipline_weights = discipline_scores / discipline_total if discipline_total else discipline_scores
+    work_type_total = work_type_scores.sum()
+    work_type_weights = work_type_scores / work_type_total if work_type_total else work_type_scores
+
+    discipline_names = list(DISCIPLINE_TERMS)
+    ranked = np.argsort(-discipline_weights, kind="stable")
+    disciplines = [discipline_names[i] for i in ranked if discipline_weights[i] >= DISCIPLINE_MIN_SHARE]
+
+    spec_counts = counts["spec_counts"]
+    specifications = sorted(spec_counts, key=lambda s: (-spec_counts[s], s))
+
+    # 1.0 baseline, plus up to 1.0 each for discipline diversity, specification
+    # breadth and corpus size (both log-scaled)
+    total_tokens = int(counts["token_totals"].sum())
+    complexity_score = (
+        1.0
+        + _normalized_entropy(discipline_weights[discipline_weights >= DISCIPLINE_MIN_SHARE])
+        + min(1.0, math.log10(1 + len(specifications)) / 2)
+        + min(1.0, math.log10(1 + total_tokens) / 6)
+    )
+
+    return {
+        "disciplines": disciplines,
+        "discipline_weights": {
+            discipline_names[i]: round(float(discipline_weights[i]), 4) for i in ranked if discipline_weights[i] > 0
+        },
+        "work_type_weights": {
+            name: round(float(weight), 4) for name, weight in zip(WORK_TYPE_TERMS, work_type_weights) if weight > 0
+        },
+        "specifications": specifications,
+        "complexity_score": round(complexity_score, 2)
+    }
@@ -1,13 +1,18 @@
-from typing import Dict, List, Any, Annotated
+from typing import Dict, List, Any, Optional, Annotated
 from pydantic import BaseModel
 import re
 import json
+from graphs.state import GraphState, append
+from graphs.edges import EdgeBuffer, add_document_reference_edges
+from graphs.memo import memoize_node
 
-class StandardsExtractionState(BaseModel):
+class StandardsExtractionState(GraphState):
     project_id: str
     txt_project_documents: List[Dict[str, Any]] = []
     reference_database: Dict[str, Any] = {}
-    standards_from_project_documents: Annotated[List[Dict[str, Any]], "add"] = []
+    standards_from_project_documents: Annotated[List[Dict[str, Any]], append] = []
+    standards_asset_specs: List[Dict[str, Any]] = []
+    standards_doc_ref_edges: List[Dict[str, Any]] = []
     error: str = ""
     done: bool = False
 
@@ -147,6 +152,7 @@ def validate_standards_in_database(standards: List[Dict[str, Any]], database: Di
 
     return validated_standards
 
+@memoize_node("standards_extraction", fields=("txt_project_documents", "reference_database"))
 def standards_extraction_node(state: StandardsExtractionState) -> Dict[str, Any]:
     """Extract standards from project documents"""
     try:
@@ -216,26 +222,21 @@ def create_standards_asset_specs(state: StandardsExtractionState) -> List[Dict[s
 
 def create_document_reference_edges(state: StandardsExtractionState) -> List[Dict[str, Any]]:
     """Create edges linking standards to source documents"""
-    edges = []
+    edges = EdgeBuffer()
 
     for std in state.standards_from_project_documents:
-        for doc_id in std.get('document_ids', []):
-            edges.append({
-                "from_asset_id": "",  # Will be set to standard asset ID
-                "to_asset_id": doc_id,
-                "edge_type": "REFERENCES",
-                "properties": {
-                    "reference_type": "standards_citation",
-                    "section_reference": std.get("section_reference"),
-                    "context": std.get("context", "")[:100]
-                },
-                "idempotency_key": f"std_doc_ref:{state.project_id}:{std['standard_code']}:{doc_id}"
-            })
-
-    return edges
+        properties = {
+            "reference_type": "standards_citation",
+            "section_reference": std.get("section_reference"),
+            "context": std.get("context", "")[:100]
+        }
+        add_document_reference_edges(edges, "std_doc_ref", "REFERENCES", state.project_id,
+                                     std["standard_code"], std.get("document_ids", []), properties)
+
+    return edges.to_list()
 
 # Graph definition
-def create_standards_extraction_graph():
+def create_standards_extraction_graph(checkpointer=None):
     """Create the standards extraction graph"""
     from langgraph.graph import StateGraph
 
@@ -255,4 +256,4 @@ def create_standards_extraction_graph():
     graph.add_edge("extract_standards", "create_standards_assets")
     graph.add_edge("create_standards_assets", "create_doc_refs")
 
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
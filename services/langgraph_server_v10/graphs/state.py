@@ -0,0 +1,56 @@
+from typing import Any, Dict, List, Optional, Type
+from functools import lru_cache
+from pydantic import BaseModel, create_model
+
+def append(left: Optional[List[Any]], right: Optional[List[Any]]) -> List[Any]:
+    """Append reducer for list channels.
+
+    The items themselves are never copied: a write shares every existing
+    element with the previous value, and a write that adds nothing returns
+    the previous list unchanged.
+    """
+    if not right:
+        return left if left is not None else []
+    if not left:
+        return list(right)
+    return left + right
+
+class GraphState(BaseModel):
+    """Base class for pydantic graph states.
+
+    langgraph rebuilds the state object from the channel values with
+    `Schema(**values)` before every node. Those values were validated when
+    they entered the graph (see `validate_graph_input`) and afterwards are
+    only node outputs, so the constructor takes them as-is: no validation and
+    no copies of the documents carried in state.
+
+    None values are dropped, since langgraph passes None for channels that
+    have not been written yet and fields such as `error: str = ""` should
+    fall back to their defaults.
+    """
+
+    def __init__(self, **data: Any):
+        state = type(self).model_construct(**{k: v for k, v in data.items() if v is not None})
+        object.__setattr__(self, "__dict__", state.__dict__)
+        object.__setattr__(self, "__pydantic_fields_set__", state.__pydantic_fields_set__)
+        object.__setattr__(self, "__pydantic_extra__", state.__pydantic_extra__)
+        object.__setattr__(self, "__pydantic_private__", state.__pydantic_private__)
+
+@lru_cache(maxsize=None)
+def _input_model(schema: Type[GraphState]) -> Type[BaseModel]:
+    # Plain pydantic model with the same fields, since GraphState itself never validates
+    fields = {name: (field.annotation, field) for name, field in schema.model_fields.items()}
+    return create_model(f"{schema.__name__}Input", **fields)
+
+def validate_graph_input(graph: Any, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate run input against a compiled graph's state schema.
+
+    Returns the validated values of the supplied keys; graphs without a
+    pydantic state schema get the input back unchanged.
+    """
+    schema = getattr(getattr(graph, "builder", None), "schema", None)
+    if not (isinstance(schema, type) and issubclass(schema, GraphState)):
+        return data
+    data = {k: v for k, v in data.items() if v is not None}
+    state = _input_model(schema).model_validate(data)
+    return {k: getattr(state, k) for k in data if k in schema.model_fields}
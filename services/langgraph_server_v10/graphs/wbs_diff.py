@@ -0,0 +1,50 @@
+from typing import Dict, Any, Optional, Iterable
+import hashlib
+import json
+
+# Fields excluded from the content hash - identity and the hash itself
+_IDENTITY_FIELDS = {"id", "content_hash"}
+
+def stable_node_id(path: Iterable[str]) -> str:
+    """Derive a stable WBS node id from the names on its root-to-node path"""
+    key = "/".join(part.strip().lower() for part in path)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+def node_content_hash(node: Dict[str, Any]) -> str:
+    """Hash the content fields of a WBS node"""
+    content = {k: v for k, v in node.items() if k not in _IDENTITY_FIELDS}
+    payload = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def diff_wbs(previous: Optional[Dict[str, Any]], current: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compare a new WBS structure against the previously persisted one"""
+    previous_nodes = {n["id"]: n for n in (previous or {}).get("nodes") or []}
+    current_nodes = (current or {}).get("nodes") or []
+    current_ids = set()
+
+    added = []
+    changed = []
+    unchanged_count = 0
+
+    for node in current_nodes:
+        current_ids.add(node["id"])
+        old = previous_nodes.get(node["id"])
+        if old is None:
+            added.append(node)
+            continue
+
+        old_hash = old.get("content_hash") or node_content_hash(old)
+        new_hash = node.get("content_hash") or node_content_hash(node)
+        if old_hash != new_hash:
+            changed.append(node)
+        else:
+            unchanged_count += 1
+
+    removed = [n for node_id, n in previous_nodes.items() if node_id not in current_ids]
+
+    return {
+        "added": added,
+        "changed": changed,
+        "removed": removed,
+        "unchanged_count": unchanged_count
+    }
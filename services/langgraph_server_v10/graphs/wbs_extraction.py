@@ -2,6 +2,11 @@ from typing import Dict, List, Any, Optional, Annotated
 from pydantic import BaseModel
 import re
 import json
+from graphs.state import GraphState
+from graphs.wbs_diff import stable_node_id, node_content_hash, diff_wbs
+from graphs.edges import EdgeBuffer, add_parent_edges, add_document_reference_edges
+from graphs.scope_scoring import score_scope
+from graphs.memo import memoize_node
 
 class WbsNode(BaseModel):
     id: str
@@ -14,61 +19,42 @@ class WbsNode(BaseModel):
     applicable_specifications: List[str] = []
     itp_required: bool = False
     is_leaf_node: bool = False
+    content_hash: str = ""
 
-class WbsExtractionState(BaseModel):
+class WbsExtractionState(GraphState):
     project_id: str
     txt_project_documents: List[Dict[str, Any]] = []
     wbs_structure: Optional[Dict[str, Any]] = None
+    previous_wbs_structure: Optional[Dict[str, Any]] = None
+    wbs_diff: Optional[Dict[str, Any]] = None
+    wbs_asset_specs: List[Dict[str, Any]] = []
+    wbs_edge_specs: List[Dict[str, Any]] = []
+    doc_ref_edges: List[Dict[str, Any]] = []
     error: str = ""
     done: bool = False
 
 def analyze_project_scope(documents: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Analyze project documents to understand scope and deliverables"""
-    scope_info = {
-        "disciplines": [],
+    # Term-frequency scoring in a single pass over the documents
+    scores = score_scope([doc.get("content", "") for doc in documents])
+
+    return {
+        "disciplines": scores["disciplines"],
+        "discipline_weights": scores["discipline_weights"],
         "work_packages": [],
+        "work_type_weights": scores["work_type_weights"],
         "activities": [],
-        "specifications": [],
-        "complexity_score": 1.0
-    }
-
-    combined_content = " ".join([doc.get("content", "") for doc in documents])
-
-    # Identify disciplines
-    discipline_patterns = {
-        "Civil": r'\b(civil|earthworks|concrete|pavement|drainage)\b',
-        "Structural": r'\b(structural|steel|concrete|reinforcement)\b',
-        "Electrical": r'\b(electrical|power|cabling|lighting)\b',
-        "Mechanical": r'\b(mechanical|hvac|plumbing|ventilation)\b'
+        "specifications": scores["specifications"],
+        "complexity_score": scores["complexity_score"]
     }
 
-    for discipline, pattern in discipline_patterns.items():
-        if re.search(pattern, combined_content, re.IGNORECASE):
-            scope_info["disciplines"].append(discipline)
-
-    # Identify specifications
-    spec_patterns = [
-        r'(AS\s*\d+(?:\.\d+)*)',
-        r'(ISO\s*\d+(?:\.\d+)*)',
-        r'(BS\s*\d+(?:\.\d+)*)'
-    ]
-
-    for pattern in spec_patterns:
-        specs = re.findall(pattern, combined_content)
-        scope_info["specifications"].extend(specs)
-
-    scope_info["specifications"] = list(set(scope_info["specifications"]))
-
-    return scope_info
-
 def generate_wbs_hierarchy(scope_info: Dict[str, Any], project_id: str) -> Dict[str, Any]:
     """Generate hierarchical WBS structure"""
     nodes = []
-    node_counter = 1
 
-    # Create discipline nodes
+    # Node ids are derived from the name path so re-extraction keeps identity
     for discipline in scope_info["disciplines"]:
-        discipline_id = f"{node_counter}"
+        discipline_id = stable_node_id([discipline])
         nodes.append(WbsNode(
             id=discipline_id,
             node_type="discipline",
@@ -87,8 +73,7 @@ def generate_wbs_hierarchy(scope_info: Dict[str, Any], project_id: str) -> Dict[
         ]
 
         for wp in work_packages:
-            node_counter += 1
-            wp_id = f"{node_counter}"
+            wp_id = stable_node_id([discipline, wp])
             nodes.append(WbsNode(
                 id=wp_id,
                 parentId=discipline_id,
@@ -109,8 +94,7 @@ def generate_wbs_hierarchy(scope_info: Dict[str, Any], project_id: str) -> Dict[
             ]
 
             for activity in activities:
-                node_counter += 1
-                activity_id = f"{node_counter}"
+                activity_id = stable_node_id([discipline, wp, activity])
                 nodes.append(WbsNode(
                     id=activity_id,
                     parentId=wp_id,
@@ -121,18 +105,26 @@ def generate_wbs_hierarchy(scope_info: Dict[str, Any], project_id: str) -> Dict[
                     is_leaf_node=True
                 ))
 
-        node_counter += 1
+    node_dicts = [node.dict() for node in nodes]
+    for node in node_dicts:
+        node["content_hash"] = node_content_hash(node)
 
     return {
-        "nodes": [node.dict() for node in nodes],
+        "nodes": node_dicts,
         "metadata": {
             "total_nodes": len(nodes),
             "disciplines_count": len(scope_info["disciplines"]),
+            "discipline_weights": scope_info.get("discipline_weights", {}),
             "specifications_referenced": scope_info["specifications"],
             "complexity_score": scope_info["complexity_score"]
         }
     }
 
+@memoize_node(
+    "wbs_extraction",
+    fields=("project_id", "txt_project_documents", "previous_wbs_structure"),
+    depends_on=("graphs.scope_scoring", "graphs.wbs_diff")
+)
 def wbs_extraction_node(state: WbsExtractionState) -> Dict[str, Any]:
     """Extract Work Breakdown Structure from project documents"""
     try:
@@ -144,9 +136,14 @@ def wbs_extraction_node(state: WbsExtractionState) -> Dict[str, Any]:
 
         # Generate WBS hierarchy
         wbs_structure = generate_wbs_hierarchy(scope_info, state.project_id)
+        wbs_structure["metadata"]["source_document_ids"] = [doc.get("id") for doc in state.txt_project_documents]
+
+        # Compare against the persisted WBS so only changes are written downstream
+        wbs_diff = diff_wbs(state.previous_wbs_structure, wbs_structure)
 
         return {
             "wbs_structure": wbs_structure,
+            "wbs_diff": wbs_diff,
             "done": True
         }
 
@@ -157,87 +154,101 @@ def wbs_extraction_node(state: WbsExtractionState) -> Dict[str, Any]:
             "done": True
         }
 
+def wbs_node_asset_spec(project_id: str, node: Dict[str, Any]) -> Dict[str, Any]:
+    """Create the asset write specification for a single WBS node"""
+    return {
+        "asset": {
+            "type": "wbs_node",
+            "subtype": node["node_type"],
+            "name": node["name"],
+            "project_id": project_id,
+            "content": {
+                "wbs_id": node["id"],
+                "parent_wbs_id": node.get("parentId"),
+                "node_type": node["node_type"],
+                "description": node["description"],
+                "source_reference_uuids": node["source_reference_uuids"],
+                "source_reference_hints": node["source_reference_hints"],
+                "applicable_specifications": node["applicable_specifications"],
+                "itp_required": node["itp_required"],
+                "is_leaf_node": node["is_leaf_node"],
+                "content_hash": node.get("content_hash")
+            }
+        },
+        "idempotency_key": f"wbs_node:{project_id}:{node['id']}"
+    }
+
+def _current_wbs_diff(state: WbsExtractionState) -> Dict[str, Any]:
+    return state.wbs_diff or diff_wbs(state.previous_wbs_structure, state.wbs_structure)
+
 def create_wbs_asset_specs(state: WbsExtractionState) -> List[Dict[str, Any]]:
-    """Create asset write specifications for WBS nodes"""
-    if not state.wbs_structure or not state.wbs_structure.get("nodes"):
+    """Create asset write specifications for added, changed and removed WBS nodes"""
+    if not state.wbs_structure:
         return []
 
-    specs = []
-
-    for node in state.wbs_structure["nodes"]:
-        spec = {
-            "asset": {
-                "type": "wbs_node",
-                "subtype": node["node_type"],
-                "name": node["name"],
-                "project_id": state.project_id,
-                "content": {
-                    "wbs_id": node["id"],
-                    "parent_wbs_id": node.get("parentId"),
-                    "node_type": node["node_type"],
-                    "description": node["description"],
-                    "source_reference_uuids": node["source_reference_uuids"],
-                    "source_reference_hints": node["source_reference_hints"],
-                    "applicable_specifications": node["applicable_specifications"],
-                    "itp_required": node["itp_required"],
-                    "is_leaf_node": node["is_leaf_node"]
-                }
-            },
+    wbs_diff = _current_wbs_diff(state)
+    specs = [wbs_node_asset_spec(state.project_id, node) for node in wbs_diff["added"] + wbs_diff["changed"]]
+
+    for node in wbs_diff["removed"]:
+        specs.append({
+            "operation": "delete",
+            "asset": {"type": "wbs_node", "project_id": state.project_id},
             "idempotency_key": f"wbs_node:{state.project_id}:{node['id']}"
-        }
-        specs.append(spec)
+        })
 
     return specs
 
 def create_wbs_edge_specs(state: WbsExtractionState) -> List[Dict[str, Any]]:
-    """Create edge specifications for WBS hierarchy"""
-    if not state.wbs_structure or not state.wbs_structure.get("nodes"):
+    """Create edge specifications for added, changed and removed WBS hierarchy links"""
+    if not state.wbs_structure:
         return []
 
-    edges = []
-
-    for node in state.wbs_structure["nodes"]:
-        if node.get("parentId"):
-            edges.append({
-                "from_asset_id": "",  # Will be set to child asset ID
-                "to_asset_id": "",    # Will be set to parent asset ID
-                "edge_type": "PARENT_OF",
-                "properties": {
-                    "hierarchy_level": node["node_type"],
-                    "child_wbs_id": node["id"],
-                    "parent_wbs_id": node["parentId"]
-                },
-                "idempotency_key": f"wbs_edge:{state.project_id}:{node['id']}:{node['parentId']}"
-            })
+    wbs_diff = _current_wbs_diff(state)
+    edges = EdgeBuffer()
+    add_parent_edges(edges, state.project_id, wbs_diff["added"] + wbs_diff["changed"])
+    add_parent_edges(edges, state.project_id, wbs_diff["removed"], operation="delete")
 
-    return edges
+    return edges.to_list()
 
-def create_document_reference_edges(state: WbsExtractionState) -> List[Dict[str, Any]]:
-    """Create edges linking WBS nodes to source documents"""
-    edges = []
-
-    for doc in state.txt_project_documents:
-        # Link key WBS nodes to source documents
-        if state.wbs_structure and state.wbs_structure.get("nodes"):
-            # Link discipline nodes to all documents
-            discipline_nodes = [n for n in state.wbs_structure["nodes"] if n["node_type"] == "discipline"]
-
-            for node in discipline_nodes[:2]:  # Link to first 2 disciplines
-                edges.append({
-                    "from_asset_id": "",  # Will be set to WBS asset ID
-                    "to_asset_id": doc["id"],
-                    "edge_type": "GENERATED_FROM",
-                    "properties": {
-                        "reference_type": "source_document",
-                        "extraction_method": "wbs_analysis"
-                    },
-                    "idempotency_key": f"wbs_doc_ref:{state.project_id}:{node['id']}:{doc['id']}"
-                })
+def build_document_reference_edges(project_id: str, wbs_structure: Optional[Dict[str, Any]], document_ids: List[str]) -> EdgeBuffer:
+    """Link key WBS nodes to source documents"""
+    edges = EdgeBuffer()
+    if not wbs_structure or not wbs_structure.get("nodes"):
+        return edges
+
+    # Link to first 2 disciplines
+    discipline_nodes = [n for n in wbs_structure["nodes"] if n["node_type"] == "discipline"][:2]
+    properties = {
+        "reference_type": "source_document",
+        "extraction_method": "wbs_analysis"
+    }
+
+    for node in discipline_nodes:
+        add_document_reference_edges(edges, "wbs_doc_ref", "GENERATED_FROM", project_id, node["id"], document_ids, properties)
 
     return edges
 
+def create_document_reference_edges(state: WbsExtractionState) -> List[Dict[str, Any]]:
+    """Create edges linking WBS nodes to source documents, emitting only changes"""
+    current = build_document_reference_edges(
+        state.project_id,
+        state.wbs_structure,
+        [doc["id"] for doc in state.txt_project_documents]
+    )
+
+    previous_metadata = (state.previous_wbs_structure or {}).get("metadata") or {}
+    previous = build_document_reference_edges(
+        state.project_id,
+        state.previous_wbs_structure,
+        previous_metadata.get("source_document_ids") or []
+    )
+
+    edges = current.difference(previous)
+    edges.extend(previous.difference(current, operation="delete"))
+    return edges.to_list()
+
 # Graph definition
-def create_wbs_extraction_graph():
+def create_wbs_extraction_graph(checkpointer=None):
     """Create the WBS extraction graph"""
     from langgraph.graph import StateGraph
 
@@ -261,4 +272,4 @@ def create_wbs_extraction_graph():
     graph.add_edge("create_wbs_assets", "create_wbs_edges")
     graph.add_edge("create_wbs_edges", "create_doc_refs")
 
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
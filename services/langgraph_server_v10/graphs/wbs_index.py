@@ -0,0 +1,120 @@
+from typing import Dict, List, Any, Optional, Tuple
+
+class WbsIndex:
+    """Precomputed tree indexes over the flat `nodes` list of a WBS structure.
+
+    A single preorder (Euler tour) walk assigns every node an interval
+    [tin, tout) into `order`, so a subtree is a contiguous slice. Leaves and
+    ITP-required nodes get their own preorder lists with per-node ranges, so
+    "leaves under X" and "itp_required under X" are slices as well.
+    """
+
+    def __init__(self, nodes: List[Dict[str, Any]]):
+        self.nodes: Dict[str, Dict[str, Any]] = {n["id"]: n for n in nodes}
+        self.children: Dict[str, List[str]] = {node_id: [] for node_id in self.nodes}
+        self.roots: List[str] = []
+
+        for node in nodes:
+            parent_id = node.get("parentId")
+            if parent_id and parent_id in self.children:
+                self.children[parent_id].append(node["id"])
+            else:
+                self.roots.append(node["id"])
+
+        self.depth: Dict[str, int] = {}
+        self.paths: Dict[str, Tuple[str, ...]] = {}
+        self.order: List[str] = []
+        self.tin: Dict[str, int] = {}
+        self.tout: Dict[str, int] = {}
+        self.leaves: List[str] = []
+        self.leaf_range: Dict[str, Tuple[int, int]] = {}
+        self.itp_required: List[str] = []
+        self.itp_range: Dict[str, Tuple[int, int]] = {}
+
+        # Iterative DFS - (node_id, exiting) pairs avoid recursion limits on deep trees
+        stack: List[Tuple[str, bool]] = [(root_id, False) for root_id in reversed(self.roots)]
+        leaf_start: Dict[str, int] = {}
+        itp_start: Dict[str, int] = {}
+
+        while stack:
+            node_id, exiting = stack.pop()
+            if exiting:
+                self.tout[node_id] = len(self.order)
+                self.leaf_range[node_id] = (leaf_start[node_id], len(self.leaves))
+                self.itp_range[node_id] = (itp_start[node_id], len(self.itp_required))
+                continue
+
+            parent_id = self.nodes[node_id].get("parentId")
+            parent_path = self.paths.get(parent_id, ()) if parent_id else ()
+            self.paths[node_id] = parent_path + (node_id,)
+            self.depth[node_id] = len(parent_path)
+
+            self.tin[node_id] = len(self.order)
+            self.order.append(node_id)
+            leaf_start[node_id] = len(self.leaves)
+            itp_start[node_id] = len(self.itp_required)
+
+            if self.nodes[node_id].get("itp_required"):
+                self.itp_required.append(node_id)
+            if not self.children[node_id]:
+                self.leaves.append(node_id)
+
+            stack.append((node_id, True))
+            for child_id in reversed(self.children[node_id]):
+                stack.append((child_id, False))
+
+    def _require(self, node_id: str) -> None:
+        if node_id not in self.tin:
+            raise KeyError(node_id)
+
+    def get_node(self, node_id: str) -> Dict[str, Any]:
+        """Return a single node by id"""
+        self._require(node_id)
+        return self.nodes[node_id]
+
+    def get_children(self, node_id: str) -> List[str]:
+        """Return direct child ids of a node"""
+        self._require(node_id)
+        return self.children[node_id]
+
+    def get_ancestors(self, node_id: str) -> List[str]:
+        """Return ancestor ids from the root down to the parent of the node"""
+        self._require(node_id)
+        return list(self.paths[node_id][:-1])
+
+    def get_path(self, node_id: str) -> Tuple[str, ...]:
+        """Return the cached root-to-node id path"""
+        self._require(node_id)
+        return self.paths[node_id]
+
+    def is_ancestor(self, ancestor_id: str, node_id: str) -> bool:
+        """Check whether ancestor_id is a proper ancestor of node_id in O(1)"""
+        self._require(ancestor_id)
+        self._require(node_id)
+        return (
+            ancestor_id != node_id
+            and self.tin[ancestor_id] <= self.tin[node_id]
+            and self.tout[node_id] <= self.tout[ancestor_id]
+        )
+
+    def get_subtree(self, node_id: str) -> List[str]:
+        """Return the node and all of its descendants in preorder"""
+        self._require(node_id)
+        return self.order[self.tin[node_id]:self.tout[node_id]]
+
+    def get_leaves_under(self, node_id: str) -> List[str]:
+        """Return leaf ids within the subtree of a node"""
+        self._require(node_id)
+        start, end = self.leaf_range[node_id]
+        return self.leaves[start:end]
+
+    def get_itp_required_under(self, node_id: str) -> List[str]:
+        """Return ids of nodes requiring an ITP within the subtree of a node"""
+        self._require(node_id)
+        start, end = self.itp_range[node_id]
+        return self.itp_required[start:end]
+
+def build_wbs_index(wbs_structure: Optional[Dict[str, Any]]) -> WbsIndex:
+    """Build a tree index for a WBS structure"""
+    nodes = (wbs_structure or {}).get("nodes") or []
+    return WbsIndex(nodes)
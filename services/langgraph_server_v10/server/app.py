@@ -1,7 +1,14 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse, StreamingResponse
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from collections import OrderedDict
 import asyncio
+import json
+import logging
+import os
+import re
+import socket
+import time
 import uuid
 from graphs.orchestrator import create_orchestrator_graph
 from graphs.document_extraction import create_document_extraction_graph
@@ -11,93 +18,551 @@ from graphs.wbs_extraction import create_wbs_extraction_graph
 from graphs.plan_generation import create_plan_generation_graph
 from graphs.lbs_extraction import create_lbs_extraction_graph
 from graphs.itp_generation import create_itp_generation_graph
+from graphs.email_ingest import create_email_ingest_graph, configure_email_ingest
+from graphs.conformance_checker import create_conformance_checker_graph
+from graphs.approvals_engine import create_approvals_engine_graph, configure_approvals_engine, approvals_inbox, approvals_due
+from graphs.wbs_index import WbsIndex, build_wbs_index
+from graphs.lbs_index import CRS_GRID, LbsIndex, build_lbs_index
+from graphs import memo, llm, retrieval
+from graphs.state import validate_graph_input
+from graphs.events import run_event_handler
+from server.checkpoints import create_checkpoint_saver
+from server.sink import AssetSink, create_spec_store
+from server.profiling import RunProfiler
+from server.run_store import create_run_store
+from server.subscriptions import SubscriptionHub
 
 app = FastAPI()
+logger = logging.getLogger(__name__)
+
+memo.configure_node_cache(
+	max_entries=int(os.environ.get("NODE_CACHE_MAX_ENTRIES", "256")),
+	max_bytes=int(os.environ.get("NODE_CACHE_MAX_MB", "256")) * 1024 * 1024,
+	disk_dir=os.environ.get("NODE_CACHE_DIR") or None
+)
+retrieval.configure_retrieval(
+	index_dir=os.environ.get("RETRIEVAL_INDEX_DIR") or None,
+	embedder=os.environ.get("RETRIEVAL_EMBEDDER", "tfidf"),
+	dim=int(os.environ.get("RETRIEVAL_DIM", "1024"))
+)
+configure_email_ingest(
+	spool_dir=os.environ.get("EMAIL_SPOOL_DIR") or None,
+	mailbox_dir=os.environ.get("EMAIL_MAILBOX_DIR") or None
+)
+# With a Postgres run store, approval state is kept in the same database
+configure_approvals_engine(
+	state_dir=os.environ.get("APPROVALS_STATE_DIR") or None,
+	store_url=os.environ.get("RUN_STORE_URL", "sqlite:///runs.sqlite")
+)
+llm.configure_llm_client(
+	backend=os.environ.get("LLM_BACKEND", "openai"),
+	model=os.environ.get("LLM_MODEL", "gpt-4o-mini"),
+	cache_dir=os.environ.get("LLM_CACHE_DIR") or None,
+	cache_max_bytes=int(os.environ.get("LLM_CACHE_MAX_MB", "512")) * 1024 * 1024,
+	replay_path=os.environ.get("LLM_REPLAY_PATH") or None,
+	record_path=os.environ.get("LLM_RECORD_PATH") or None,
+	max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", "4")),
+	requests_per_minute=float(os.environ["LLM_REQUESTS_PER_MINUTE"]) if os.environ.get("LLM_REQUESTS_PER_MINUTE") else None,
+	tokens_per_minute=float(os.environ["LLM_TOKENS_PER_MINUTE"]) if os.environ.get("LLM_TOKENS_PER_MINUTE") else None
+)
 
 class Thread(BaseModel):
 	id: str
 
-threads: dict[str, dict] = {}
-runs: dict[str, dict] = {}
+# Threads, run records, run events, profiles and the run queue live in the
+# shared store, so any worker process can accept, execute or stream any run
+store = create_run_store(os.environ.get("RUN_STORE_URL", "sqlite:///runs.sqlite"))
+worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+worker_concurrency = int(os.environ.get("RUN_WORKER_CONCURRENCY", "4"))
+queue_poll_interval = float(os.environ.get("RUN_QUEUE_POLL_INTERVAL", "0.2"))
+heartbeat_interval = float(os.environ.get("RUN_HEARTBEAT_INTERVAL", "5"))
+stale_run_timeout = float(os.environ.get("RUN_STALE_TIMEOUT", "60"))
+queue_wakeup = asyncio.Event()
+# One store poll per worker feeds every WebSocket subscriber
+hub = SubscriptionHub(
+	store,
+	poll_interval=float(os.environ.get("WS_POLL_INTERVAL", "0.25")),
+	flush_interval=float(os.environ.get("WS_FLUSH_INTERVAL", "0.1")),
+	max_pending=int(os.environ.get("WS_MAX_PENDING_EVENTS", "1000"))
+)
+queue_worker: asyncio.Task | None = None
+# Store errors of the queue loop; a worker that cannot reach its store
+# claims nothing, so this is where a broken store shows
+queue_errors = {"consecutive": 0, "total": 0, "last_error": None, "failing_since": None}
+# Runs this worker has claimed and is executing
+run_tasks: dict[str, asyncio.Task] = {}
+# LRU of run WBS indexes; an evicted one is rebuilt from the stored result on its next query
+wbs_indexes: "OrderedDict[str, WbsIndex]" = OrderedDict()
+wbs_index_cache_size = int(os.environ.get("WBS_INDEX_CACHE_SIZE", "64"))
+# project_id -> (file mtime, index); the mtime shows when another worker saved a newer index
+lbs_indexes: dict[str, tuple[int, LbsIndex]] = {}
+lbs_index_dir = os.environ.get("LBS_INDEX_DIR", "lbs_indexes")
+# Checkpoints follow the run store, so a run claimed on another host resumes from them
+checkpointer = create_checkpoint_saver(
+	os.environ.get("RUN_STORE_URL", "sqlite:///runs.sqlite"),
+	os.environ.get("CHECKPOINT_DB_PATH", "checkpoints.sqlite")
+)
+sink = AssetSink(create_spec_store(os.environ["ASSET_SINK_URL"])) if os.environ.get("ASSET_SINK_URL") else None
 graphs = {
-	"orchestrator": create_orchestrator_graph(),
-	"document_extraction": create_document_extraction_graph(),
-	"project_details": create_project_details_extraction_graph(),
-	"standards_extraction": create_standards_extraction_graph(),
-	"wbs_extraction": create_wbs_extraction_graph(),
-	"plan_generation": create_plan_generation_graph(),
-	"lbs_extraction": create_lbs_extraction_graph(),
-	"itp_generation": create_itp_generation_graph(),
+	"orchestrator": create_orchestrator_graph(checkpointer=checkpointer),
+	"document_extraction": create_document_extraction_graph(checkpointer=checkpointer),
+	"project_details": create_project_details_extraction_graph(checkpointer=checkpointer),
+	"standards_extraction": create_standards_extraction_graph(checkpointer=checkpointer),
+	"wbs_extraction": create_wbs_extraction_graph(checkpointer=checkpointer),
+	"plan_generation": create_plan_generation_graph(checkpointer=checkpointer),
+	"lbs_extraction": create_lbs_extraction_graph(checkpointer=checkpointer),
+	"itp_generation": create_itp_generation_graph(checkpointer=checkpointer),
+	"email_ingest": create_email_ingest_graph(checkpointer=checkpointer),
+	"conformance_checker": create_conformance_checker_graph(checkpointer=checkpointer),
+	"approvals_engine": create_approvals_engine_graph(checkpointer=checkpointer),
 }
 
 @app.post("/v10/threads")
 async def create_thread():
 	thread_id = str(uuid.uuid4())
-	threads[thread_id] = {"id": thread_id}
+	await store.create_thread(thread_id)
 	return {"id": thread_id}
 
 @app.get("/v10/threads/{thread_id}")
 async def get_thread(thread_id: str):
-	th = threads.get(thread_id)
+	th = await store.get_thread(thread_id)
 	if not th:
 		raise HTTPException(404, "Not found")
 	return th
 
 @app.get("/v10/graphs")
 async def list_graphs():
-	return {"graphs": list(graphs.keys()) + ["document_extraction","project_details","standards_extraction","plan_generation","wbs_extraction","lbs_extraction","itp_generation","conformance_checker","email_ingest","approvals_engine"]}
+	return {"graphs": list(graphs)}
 
 @app.post("/v10/graphs/{graph_id}/runs")
 async def start_run(graph_id: str, body: dict = None):
-	run_id = str(uuid.uuid4())
-	runs[run_id] = {"id": run_id, "graph_id": graph_id, "status": "running"}
+	inputs = dict(body or {})
+	# Opt-in profiling is a run option next to the graph input, not part of the graph state
+	profile = bool(inputs.pop("profile", False))
+	if graph_id in graphs:
+		# Input is validated once here; inside the graph state is passed on unvalidated
+		try:
+			inputs = validate_graph_input(graphs[graph_id], inputs)
+		except ValidationError as e:
+			raise HTTPException(422, e.errors(include_url=False, include_context=False))
 
+	run_id = str(uuid.uuid4())
+	record = {"id": run_id, "graph_id": graph_id, "status": "running"}
+	if (body or {}).get("project_id"):
+		# Lets WebSocket clients follow every run of a project
+		record["project_id"] = str(body["project_id"])
 	if graph_id in graphs:
-		# Run actual graph
-		asyncio.create_task(_run_graph(run_id, graph_id, body or {}))
-	else:
-		# Simulate for other graphs
-		asyncio.create_task(_simulate_events(run_id, graph_id))
+		checkpointer.register_run(run_id, graph_id)
+		if profile:
+			record["profiling"] = True
+	await store.create_run(record)
+	# Whichever worker claims the run executes it; other graphs are simulated
+	await store.enqueue(run_id, graph_id, inputs, profile)
+	_wake_queue_worker()
 
 	return {"id": run_id, "status": "running"}
 
-async def _run_graph(run_id: str, graph_id: str, config: dict):
+def _wake_queue_worker():
+	global queue_worker
+	# Started on first use too, for servers run without lifespan events
+	if queue_worker is None or queue_worker.done():
+		queue_worker = asyncio.create_task(_work_queue())
+	queue_wakeup.set()
+
+def _queue_error(error: Exception) -> None:
+	queue_errors["consecutive"] += 1
+	queue_errors["total"] += 1
+	queue_errors["last_error"] = f"{type(error).__name__}: {error}"
+	if queue_errors["consecutive"] == 1:
+		queue_errors["failing_since"] = time.time()
+		logger.exception("Run queue worker %s cannot reach the run store", worker_id)
+	elif queue_errors["consecutive"] % 100 == 0:
+		logger.error(
+			"Run queue worker %s still failing after %d attempts over %.0fs: %s",
+			worker_id, queue_errors["consecutive"], time.time() - queue_errors["failing_since"], queue_errors["last_error"]
+		)
+
+async def _work_queue():
+	last_heartbeat = 0.0
+	while True:
+		try:
+			for job in await store.claim(worker_id, worker_concurrency - len(run_tasks)):
+				# Requeued while this worker was still executing it; the running
+				# task holds the claim again and carries on
+				if job["run_id"] not in run_tasks:
+					run_tasks[job["run_id"]] = asyncio.create_task(_execute(job))
+			if time.monotonic() - last_heartbeat >= heartbeat_interval:
+				last_heartbeat = time.monotonic()
+				running = list(run_tasks)
+				held = set(await store.heartbeat(worker_id, running))
+				for run_id in running:
+					if run_id not in held and run_id in run_tasks:
+						# Missed heartbeats got the run requeued and another worker
+						# now runs it; stop this copy instead of racing it
+						logger.warning("Run %s was requeued away from worker %s; cancelling it here", run_id, worker_id)
+						run_tasks[run_id].cancel()
+				# Runs of a worker that died go back on the queue and resume from their checkpoints
+				await store.requeue_stale(stale_run_timeout)
+			if queue_errors["consecutive"]:
+				logger.warning("Run queue worker %s reached the run store again after %d failed attempts", worker_id, queue_errors["consecutive"])
+				queue_errors.update(consecutive=0, failing_since=None)
+		except Exception as e:
+			# The store being briefly unavailable must not stop the worker
+			_queue_error(e)
+		# Back off while the store keeps failing instead of retrying every poll
+		delay = min(queue_poll_interval * 2 ** min(queue_errors["consecutive"], 6), max(queue_poll_interval, 5.0))
+		try:
+			await asyncio.wait_for(queue_wakeup.wait(), delay)
+		except asyncio.TimeoutError:
+			pass
+		queue_wakeup.clear()
+
+async def _execute(job: dict):
+	run_id = job["run_id"]
 	try:
-		graph = graphs[graph_id]
-		result = await graph.ainvoke(config)
-		runs[run_id]["result"] = result
-		runs[run_id]["status"] = "completed"
-		runs[run_id]["last_event"] = "completed"
+		if job["graph_id"] in graphs:
+			await _run_graph(run_id, job["graph_id"], job["input"], job["profile"])
+		else:
+			await _simulate_events(run_id, job["graph_id"])
+	finally:
+		run_tasks.pop(run_id, None)
+		queue_wakeup.set()
+	# Not reached when the task is cancelled on shutdown, so the run stays queued
+	await store.complete(run_id, worker_id)
+
+async def _write_events(run_id: str, events: asyncio.Queue):
+	# Batches whatever nodes emitted since the last write; None ends the stream
+	while True:
+		batch = [await events.get()]
+		while not events.empty():
+			batch.append(events.get_nowait())
+		done = batch[-1] is None
+		if done:
+			batch.pop()
+		if batch:
+			await store.append_events(run_id, batch)
+		if done:
+			return
+
+# Graphs that diff the WBS they extract against previous_wbs_structure
+_WBS_DIFF_GRAPHS = ("wbs_extraction", "orchestrator")
+
+async def _run_graph(run_id: str, graph_id: str, config: dict | None, profile: bool = False):
+	# The run id doubles as the checkpoint thread, so every completed node is
+	# checkpointed and a None input continues from the last checkpoint
+	run_config = {"configurable": {"thread_id": run_id}}
+	graph = graphs[graph_id]
+	loop = asyncio.get_running_loop()
+	events: asyncio.Queue = asyncio.Queue()
+	writer = asyncio.create_task(_write_events(run_id, events))
+	profiler = None
+	if profile:
+		# Unprofiled runs get no callbacks at all
+		profiler = RunProfiler()
+		run_config["callbacks"] = [profiler.node_timer]
+		profiler.start()
+	try:
+		if config is not None and await checkpointer.aget_tuple(run_config):
+			# Claimed again after its worker died; carry on from the checkpoint
+			config = None
+		if config is not None and graph_id in _WBS_DIFF_GRAPHS and config.get("project_id") and config.get("previous_wbs_structure") is None:
+			# WBS changes are emitted against the project's last completed WBS,
+			# loaded when the run starts rather than when it was queued
+			previous = await store.latest_result_json(config["project_id"], "wbs_structure")
+			if previous:
+				config = {**config, "previous_wbs_structure": json.loads(previous)}
+		result = None
+		sunk = {"assets": 0, "edges": 0}
+		# Nodes may emit from executor threads, so events are handed to the loop
+		with run_event_handler(lambda event: loop.call_soon_threadsafe(events.put_nowait, event)):
+			async for mode, chunk in graph.astream(config, run_config, stream_mode=["updates", "values"]):
+				if mode == "updates":
+					for node, update in chunk.items():
+						await store.update_run(run_id, last_event=node)
+						# Specs are written while later nodes keep running; a full
+						# sink queue blocks here and holds the graph back
+						if sink and update:
+							assets, edges = await sink.put_update(run_id, update)
+							sunk["assets"] += assets
+							sunk["edges"] += edges
+				else:
+					result = chunk
+		# Every event is stored before the run shows as completed
+		loop.call_soon_threadsafe(events.put_nowait, None)
+		await writer
+		if profiler:
+			await _finish_profile(run_id, profiler)
+			profiler = None
+		fields = {}
+		status = "completed"
+		if sink:
+			await sink.flush()
+			fields["sink"] = sunk
+			failed = sink.pop_failures(run_id)
+			if failed:
+				# The result is still stored, but the run does not show as
+				# completed while some of its specs are missing
+				fields["sink"] = {**sunk, "failed": failed}
+				fields["error"] = f"Asset sink could not write {failed['assets']} asset and {failed['edges']} edge specs: {failed['error']}"
+				status = "failed"
+		if result and result.get("lbs_structure") and result.get("project_id"):
+			await loop.run_in_executor(None, _save_lbs_index, result["project_id"], result["lbs_structure"])
+		# The result is kept apart from the run record, serialized once here
+		# rather than on every read; nothing is written once the claim is lost
+		if await store.finish_run(run_id, worker_id, result, **fields, status=status, last_event="completed"):
+			checkpointer.set_run_status(run_id, status)
+		else:
+			logger.warning("Run %s finished on worker %s after its claim was lost; result discarded", run_id, worker_id)
 	except Exception as e:
-		runs[run_id]["status"] = "failed"
-		runs[run_id]["error"] = str(e)
+		if await store.finish_run(run_id, worker_id, status="failed", error=str(e)):
+			checkpointer.set_run_status(run_id, "failed")
+	finally:
+		writer.cancel()
+		if profiler:
+			await _finish_profile(run_id, profiler)
+		checkpointer.forget(run_id)
+
+async def _finish_profile(run_id: str, profiler: RunProfiler):
+	# Snapshotting and comparing allocations takes a while; other runs keep going meanwhile
+	artifact = await asyncio.get_running_loop().run_in_executor(None, profiler.stop)
+	await store.put_profile(run_id, artifact)
+	await store.update_run(run_id, profile=artifact["summary"])
 
 async def _simulate_events(run_id: str, graph_id: str):
 	stages = ["start","stage1","stage2","completed"]
 	for s in stages:
 		await asyncio.sleep(0.5)
-		runs[run_id]["last_event"] = s
+		await store.update_run(run_id, last_event=s)
 	if stages[-1] == "completed":
-		runs[run_id]["status"] = "completed"
+		await store.finish_run(run_id, worker_id, status="completed")
+
+@app.get("/v10/sink/stats")
+async def get_sink_stats():
+	if not sink:
+		return {"enabled": False}
+	return {"enabled": True, "pending": sink.queue.qsize(), **sink.stats}
+
+@app.get("/v10/queue/stats")
+async def get_queue_stats():
+	return {
+		"worker_id": worker_id,
+		"running": list(run_tasks),
+		"healthy": queue_errors["consecutive"] == 0,
+		"consecutive_errors": queue_errors["consecutive"],
+		"total_errors": queue_errors["total"],
+		"last_error": queue_errors["last_error"],
+		"failing_since": queue_errors["failing_since"]
+	}
+
+@app.get("/v10/memo/stats")
+async def get_memo_stats():
+	return memo.node_cache.report()
+
+@app.get("/v10/llm/stats")
+async def get_llm_stats():
+	return llm.llm_client.report()
+
+@app.on_event("startup")
+async def start_queue_worker():
+	_wake_queue_worker()
+
+@app.on_event("shutdown")
+async def stop_queue_worker():
+	await hub.close()
+	if queue_worker:
+		queue_worker.cancel()
+	tasks = list(run_tasks.values())
+	for task in tasks:
+		task.cancel()
+	await asyncio.gather(*tasks, return_exceptions=True)
+	# Unfinished runs are picked up by another worker straight away instead of after the stale timeout
+	await store.release(worker_id)
+	await store.close()
+	checkpointer.close()
+
+@app.on_event("shutdown")
+async def close_sink():
+	if sink:
+		await sink.close()
+
+# Items per page of a result list, when the client does not ask for fewer
+RESULT_PAGE_LIMIT = 1000
+
+def _json_members(members: dict) -> str:
+	"""A JSON object from member names and their already serialized values"""
+	return "{" + ",".join(f"{json.dumps(k)}:{v}" for k, v in members.items()) + "}"
+
+def _nest_paths(texts: dict) -> str:
+	# {"wbs_structure.nodes": "[...]"} -> {"wbs_structure": {"nodes": [...]}}
+	tree: dict = {}
+	for path, text in texts.items():
+		node = tree
+		*parents, leaf = path.split(".")
+		for name in parents:
+			node = node.setdefault(name, {})
+			if not isinstance(node, dict):
+				break
+		else:
+			node[leaf] = text
+	def render(node):
+		return node if isinstance(node, str) else _json_members({k: render(v) for k, v in node.items()})
+	return render(tree)
+
+async def _load_result(run_id: str, r: dict):
+	# Runs completed before results were stored separately keep them in the record
+	if "result" in r:
+		return r["result"]
+	texts = await store.get_result_json(run_id)
+	return None if texts is None else json.loads(_json_members(texts))
 
 @app.get("/v10/runs/{run_id}")
-async def get_run(run_id: str):
-	r = runs.get(run_id)
+async def get_run(run_id: str, fields: str | None = None):
+	"""The run record, with its result; `fields=status,result.edges` selects parts of it"""
+	r = await store.get_run(run_id)
 	if not r:
 		raise HTTPException(404, "Not found")
-	return r
+	wanted = [f for f in (fields or "").split(",") if f] or None
+	result_paths = None
+	if wanted is not None:
+		result_paths = [f[len("result."):] for f in wanted if f.startswith("result.")]
+		if "result" in wanted:
+			result_paths = None
+		elif not result_paths:
+			result_paths = []
+	if "result" in r:
+		if wanted is None:
+			return r
+		picked = {k: v for k, v in r.items() if k in wanted or k == "id"}
+		if result_paths is None and "result" in wanted:
+			picked["result"] = r["result"]
+		elif result_paths:
+			picked["result"] = _pick_paths(r["result"] or {}, result_paths)
+		return picked
+	members = {k: json.dumps(v, default=str) for k, v in r.items() if wanted is None or k in wanted or k == "id"}
+	if result_paths is None or result_paths:
+		texts = await store.get_result_json(run_id, result_paths)
+		if texts is not None:
+			members["result"] = _json_members(texts) if result_paths is None else _nest_paths(texts)
+		elif wanted is None and r.get("status") == "completed":
+			members["result"] = "null"
+	return Response(_json_members(members), media_type="application/json")
+
+def _pick_paths(result: dict, paths: list) -> dict:
+	picked: dict = {}
+	for path in paths:
+		value, node = result, picked
+		*parents, leaf = path.split(".")
+		for name in parents:
+			value = value.get(name) if isinstance(value, dict) else None
+			node = node.setdefault(name, {})
+		if isinstance(value, dict) and leaf in value:
+			node[leaf] = value[leaf]
+	return picked
+
+@app.get("/v10/runs/{run_id}/result")
+async def get_run_result_index(run_id: str):
+	"""Which result fields are stored, and how long each list is, for paging through them"""
+	if not await store.get_run(run_id):
+		raise HTTPException(404, "Not found")
+	return {"run_id": run_id, "fields": await store.result_index(run_id)}
+
+@app.get("/v10/runs/{run_id}/result/{path}")
+async def get_run_result_items(run_id: str, path: str, cursor: str | None = None, limit: int = 100):
+	"""One page of a result list such as `txt_project_documents` or `wbs_structure.nodes`"""
+	try:
+		start = int(cursor) if cursor else 0
+	except ValueError:
+		raise HTTPException(400, "Invalid cursor")
+	if start < 0 or limit < 1:
+		raise HTTPException(400, "cursor and limit must be positive")
+	page = await store.get_result_items(run_id, path, start, min(limit, RESULT_PAGE_LIMIT))
+	if page is None:
+		raise HTTPException(404, "No result list at that path")
+	total, items = page
+	end = start + len(items)
+	next_cursor = json.dumps(str(end)) if end < total else "null"
+	return Response(
+		f'{{"run_id":{json.dumps(run_id)},"path":{json.dumps(path)},"total":{total},"items":[{",".join(items)}],"next_cursor":{next_cursor}}}',
+		media_type="application/json"
+	)
+
+@app.get("/v10/runs/{run_id}/profile")
+async def get_run_profile(run_id: str, format: str = "json"):
+	r = await store.get_run(run_id)
+	if not r:
+		raise HTTPException(404, "Not found")
+	artifact = await store.get_profile(run_id)
+	if not artifact:
+		raise HTTPException(404, "Run was not profiled" if not r.get("profiling") else "Profile not ready")
+	if format == "collapsed":
+		return PlainTextResponse("\n".join(artifact["collapsed_stacks"]) + "\n")
+	return JSONResponse(artifact, headers={"Content-Disposition": f'attachment; filename="profile-{run_id}.json"'})
+
+@app.post("/v10/runs/{run_id}/resume")
+async def resume_run(run_id: str):
+	r = await store.get_run(run_id) or checkpointer.get_run(run_id)
+	if not r:
+		raise HTTPException(404, "Not found")
+	if r["graph_id"] not in graphs:
+		raise HTTPException(409, "Run cannot be resumed")
+	if r.get("status") == "completed":
+		raise HTTPException(409, "Run already completed")
+	if await store.is_queued(run_id):
+		raise HTTPException(409, "Run is still running")
+
+	graph = graphs[r["graph_id"]]
+	snapshot = await graph.aget_state({"configurable": {"thread_id": run_id}})
+	if not snapshot.values:
+		raise HTTPException(409, "No checkpoint to resume from")
+
+	await store.create_run({
+		"id": run_id,
+		"graph_id": r["graph_id"],
+		"status": "running",
+		"resumed_from": list(snapshot.next)
+	})
+	checkpointer.set_run_status(run_id, "running")
+	await store.enqueue(run_id, r["graph_id"], None)
+	_wake_queue_worker()
+	return {"id": run_id, "status": "running", "resumed_from": list(snapshot.next)}
+
+@app.websocket("/v10/ws")
+async def subscribe_runs(websocket: WebSocket):
+	"""Events and status changes of many runs over one connection.
+
+	Clients send {"action": "subscribe" | "unsubscribe", "run_ids": [...]}
+	and/or "project_id"; the server sends acknowledgements and "batch"
+	messages holding the events and latest run statuses since the last one.
+	"""
+	await websocket.accept()
+	subscriber = await hub.connect(websocket)
+	try:
+		while True:
+			try:
+				message = await websocket.receive_json()
+			except ValueError:
+				subscriber.reply({"type": "error", "error": "Messages must be JSON"})
+				continue
+			await hub.handle(subscriber, message)
+	except WebSocketDisconnect:
+		pass
+	finally:
+		hub.disconnect(subscriber)
 
 @app.get("/v10/runs/{run_id}/events")
 async def stream_events(run_id: str):
-	if run_id not in runs:
+	if not await store.get_run(run_id):
 		raise HTTPException(404, "Not found")
 	async def event_generator():
 		previous = None
+		seq = 0
 		while True:
 			await asyncio.sleep(0.3)
-			r = runs.get(run_id)
+			r = await store.get_run(run_id)
 			if not r:
 				break
+			for seq, event in await store.events_after(run_id, seq):
+				yield f"event: section\ndata: {json.dumps(event)}\n\n"
 			le = r.get("last_event")
 			if le and le != previous:
 				data = {
@@ -106,8 +571,10 @@ async def stream_events(run_id: str):
 					"graph_id": r.get("graph_id"),
 					"status": r.get("status")
 				}
-				if r.get("result"):
-					data["result"] = r["result"]
+				if le == "completed":
+					result = await _load_result(run_id, r)
+					if result:
+						data["result"] = result
 				if r.get("error"):
 					data["error"] = r["error"]
 				yield f"event: message\ndata: {data}\n\n"
@@ -119,3 +586,104 @@ async def stream_events(run_id: str):
 				yield f"event: error\ndata: {{\"run_id\": \"{run_id}\", \"error\": \"{r.get('error', 'Unknown error')}\"}}\n\n"
 				break
 	return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+
+async def _get_wbs_index(run_id: str) -> WbsIndex:
+	index = wbs_indexes.get(run_id)
+	if index is not None:
+		wbs_indexes.move_to_end(run_id)
+	else:
+		r = await store.get_run(run_id)
+		if not r:
+			raise HTTPException(404, "Not found")
+		if "result" in r:
+			wbs = (r["result"] or {}).get("wbs_structure")
+		else:
+			texts = await store.get_result_json(run_id, ["wbs_structure"]) or {}
+			wbs = json.loads(texts["wbs_structure"]) if "wbs_structure" in texts else None
+		if not wbs:
+			raise HTTPException(404, "No WBS structure for run")
+		index = build_wbs_index(wbs)
+		wbs_indexes[run_id] = index
+		while len(wbs_indexes) > wbs_index_cache_size:
+			wbs_indexes.popitem(last=False)
+	return index
+
+async def _wbs_query(run_id: str, node_id: str, query) -> dict:
+	index = await _get_wbs_index(run_id)
+	try:
+		node_ids = query(index, node_id)
+	except KeyError:
+		raise HTTPException(404, "WBS node not found")
+	return {"node_id": node_id, "nodes": [index.nodes[n] for n in node_ids]}
+
+@app.get("/v10/runs/{run_id}/wbs/{node_id}/children")
+async def get_wbs_children(run_id: str, node_id: str):
+	return await _wbs_query(run_id, node_id, WbsIndex.get_children)
+
+@app.get("/v10/runs/{run_id}/wbs/{node_id}/subtree")
+async def get_wbs_subtree(run_id: str, node_id: str):
+	return await _wbs_query(run_id, node_id, WbsIndex.get_subtree)
+
+@app.get("/v10/runs/{run_id}/wbs/{node_id}/ancestors")
+async def get_wbs_ancestors(run_id: str, node_id: str):
+	return await _wbs_query(run_id, node_id, WbsIndex.get_ancestors)
+
+@app.get("/v10/runs/{run_id}/wbs/{node_id}/leaves")
+async def get_wbs_leaves(run_id: str, node_id: str):
+	return await _wbs_query(run_id, node_id, WbsIndex.get_leaves_under)
+
+@app.get("/v10/runs/{run_id}/wbs/{node_id}/itp-required")
+async def get_wbs_itp_required(run_id: str, node_id: str):
+	return await _wbs_query(run_id, node_id, WbsIndex.get_itp_required_under)
+
+def _lbs_index_path(project_id: str) -> str:
+	return os.path.join(lbs_index_dir, re.sub(r"[^A-Za-z0-9_-]", "_", project_id) + ".npz")
+
+def _save_lbs_index(project_id: str, lbs_structure: dict) -> None:
+	# Each project keeps the index of its latest LBS, replaced atomically
+	index = build_lbs_index(lbs_structure)
+	os.makedirs(lbs_index_dir, exist_ok=True)
+	path = _lbs_index_path(project_id)
+	index.save(path + ".tmp")
+	os.replace(path + ".tmp", path)
+	lbs_indexes[project_id] = (os.stat(path).st_mtime_ns, index)
+
+def _get_lbs_index(project_id: str) -> LbsIndex:
+	path = _lbs_index_path(project_id)
+	try:
+		mtime = os.stat(path).st_mtime_ns
+	except FileNotFoundError:
+		raise HTTPException(404, "No LBS index for project")
+	cached = lbs_indexes.get(project_id)
+	if cached is None or cached[0] != mtime:
+		# The index dir is shared by all workers; reload when any of them saved a newer one
+		cached = lbs_indexes[project_id] = (mtime, LbsIndex.load(path))
+	return cached[1]
+
+@app.get("/v10/projects/{project_id}/lbs/chainage")
+async def get_lbs_by_chainage(project_id: str, start: float, end: float | None = None):
+	index = _get_lbs_index(project_id)
+	return {"project_id": project_id, "nodes": [index.nodes[n] for n in index.query_chainage(start, end)]}
+
+@app.get("/v10/projects/{project_id}/lbs/within")
+async def get_lbs_within(project_id: str, min_x: float, min_y: float, max_x: float, max_y: float, crs: str = CRS_GRID):
+	index = _get_lbs_index(project_id)
+	return {"project_id": project_id, "nodes": [index.nodes[n] for n in index.query_within(min_x, min_y, max_x, max_y, crs)]}
+
+@app.get("/v10/projects/{project_id}/approvals/inbox")
+async def get_approvals_inbox(project_id: str, approver: str | None = None, roles: str | None = None):
+	role_list = [r for r in (roles or "").split(",") if r]
+	if not approver and not role_list:
+		raise HTTPException(400, "approver or roles required")
+	# The engine lock is held while a run applies events, so wait for it off the event loop
+	items = await asyncio.to_thread(approvals_inbox, project_id, approver, role_list)
+	return {"project_id": project_id, "items": items}
+
+@app.get("/v10/projects/{project_id}/approvals/due")
+async def get_approvals_due(project_id: str, before: str):
+	try:
+		items = await asyncio.to_thread(approvals_due, project_id, before)
+	except ValueError:
+		raise HTTPException(400, "before must be an ISO 8601 time")
+	return {"project_id": project_id, "before": before, "items": items}
@@ -0,0 +1,476 @@
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import sqlite3
+import threading
+import time
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+	BaseCheckpointSaver,
+	Checkpoint,
+	CheckpointMetadata,
+	CheckpointTuple,
+	SerializerProtocol,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+	thread_id TEXT NOT NULL,
+	checkpoint_id TEXT NOT NULL,
+	parent_id TEXT,
+	header BLOB NOT NULL,
+	metadata BLOB NOT NULL,
+	PRIMARY KEY (thread_id, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS channel_deltas (
+	thread_id TEXT NOT NULL,
+	channel TEXT NOT NULL,
+	version NOT NULL,
+	kind TEXT NOT NULL,
+	value BLOB NOT NULL,
+	PRIMARY KEY (thread_id, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+	thread_id TEXT NOT NULL,
+	checkpoint_id TEXT NOT NULL,
+	task_id TEXT NOT NULL,
+	idx INTEGER NOT NULL,
+	channel TEXT NOT NULL,
+	value BLOB NOT NULL,
+	PRIMARY KEY (thread_id, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS runs (
+	run_id TEXT PRIMARY KEY,
+	graph_id TEXT NOT NULL,
+	status TEXT NOT NULL,
+	updated_at REAL NOT NULL
+);
+"""
+
+def _strip_writes(metadata: CheckpointMetadata) -> Dict[str, Any]:
+	# metadata["writes"] repeats every node output; the channel deltas already hold them
+	if not metadata.get("writes"):
+		return dict(metadata)
+	return {**metadata, "writes": {node: None for node in metadata["writes"]}}
+
+class DeltaSaver(BaseCheckpointSaver):
+	"""Checkpoint saver that writes only what changed since the previous checkpoint.
+
+	Each checkpoint row holds the small bookkeeping header (channel versions,
+	versions seen, pending sends). Channel values are stored separately, one
+	row per (channel, version), so a channel is written only when a node
+	updates it; list channels that were only appended to store just the new tail.
+	Subclasses provide the tables.
+	"""
+
+	def __init__(self, *, serde: Optional[SerializerProtocol] = None):
+		super().__init__(serde=serde)
+		# thread_id -> channel -> (version, detached copy of a list value) of the last stored delta
+		self._last: Dict[str, Dict[str, Tuple[Any, Optional[List[Any]]]]] = {}
+
+	def _appended(self, value: Any, stored: Optional[List[Any]]) -> bool:
+		# Elements are compared by content, not identity: a node may have
+		# mutated an element of the list in place since the last checkpoint.
+		# The stored copy is built from deserialized deltas, so only new
+		# elements are ever serialized, and the prefix check is a C-level ==
+		return (
+			isinstance(value, list) and stored is not None
+			and len(value) >= len(stored) and value[:len(stored)] == stored
+		)
+
+	# Storage, implemented by each backend
+
+	def register_run(self, run_id: str, graph_id: str, status: str = "running") -> None:
+		raise NotImplementedError
+
+	def set_run_status(self, run_id: str, status: str) -> None:
+		raise NotImplementedError
+
+	def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+		raise NotImplementedError
+
+	def _store(self, deltas: List[Tuple], checkpoint_row: Tuple) -> None:
+		"""Write the channel deltas and the checkpoint row in one transaction"""
+		raise NotImplementedError
+
+	def _store_writes(self, rows: List[Tuple]) -> None:
+		raise NotImplementedError
+
+	def _delta_rows(self, thread_id: str) -> List[Tuple]:
+		"""(channel, version, kind, value) of a thread, ordered by channel and version"""
+		raise NotImplementedError
+
+	def _write_rows(self, thread_id: str, checkpoint_id: str) -> List[Tuple]:
+		"""(task_id, channel, value) of a checkpoint, ordered by task and index"""
+		raise NotImplementedError
+
+	def _checkpoint_rows(self, thread_id: Optional[str], checkpoint_id: Optional[str] = None,
+						before: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple]:
+		"""(thread_id, checkpoint_id, parent_id, header, metadata), newest first"""
+		raise NotImplementedError
+
+	def close(self) -> None:
+		raise NotImplementedError
+
+	def forget(self, thread_id: str) -> None:
+		"""Drop the in-memory delta cache of a finished thread"""
+		self._last.pop(thread_id, None)
+
+	# Checkpoints
+
+	def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata) -> RunnableConfig:
+		thread_id = config["configurable"]["thread_id"]
+		parent_id = config["configurable"].get("thread_ts")
+		last = self._last.setdefault(thread_id, {})
+
+		deltas = []
+		for channel, value in checkpoint["channel_values"].items():
+			version = checkpoint["channel_versions"].get(channel)
+			previous = last.get(channel)
+			# Unversioned channels still hold their initial value, which the graph recreates
+			if version is None or (previous is not None and previous[0] == version):
+				continue
+			stored = previous[1] if previous is not None else None
+			if self._appended(value, stored):
+				# Only the appended tail is new
+				blob = self.serde.dumps(value[len(stored):])
+				deltas.append((thread_id, channel, version, "append", blob))
+				copy = stored + self.serde.loads(blob)
+			else:
+				blob = self.serde.dumps(value)
+				deltas.append((thread_id, channel, version, "set", blob))
+				copy = self.serde.loads(blob) if isinstance(value, list) else None
+			last[channel] = (version, copy)
+
+		header = self.serde.dumps({
+			"v": checkpoint["v"],
+			"id": checkpoint["id"],
+			"ts": checkpoint["ts"],
+			"channels": list(checkpoint["channel_values"].keys()),
+			"channel_versions": checkpoint["channel_versions"],
+			"versions_seen": checkpoint["versions_seen"],
+			"pending_sends": checkpoint.get("pending_sends", []),
+			"current_tasks": checkpoint.get("current_tasks", {})
+		})
+		self._store(deltas, (thread_id, checkpoint["id"], parent_id, header, self.serde.dumps(_strip_writes(metadata))))
+		return {"configurable": {"thread_id": thread_id, "thread_ts": checkpoint["id"]}}
+
+	def put_writes(self, config: RunnableConfig, writes: List[Tuple[str, Any]], task_id: str) -> None:
+		thread_id = config["configurable"]["thread_id"]
+		checkpoint_id = config["configurable"]["thread_ts"]
+		self._store_writes([
+			(thread_id, checkpoint_id, task_id, idx, channel, self.serde.dumps(value))
+			for idx, (channel, value) in enumerate(writes)
+		])
+
+	def _load_channel_values(self, thread_id: str, header: Dict[str, Any]) -> Dict[str, Any]:
+		versions = header["channel_versions"]
+		present = set(header["channels"])
+		values: Dict[str, Any] = {}
+		for channel, version, kind, blob in self._delta_rows(thread_id):
+			if channel not in present or version > versions.get(channel, version):
+				continue
+			if kind == "append" and channel in values:
+				values[channel] = values[channel] + self.serde.loads(blob)
+			else:
+				values[channel] = self.serde.loads(blob)
+		return values
+
+	def _to_tuple(self, thread_id: str, checkpoint_id: str, parent_id: Optional[str],
+				header_blob: bytes, metadata_blob: bytes) -> CheckpointTuple:
+		header = self.serde.loads(header_blob)
+		channel_values = self._load_channel_values(thread_id, header)
+		checkpoint = Checkpoint(
+			v=header["v"],
+			id=header["id"],
+			ts=header["ts"],
+			channel_values=channel_values,
+			channel_versions=header["channel_versions"],
+			versions_seen=header["versions_seen"],
+			pending_sends=header["pending_sends"],
+			current_tasks=header["current_tasks"]
+		)
+		writes = self._write_rows(thread_id, checkpoint_id)
+
+		return CheckpointTuple(
+			config={"configurable": {"thread_id": thread_id, "thread_ts": checkpoint_id}},
+			checkpoint=checkpoint,
+			metadata=self.serde.loads(metadata_blob),
+			parent_config={"configurable": {"thread_id": thread_id, "thread_ts": parent_id}} if parent_id else None,
+			pending_writes=[(task_id, channel, self.serde.loads(value)) for task_id, channel, value in writes]
+		)
+
+	def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+		thread_id = config["configurable"]["thread_id"]
+		checkpoint_id = config["configurable"].get("thread_ts")
+		rows = self._checkpoint_rows(thread_id, checkpoint_id=checkpoint_id, limit=1)
+		if not rows:
+			return None
+
+		result = self._to_tuple(*rows[0])
+		if not checkpoint_id:
+			# Seed the delta cache so a resumed run keeps writing deltas
+			versions = result.checkpoint["channel_versions"]
+			self._last[thread_id] = {
+				channel: (versions.get(channel), self.serde.loads(self.serde.dumps(value)) if isinstance(value, list) else None)
+				for channel, value in result.checkpoint["channel_values"].items()
+			}
+		return result
+
+	def list(
+		self,
+		config: Optional[RunnableConfig],
+		*,
+		filter: Optional[Dict[str, Any]] = None,
+		before: Optional[RunnableConfig] = None,
+		limit: Optional[int] = None,
+	) -> Iterator[CheckpointTuple]:
+		rows = self._checkpoint_rows(
+			config["configurable"]["thread_id"] if config else None,
+			before=before["configurable"]["thread_ts"] if before else None
+		)
+		count = 0
+		for thread_id, checkpoint_id, parent_id, header, metadata in rows:
+			if filter:
+				loaded = self.serde.loads(metadata)
+				if not all(loaded.get(k) == v for k, v in filter.items()):
+					continue
+			yield self._to_tuple(thread_id, checkpoint_id, parent_id, header, metadata)
+			count += 1
+			if limit is not None and count >= limit:
+				break
+
+	async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+		return await asyncio.get_running_loop().run_in_executor(None, self.get_tuple, config)
+
+	async def alist(
+		self,
+		config: Optional[RunnableConfig],
+		*,
+		filter: Optional[Dict[str, Any]] = None,
+		before: Optional[RunnableConfig] = None,
+		limit: Optional[int] = None,
+	) -> AsyncIterator[CheckpointTuple]:
+		items = await asyncio.get_running_loop().run_in_executor(
+			None, lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+		)
+		for item in items:
+			yield item
+
+	async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata) -> RunnableConfig:
+		return await asyncio.get_running_loop().run_in_executor(None, self.put, config, checkpoint, metadata)
+
+	async def aput_writes(self, config: RunnableConfig, writes: List[Tuple[str, Any]], task_id: str) -> None:
+		await asyncio.get_running_loop().run_in_executor(None, self.put_writes, config, writes, task_id)
+
+class DeltaSqliteSaver(DeltaSaver):
+	"""Delta checkpoints in a SQLite file, for workers on one host"""
+
+	def __init__(self, path: str, *, serde: Optional[SerializerProtocol] = None):
+		super().__init__(serde=serde)
+		self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+		self.conn.execute("PRAGMA journal_mode=WAL")
+		self.conn.execute("PRAGMA synchronous=NORMAL")
+		self.conn.executescript(_SCHEMA)
+		self.lock = threading.Lock()
+
+	# Run registry - lets a restarted worker find the graph of a run to resume
+
+	def register_run(self, run_id: str, graph_id: str, status: str = "running") -> None:
+		with self.lock:
+			self.conn.execute(
+				"INSERT OR REPLACE INTO runs (run_id, graph_id, status, updated_at) VALUES (?, ?, ?, ?)",
+				(run_id, graph_id, status, time.time())
+			)
+
+	def set_run_status(self, run_id: str, status: str) -> None:
+		with self.lock:
+			self.conn.execute("UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?", (status, time.time(), run_id))
+
+	def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+		with self.lock:
+			row = self.conn.execute("SELECT run_id, graph_id, status FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+		if not row:
+			return None
+		return {"id": row[0], "graph_id": row[1], "status": row[2]}
+
+	# Checkpoint storage
+
+	def _store(self, deltas: List[Tuple], checkpoint_row: Tuple) -> None:
+		with self.lock:
+			self.conn.execute("BEGIN")
+			try:
+				self.conn.executemany(
+					"INSERT OR IGNORE INTO channel_deltas (thread_id, channel, version, kind, value) VALUES (?, ?, ?, ?, ?)",
+					deltas
+				)
+				self.conn.execute(
+					"INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_id, parent_id, header, metadata) VALUES (?, ?, ?, ?, ?)",
+					checkpoint_row
+				)
+				self.conn.execute("COMMIT")
+			except Exception:
+				self.conn.execute("ROLLBACK")
+				raise
+
+	def _store_writes(self, rows: List[Tuple]) -> None:
+		with self.lock:
+			self.conn.executemany(
+				"INSERT OR REPLACE INTO writes (thread_id, checkpoint_id, task_id, idx, channel, value) VALUES (?, ?, ?, ?, ?, ?)",
+				rows
+			)
+
+	def _delta_rows(self, thread_id: str) -> List[Tuple]:
+		with self.lock:
+			return self.conn.execute(
+				"SELECT channel, version, kind, value FROM channel_deltas WHERE thread_id = ? ORDER BY channel, version",
+				(thread_id,)
+			).fetchall()
+
+	def _write_rows(self, thread_id: str, checkpoint_id: str) -> List[Tuple]:
+		with self.lock:
+			return self.conn.execute(
+				"SELECT task_id, channel, value FROM writes WHERE thread_id = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+				(thread_id, checkpoint_id)
+			).fetchall()
+
+	def _checkpoint_rows(self, thread_id: Optional[str], checkpoint_id: Optional[str] = None,
+						before: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple]:
+		query = "SELECT thread_id, checkpoint_id, parent_id, header, metadata FROM checkpoints"
+		clauses, params = [], []
+		if thread_id:
+			clauses.append("thread_id = ?")
+			params.append(thread_id)
+		if checkpoint_id:
+			clauses.append("checkpoint_id = ?")
+			params.append(checkpoint_id)
+		if before:
+			clauses.append("checkpoint_id < ?")
+			params.append(before)
+		if clauses:
+			query += " WHERE " + " AND ".join(clauses)
+		query += " ORDER BY checkpoint_id DESC"
+		if limit is not None:
+			query += f" LIMIT {int(limit)}"
+
+		with self.lock:
+			return self.conn.execute(query, params).fetchall()
+
+	def close(self) -> None:
+		self.conn.close()
+
+class DeltaPostgresSaver(DeltaSaver):
+	"""Delta checkpoints in Postgres (db/migrations/009_graph_checkpoints.sql), for workers on several hosts.
+
+	A run requeued after its worker died, or resumed on request, continues
+	from its last checkpoint on whichever host claims it.
+	"""
+
+	def __init__(self, dsn: str, *, serde: Optional[SerializerProtocol] = None, min_size: int = 1, max_size: int = 8):
+		super().__init__(serde=serde)
+		try:
+			from psycopg_pool import ConnectionPool
+		except ImportError as e:
+			raise RuntimeError("Postgres checkpoints require psycopg and psycopg-pool") from e
+		# Synchronous pool: the saver's methods already run in executor threads
+		self.pool = ConnectionPool(dsn, min_size=min_size, max_size=max_size, open=False)
+		self._opened = False
+		self._open_lock = threading.Lock()
+
+	def _connection(self):
+		if not self._opened:
+			with self._open_lock:
+				if not self._opened:
+					self.pool.open()
+					self._opened = True
+		return self.pool.connection()
+
+	def _fetch(self, query: str, params=()) -> List[Tuple]:
+		with self._connection() as conn:
+			cur = conn.execute(query, params)
+			return cur.fetchall() if cur.description else []
+
+	# Run registry
+
+	def register_run(self, run_id: str, graph_id: str, status: str = "running") -> None:
+		self._fetch(
+			"INSERT INTO public.graph_checkpoint_runs (run_id, graph_id, status, updated_at) VALUES (%s, %s, %s, now()) "
+			"ON CONFLICT (run_id) DO UPDATE SET graph_id = EXCLUDED.graph_id, status = EXCLUDED.status, updated_at = now()",
+			(run_id, graph_id, status)
+		)
+
+	def set_run_status(self, run_id: str, status: str) -> None:
+		self._fetch("UPDATE public.graph_checkpoint_runs SET status = %s, updated_at = now() WHERE run_id = %s", (status, run_id))
+
+	def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+		rows = self._fetch("SELECT run_id, graph_id, status FROM public.graph_checkpoint_runs WHERE run_id = %s", (run_id,))
+		if not rows:
+			return None
+		return {"id": rows[0][0], "graph_id": rows[0][1], "status": rows[0][2]}
+
+	# Checkpoint storage
+
+	def _store(self, deltas: List[Tuple], checkpoint_row: Tuple) -> None:
+		with self._connection() as conn:
+			with conn.transaction():
+				with conn.cursor() as cur:
+					cur.executemany(
+						"INSERT INTO public.graph_checkpoint_deltas (thread_id, channel, version, kind, value) VALUES (%s, %s, %s, %s, %s) "
+						"ON CONFLICT DO NOTHING",
+						deltas
+					)
+				conn.execute(
+					"INSERT INTO public.graph_checkpoints (thread_id, checkpoint_id, parent_id, header, metadata) VALUES (%s, %s, %s, %s, %s) "
+					"ON CONFLICT (thread_id, checkpoint_id) DO UPDATE SET parent_id = EXCLUDED.parent_id, header = EXCLUDED.header, metadata = EXCLUDED.metadata",
+					checkpoint_row
+				)
+
+	def _store_writes(self, rows: List[Tuple]) -> None:
+		with self._connection() as conn:
+			with conn.cursor() as cur:
+				cur.executemany(
+					"INSERT INTO public.graph_checkpoint_writes (thread_id, checkpoint_id, task_id, idx, channel, value) VALUES (%s, %s, %s, %s, %s, %s) "
+					"ON CONFLICT (thread_id, checkpoint_id, task_id, idx) DO UPDATE SET channel = EXCLUDED.channel, value = EXCLUDED.value",
+					rows
+				)
+
+	def _delta_rows(self, thread_id: str) -> List[Tuple]:
+		return self._fetch(
+			"SELECT channel, version, kind, value FROM public.graph_checkpoint_deltas WHERE thread_id = %s ORDER BY channel, version",
+			(thread_id,)
+		)
+
+	def _write_rows(self, thread_id: str, checkpoint_id: str) -> List[Tuple]:
+		return self._fetch(
+			"SELECT task_id, channel, value FROM public.graph_checkpoint_writes WHERE thread_id = %s AND checkpoint_id = %s ORDER BY task_id, idx",
+			(thread_id, checkpoint_id)
+		)
+
+	def _checkpoint_rows(self, thread_id: Optional[str], checkpoint_id: Optional[str] = None,
+						before: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple]:
+		query = "SELECT thread_id, checkpoint_id, parent_id, header, metadata FROM public.graph_checkpoints"
+		clauses, params = [], []
+		if thread_id:
+			clauses.append("thread_id = %s")
+			params.append(thread_id)
+		if checkpoint_id:
+			clauses.append("checkpoint_id = %s")
+			params.append(checkpoint_id)
+		if before:
+			clauses.append("checkpoint_id < %s")
+			params.append(before)
+		if clauses:
+			query += " WHERE " + " AND ".join(clauses)
+		query += " ORDER BY checkpoint_id DESC"
+		if limit is not None:
+			query += f" LIMIT {int(limit)}"
+		return self._fetch(query, params)
+
+	def close(self) -> None:
+		if self._opened:
+			self.pool.close()
+
+def create_checkpoint_saver(store_url: str, sqlite_path: str) -> DeltaSaver:
+	"""Keep checkpoints next to the run store: in Postgres when runs are, else in a SQLite file"""
+	if store_url.startswith(("postgres://", "postgresql://")):
+		return DeltaPostgresSaver(store_url)
+	return DeltaSqliteSaver(sqlite_path)
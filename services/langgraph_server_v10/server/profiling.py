@@ -0,0 +1,225 @@
+from typing import Dict, List, Any, Optional, Tuple
+from collections import Counter
+from uuid import UUID
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Leaf frames in these modules are threads waiting for work, not CPU time
+_IDLE_MODULES = ("selectors.py", "threading.py", "queue.py", "concurrent/futures/thread.py")
+_MAX_STACK = 64
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+# Whether tracing was started here; tracing someone else turned on is left running
+_tracemalloc_owned = False
+
+def _start_tracemalloc(frames: int) -> None:
+	global _tracemalloc_users, _tracemalloc_owned
+	with _tracemalloc_lock:
+		if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+			tracemalloc.start(frames)
+			_tracemalloc_owned = True
+		_tracemalloc_users += 1
+
+def _stop_tracemalloc() -> None:
+	global _tracemalloc_users, _tracemalloc_owned
+	with _tracemalloc_lock:
+		_tracemalloc_users -= 1
+		# Overlapping profiled runs share tracing; the last one out stops it
+		if _tracemalloc_users == 0 and _tracemalloc_owned:
+			tracemalloc.stop()
+			_tracemalloc_owned = False
+
+def _short_path(filename: str) -> str:
+	for root in sorted((p for p in sys.path if p), key=len, reverse=True):
+		if filename.startswith(root + os.sep):
+			return filename[len(root) + 1:]
+	return filename
+
+def _function(code) -> str:
+	return f"{_short_path(code.co_filename)}:{code.co_firstlineno}:{code.co_name}"
+
+class SamplingProfiler:
+	"""Samples the stacks of every other thread at a fixed interval"""
+
+	def __init__(self, interval: float = 0.005):
+		self.interval = interval
+		self.samples = 0
+		self.self_counts: Counter = Counter()
+		self.total_counts: Counter = Counter()
+		self.stacks: Counter = Counter()
+		self._stop = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+		self._names: Dict[Any, str] = {}
+
+	def _name(self, code) -> str:
+		name = self._names.get(code)
+		if name is None:
+			name = self._names[code] = _function(code)
+		return name
+
+	def _sample(self) -> None:
+		own = threading.get_ident()
+		for thread_id, frame in sys._current_frames().items():
+			if thread_id == own or frame.f_code.co_filename.endswith(_IDLE_MODULES):
+				continue
+			stack: List[str] = []
+			while frame is not None and len(stack) < _MAX_STACK:
+				stack.append(self._name(frame.f_code))
+				frame = frame.f_back
+			self.samples += 1
+			self.self_counts[stack[0]] += 1
+			self.total_counts.update(set(stack))
+			self.stacks[";".join(reversed(stack))] += 1
+
+	def _run(self) -> None:
+		while not self._stop.wait(self.interval):
+			self._sample()
+
+	def start(self) -> None:
+		self._thread = threading.Thread(target=self._run, name="run-profiler", daemon=True)
+		self._thread.start()
+
+	def stop(self) -> None:
+		self._stop.set()
+		if self._thread:
+			self._thread.join()
+
+class NodeTimer(BaseCallbackHandler):
+	"""Times graph nodes, nested subgraph nodes included, from LangChain run callbacks"""
+
+	run_inline = True
+
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.parents: Dict[UUID, Optional[UUID]] = {}
+		self.paths: Dict[UUID, str] = {}
+		self.active: Dict[UUID, Tuple[float, int]] = {}
+		self.nodes: Dict[str, Dict[str, Any]] = {}
+
+	def _parent_path(self, parent_run_id: Optional[UUID]) -> Optional[str]:
+		while parent_run_id is not None:
+			if parent_run_id in self.paths:
+				return self.paths[parent_run_id]
+			parent_run_id = self.parents.get(parent_run_id)
+		return None
+
+	def on_chain_start(self, serialized, inputs, *, run_id: UUID, parent_run_id: Optional[UUID] = None,
+					   tags: Optional[List[str]] = None, metadata: Optional[Dict[str, Any]] = None, **kwargs) -> None:
+		name = kwargs.get("name")
+		with self.lock:
+			self.parents[run_id] = parent_run_id
+			# Node tasks carry a graph:step tag and are named after their node
+			is_node = (
+				name not in (None, "__start__")
+				and (metadata or {}).get("langgraph_node") == name
+				and any(tag.startswith("graph:step:") for tag in tags or ())
+			)
+			if not is_node:
+				return
+			parent_path = self._parent_path(parent_run_id)
+			self.paths[run_id] = f"{parent_path}/{name}" if parent_path else name
+			traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+			self.active[run_id] = (time.perf_counter(), traced)
+
+	def _finish(self, run_id: UUID, failed: bool) -> None:
+		with self.lock:
+			started = self.active.pop(run_id, None)
+			if started is None:
+				return
+			elapsed = time.perf_counter() - started[0]
+			traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+			node = self.nodes.setdefault(self.paths[run_id], {"calls": 0, "errors": 0, "total_s": 0.0, "max_s": 0.0, "net_alloc_kb": 0.0})
+			node["calls"] += 1
+			node["errors"] += int(failed)
+			node["total_s"] += elapsed
+			node["max_s"] = max(node["max_s"], elapsed)
+			# Net growth of traced memory while the node ran; concurrent nodes share it
+			node["net_alloc_kb"] += (traced - started[1]) / 1024
+
+	def on_chain_end(self, outputs, *, run_id: UUID, **kwargs) -> None:
+		self._finish(run_id, False)
+
+	def on_chain_error(self, error, *, run_id: UUID, **kwargs) -> None:
+		self._finish(run_id, True)
+
+class RunProfiler:
+	"""CPU samples, allocation sites and per-node times for one graph run.
+
+	Only created for runs that ask for profiling, so other runs carry no
+	callbacks, sampler or allocation tracing. The sampler and tracemalloc
+	see the whole process, so runs overlapping a profiled run show up in
+	its functions and allocations. stop() snapshots and compares every
+	traced allocation in the process, so callers on an event loop run it in
+	an executor.
+	"""
+
+	def __init__(self, interval: float = 0.005, frames: int = 8):
+		self.sampler = SamplingProfiler(interval)
+		self.node_timer = NodeTimer()
+		self.frames = frames
+		self.started = 0.0
+		self.baseline: Optional[tracemalloc.Snapshot] = None
+
+	def start(self) -> None:
+		_start_tracemalloc(self.frames)
+		self.baseline = tracemalloc.take_snapshot()
+		self.started = time.perf_counter()
+		self.sampler.start()
+
+	def stop(self) -> Dict[str, Any]:
+		"""Stop profiling and return the full artifact; its `summary` is what goes on the run record"""
+		duration = time.perf_counter() - self.started
+		self.sampler.stop()
+		snapshot = tracemalloc.take_snapshot()
+		_, peak = tracemalloc.get_traced_memory()
+		_stop_tracemalloc()
+
+		ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+		allocations = snapshot.filter_traces(ignore).compare_to(self.baseline.filter_traces(ignore), "lineno")
+		sampler = self.sampler
+		samples = max(sampler.samples, 1)
+
+		functions = [
+			{
+				"function": name,
+				"self_pct": round(100 * sampler.self_counts[name] / samples, 2),
+				"total_pct": round(100 * count / samples, 2),
+				"samples": count
+			}
+			for name, count in sampler.total_counts.most_common()
+		]
+		sites = [
+			{
+				"site": f"{_short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+				"size_kb": round(stat.size_diff / 1024, 1),
+				"count": stat.count_diff
+			}
+			for stat in allocations if stat.size_diff > 0
+		]
+		nodes = sorted(
+			({"node": path, **{k: round(v, 4) if isinstance(v, float) else v for k, v in stats.items()}}
+			 for path, stats in self.node_timer.nodes.items()),
+			key=lambda node: node["total_s"], reverse=True
+		)
+
+		summary = {
+			"duration_s": round(duration, 4),
+			"samples": sampler.samples,
+			"interval_ms": sampler.interval * 1000,
+			"traced_peak_kb": round(peak / 1024, 1),
+			"nodes": nodes,
+			"top_functions": sorted(functions, key=lambda f: f["self_pct"], reverse=True)[:10],
+			"top_allocations": sites[:10]
+		}
+		return {
+			"summary": summary,
+			"functions": functions,
+			"allocations": sites[:200],
+			# One "root;...;leaf count" line per distinct stack, for flame graph tools
+			"collapsed_stacks": [f"{stack} {count}" for stack, count in sampler.stacks.most_common()]
+		}
@@ -0,0 +1,717 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+	thread_id TEXT PRIMARY KEY,
+	record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+	run_id TEXT PRIMARY KEY,
+	graph_id TEXT NOT NULL,
+	record TEXT NOT NULL,
+	updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_updated ON runs (updated_at);
+CREATE TABLE IF NOT EXISTS run_events (
+	seq INTEGER PRIMARY KEY AUTOINCREMENT,
+	run_id TEXT NOT NULL,
+	event TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS run_events_run ON run_events (run_id, seq);
+CREATE TABLE IF NOT EXISTS run_queue (
+	run_id TEXT PRIMARY KEY,
+	graph_id TEXT NOT NULL,
+	input TEXT,
+	profile INTEGER NOT NULL DEFAULT 0,
+	enqueued_at REAL NOT NULL,
+	claimed_by TEXT,
+	heartbeat_at REAL
+);
+CREATE TABLE IF NOT EXISTS run_profiles (
+	run_id TEXT PRIMARY KEY,
+	artifact TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_result_fields (
+	run_id TEXT NOT NULL,
+	path TEXT NOT NULL,
+	kind TEXT NOT NULL,
+	body TEXT,
+	length INTEGER NOT NULL,
+	PRIMARY KEY (run_id, path)
+);
+CREATE TABLE IF NOT EXISTS run_result_items (
+	run_id TEXT NOT NULL,
+	path TEXT NOT NULL,
+	idx INTEGER NOT NULL,
+	body TEXT NOT NULL,
+	PRIMARY KEY (run_id, path, idx)
+);
+"""
+
+def _default(value: Any) -> Any:
+	# Graph results can hold pydantic models from nested graph state
+	if hasattr(value, "model_dump"):
+		return value.model_dump()
+	return str(value)
+
+def _dumps(value: Any) -> str:
+	return json.dumps(value, default=_default)
+
+def _status(row: Tuple) -> Dict[str, Any]:
+	run_id, graph_id, project_id, status, last_event, error, updated_at = row
+	return {
+		"run_id": run_id,
+		"graph_id": graph_id,
+		"project_id": project_id,
+		"status": status,
+		"last_event": last_event,
+		"error": error,
+		"updated_at": updated_at
+	}
+
+def _plain(value: Any) -> Any:
+	return value.model_dump() if hasattr(value, "model_dump") else value
+
+def result_rows(result: Dict[str, Any]) -> Tuple[List[Tuple[str, str, Optional[str], int]], List[Tuple[str, int, str]]]:
+	"""Split a run result into stored fields and list items, each serialized once.
+
+	Top-level lists, and lists directly inside a top-level object such as
+	`wbs_structure.nodes`, are stored item by item so they can be paged.
+	An object's other members are stored together as one JSON text.
+	"""
+	fields: List[Tuple[str, str, Optional[str], int]] = []
+	items: List[Tuple[str, int, str]] = []
+
+	def put_list(path: str, values: List[Any]) -> None:
+		fields.append((path, "list", None, len(values)))
+		items.extend((path, i, _dumps(value)) for i, value in enumerate(values))
+
+	for key, value in result.items():
+		value = _plain(value)
+		if isinstance(value, list):
+			put_list(key, value)
+		elif isinstance(value, dict) and any(isinstance(v, list) for v in value.values()):
+			fields.append((key, "object", _dumps({k: v for k, v in value.items() if not isinstance(v, list)}), len(value)))
+			for child, child_value in value.items():
+				if isinstance(child_value, list):
+					put_list(f"{key}.{child}", child_value)
+		else:
+			fields.append((key, "json", _dumps(value), 0))
+	return fields, items
+
+def _result_reads(kinds: Dict[str, str], paths: Optional[List[str]]) -> Tuple[List[str], Set[str], Set[str]]:
+	# The requested paths that exist, and the stored bodies and lists they are built from
+	if paths is None:
+		paths = [path for path in kinds if "." not in path]
+	found, bodies, lists = [], set(), set()
+	for path in paths:
+		parent = path.split(".", 1)[0]
+		if path in kinds:
+			stored = [path] + [p for p in kinds if p.startswith(path + ".")] if kinds[path] == "object" else [path]
+		elif "." in path and kinds.get(parent) == "object":
+			# A plain member of an object is cut out of the object's body
+			stored = [parent]
+		else:
+			continue
+		found.append(path)
+		for p in stored:
+			(lists if kinds[p] == "list" else bodies).add(p)
+	return found, bodies, lists
+
+def _compose(path: str, kinds: Dict[str, str], bodies: Dict[str, str], items: Dict[str, List[str]]) -> Optional[str]:
+	kind = kinds.get(path)
+	if kind == "list":
+		return "[" + ",".join(items.get(path, ())) + "]"
+	if kind == "json":
+		return bodies[path]
+	if kind == "object":
+		body = bodies[path]
+		members = [f"{json.dumps(p[len(path) + 1:])}:{_compose(p, kinds, bodies, items)}" for p in kinds if p.startswith(path + ".")]
+		if members:
+			body = body[:-1] + ("," if body != "{}" else "") + ",".join(members) + "}"
+		return body
+	parent, member = path.split(".", 1)
+	members = json.loads(bodies[parent])
+	return _dumps(members[member]) if member in members else None
+
+def compose_result(kinds: Dict[str, str], paths: List[str], bodies: Dict[str, str], items: Dict[str, List[str]]) -> Dict[str, str]:
+	"""JSON text for each requested result path, joined from the stored serialized pieces"""
+	composed = {}
+	for path in paths:
+		text = _compose(path, kinds, bodies, items)
+		if text is not None:
+			composed[path] = text
+	return composed
+
+def _job(row: Tuple) -> Dict[str, Any]:
+	run_id, graph_id, inputs, profile = row
+	return {"run_id": run_id, "graph_id": graph_id, "input": json.loads(inputs) if inputs else None, "profile": bool(profile)}
+
+class SqliteRunStore:
+	"""Threads, run records, run events and the run queue in one SQLite file.
+
+	Every worker process that opens the same file sees the same runs, so a
+	run started on one worker can be executed and streamed by any other.
+	Good for `uvicorn --workers N` on one host and for tests; use Postgres
+	when workers run on several machines.
+	"""
+
+	def __init__(self, path: str):
+		self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+		self.conn.execute("PRAGMA journal_mode=WAL")
+		self.conn.execute("PRAGMA synchronous=NORMAL")
+		self.conn.executescript(_SQLITE_SCHEMA)
+		self.lock = threading.Lock()
+
+	async def _call(self, fn, *args):
+		return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+	def _execute(self, query: str, params=()) -> List[Tuple]:
+		with self.lock:
+			return self.conn.execute(query, params).fetchall()
+
+	def _transaction(self, fn):
+		# BEGIN IMMEDIATE takes the write lock up front, so read-modify-write
+		# sequences cannot interleave with another process
+		with self.lock:
+			self.conn.execute("BEGIN IMMEDIATE")
+			try:
+				result = fn(self.conn)
+				self.conn.execute("COMMIT")
+				return result
+			except Exception:
+				self.conn.execute("ROLLBACK")
+				raise
+
+	# Threads
+
+	async def create_thread(self, thread_id: str) -> Dict[str, Any]:
+		record = {"id": thread_id}
+		await self._call(self._execute, "INSERT OR REPLACE INTO threads (thread_id, record) VALUES (?, ?)", (thread_id, _dumps(record)))
+		return record
+
+	async def get_thread(self, thread_id: str) -> Optional[Dict[str, Any]]:
+		rows = await self._call(self._execute, "SELECT record FROM threads WHERE thread_id = ?", (thread_id,))
+		return json.loads(rows[0][0]) if rows else None
+
+	# Run records
+
+	async def create_run(self, record: Dict[str, Any]) -> None:
+		await self._call(
+			self._execute,
+			"INSERT OR REPLACE INTO runs (run_id, graph_id, record, updated_at) VALUES (?, ?, ?, ?)",
+			(record["id"], record["graph_id"], _dumps(record), time.time())
+		)
+
+	async def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+		rows = await self._call(self._execute, "SELECT record FROM runs WHERE run_id = ?", (run_id,))
+		return json.loads(rows[0][0]) if rows else None
+
+	def _update_run(self, run_id: str, fields: Dict[str, Any]) -> None:
+		def update(conn):
+			row = conn.execute("SELECT record FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+			if row:
+				record = {**json.loads(row[0]), **fields}
+				conn.execute("UPDATE runs SET record = ?, updated_at = ? WHERE run_id = ?", (_dumps(record), time.time(), run_id))
+		self._transaction(update)
+
+	async def update_run(self, run_id: str, **fields: Any) -> None:
+		"""Merge fields into the run record"""
+		await self._call(self._update_run, run_id, fields)
+
+	# Run events
+
+	def _append_events(self, run_id: str, events: List[Dict[str, Any]]) -> None:
+		with self.lock:
+			self.conn.executemany("INSERT INTO run_events (run_id, event) VALUES (?, ?)", [(run_id, _dumps(e)) for e in events])
+
+	async def append_events(self, run_id: str, events: List[Dict[str, Any]]) -> None:
+		await self._call(self._append_events, run_id, events)
+
+	async def events_after(self, run_id: str, seq: int = 0) -> List[Tuple[int, Dict[str, Any]]]:
+		"""Events of a run with a sequence number above seq, oldest first"""
+		rows = await self._call(self._execute, "SELECT seq, event FROM run_events WHERE run_id = ? AND seq > ? ORDER BY seq", (run_id, seq))
+		return [(s, json.loads(event)) for s, event in rows]
+
+	# Change feed; one poll serves every subscriber of a worker
+
+	async def latest_event_seq(self) -> int:
+		rows = await self._call(self._execute, "SELECT COALESCE(MAX(seq), 0) FROM run_events")
+		return rows[0][0]
+
+	async def events_since(self, seq: int, limit: int = 1000) -> List[Tuple[int, str, Optional[str], Dict[str, Any]]]:
+		"""Events of every run above seq, oldest first, with the project of each run"""
+		rows = await self._call(
+			self._execute,
+			"""SELECT e.seq, e.run_id, json_extract(r.record, '$.project_id'), e.event FROM run_events e
+			LEFT JOIN runs r ON r.run_id = e.run_id WHERE e.seq > ? ORDER BY e.seq LIMIT ?""",
+			(seq, limit)
+		)
+		return [(s, run_id, project_id, json.loads(event)) for s, run_id, project_id, event in rows]
+
+	_STATUS_COLUMNS = """run_id, graph_id, json_extract(record, '$.project_id'), json_extract(record, '$.status'),
+		json_extract(record, '$.last_event'), json_extract(record, '$.error'), updated_at"""
+
+	async def runs_updated_since(self, updated_after: float) -> List[Dict[str, Any]]:
+		"""Status fields, not whole records, of runs updated after a time"""
+		rows = await self._call(
+			self._execute,
+			f"SELECT {self._STATUS_COLUMNS} FROM runs WHERE updated_at > ? ORDER BY updated_at",
+			(updated_after,)
+		)
+		return [_status(row) for row in rows]
+
+	async def run_statuses(self, run_ids: List[str]) -> List[Dict[str, Any]]:
+		if not run_ids:
+			return []
+		rows = await self._call(
+			self._execute,
+			f"SELECT {self._STATUS_COLUMNS} FROM runs WHERE run_id IN ({','.join('?' * len(run_ids))})",
+			tuple(run_ids)
+		)
+		return [_status(row) for row in rows]
+
+	# Run queue
+
+	async def enqueue(self, run_id: str, graph_id: str, inputs: Optional[Dict[str, Any]], profile: bool = False) -> None:
+		await self._call(
+			self._execute,
+			"INSERT OR REPLACE INTO run_queue (run_id, graph_id, input, profile, enqueued_at) VALUES (?, ?, ?, ?, ?)",
+			(run_id, graph_id, _dumps(inputs) if inputs is not None else None, int(profile), time.time())
+		)
+
+	def _claim(self, worker_id: str, limit: int) -> List[Tuple]:
+		now = time.time()
+		return self._transaction(lambda conn: conn.execute(
+			"""UPDATE run_queue SET claimed_by = ?, heartbeat_at = ?
+			WHERE run_id IN (SELECT run_id FROM run_queue WHERE claimed_by IS NULL ORDER BY enqueued_at LIMIT ?)
+			RETURNING run_id, graph_id, input, profile""",
+			(worker_id, now, limit)
+		).fetchall())
+
+	async def claim(self, worker_id: str, limit: int = 1) -> List[Dict[str, Any]]:
+		"""Take up to limit unclaimed runs, oldest first; each is given to exactly one worker"""
+		if limit <= 0:
+			return []
+		return [_job(row) for row in await self._call(self._claim, worker_id, limit)]
+
+	async def heartbeat(self, worker_id: str, run_ids: List[str]) -> List[str]:
+		"""Refresh the claims of a worker's runs; returns the runs it still holds"""
+		if not run_ids:
+			return []
+		now = time.time()
+		rows = await self._call(
+			lambda: self._execute(
+				f"UPDATE run_queue SET heartbeat_at = ? WHERE claimed_by = ? AND run_id IN ({','.join('?' * len(run_ids))}) RETURNING run_id",
+				(now, worker_id, *run_ids)
+			)
+		)
+		return [row[0] for row in rows]
+
+	async def requeue_stale(self, timeout: float) -> List[str]:
+		"""Release runs whose worker stopped heartbeating, so another worker resumes them"""
+		rows = await self._call(
+			self._execute,
+			"UPDATE run_queue SET claimed_by = NULL, heartbeat_at = NULL WHERE claimed_by IS NOT NULL AND heartbeat_at < ? RETURNING run_id",
+			(time.time() - timeout,)
+		)
+		return [row[0] for row in rows]
+
+	async def release(self, worker_id: str) -> None:
+		"""Hand every run claimed by a stopping worker back to the queue"""
+		await self._call(self._execute, "UPDATE run_queue SET claimed_by = NULL, heartbeat_at = NULL WHERE claimed_by = ?", (worker_id,))
+
+	async def is_queued(self, run_id: str) -> bool:
+		"""Whether the run is waiting for a worker or being executed by one"""
+		return bool(await self._call(self._execute, "SELECT 1 FROM run_queue WHERE run_id = ?", (run_id,)))
+
+	async def complete(self, run_id: str, worker_id: str) -> bool:
+		"""Remove a finished run from the queue, if worker_id still holds its claim"""
+		rows = await self._call(self._execute, "DELETE FROM run_queue WHERE run_id = ? AND claimed_by = ? RETURNING run_id", (run_id, worker_id))
+		return bool(rows)
+
+	def _finish_run(self, run_id: str, worker_id: str, result: Optional[Dict[str, Any]], fields: Dict[str, Any]) -> bool:
+		rows = result_rows(result) if result is not None else None
+		def finish(conn):
+			if not conn.execute("SELECT 1 FROM run_queue WHERE run_id = ? AND claimed_by = ?", (run_id, worker_id)).fetchone():
+				return False
+			if rows is not None:
+				conn.execute("DELETE FROM run_result_fields WHERE run_id = ?", (run_id,))
+				conn.execute("DELETE FROM run_result_items WHERE run_id = ?", (run_id,))
+				conn.executemany("INSERT INTO run_result_fields (run_id, path, kind, body, length) VALUES (?, ?, ?, ?, ?)", [(run_id, *f) for f in rows[0]])
+				conn.executemany("INSERT INTO run_result_items (run_id, path, idx, body) VALUES (?, ?, ?, ?)", [(run_id, *i) for i in rows[1]])
+			row = conn.execute("SELECT record FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+			if row:
+				record = {**json.loads(row[0]), **fields}
+				conn.execute("UPDATE runs SET record = ?, updated_at = ? WHERE run_id = ?", (_dumps(record), time.time(), run_id))
+			return True
+		return self._transaction(finish)
+
+	async def finish_run(self, run_id: str, worker_id: str, result: Optional[Dict[str, Any]] = None, **fields: Any) -> bool:
+		"""Store a run's result and merge fields into its record, only while worker_id holds its claim.
+
+		Returns False, writing nothing, when the run was requeued after
+		missed heartbeats and another worker now holds it.
+		"""
+		return await self._call(self._finish_run, run_id, worker_id, result, fields)
+
+	# Results, stored pre-serialized by finish_run so reads join text instead of encoding the result again
+
+	async def result_index(self, run_id: str) -> List[Dict[str, Any]]:
+		"""Stored result paths with their kind and, for lists and objects, their length"""
+		rows = await self._call(self._execute, "SELECT path, kind, length FROM run_result_fields WHERE run_id = ? ORDER BY path", (run_id,))
+		return [{"path": path, "kind": kind, "length": length} for path, kind, length in rows]
+
+	def _get_result_json(self, run_id: str, paths: Optional[List[str]]) -> Optional[Dict[str, str]]:
+		kinds = dict(self._execute("SELECT path, kind FROM run_result_fields WHERE run_id = ?", (run_id,)))
+		if not kinds:
+			return None
+		found, bodies, lists = _result_reads(kinds, paths)
+		texts: Dict[str, str] = {}
+		if bodies:
+			texts = dict(self._execute(
+				f"SELECT path, body FROM run_result_fields WHERE run_id = ? AND path IN ({','.join('?' * len(bodies))})",
+				(run_id, *bodies)
+			))
+		items: Dict[str, List[str]] = {}
+		if lists:
+			for path, body in self._execute(
+				f"SELECT path, body FROM run_result_items WHERE run_id = ? AND path IN ({','.join('?' * len(lists))}) ORDER BY path, idx",
+				(run_id, *lists)
+			):
+				items.setdefault(path, []).append(body)
+		return compose_result(kinds, found, texts, items)
+
+	async def get_result_json(self, run_id: str, paths: Optional[List[str]] = None) -> Optional[Dict[str, str]]:
+		"""JSON text of the requested result paths (all top-level fields by default); None without a stored result"""
+		return await self._call(self._get_result_json, run_id, paths)
+
+	async def get_result_items(self, run_id: str, path: str, start: int, limit: int) -> Optional[Tuple[int, List[str]]]:
+		"""Total length and the JSON text of up to limit items of a stored list, from index start"""
+		rows = await self._call(self._execute, "SELECT length FROM run_result_fields WHERE run_id = ? AND path = ? AND kind = 'list'", (run_id, path))
+		if not rows:
+			return None
+		items = await self._call(
+			self._execute,
+			"SELECT body FROM run_result_items WHERE run_id = ? AND path = ? AND idx >= ? ORDER BY idx LIMIT ?",
+			(run_id, path, start, limit)
+		)
+		return rows[0][0], [body for body, in items]
+
+	async def latest_result_json(self, project_id: str, path: str) -> Optional[str]:
+		"""JSON text of a result field from the project's most recently completed run that stored it"""
+		rows = await self._call(
+			self._execute,
+			"""SELECT r.run_id FROM runs r JOIN run_result_fields f ON f.run_id = r.run_id AND f.path = ?
+			WHERE json_extract(r.record, '$.project_id') = ? AND json_extract(r.record, '$.status') = 'completed'
+			ORDER BY r.updated_at DESC LIMIT 1""",
+			(path, project_id)
+		)
+		if not rows:
+			return None
+		texts = await self.get_result_json(rows[0][0], [path]) or {}
+		return texts.get(path)
+
+	# Profiles
+
+	async def put_profile(self, run_id: str, artifact: Dict[str, Any]) -> None:
+		await self._call(self._execute, "INSERT OR REPLACE INTO run_profiles (run_id, artifact) VALUES (?, ?)", (run_id, _dumps(artifact)))
+
+	async def get_profile(self, run_id: str) -> Optional[Dict[str, Any]]:
+		rows = await self._call(self._execute, "SELECT artifact FROM run_profiles WHERE run_id = ?", (run_id,))
+		return json.loads(rows[0][0]) if rows else None
+
+	async def close(self) -> None:
+		self.conn.close()
+
+class PostgresRunStore:
+	"""Run state tables (db/migrations/005_graph_run_state.sql) behind a connection pool, for workers on several hosts"""
+
+	def __init__(self, dsn: str, min_size: int = 1, max_size: int = 8):
+		try:
+			from psycopg_pool import AsyncConnectionPool
+		except ImportError as e:
+			raise RuntimeError("Postgres run store requires psycopg and psycopg-pool") from e
+		self.pool = AsyncConnectionPool(dsn, min_size=min_size, max_size=max_size, open=False)
+		self._opened = False
+
+	async def _fetch(self, query: str, params=()) -> List[Tuple]:
+		if not self._opened:
+			await self.pool.open()
+			self._opened = True
+		async with self.pool.connection() as conn:
+			cur = await conn.execute(query, params)
+			return await cur.fetchall() if cur.description else []
+
+	# Threads
+
+	async def create_thread(self, thread_id: str) -> Dict[str, Any]:
+		record = {"id": thread_id}
+		await self._fetch(
+			"INSERT INTO public.graph_threads (thread_id, record) VALUES (%s, %s::jsonb) ON CONFLICT (thread_id) DO UPDATE SET record = EXCLUDED.record",
+			(thread_id, _dumps(record))
+		)
+		return record
+
+	async def get_thread(self, thread_id: str) -> Optional[Dict[str, Any]]:
+		rows = await self._fetch("SELECT record FROM public.graph_threads WHERE thread_id = %s", (thread_id,))
+		return rows[0][0] if rows else None
+
+	# Run records
+
+	async def create_run(self, record: Dict[str, Any]) -> None:
+		await self._fetch(
+			"""INSERT INTO public.graph_runs (run_id, graph_id, record, updated_at) VALUES (%s, %s, %s::jsonb, now())
+			ON CONFLICT (run_id) DO UPDATE SET graph_id = EXCLUDED.graph_id, record = EXCLUDED.record, updated_at = now()""",
+			(record["id"], record["graph_id"], _dumps(record))
+		)
+
+	async def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+		rows = await self._fetch("SELECT record FROM public.graph_runs WHERE run_id = %s", (run_id,))
+		return rows[0][0] if rows else None
+
+	async def update_run(self, run_id: str, **fields: Any) -> None:
+		"""Merge fields into the run record"""
+		await self._fetch(
+			"UPDATE public.graph_runs SET record = record || %s::jsonb, updated_at = now() WHERE run_id = %s",
+			(_dumps(fields), run_id)
+		)
+
+	# Run events
+
+	async def append_events(self, run_id: str, events: List[Dict[str, Any]]) -> None:
+		if not self._opened:
+			await self.pool.open()
+			self._opened = True
+		async with self.pool.connection() as conn:
+			async with conn.cursor() as cur:
+				await cur.executemany(
+					"INSERT INTO public.graph_run_events (run_id, event) VALUES (%s, %s::jsonb)",
+					[(run_id, _dumps(e)) for e in events]
+				)
+
+	async def events_after(self, run_id: str, seq: int = 0) -> List[Tuple[int, Dict[str, Any]]]:
+		"""Events of a run with a sequence number above seq, oldest first"""
+		rows = await self._fetch(
+			"SELECT seq, event FROM public.graph_run_events WHERE run_id = %s AND seq > %s ORDER BY seq",
+			(run_id, seq)
+		)
+		return [(s, event) for s, event in rows]
+
+	# Change feed; one poll serves every subscriber of a worker
+
+	async def latest_event_seq(self) -> int:
+		rows = await self._fetch("SELECT COALESCE(MAX(seq), 0) FROM public.graph_run_events")
+		return rows[0][0]
+
+	async def events_since(self, seq: int, limit: int = 1000) -> List[Tuple[int, str, Optional[str], Dict[str, Any]]]:
+		"""Events of every run above seq, oldest first, with the project of each run"""
+		rows = await self._fetch(
+			"""SELECT e.seq, e.run_id, r.record->>'project_id', e.event FROM public.graph_run_events e
+			LEFT JOIN public.graph_runs r ON r.run_id = e.run_id WHERE e.seq > %s ORDER BY e.seq LIMIT %s""",
+			(seq, limit)
+		)
+		return [tuple(row) for row in rows]
+
+	_STATUS_COLUMNS = """run_id, graph_id, record->>'project_id', record->>'status',
+		record->>'last_event', record->>'error', extract(epoch FROM updated_at)::float8"""
+
+	async def runs_updated_since(self, updated_after: float) -> List[Dict[str, Any]]:
+		"""Status fields, not whole records, of runs updated after a time"""
+		rows = await self._fetch(
+			f"SELECT {self._STATUS_COLUMNS} FROM public.graph_runs WHERE updated_at > to_timestamp(%s) ORDER BY updated_at",
+			(updated_after,)
+		)
+		return [_status(row) for row in rows]
+
+	async def run_statuses(self, run_ids: List[str]) -> List[Dict[str, Any]]:
+		if not run_ids:
+			return []
+		rows = await self._fetch(f"SELECT {self._STATUS_COLUMNS} FROM public.graph_runs WHERE run_id = ANY(%s)", (list(run_ids),))
+		return [_status(row) for row in rows]
+
+	# Run queue
+
+	async def enqueue(self, run_id: str, graph_id: str, inputs: Optional[Dict[str, Any]], profile: bool = False) -> None:
+		await self._fetch(
+			"""INSERT INTO public.graph_run_queue (run_id, graph_id, input, profile, enqueued_at) VALUES (%s, %s, %s::jsonb, %s, now())
+			ON CONFLICT (run_id) DO UPDATE SET graph_id = EXCLUDED.graph_id, input = EXCLUDED.input, profile = EXCLUDED.profile,
+				enqueued_at = now(), claimed_by = NULL, heartbeat_at = NULL""",
+			(run_id, graph_id, _dumps(inputs) if inputs is not None else None, profile)
+		)
+
+	async def claim(self, worker_id: str, limit: int = 1) -> List[Dict[str, Any]]:
+		"""Take up to limit unclaimed runs, oldest first; each is given to exactly one worker"""
+		if limit <= 0:
+			return []
+		# SKIP LOCKED lets concurrent workers claim different runs without waiting on each other
+		rows = await self._fetch(
+			"""UPDATE public.graph_run_queue SET claimed_by = %s, heartbeat_at = now()
+			WHERE run_id IN (
+				SELECT run_id FROM public.graph_run_queue WHERE claimed_by IS NULL
+				ORDER BY enqueued_at LIMIT %s FOR UPDATE SKIP LOCKED
+			)
+			RETURNING run_id, graph_id, input, profile""",
+			(worker_id, limit)
+		)
+		return [
+			{"run_id": run_id, "graph_id": graph_id, "input": inputs, "profile": profile}
+			for run_id, graph_id, inputs, profile in rows
+		]
+
+	async def heartbeat(self, worker_id: str, run_ids: List[str]) -> List[str]:
+		"""Refresh the claims of a worker's runs; returns the runs it still holds"""
+		if not run_ids:
+			return []
+		rows = await self._fetch(
+			"UPDATE public.graph_run_queue SET heartbeat_at = now() WHERE claimed_by = %s AND run_id = ANY(%s) RETURNING run_id",
+			(worker_id, list(run_ids))
+		)
+		return [row[0] for row in rows]
+
+	async def requeue_stale(self, timeout: float) -> List[str]:
+		"""Release runs whose worker stopped heartbeating, so another worker resumes them"""
+		rows = await self._fetch(
+			"""UPDATE public.graph_run_queue SET claimed_by = NULL, heartbeat_at = NULL
+			WHERE claimed_by IS NOT NULL AND heartbeat_at < now() - make_interval(secs => %s) RETURNING run_id""",
+			(timeout,)
+		)
+		return [row[0] for row in rows]
+
+	async def release(self, worker_id: str) -> None:
+		"""Hand every run claimed by a stopping worker back to the queue"""
+		await self._fetch("UPDATE public.graph_run_queue SET claimed_by = NULL, heartbeat_at = NULL WHERE claimed_by = %s", (worker_id,))
+
+	async def is_queued(self, run_id: str) -> bool:
+		"""Whether the run is waiting for a worker or being executed by one"""
+		return bool(await self._fetch("SELECT 1 FROM public.graph_run_queue WHERE run_id = %s", (run_id,)))
+
+	async def complete(self, run_id: str, worker_id: str) -> bool:
+		"""Remove a finished run from the queue, if worker_id still holds its claim"""
+		rows = await self._fetch(
+			"DELETE FROM public.graph_run_queue WHERE run_id = %s AND claimed_by = %s RETURNING run_id",
+			(run_id, worker_id)
+		)
+		return bool(rows)
+
+	async def finish_run(self, run_id: str, worker_id: str, result: Optional[Dict[str, Any]] = None, **fields: Any) -> bool:
+		"""Store a run's result and merge fields into its record, only while worker_id holds its claim.
+
+		Returns False, writing nothing, when the run was requeued after
+		missed heartbeats and another worker now holds it.
+		"""
+		rows = result_rows(result) if result is not None else None
+		if not self._opened:
+			await self.pool.open()
+			self._opened = True
+		async with self.pool.connection() as conn:
+			async with conn.transaction():
+				# The row lock holds off requeue_stale until this commits
+				cur = await conn.execute(
+					"SELECT 1 FROM public.graph_run_queue WHERE run_id = %s AND claimed_by = %s FOR UPDATE",
+					(run_id, worker_id)
+				)
+				if not await cur.fetchone():
+					return False
+				if rows is not None:
+					await conn.execute("DELETE FROM public.graph_run_result_fields WHERE run_id = %s", (run_id,))
+					await conn.execute("DELETE FROM public.graph_run_result_items WHERE run_id = %s", (run_id,))
+					async with conn.cursor() as cur:
+						await cur.executemany(
+							"INSERT INTO public.graph_run_result_fields (run_id, path, kind, body, length) VALUES (%s, %s, %s, %s, %s)",
+							[(run_id, *f) for f in rows[0]]
+						)
+						await cur.executemany(
+							"INSERT INTO public.graph_run_result_items (run_id, path, idx, body) VALUES (%s, %s, %s, %s)",
+							[(run_id, *i) for i in rows[1]]
+						)
+				await conn.execute(
+					"UPDATE public.graph_runs SET record = record || %s::jsonb, updated_at = now() WHERE run_id = %s",
+					(_dumps(fields), run_id)
+				)
+		return True
+
+	# Results, stored pre-serialized by finish_run so reads join text instead of encoding the result again
+
+	async def result_index(self, run_id: str) -> List[Dict[str, Any]]:
+		"""Stored result paths with their kind and, for lists and objects, their length"""
+		rows = await self._fetch("SELECT path, kind, length FROM public.graph_run_result_fields WHERE run_id = %s ORDER BY path", (run_id,))
+		return [{"path": path, "kind": kind, "length": length} for path, kind, length in rows]
+
+	async def get_result_json(self, run_id: str, paths: Optional[List[str]] = None) -> Optional[Dict[str, str]]:
+		"""JSON text of the requested result paths (all top-level fields by default); None without a stored result"""
+		kinds = dict(await self._fetch("SELECT path, kind FROM public.graph_run_result_fields WHERE run_id = %s", (run_id,)))
+		if not kinds:
+			return None
+		found, bodies, lists = _result_reads(kinds, paths)
+		texts: Dict[str, str] = {}
+		if bodies:
+			texts = dict(await self._fetch(
+				"SELECT path, body FROM public.graph_run_result_fields WHERE run_id = %s AND path = ANY(%s)",
+				(run_id, list(bodies))
+			))
+		items: Dict[str, List[str]] = {}
+		if lists:
+			for path, body in await self._fetch(
+				"SELECT path, body FROM public.graph_run_result_items WHERE run_id = %s AND path = ANY(%s) ORDER BY path, idx",
+				(run_id, list(lists))
+			):
+				items.setdefault(path, []).append(body)
+		return compose_result(kinds, found, texts, items)
+
+	async def get_result_items(self, run_id: str, path: str, start: int, limit: int) -> Optional[Tuple[int, List[str]]]:
+		"""Total length and the JSON text of up to limit items of a stored list, from index start"""
+		rows = await self._fetch(
+			"SELECT length FROM public.graph_run_result_fields WHERE run_id = %s AND path = %s AND kind = 'list'",
+			(run_id, path)
+		)
+		if not rows:
+			return None
+		items = await self._fetch(
+			"SELECT body FROM public.graph_run_result_items WHERE run_id = %s AND path = %s AND idx >= %s ORDER BY idx LIMIT %s",
+			(run_id, path, start, limit)
+		)
+		return rows[0][0], [body for body, in items]
+
+	async def latest_result_json(self, project_id: str, path: str) -> Optional[str]:
+		"""JSON text of a result field from the project's most recently completed run that stored it"""
+		rows = await self._fetch(
+			"""SELECT r.run_id FROM public.graph_runs r
+			JOIN public.graph_run_result_fields f ON f.run_id = r.run_id AND f.path = %s
+			WHERE r.record->>'project_id' = %s AND r.record->>'status' = 'completed'
+			ORDER BY r.updated_at DESC LIMIT 1""",
+			(path, project_id)
+		)
+		if not rows:
+			return None
+		texts = await self.get_result_json(rows[0][0], [path]) or {}
+		return texts.get(path)
+
+	# Profiles
+
+	async def put_profile(self, run_id: str, artifact: Dict[str, Any]) -> None:
+		await self._fetch(
+			"INSERT INTO public.graph_run_profiles (run_id, artifact) VALUES (%s, %s::jsonb) ON CONFLICT (run_id) DO UPDATE SET artifact = EXCLUDED.artifact",
+			(run_id, _dumps(artifact))
+		)
+
+	async def get_profile(self, run_id: str) -> Optional[Dict[str, Any]]:
+		rows = await self._fetch("SELECT artifact FROM public.graph_run_profiles WHERE run_id = %s", (run_id,))
+		return rows[0][0] if rows else None
+
+	async def close(self) -> None:
+		if self._opened:
+			await self.pool.close()
+
+def create_run_store(url: str):
+	"""Create a run store from a postgresql:// or sqlite:/// URL"""
+	if url.startswith("sqlite:///"):
+		return SqliteRunStore(url[len("sqlite:///"):])
+	if url.startswith(("postgres://", "postgresql://")):
+		return PostgresRunStore(url)
+	raise ValueError(f"Unsupported run store URL: {url}")
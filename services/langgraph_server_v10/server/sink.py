@@ -0,0 +1,265 @@
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import json
+import sqlite3
+import threading
+
+# Run-update keys that carry asset specs / edge specs, across all graphs
+ASSET_SPEC_KEYS = ("asset_specs", "standards_asset_specs", "wbs_asset_specs", "itp_asset_specs", "lbs_asset_specs", "plan_asset_specs", "email_asset_specs", "ncr_asset_specs", "approval_asset_specs", "project_details_asset_spec")
+EDGE_SPEC_KEYS = ("edges", "standards_doc_ref_edges", "wbs_edge_specs", "doc_ref_edges")
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS graph_asset_specs (
+	idempotency_key TEXT PRIMARY KEY,
+	project_id TEXT,
+	type TEXT NOT NULL,
+	spec TEXT NOT NULL,
+	run_id TEXT,
+	updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS graph_edge_specs (
+	idempotency_key TEXT PRIMARY KEY,
+	edge_type TEXT NOT NULL,
+	spec TEXT NOT NULL,
+	run_id TEXT,
+	updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+def _split(specs: List[Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+	# Last write per key wins within a batch; delete specs become key deletions
+	upserts: Dict[str, Dict[str, Any]] = {}
+	deletes: Dict[str, None] = {}
+	for spec in specs:
+		key = spec["idempotency_key"]
+		if spec.get("operation") == "delete":
+			upserts.pop(key, None)
+			deletes[key] = None
+		else:
+			deletes.pop(key, None)
+			upserts[key] = spec
+	return upserts, list(deletes)
+
+class SqliteSpecStore:
+	"""Local SQLite stand-in for the Postgres spec tables"""
+
+	def __init__(self, path: str):
+		self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+		self.conn.execute("PRAGMA journal_mode=WAL")
+		self.conn.executescript(_SQLITE_SCHEMA)
+		self.lock = threading.Lock()
+
+	def _write(self, assets: List[Tuple[Dict[str, Any], str]], edges: List[Tuple[Dict[str, Any], str]]) -> None:
+		asset_upserts, asset_deletes = _split([spec for spec, _ in assets])
+		edge_upserts, edge_deletes = _split([spec for spec, _ in edges])
+		run_ids = {spec["idempotency_key"]: run_id for spec, run_id in assets + edges}
+
+		with self.lock:
+			self.conn.execute("BEGIN")
+			try:
+				self.conn.executemany(
+					"""INSERT INTO graph_asset_specs (idempotency_key, project_id, type, spec, run_id) VALUES (?, ?, ?, ?, ?)
+					ON CONFLICT(idempotency_key) DO UPDATE SET project_id = excluded.project_id, type = excluded.type,
+						spec = excluded.spec, run_id = excluded.run_id, updated_at = CURRENT_TIMESTAMP
+					WHERE graph_asset_specs.spec != excluded.spec""",
+					[
+						(key, spec["asset"].get("project_id"), spec["asset"]["type"], json.dumps(spec, default=str), run_ids[key])
+						for key, spec in asset_upserts.items()
+					]
+				)
+				self.conn.executemany(
+					"""INSERT INTO graph_edge_specs (idempotency_key, edge_type, spec, run_id) VALUES (?, ?, ?, ?)
+					ON CONFLICT(idempotency_key) DO UPDATE SET edge_type = excluded.edge_type,
+						spec = excluded.spec, run_id = excluded.run_id, updated_at = CURRENT_TIMESTAMP
+					WHERE graph_edge_specs.spec != excluded.spec""",
+					[
+						(key, spec["edge_type"], json.dumps(spec, default=str), run_ids[key])
+						for key, spec in edge_upserts.items()
+					]
+				)
+				self.conn.executemany("DELETE FROM graph_asset_specs WHERE idempotency_key = ?", [(k,) for k in asset_deletes])
+				self.conn.executemany("DELETE FROM graph_edge_specs WHERE idempotency_key = ?", [(k,) for k in edge_deletes])
+				self.conn.execute("COMMIT")
+			except Exception:
+				self.conn.execute("ROLLBACK")
+				raise
+
+	async def write_batch(self, assets: List[Tuple[Dict[str, Any], str]], edges: List[Tuple[Dict[str, Any], str]]) -> None:
+		await asyncio.get_running_loop().run_in_executor(None, self._write, assets, edges)
+
+	async def close(self) -> None:
+		self.conn.close()
+
+class PostgresSpecStore:
+	"""Postgres spec tables (db/migrations/004_graph_spec_sink.sql) behind a connection pool"""
+
+	def __init__(self, dsn: str, min_size: int = 1, max_size: int = 4):
+		try:
+			from psycopg_pool import AsyncConnectionPool
+		except ImportError as e:
+			raise RuntimeError("Postgres asset sink requires psycopg and psycopg-pool") from e
+		self.pool = AsyncConnectionPool(dsn, min_size=min_size, max_size=max_size, open=False)
+		self._opened = False
+
+	async def write_batch(self, assets: List[Tuple[Dict[str, Any], str]], edges: List[Tuple[Dict[str, Any], str]]) -> None:
+		from psycopg.types.json import Jsonb
+
+		if not self._opened:
+			await self.pool.open()
+			self._opened = True
+
+		asset_upserts, asset_deletes = _split([spec for spec, _ in assets])
+		edge_upserts, edge_deletes = _split([spec for spec, _ in edges])
+		run_ids = {spec["idempotency_key"]: run_id for spec, run_id in assets + edges}
+
+		async with self.pool.connection() as conn:
+			async with conn.transaction():
+				async with conn.cursor() as cur:
+					# executemany runs in pipeline mode, so a batch is one round trip
+					await cur.executemany(
+						"""INSERT INTO public.graph_asset_specs (idempotency_key, project_id, type, spec, run_id) VALUES (%s, %s, %s, %s, %s)
+						ON CONFLICT (idempotency_key) DO UPDATE SET project_id = EXCLUDED.project_id, type = EXCLUDED.type,
+							spec = EXCLUDED.spec, run_id = EXCLUDED.run_id, updated_at = now()
+						WHERE graph_asset_specs.spec IS DISTINCT FROM EXCLUDED.spec""",
+						[
+							(key, spec["asset"].get("project_id"), spec["asset"]["type"], Jsonb(spec), run_ids[key])
+							for key, spec in asset_upserts.items()
+						]
+					)
+					await cur.executemany(
+						"""INSERT INTO public.graph_edge_specs (idempotency_key, edge_type, spec, run_id) VALUES (%s, %s, %s, %s)
+						ON CONFLICT (idempotency_key) DO UPDATE SET edge_type = EXCLUDED.edge_type,
+							spec = EXCLUDED.spec, run_id = EXCLUDED.run_id, updated_at = now()
+						WHERE graph_edge_specs.spec IS DISTINCT FROM EXCLUDED.spec""",
+						[(key, spec["edge_type"], Jsonb(spec), run_ids[key]) for key, spec in edge_upserts.items()]
+					)
+					if asset_deletes:
+						await cur.execute("DELETE FROM public.graph_asset_specs WHERE idempotency_key = ANY(%s)", (asset_deletes,))
+					if edge_deletes:
+						await cur.execute("DELETE FROM public.graph_edge_specs WHERE idempotency_key = ANY(%s)", (edge_deletes,))
+
+	async def close(self) -> None:
+		if self._opened:
+			await self.pool.close()
+
+def create_spec_store(url: str):
+	"""Create a spec store from a postgresql:// or sqlite:/// URL"""
+	if url.startswith("sqlite:///"):
+		return SqliteSpecStore(url[len("sqlite:///"):])
+	if url.startswith(("postgres://", "postgresql://")):
+		return PostgresSpecStore(url)
+	raise ValueError(f"Unsupported asset sink URL: {url}")
+
+class AssetSink:
+	"""Batched, back-pressured writer for asset and edge specs.
+
+	Graph runs enqueue specs as nodes finish; a single background task drains
+	the queue in batches while extraction continues. When the queue is full,
+	`put_specs` waits, which stalls the run's stream loop and therefore the
+	graph until the writer catches up. A batch that still fails after its
+	retries is recorded against each run it held specs for, so the run can
+	be failed instead of completing with specs missing.
+	"""
+
+	def __init__(self, store, batch_size: int = 1000, max_pending: int = 10000, flush_interval: float = 0.05,
+				 max_attempts: int = 3, retry_delay: float = 0.5):
+		self.store = store
+		self.batch_size = batch_size
+		self.flush_interval = flush_interval
+		self.max_attempts = max_attempts
+		self.retry_delay = retry_delay
+		self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+		self._writer: Optional[asyncio.Task] = None
+		self.stats = {"assets_written": 0, "edges_written": 0, "batches": 0, "retries": 0, "failed_batches": 0, "last_error": None}
+		# run_id -> counts of specs that were not written, and the last error
+		self.failures: Dict[str, Dict[str, Any]] = {}
+
+	def _ensure_writer(self) -> None:
+		if self._writer is None or self._writer.done():
+			self._writer = asyncio.create_task(self._run_writer())
+
+	async def put_specs(self, run_id: str, assets: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> None:
+		"""Enqueue specs for writing, waiting while the queue is full"""
+		self._ensure_writer()
+		for spec in assets:
+			await self.queue.put(("asset", spec, run_id))
+		for spec in edges:
+			await self.queue.put(("edge", spec, run_id))
+
+	async def put_update(self, run_id: str, update: Dict[str, Any]) -> Tuple[int, int]:
+		"""Enqueue the specs contained in a node update; returns (assets, edges) enqueued"""
+		assets: List[Dict[str, Any]] = []
+		edges: List[Dict[str, Any]] = []
+		for key in ASSET_SPEC_KEYS:
+			value = update.get(key)
+			if isinstance(value, dict):
+				value = [value]
+			assets.extend(s for s in value or [] if s and s.get("idempotency_key"))
+		for key in EDGE_SPEC_KEYS:
+			edges.extend(e for e in update.get(key) or [] if e.get("idempotency_key"))
+		if assets or edges:
+			await self.put_specs(run_id, assets, edges)
+		return len(assets), len(edges)
+
+	async def flush(self) -> None:
+		"""Wait until every enqueued spec has been written or given up on"""
+		if self._writer is not None:
+			await self.queue.join()
+
+	def pop_failures(self, run_id: str) -> Optional[Dict[str, Any]]:
+		"""Specs of a run that could not be written, or None if all of them landed"""
+		return self.failures.pop(run_id, None)
+
+	async def _write(self, assets: List[Tuple[Dict[str, Any], str]], edges: List[Tuple[Dict[str, Any], str]]) -> None:
+		for attempt in range(self.max_attempts):
+			try:
+				await self.store.write_batch(assets, edges)
+				return
+			except Exception:
+				if attempt == self.max_attempts - 1:
+					raise
+				self.stats["retries"] += 1
+				await asyncio.sleep(self.retry_delay * 2 ** attempt)
+
+	async def _run_writer(self) -> None:
+		loop = asyncio.get_running_loop()
+		while True:
+			items = [await self.queue.get()]
+			deadline = loop.time() + self.flush_interval
+			while len(items) < self.batch_size:
+				try:
+					items.append(self.queue.get_nowait())
+					continue
+				except asyncio.QueueEmpty:
+					pass
+				timeout = deadline - loop.time()
+				if timeout <= 0:
+					break
+				try:
+					items.append(await asyncio.wait_for(self.queue.get(), timeout))
+				except asyncio.TimeoutError:
+					break
+
+			assets = [(spec, run_id) for kind, spec, run_id in items if kind == "asset"]
+			edges = [(spec, run_id) for kind, spec, run_id in items if kind == "edge"]
+			try:
+				await self._write(assets, edges)
+				self.stats["assets_written"] += len(assets)
+				self.stats["edges_written"] += len(edges)
+				self.stats["batches"] += 1
+			except Exception as e:
+				self.stats["failed_batches"] += 1
+				self.stats["last_error"] = str(e)
+				for kind, _, run_id in items:
+					failed = self.failures.setdefault(run_id, {"assets": 0, "edges": 0})
+					failed[f"{kind}s"] += 1
+					failed["error"] = str(e)
+			finally:
+				for _ in items:
+					self.queue.task_done()
+
+	async def close(self) -> None:
+		await self.flush()
+		if self._writer is not None:
+			self._writer.cancel()
+		await self.store.close()
@@ -0,0 +1,233 @@
+from typing import Any, Dict, List, Optional, Set
+from collections import deque
+import asyncio
+import json
+import time
+
+# Status rows are re-read this far back, so updates written with a slightly
+# older timestamp by another worker are not missed; duplicates are skipped
+_UPDATE_OVERLAP = 2.0
+# Likewise events: sequence numbers are taken at insert but become visible at
+# commit, so on Postgres a lower seq can appear after a higher one was read.
+# Events above the high-water mark of this long ago are re-read and deduped
+_EVENT_OVERLAP = 2.0
+
+class Subscriber:
+	"""One WebSocket connection: what it watches and what is waiting to be sent"""
+
+	def __init__(self, websocket, max_pending: int):
+		self.websocket = websocket
+		self.run_ids: Set[str] = set()
+		self.project_ids: Set[str] = set()
+		self.max_pending = max_pending
+		self.events: deque = deque()
+		# Latest status per run; a newer one replaces an unsent older one
+		self.runs: Dict[str, Dict[str, Any]] = {}
+		self.replies: List[Dict[str, Any]] = []
+		self.dropped = 0
+		self.ready = asyncio.Event()
+		self.writer: Optional[asyncio.Task] = None
+
+	def push_event(self, event: Dict[str, Any]) -> None:
+		if len(self.events) >= self.max_pending:
+			self.events.popleft()
+			self.dropped += 1
+		self.events.append(event)
+		self.ready.set()
+
+	def push_status(self, status: Dict[str, Any]) -> None:
+		self.runs[status["run_id"]] = status
+		self.ready.set()
+
+	def reply(self, message: Dict[str, Any]) -> None:
+		self.replies.append(message)
+		self.ready.set()
+
+	def take(self) -> List[Dict[str, Any]]:
+		"""Everything pending, as replies followed by at most one batch"""
+		messages, self.replies = self.replies, []
+		if self.events or self.runs or self.dropped:
+			batch = {"type": "batch", "events": list(self.events), "runs": list(self.runs.values())}
+			if self.dropped:
+				# Dropped events can be fetched again from /v10/runs/{run_id}/events
+				batch["dropped"] = self.dropped
+			messages.append(batch)
+			self.events.clear()
+			self.runs = {}
+			self.dropped = 0
+		return messages
+
+class SubscriptionHub:
+	"""Pushes run events and status changes to WebSocket subscribers.
+
+	One poll of the run store per worker serves every connection, and each
+	change is routed through the run and project subscription maps, so the
+	cost of a poll does not grow with the number of watched runs. Each
+	connection has its own writer that sends whatever built up since its
+	last send as one message. A client that reads too slowly loses its
+	oldest events, reported as `dropped`, instead of holding up the others;
+	statuses are coalesced per run and never dropped.
+	"""
+
+	def __init__(self, store, poll_interval: float = 0.25, flush_interval: float = 0.1,
+				 max_pending: int = 1000, send_timeout: float = 30.0, batch_limit: int = 1000):
+		self.store = store
+		self.poll_interval = poll_interval
+		self.flush_interval = flush_interval
+		self.max_pending = max_pending
+		self.send_timeout = send_timeout
+		self.batch_limit = batch_limit
+		self.subscribers: Set[Subscriber] = set()
+		self.by_run: Dict[str, Set[Subscriber]] = {}
+		self.by_project: Dict[str, Set[Subscriber]] = {}
+		self.poller: Optional[asyncio.Task] = None
+		# Events are read from above event_seq; the ones above it already pushed are in pushed_events
+		self.event_seq: Optional[int] = None
+		self.event_marks: deque = deque()
+		self.pushed_events: Set[int] = set()
+		self.updated_after = 0.0
+		# run_id -> updated_at already pushed, for rows inside the overlap window
+		self.pushed: Dict[str, float] = {}
+
+	async def connect(self, websocket) -> Subscriber:
+		subscriber = Subscriber(websocket, self.max_pending)
+		self.subscribers.add(subscriber)
+		subscriber.writer = asyncio.create_task(self._write(subscriber))
+		if self.poller is None or self.poller.done():
+			self.poller = asyncio.create_task(self._poll())
+		return subscriber
+
+	def disconnect(self, subscriber: Subscriber) -> None:
+		if subscriber not in self.subscribers:
+			return
+		self.subscribers.discard(subscriber)
+		for run_id in subscriber.run_ids:
+			_discard(self.by_run, run_id, subscriber)
+		for project_id in subscriber.project_ids:
+			_discard(self.by_project, project_id, subscriber)
+		if subscriber.writer and subscriber.writer is not asyncio.current_task():
+			subscriber.writer.cancel()
+
+	async def handle(self, subscriber: Subscriber, message: Any) -> None:
+		"""Apply a subscribe or unsubscribe message from a client"""
+		action = message.get("action") if isinstance(message, dict) else None
+		run_ids = [str(r) for r in message.get("run_ids") or ()] if action else []
+		project_id = message.get("project_id") if action else None
+		if action not in ("subscribe", "unsubscribe") or not (run_ids or project_id):
+			subscriber.reply({"type": "error", "error": "Expected {\"action\": \"subscribe\" or \"unsubscribe\", \"run_ids\": [...], \"project_id\": ...}"})
+			return
+
+		if action == "subscribe":
+			for run_id in run_ids:
+				subscriber.run_ids.add(run_id)
+				self.by_run.setdefault(run_id, set()).add(subscriber)
+			if project_id:
+				subscriber.project_ids.add(project_id)
+				self.by_project.setdefault(project_id, set()).add(subscriber)
+		else:
+			for run_id in run_ids:
+				subscriber.run_ids.discard(run_id)
+				_discard(self.by_run, run_id, subscriber)
+			if project_id:
+				subscriber.project_ids.discard(project_id)
+				_discard(self.by_project, project_id, subscriber)
+		subscriber.reply({"type": f"{action}d", "run_ids": run_ids, "project_id": project_id})
+		if action == "subscribe":
+			# Current status straight away rather than on the run's next change
+			for status in await self.store.run_statuses(run_ids):
+				subscriber.push_status(status)
+
+	def _recipients(self, run_id: str, project_id: Optional[str]) -> Set[Subscriber]:
+		by_run = self.by_run.get(run_id)
+		by_project = self.by_project.get(project_id) if project_id else None
+		if by_run and by_project:
+			return by_run | by_project
+		return by_run or by_project or set()
+
+	async def _poll(self) -> None:
+		try:
+			while self.subscribers:
+				try:
+					await self._poll_once()
+				except Exception:
+					# The store being briefly unavailable must not end the streams
+					pass
+				await asyncio.sleep(self.poll_interval)
+		finally:
+			# The next first subscriber starts from the changes made after it connects
+			self.event_seq = None
+			self.event_marks.clear()
+			self.pushed_events.clear()
+			self.pushed.clear()
+
+	async def _poll_once(self) -> None:
+		if self.event_seq is None:
+			self.event_seq = await self.store.latest_event_seq()
+			self.updated_after = time.time() - _UPDATE_OVERLAP
+
+		after = self.event_seq
+		while True:
+			rows = await self.store.events_since(after, self.batch_limit)
+			for seq, run_id, project_id, event in rows:
+				after = seq
+				if seq in self.pushed_events:
+					continue
+				self.pushed_events.add(seq)
+				for subscriber in self._recipients(run_id, project_id):
+					subscriber.push_event({"seq": seq, "run_id": run_id, "event": event})
+			if len(rows) < self.batch_limit:
+				break
+		# The floor only moves up to a high-water mark once it is old enough
+		# that any earlier sequence number still uncommitted then has committed
+		now = time.monotonic()
+		high = max(after, self.event_marks[-1][1] if self.event_marks else after)
+		self.event_marks.append((now, high))
+		while self.event_marks[0][0] < now - _EVENT_OVERLAP:
+			self.event_seq = max(self.event_seq, self.event_marks.popleft()[1])
+		if self.pushed_events and min(self.pushed_events) <= self.event_seq:
+			self.pushed_events = {seq for seq in self.pushed_events if seq > self.event_seq}
+
+		newest = self.updated_after
+		for status in await self.store.runs_updated_since(self.updated_after):
+			run_id, updated_at = status["run_id"], status["updated_at"]
+			newest = max(newest, updated_at)
+			if self.pushed.get(run_id) == updated_at:
+				continue
+			self.pushed[run_id] = updated_at
+			for subscriber in self._recipients(run_id, status["project_id"]):
+				subscriber.push_status(status)
+		self.updated_after = max(self.updated_after, newest - _UPDATE_OVERLAP)
+		for run_id in [r for r, updated_at in self.pushed.items() if updated_at <= self.updated_after]:
+			del self.pushed[run_id]
+
+	async def _write(self, subscriber: Subscriber) -> None:
+		try:
+			while True:
+				await subscriber.ready.wait()
+				subscriber.ready.clear()
+				for message in subscriber.take():
+					await asyncio.wait_for(subscriber.websocket.send_text(json.dumps(message, default=str)), self.send_timeout)
+				# Whatever arrives meanwhile goes out together in the next message
+				await asyncio.sleep(self.flush_interval)
+		except asyncio.CancelledError:
+			raise
+		except Exception:
+			# Stuck or gone; the reader loop sees the close and cleans up
+			self.disconnect(subscriber)
+			try:
+				await subscriber.websocket.close(code=1013)
+			except Exception:
+				pass
+
+	async def close(self) -> None:
+		for subscriber in list(self.subscribers):
+			self.disconnect(subscriber)
+		if self.poller:
+			self.poller.cancel()
+
+def _discard(index: Dict[str, Set[Subscriber]], key: str, subscriber: Subscriber) -> None:
+	subscribers = index.get(key)
+	if subscribers is not None:
+		subscribers.discard(subscriber)
+		if not subscribers:
+			del index[key]
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The service runs with its own directory on the path (PYTHONPATH=.), so the
+# tests import graphs.* and server.* the same way
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,114 @@
+import pytest
+from graphs import approvals_engine
+from graphs.approvals_engine import (
+	ApprovalsEngine, ApprovalsEngineState, CompiledWorkflow, approvals_engine_node, approvals_inbox,
+	create_approval_asset_specs, APPROVED, REJECTED
+)
+
+START = "2025-03-03T08:00:00+00:00"
+
+def _workflow(wid, rule="any", approvers=("u1", "u2", "u3"), **step):
+	return {
+		"id": wid,
+		"name": "Pour approval",
+		"target_asset_id": f"itp-{wid}",
+		"target_asset_type": "itp",
+		"started_at": START,
+		"steps": [{"step_number": 1, "name": "Review", "approval_type": rule, "approvers": list(approvers), **step}]
+	}
+
+def _decision(wid, approver, decision=APPROVED, **extra):
+	return {"type": "decision", "workflow_id": wid, "approver_id": approver, "decision": decision, **extra}
+
+def _status(engine, wid, events):
+	engine.apply_events(events)
+	return engine.workflows[wid]["status"]
+
+@pytest.fixture
+def engine():
+	return ApprovalsEngine()
+
+@pytest.fixture
+def state_dir(monkeypatch, tmp_path):
+	monkeypatch.setattr(approvals_engine, "state_root", str(tmp_path / "approvals"))
+	monkeypatch.setattr(approvals_engine, "state_store", None)
+	monkeypatch.setattr(approvals_engine, "_engines", {})
+
+@pytest.mark.parametrize("rule, approve_at, reject_at", [("any", 1, 3), ("all", 3, 1), ("majority", 2, 2)])
+def test_rules_compile_to_vote_thresholds(rule, approve_at, reject_at):
+	step = CompiledWorkflow(_workflow("w", rule)["steps"]).steps[0]
+	assert (step.approve_at, step.reject_at) == (approve_at, reject_at)
+
+def test_any_approves_on_the_first_vote(engine):
+	engine.upsert_workflow(_workflow("w", "any"))
+	assert _status(engine, "w", [_decision("w", "u1", REJECTED), _decision("w", "u2", REJECTED)]) == "in_progress"
+	assert _status(engine, "w", [_decision("w", "u3")]) == APPROVED
+
+def test_all_is_rejected_by_one_vote(engine):
+	engine.upsert_workflow(_workflow("w", "all"))
+	assert _status(engine, "w", [_decision("w", "u1"), _decision("w", "u2")]) == "in_progress"
+	assert _status(engine, "w", [_decision("w", "u3", REJECTED)]) == REJECTED
+
+def test_majority_decides_once_the_outcome_is_settled(engine):
+	engine.upsert_workflow(_workflow("a", "majority"))
+	engine.upsert_workflow(_workflow("b", "majority"))
+	assert _status(engine, "a", [_decision("a", "u1"), _decision("a", "u2")]) == APPROVED
+	assert _status(engine, "b", [_decision("b", "u1"), _decision("b", "u2", REJECTED)]) == "in_progress"
+	assert _status(engine, "b", [_decision("b", "u3", REJECTED)]) == REJECTED
+
+def test_votes_move_through_steps_and_repeat_votes_are_ignored(engine):
+	workflow = _workflow("w", approvers=("u1",))
+	workflow["steps"].append({"step_number": 2, "name": "Sign off", "roles": ["engineer"]})
+	engine.upsert_workflow(workflow)
+	changed, ignored = engine.apply_events([_decision("w", "u1"), _decision("w", "u1"), _decision("other", "u1")])
+	assert changed == ["w"] and ignored == 2
+	assert engine.describe("w")["current_step"] == 2
+	assert [item["id"] for item in engine.inbox(roles=["engineer"])] == ["w"]
+	assert engine.inbox("u1") == []
+	assert _status(engine, "w", [_decision("w", "u9", role="engineer")]) == APPROVED
+	assert engine.inbox(roles=["engineer"]) == []
+
+def test_delegation_moves_the_seat_to_the_delegate(engine):
+	engine.upsert_workflow(_workflow("w", "all", approvers=("u1", "u2")))
+	engine.apply_events([{"type": "delegated", "workflow_id": "w", "from": "u1", "to": "u7"}])
+	assert engine.inbox("u1") == []
+	assert [item["id"] for item in engine.inbox("u7")] == ["w"]
+	assert engine.describe("w")["pending"] == ["u2", "u7"]
+
+	assert _status(engine, "w", [_decision("w", "u7"), _decision("w", "u2")]) == APPROVED
+	assert [d["seat"] for d in engine.workflows["w"]["decisions"]] == ["u1", "u2"]
+
+def test_overdue_steps_escalate_once(engine):
+	engine.upsert_workflow(_workflow("w", "all", approvers=("u1", "u2"), due_days=2, escalation_approvers=["boss"]))
+	engine.upsert_workflow(_workflow("later", due_days=10))
+	assert engine.escalate(approvals_engine._timestamp("2025-03-04T08:00:00Z")) == []
+
+	escalations = engine.escalate(approvals_engine._timestamp("2025-03-06T08:00:00Z"))
+	assert [(e["workflow_id"], e["escalated_to"], e["pending"]) for e in escalations] == [("w", ["boss"], ["u1", "u2"])]
+	assert engine.escalate(approvals_engine._timestamp("2025-03-07T08:00:00Z")) == []
+	assert [item["id"] for item in engine.inbox("boss")] == ["w"]
+	assert [item["id"] for item in engine.due_before(approvals_engine._timestamp("2025-03-06T08:00:00Z"))] == ["w"]
+
+	# An escalation approver decides the step outright
+	assert _status(engine, "w", [_decision("w", "boss")]) == APPROVED
+	assert engine.inbox("boss") == []
+
+def test_inbox_reloads_workflows_saved_by_another_worker(state_dir):
+	approvals_engine_node(ApprovalsEngineState(project_id="p1", workflows=[_workflow("w1"), _workflow("w2")]))
+	assert [item["id"] for item in approvals_inbox("p1", "u1")] == ["w1", "w2"]
+	this_worker = dict(approvals_engine._engines)
+
+	# Another worker, with its own cache, decides w1
+	approvals_engine._engines.clear()
+	approvals_engine_node(ApprovalsEngineState(project_id="p1", events=[_decision("w1", "u2")]))
+
+	approvals_engine._engines.clear()
+	approvals_engine._engines.update(this_worker)
+	assert [item["id"] for item in approvals_inbox("p1", "u1")] == ["w2"]
+	assert approvals_engine._engines["p1"][0] == 2
+
+def test_asset_keys_follow_the_workflow_id(state_dir):
+	# Two workflows that share a name are still two assets
+	update = approvals_engine_node(ApprovalsEngineState(project_id="p1", workflows=[_workflow("w1"), _workflow("w2")]))
+	state = ApprovalsEngineState(project_id="p1", **update)
+	assert [spec["idempotency_key"] for spec in create_approval_asset_specs(state)] == ["workflow:p1:w1", "workflow:p1:w2"]
@@ -0,0 +1,64 @@
+from langgraph.checkpoint.base import empty_checkpoint
+from server.checkpoints import DeltaSqliteSaver
+
+CONFIG = {"configurable": {"thread_id": "run-1"}}
+
+def _checkpoint(version: int, specs: list) -> dict:
+	checkpoint = empty_checkpoint()
+	checkpoint["channel_values"] = {"asset_specs": specs}
+	checkpoint["channel_versions"] = {"asset_specs": version}
+	return checkpoint
+
+def _kinds(saver: DeltaSqliteSaver) -> list:
+	return [kind for kind, in saver.conn.execute("SELECT kind FROM channel_deltas ORDER BY version")]
+
+def test_append_stores_only_the_tail(tmp_path):
+	saver = DeltaSqliteSaver(str(tmp_path / "checkpoints.sqlite"))
+	specs = [{"idempotency_key": "a"}]
+	saver.put(CONFIG, _checkpoint(1, specs), {})
+	saver.put(CONFIG, _checkpoint(2, specs + [{"idempotency_key": "b"}]), {})
+
+	assert _kinds(saver) == ["set", "append"]
+	restored = saver.get_tuple(CONFIG).checkpoint["channel_values"]["asset_specs"]
+	assert restored == [{"idempotency_key": "a"}, {"idempotency_key": "b"}]
+
+def test_element_mutated_in_place_is_stored_in_full(tmp_path):
+	saver = DeltaSqliteSaver(str(tmp_path / "checkpoints.sqlite"))
+	specs = [{"idempotency_key": "a", "status": "draft"}]
+	saver.put(CONFIG, _checkpoint(1, specs), {})
+	# Same element object, changed by a node, plus an appended element
+	specs[0]["status"] = "approved"
+	specs.append({"idempotency_key": "b"})
+	saver.put(CONFIG, _checkpoint(2, specs), {})
+
+	assert _kinds(saver) == ["set", "set"]
+	restored = DeltaSqliteSaver(str(tmp_path / "checkpoints.sqlite")).get_tuple(CONFIG)
+	assert restored.checkpoint["channel_values"]["asset_specs"] == [
+		{"idempotency_key": "a", "status": "approved"},
+		{"idempotency_key": "b"}
+	]
+
+def test_resumed_saver_keeps_writing_deltas(tmp_path):
+	path = str(tmp_path / "checkpoints.sqlite")
+	DeltaSqliteSaver(path).put(CONFIG, _checkpoint(1, [{"idempotency_key": "a"}]), {})
+
+	saver = DeltaSqliteSaver(path)
+	specs = saver.get_tuple(CONFIG).checkpoint["channel_values"]["asset_specs"]
+	saver.put(CONFIG, _checkpoint(2, specs + [{"idempotency_key": "b"}]), {})
+
+	assert _kinds(saver) == ["set", "append"]
+	assert len(saver.get_tuple(CONFIG).checkpoint["channel_values"]["asset_specs"]) == 2
+
+def test_append_serializes_only_the_new_elements(tmp_path):
+	saver = DeltaSqliteSaver(str(tmp_path / "checkpoints.sqlite"))
+	specs = [{"idempotency_key": str(i)} for i in range(100)]
+	saver.put(CONFIG, _checkpoint(1, specs), {})
+
+	dumped = []
+	dumps = saver.serde.dumps
+	saver.serde.dumps = lambda value: dumped.append(value) or dumps(value)
+	saver.put(CONFIG, _checkpoint(2, specs + [{"idempotency_key": "new"}]), {})
+
+	assert _kinds(saver) == ["set", "append"]
+	# Neither the list nor any element of the stored prefix is serialized again
+	assert [value for value in dumped if isinstance(value, list) or value in specs] == [[{"idempotency_key": "new"}]]
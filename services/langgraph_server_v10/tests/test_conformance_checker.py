@@ -0,0 +1,149 @@
+import math
+import statistics
+import pytest
+from graphs.conformance_checker import (
+	ConformanceCheckState, check_conformance, create_ncr_asset_specs, create_ncr_edge_specs
+)
+
+ITPS = [{
+	"id": "itp-1",
+	"items": [{
+		"code": "1.1",
+		"test_method": "AS 1289.5.4.1",
+		"limits": {"characteristic": "relative_compaction", "min": 95.0, "max": None, "unit": "%"}
+	}]
+}]
+LOTS = [{"id": "lot-1", "itp_id": "itp-1"}]
+
+def _results(values):
+	return [
+		{"id": f"r{i}", "lot_id": "lot-1", "characteristic": "relative_compaction", "value": value}
+		for i, value in enumerate(values)
+	]
+
+def test_non_numeric_values_are_counted_not_fatal():
+	nonconformances, summary = check_conformance(_results([98.0, "<0.5", "97.5", "abc", None, 90.0]), LOTS, ITPS, [])
+	assert summary["results"] == 6
+	assert summary["results_checked"] == 3
+	assert summary["results_unmatched"] == 3
+	assert summary["results_invalid"] == 2
+	assert [nc["result_id"] for nc in nonconformances if nc["type"] == "limit"] == ["r5"]
+
+def test_columnar_values_with_text_are_coerced_per_value():
+	columns = {key: [r[key] for r in _results(["96", "n/a", 99])] for key in ("id", "lot_id", "characteristic", "value")}
+	_, summary = check_conformance(columns, LOTS, ITPS, [])
+	assert summary["results_checked"] == 2
+	assert summary["results_invalid"] == 1
+
+def test_numeric_values_report_no_invalid_results():
+	_, summary = check_conformance(_results([98.0, 97.0, 96.5]), LOTS, ITPS, [])
+	assert summary["results_checked"] == 3
+	assert summary["results_invalid"] == 0
+
+def _itp(itp_id="itp-1", **item):
+	return {"id": itp_id, "items": [{
+		"code": "1.1",
+		"test_method": "AS 1289.5.4.1",
+		"limits": {"characteristic": "relative_compaction", "min": 95.0, "max": None, "unit": "%"},
+		**item
+	}]}
+
+def _by_type(nonconformances, kind):
+	return [nc for nc in nonconformances if nc["type"] == kind]
+
+def test_characteristic_value_is_the_lower_confidence_bound_of_the_lot_mean():
+	values = [96.0, 96.5, 95.2]
+	nonconformances, summary = check_conformance(_results(values), LOTS, [_itp()], [])
+	# Every result passes on its own, but the lot mean is not shown to be above 95
+	assert _by_type(nonconformances, "limit") == []
+	[nc] = _by_type(nonconformances, "characteristic")
+	mean, std = statistics.fmean(values), statistics.stdev(values)
+	assert nc["samples"] == 3
+	assert nc["mean"] == pytest.approx(mean)
+	assert nc["std"] == pytest.approx(std)
+	assert nc["characteristic_value"] == pytest.approx(mean - 2.920 * std / math.sqrt(3))
+	assert summary["lot_characteristics_checked"] == 1
+
+def test_consistent_lots_and_small_samples_have_no_characteristic_finding():
+	nonconformances, _ = check_conformance(_results([97.0, 97.2, 96.9, 97.1]), LOTS, [_itp()], [])
+	assert nonconformances == []
+	nonconformances, summary = check_conformance(_results([95.1, 99.0]), LOTS, [_itp()], [])
+	assert nonconformances == [] and summary["lot_characteristics_checked"] == 0
+
+def test_upper_limits_use_the_upper_bound():
+	itp = _itp(limits={"characteristic": "moisture_variation", "min": -2.0, "max": 1.0, "unit": "%"})
+	results = [{"id": f"r{i}", "lot_id": "lot-1", "characteristic": "moisture_variation", "value": v} for i, v in enumerate([0.2, 0.9, 0.95])]
+	[nc] = check_conformance(results, LOTS, [itp], [])[0]
+	assert nc["type"] == "characteristic" and nc["characteristic_value"] > 1.0
+
+def test_frequency_follows_lot_quantity_in_matching_units():
+	itp = _itp(frequency={"count": 1, "per_quantity": 500, "unit": "m2"})
+	lots = [
+		{"id": "lot-1", "itp_id": "itp-1", "quantity": 1200, "unit": "m2"},
+		{"id": "lot-2", "itp_id": "itp-1", "quantity": 400, "unit": "m2"},
+		{"id": "lot-3", "itp_id": "itp-1", "quantity": 5000, "unit": "m3"},
+	]
+	results = _results([98.0, 97.0]) + [{"id": "r9", "lot_id": "lot-2", "characteristic": "relative_compaction", "value": 98.0}]
+	nonconformances, summary = check_conformance(results, lots, [itp], [])
+	# lot-3 is measured in another unit, so its frequency cannot be checked
+	assert summary["frequency_checks"] == 2
+	[nc] = _by_type(nonconformances, "frequency")
+	assert (nc["lot_id"], nc["required"], nc["actual"]) == ("lot-1", 3, 2)
+	assert (nc["quantity"], nc["quantity_unit"]) == (1200, "m2")
+
+def test_per_lot_frequency():
+	itp = _itp(frequency={"count": 2, "unit": "lot"})
+	nonconformances, _ = check_conformance(_results([98.0]), LOTS, [itp], [])
+	[nc] = _by_type(nonconformances, "frequency")
+	assert (nc["required"], nc["actual"]) == (2, 1)
+
+def test_results_naming_a_test_method_resolve_to_its_characteristic():
+	results = [{"id": "r0", "lot_id": "lot-1", "test_method": "AS 1289.5.4.1", "value": 90.0}]
+	nonconformances, summary = check_conformance(results, LOTS, [_itp()], [])
+	assert summary["results_checked"] == 1
+	assert [(nc["type"], nc["characteristic"]) for nc in nonconformances] == [("limit", "relative_compaction")]
+
+def test_a_method_shared_by_characteristics_is_not_resolved():
+	itp = _itp()
+	itp["items"].append({
+		"code": "1.2",
+		"test_method": "AS 1289.5.4.1",
+		"limits": {"characteristic": "density_ratio", "min": 98.0, "max": None, "unit": "%"}
+	})
+	results = [{"id": "r0", "lot_id": "lot-1", "test_method": "AS 1289.5.4.1", "value": 90.0}]
+	nonconformances, summary = check_conformance(results, LOTS, [itp], [])
+	assert nonconformances == []
+	assert summary["results_unmatched"] == 1
+
+def test_lots_without_an_itp_fall_back_to_standards_criteria():
+	lots = [{"id": "lot-9"}]
+	results = [{"id": "r0", "lot_id": "lot-9", "characteristic": "relative_compaction", "value": 90.0}]
+	standards = [{"standard_code": "AS 1289.5.4.1"}]
+
+	[nc] = check_conformance(results, lots, [_itp()], standards)[0]
+	assert (nc["type"], nc["itp_id"], nc["item_code"], nc["min"]) == ("limit", None, None, 95)
+	# Without standards there is nothing to check the result against
+	_, summary = check_conformance(results, lots, [_itp()], [])
+	assert summary["results_unmatched"] == 1
+
+def test_one_ncr_per_lot_and_item():
+	results = _results([90.0, 91.0, 92.0]) + [
+		{"id": "x", "lot_id": "lot-2", "characteristic": "relative_compaction", "value": 80.0}
+	]
+	lots = LOTS + [{"id": "lot-2"}]
+	nonconformances, _ = check_conformance(results, lots, [_itp()], [{"standard_code": "AS 1289.5.4.1"}])
+	state = ConformanceCheckState(project_id="p1", nonconformances=nonconformances)
+
+	specs = {spec["idempotency_key"]: spec["asset"]["content"] for spec in create_ncr_asset_specs(state)}
+	assert set(specs) == {"ncr:p1:lot-1:1.1", "ncr:p1:lot-2:relative_compaction"}
+	ncr = specs["ncr:p1:lot-1:1.1"]
+	assert ncr["failed_result_ids"] == ["r0", "r1", "r2"]
+	assert ncr["nonconformance_types"] == ["characteristic", "limit"]
+	assert [finding["type"] for finding in ncr["findings"]] == ["characteristic"]
+	assert specs["ncr:p1:lot-2:relative_compaction"]["itp_item_ref"] is None
+
+	edges = create_ncr_edge_specs(state)
+	# Project-wide criteria have no inspection point to violate
+	assert sorted(edge["edge_type"] for edge in edges) == ["APPLIES_TO", "APPLIES_TO", "VIOLATES"]
+	[violates] = [edge for edge in edges if edge["edge_type"] == "VIOLATES"]
+	assert violates["properties"] == {"itp_item_ref": "1.1", "count": 4}
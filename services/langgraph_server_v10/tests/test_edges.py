@@ -0,0 +1,26 @@
+from graphs.edges import EdgeBuffer, add_document_reference_edges, add_parent_edges
+
+def test_buffer_deduplicates_by_key():
+	edges = EdgeBuffer()
+	assert edges.add("a", "b", "REFS", "k1")
+	assert not edges.add("a", "c", "REFS", "k1")
+	edges.extend([{"edge_type": "REFS", "idempotency_key": "k2", "operation": "delete"}])
+	assert len(edges) == 2 and "k2" in edges
+	assert [edge["to_asset_id"] for edge in edges] == ["b", ""]
+	assert edges.to_list()[1]["operation"] == "delete"
+
+def test_document_reference_edges_do_not_share_properties():
+	properties = {"reference_type": "source_document"}
+	edges = add_document_reference_edges(EdgeBuffer(), "ref", "GENERATED_FROM", "p1", "n1", ["d1", "d2"], properties).to_list()
+	assert [edge["idempotency_key"] for edge in edges] == ["ref:p1:n1:d1", "ref:p1:n1:d2"]
+	edges[0]["properties"]["reference_type"] = "changed"
+	assert edges[1]["properties"]["reference_type"] == "source_document"
+	assert properties["reference_type"] == "source_document"
+
+def test_difference_marks_operations():
+	nodes = [{"id": "a", "node_type": "activity", "parentId": "p"}, {"id": "b", "node_type": "activity", "parentId": "p"}, {"id": "p", "node_type": "discipline"}]
+	current = add_parent_edges(EdgeBuffer(), "p1", nodes[:1])
+	previous = add_parent_edges(EdgeBuffer(), "p1", nodes)
+	assert current.difference(previous).to_list() == []
+	removed = previous.difference(current, operation="delete").to_list()
+	assert [(edge["idempotency_key"], edge["operation"]) for edge in removed] == [("wbs_edge:p1:b:p", "delete")]
@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import mailbox
+import os
+import re
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesParser
+from benchmarks.corpus import write_mailbox
+from graphs import email_ingest
+from graphs.email_ingest import AttachmentSpool, EmailIngestState, ingest_mailbox, create_email_edge_specs
+
+def _stdlib_messages(path):
+	"""The same mailbox read by the stdlib parser, as the fields parse_message returns"""
+	if os.path.isdir(path):
+		raw = []
+		for name in sorted(os.listdir(path)):
+			with open(os.path.join(path, name), "rb") as f:
+				raw.append(BytesParser(policy=policy.default).parse(f))
+	else:
+		raw = mailbox.mbox(path, factory=lambda f: BytesParser(policy=policy.default).parse(f))
+	messages = []
+	for msg in raw:
+		body = msg.get_body(preferencelist=("plain", "html"))
+		text = body.get_content() if body else ""
+		if body and body.get_content_type() == "text/html":
+			# parse_message keeps the text of an HTML-only body
+			text = re.sub(r"<[^>]+>", " ", text)
+		messages.append({
+			"message_id": str(msg["Message-ID"]).strip("<>"),
+			"subject": str(msg["Subject"]),
+			"body": text.strip(),
+			"attachments": [
+				(part.get_filename(), part.get_content_type(), hashlib.sha256(part.get_payload(decode=True)).hexdigest())
+				for part in msg.iter_attachments()
+			]
+		})
+	return messages
+
+def _parsed_messages(path, spool):
+	return [
+		{
+			"message_id": message["message_id"],
+			"subject": message["subject"],
+			"body": message["body"].strip(),
+			"attachments": [(a["filename"], a["content_type"], a["sha256"]) for a in message["attachments"]]
+		}
+		for message, _ in ingest_mailbox(path, spool)
+	]
+
+def test_parser_matches_stdlib_on_generated_mailbox(tmp_path):
+	path = str(tmp_path / "fixture.mbox")
+	counts = write_mailbox(path, messages=200, attachment_kb=8, duplicate_rate=0.3, seed=7)
+	spool = AttachmentSpool(str(tmp_path / "spool"))
+
+	parsed = _parsed_messages(path, spool)
+	assert len(parsed) == 200
+	assert sum(len(m["attachments"]) for m in parsed) == counts["attachments"]
+	assert parsed == _stdlib_messages(path)
+	for message, _ in ingest_mailbox(path, spool):
+		for attachment in message["attachments"]:
+			with open(attachment["path"], "rb") as f:
+				assert hashlib.sha256(f.read()).hexdigest() == attachment["sha256"]
+
+def _message(i, **headers):
+	msg = EmailMessage()
+	msg["Message-ID"] = f"<edge-{i}@fixture.example>"
+	msg["From"] = "site@fixture.example"
+	msg["To"] = "project@fixture.example"
+	msg["Subject"] = headers.pop("subject", f"Edge case {i}")
+	return msg
+
+def test_parser_matches_stdlib_on_mime_edge_cases(tmp_path):
+	messages = []
+
+	# Quoted-printable body with non-ASCII text and a soft line break in a long line
+	msg = _message(1, subject="Prüfbericht für Los 4")
+	msg.set_content("Verdichtung geprüft – Ergebnis: 98 % " + "x" * 120 + "\n", cte="quoted-printable")
+	messages.append(msg)
+
+	# HTML only
+	msg = _message(2)
+	msg.set_content("<html><body><p>Pour approved</p></body></html>", subtype="html")
+	messages.append(msg)
+
+	# Alternative body nested inside mixed, with a binary and a text attachment
+	msg = _message(3)
+	msg.set_content("Please find the drawings attached.\n")
+	msg.add_alternative("<p>Please find the drawings attached.</p>", subtype="html")
+	msg.add_attachment(bytes(range(256)) * 40, maintype="application", subtype="octet-stream", filename="scan.bin")
+	msg.add_attachment("Clause 1\r\nClause 2\n", subtype="plain", filename="spec.txt")
+	messages.append(msg)
+
+	# Body lines that look like boundaries of an enclosing part
+	msg = _message(4)
+	msg.set_content("--not-a-boundary\n--\nend\n")
+	msg.add_attachment(b"--" + b"=" * 70 + b"\n", maintype="application", subtype="pdf", filename="dashes.pdf")
+	messages.append(msg)
+
+	directory = tmp_path / "eml"
+	directory.mkdir()
+	for i, msg in enumerate(messages):
+		crlf = i % 2 == 1
+		raw = msg.as_bytes(policy=msg.policy.clone(linesep="\r\n" if crlf else "\n"))
+		(directory / f"{i:03d}.eml").write_bytes(raw)
+
+	parsed = _parsed_messages(str(directory), AttachmentSpool(str(tmp_path / "spool")))
+	assert parsed == _stdlib_messages(str(directory))
+
+def test_mboxrd_escaped_from_lines_stay_in_the_message(tmp_path):
+	path = tmp_path / "escaped.mbox"
+	path.write_bytes(
+		b"From a@example Mon Mar  3 08:00:00 2025\n"
+		b"Message-ID: <one@example>\nSubject: one\n\n"
+		b"First line\n>From the site office\n\n"
+		b"From b@example Mon Mar  3 09:00:00 2025\n"
+		b"Message-ID: <two@example>\nSubject: two\n\nSecond\n"
+	)
+	parsed = _parsed_messages(str(path), AttachmentSpool(str(tmp_path / "spool")))
+	assert [m["message_id"] for m in parsed] == ["one@example", "two@example"]
+	assert parsed[0]["body"] == "First line\nFrom the site office"
+
+def _mailbox_with_attachments(path, attachments):
+	with open(path, "wb") as f:
+		for i, data in enumerate(attachments):
+			msg = _message(i)
+			msg.set_content("See attached.\n")
+			msg.add_attachment(data, subtype="plain", filename=f"spec-{i}.txt")
+			f.write(b"From fixture@example Mon Mar  3 08:00:00 2025\n" + msg.as_bytes(policy=msg.policy.clone(linesep="\n")) + b"\n")
+
+def test_attachments_are_documents_once_per_ingest(tmp_path):
+	path = str(tmp_path / "project.mbox")
+	_mailbox_with_attachments(path, ["spec A\n", "spec B\n", "spec A\n"])
+	spool = AttachmentSpool(str(tmp_path / "spool"))
+
+	def ingest():
+		documents, flags = [], []
+		for message, docs in ingest_mailbox(path, spool):
+			documents += [doc["id"] for doc in docs]
+			flags += [(a["duplicate"], a["spooled"]) for a in message["attachments"]]
+		return documents, flags
+
+	first, first_flags = ingest()
+	again, again_flags = ingest()
+	assert len(first) == 2
+	# Content already spooled by the first ingest still makes the same documents
+	assert again == first
+	assert first_flags == [(False, True), (False, True), (True, False)]
+	assert again_flags == [(False, False), (False, False), (True, False)]
+
+class _EchoExtraction:
+	"""Document extraction that keeps every source document, except the ones listed as failing"""
+	def __init__(self, failing=()):
+		self.failing = set(failing)
+
+	async def ainvoke(self, state):
+		return {"txt_project_documents": [
+			{"id": doc["id"], "file_name": doc["file_name"], "project_id": state["project_id"]}
+			for doc in state["source_documents"] if doc["file_name"] not in self.failing
+		]}
+
+def _ingest(monkeypatch, tmp_path, project_id, path, extraction):
+	monkeypatch.setattr(email_ingest, "get_document_extraction_graph", lambda: extraction)
+	monkeypatch.setattr(email_ingest, "spool_root", str(tmp_path / "spool"))
+	monkeypatch.setattr(email_ingest, "mailbox_root", os.path.realpath(str(tmp_path)))
+	result = asyncio.run(email_ingest.email_ingest_node(EmailIngestState(project_id=project_id, mailbox_path=path)))
+	assert result["error"] == ""
+	return EmailIngestState(project_id=project_id, mailbox_path=path, **{
+		k: result[k] for k in ("messages", "txt_project_documents", "ingest_stats")
+	})
+
+def test_shared_spool_does_not_hide_documents_from_other_projects(monkeypatch, tmp_path):
+	path = str(tmp_path / "project.mbox")
+	_mailbox_with_attachments(path, ["spec A\n", "spec B\n", "spec A\n"])
+
+	a = _ingest(monkeypatch, tmp_path, "project-a", path, _EchoExtraction())
+	b = _ingest(monkeypatch, tmp_path, "project-b", path, _EchoExtraction())
+	assert len(a.txt_project_documents) == len(b.txt_project_documents) == 2
+	assert a.ingest_stats["duplicate_attachments"] == b.ingest_stats["duplicate_attachments"] == 1
+	assert a.ingest_stats["spooled_bytes"] > 0
+	assert b.ingest_stats["spooled_bytes"] == 0
+	assert len(create_email_edge_specs(b)) == 3
+
+def test_edges_only_link_extracted_documents(monkeypatch, tmp_path):
+	path = str(tmp_path / "project.mbox")
+	_mailbox_with_attachments(path, ["spec A\n", "spec B\n"])
+
+	state = _ingest(monkeypatch, tmp_path, "project-a", path, _EchoExtraction(failing={"spec-1.txt"}))
+	edges = create_email_edge_specs(state)
+	assert [edge["properties"]["filename"] for edge in edges] == ["spec-0.txt"]
+	extracted = {doc["id"] for doc in state.txt_project_documents}
+	assert all(edge["properties"]["document_id"] in extracted for edge in edges)
+
+def test_mailboxes_are_read_only_from_the_mailbox_directory(monkeypatch, tmp_path):
+	path = str(tmp_path / "project.mbox")
+	_mailbox_with_attachments(path, ["spec A\n"])
+	state = EmailIngestState(project_id="project-a", mailbox_path=path)
+
+	monkeypatch.setattr(email_ingest, "mailbox_root", None)
+	result = asyncio.run(email_ingest.email_ingest_node(state))
+	assert "No mailbox directory" in result["error"]
+
+	monkeypatch.setattr(email_ingest, "mailbox_root", os.path.realpath(str(tmp_path / "mailboxes")))
+	result = asyncio.run(email_ingest.email_ingest_node(state))
+	assert "outside the configured mailbox directory" in result["error"]
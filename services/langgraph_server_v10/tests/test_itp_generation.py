@@ -0,0 +1,68 @@
+from graphs.itp_templates import (
+	CLOSEOUT_ITEMS, DISCIPLINE_TEMPLATES, PRELIMINARY_ITEMS, SPEC_TEMPLATES,
+	compile_itp_template, compile_spec_template, spec_family
+)
+from graphs.itp_generation import ItpGenerationState, generate_itps, create_itp_asset_specs, create_itp_edge_specs
+
+def test_spec_family_normalization():
+	assert spec_family("AS1289.5.4.1") == "AS 1289"
+	assert spec_family("AS/NZS 3000:2018") == "AS 3000"
+	assert spec_family(" iso 9001 ") == "ISO 9001"
+	assert spec_family("Project spec ") == "PROJECT SPEC"
+
+def test_template_order_and_point_counts():
+	template = compile_itp_template(("AS 1289", "AS 3600"), "Civil")
+	keys = [item["key"] for item in template["items"]]
+	expected = (
+		[item["key"] for item in PRELIMINARY_ITEMS]
+		+ [item["key"] for item in DISCIPLINE_TEMPLATES["Civil"]]
+		+ [f"AS 1289:{item['key']}" for item in SPEC_TEMPLATES["AS 1289"]]
+		+ [f"AS 3600:{item['key']}" for item in SPEC_TEMPLATES["AS 3600"]]
+		+ [item["key"] for item in CLOSEOUT_ITEMS]
+	)
+	assert keys == expected
+	assert sum(template["point_counts"].values()) == len(keys)
+	assert template["point_counts"]["hold"] == sum(item["point_type"] == "hold" for item in template["items"])
+	assert {item["spec_ref"] for item in template["items"] if item["key"].startswith("AS 1289:")} == {"AS 1289"}
+
+def test_unknown_specifications_get_a_compliance_item():
+	items = compile_spec_template("EN 206")
+	assert [item["key"] for item in items] == ["EN 206:compliance"]
+	assert items[0]["acceptance_criteria"] == "Works comply with EN 206"
+
+def test_templates_are_compiled_once_and_not_mutated():
+	first = compile_itp_template(("AS 3600",), "Structural")
+	assert compile_itp_template(("AS 3600",), "Structural") is first
+	assert "AS 3600:" not in SPEC_TEMPLATES["AS 3600"][0]["key"]
+
+WBS = {"nodes": [
+	{"id": "civ", "parentId": None, "node_type": "discipline", "name": "Civil", "itp_required": True, "applicable_specifications": []},
+	{"id": "earth", "parentId": "civ", "node_type": "work_package", "name": "Earthworks", "itp_required": True,
+	 "applicable_specifications": ["AS 1289.5.4.1"]},
+	{"id": "earth-a", "parentId": "earth", "node_type": "activity", "name": "Fill", "applicable_specifications": []},
+	{"id": "drain", "parentId": "civ", "node_type": "work_package", "name": "Drainage", "itp_required": True,
+	 "applicable_specifications": []},
+	{"id": "drain-a", "parentId": "drain", "node_type": "activity", "name": "Pipes", "applicable_specifications": []},
+]}
+
+def test_one_itp_per_deepest_itp_required_node():
+	itps = generate_itps(WBS, [{"standard_code": "ISO 9001"}])
+	assert [itp["wbs_node_id"] for itp in itps] == ["earth", "drain"]
+	earth, drain = itps
+	# Node specifications win; a node without any falls back to the project standards
+	assert earth["specifications"] == ["AS 1289"]
+	assert drain["specifications"] == ["ISO 9001"]
+	assert earth["discipline"] == drain["discipline"] == "Civil"
+	assert earth["activity_ids"] == ["earth-a"]
+	assert [item["code"] for item in earth["items"][:2]] == ["ITP-earth-01", "ITP-earth-02"]
+	assert earth["hold_points"] == sum(item["point_type"] == "hold" for item in earth["items"])
+
+def test_asset_and_edge_specs_cover_hold_and_witness_points():
+	state = ItpGenerationState(project_id="p1", generated_itps=generate_itps(WBS, []))
+	specs = create_itp_asset_specs(state)
+	points = [spec for spec in specs if spec["asset"]["type"] == "inspection_point"]
+	expected = sum(itp["hold_points"] + itp["witness_points"] for itp in state.generated_itps)
+	assert len(points) == expected
+	assert len({spec["idempotency_key"] for spec in specs}) == len(specs)
+	edges = create_itp_edge_specs(state)
+	assert len(edges) == len(state.generated_itps) + expected
@@ -0,0 +1,90 @@
+import random
+from graphs.lbs_extraction import parse_locations, generate_lbs_hierarchy
+from graphs.lbs_index import CRS_GRID, CRS_WGS84, LbsIndex, build_lbs_index
+
+def test_parse_chainages_stations_and_points():
+	locations = parse_locations(
+		"Zone A: pavement from CH 1+250 to CH 1+400.5\n"
+		"Culvert at Ch. 980.5\n"
+		"STA 12+50 to STA 13+00\n"
+		"Pit E 512345.2, N 6912345.7 and -27.4698, 153.0251"
+	)
+	chainages = [loc for loc in locations if loc["kind"] == "chainage"]
+	assert [(c["start"], c["end"], c["zone"]) for c in chainages] == [
+		(1250.0, 1400.5, "Zone A"),
+		(980.5, 980.5, None),
+		(381.0, 396.24, None)
+	]
+	points = [loc["coordinates"] for loc in locations if loc["kind"] == "point"]
+	assert points == [{"easting": 512345.2, "northing": 6912345.7}, {"lat": -27.4698, "lon": 153.0251}]
+	assert locations[0] == {"kind": "zone", "name": "Zone A"}
+
+def test_hierarchy_merges_locations_cited_twice():
+	documents = [
+		{"id": "d1", "content": "Zone A drainage at CH 0+100 to CH 0+200"},
+		{"id": "d2", "content": "Zone A drainage at CH 0+100 to CH 0+200"},
+	]
+	lbs = generate_lbs_hierarchy("p1", documents)
+	by_type = {}
+	for node in lbs["nodes"]:
+		by_type.setdefault(node["node_type"], []).append(node)
+	chainage, = by_type["chainage"]
+	zone, = by_type["zone"]
+	assert chainage["name"] == "CH 0+100 to CH 0+200"
+	assert chainage["parentId"] == zone["id"]
+	assert chainage["source_document_ids"] == ["d1", "d2"]
+	# Ids are stable across extractions and differ between projects
+	assert generate_lbs_hierarchy("p1", documents)["nodes"] == lbs["nodes"]
+	assert generate_lbs_hierarchy("p2", documents)["nodes"][0]["id"] != lbs["nodes"][0]["id"]
+
+def _nodes(count, seed=3):
+	rng = random.Random(seed)
+	nodes = []
+	for i in range(count):
+		start = rng.uniform(0, 10000)
+		nodes.append({"id": f"c{i}", "chainage_start": start, "chainage_end": start + rng.uniform(0, 500)})
+		nodes.append({"id": f"g{i}", "coordinates": {"easting": rng.uniform(0, 1000), "northing": rng.uniform(0, 1000)}})
+	nodes.append({"id": "w0", "coordinates": {"lon": 153.02, "lat": -27.47}})
+	return nodes
+
+def test_chainage_queries_match_a_scan():
+	nodes = _nodes(300)
+	index = LbsIndex(nodes)
+	for start, end in [(0, 0), (2500, 2600), (9999, 20000), (-10, -1), (5000, 4000)]:
+		lo, hi = min(start, end), max(start, end)
+		expected = {n["id"] for n in nodes if "chainage_start" in n and n["chainage_start"] <= hi and n["chainage_end"] >= lo}
+		hits = index.query_chainage(start, end)
+		assert set(hits) == expected
+		assert [index.nodes[h]["chainage_start"] for h in hits] == sorted(index.nodes[h]["chainage_start"] for h in hits)
+	point = index.query_chainage(1234.5)
+	assert set(point) == {n["id"] for n in nodes if "chainage_start" in n and n["chainage_start"] <= 1234.5 <= n["chainage_end"]}
+
+def test_within_queries_match_a_scan():
+	nodes = _nodes(300)
+	index = LbsIndex(nodes)
+	expected = {
+		n["id"] for n in nodes
+		if "easting" in (n.get("coordinates") or {})
+		and 100 <= n["coordinates"]["easting"] <= 400 and 250 <= n["coordinates"]["northing"] <= 600
+	}
+	assert set(index.query_within(100, 250, 400, 600)) == expected
+	assert index.query_within(153.0, -28.0, 153.1, -27.0, crs=CRS_WGS84) == ["w0"]
+	assert index.query_within(153.0, -28.0, 153.1, -27.0, crs=CRS_GRID) == []
+
+def test_npz_round_trip(tmp_path):
+	nodes = _nodes(50)
+	index = build_lbs_index({"nodes": nodes})
+	path = str(tmp_path / "p1.npz")
+	index.save(path)
+	loaded = LbsIndex.load(path)
+	assert loaded.nodes == index.nodes
+	assert loaded.query_chainage(2000, 3000) == index.query_chainage(2000, 3000)
+	assert loaded.query_within(0, 0, 500, 500) == index.query_within(0, 0, 500, 500)
+	assert loaded.query_within(153.0, -28.0, 153.1, -27.0, crs=CRS_WGS84) == ["w0"]
+
+def test_empty_index(tmp_path):
+	index = build_lbs_index(None)
+	assert index.query_chainage(0, 100) == []
+	assert index.query_within(0, 0, 1, 1) == []
+	index.save(str(tmp_path / "empty.npz"))
+	assert LbsIndex.load(str(tmp_path / "empty.npz")).query_chainage(0, 100) == []
@@ -0,0 +1,94 @@
+import asyncio
+import time
+from graphs.llm import FakeBackend, LLMClient, PromptCache, TokenBucket
+
+class CountingBackend(FakeBackend):
+	"""FakeBackend that records the size of every batch it is sent"""
+
+	def __init__(self, latency: float = 0.0, fail: bool = False):
+		super().__init__(latency=latency)
+		self.batches = []
+		self.fail = fail
+
+	async def abatch(self, requests):
+		self.batches.append(len(requests))
+		if self.fail:
+			raise TimeoutError("backend timed out")
+		return await super().abatch(requests)
+
+def _prompt(text: str) -> list:
+	return [{"role": "user", "content": text}]
+
+def test_identical_calls_in_flight_share_one_request():
+	async def main():
+		backend = CountingBackend(latency=0.05)
+		client = LLMClient(backend, model="fake")
+		replies = await asyncio.gather(*(client.complete(_prompt("same")) for _ in range(5)))
+		return backend, client, replies
+
+	backend, client, replies = asyncio.run(main())
+	assert len(set(replies)) == 1
+	assert backend.batches == [1]
+	assert client.stats["coalesced"] == 4
+
+def test_calls_are_batched_up_to_batch_size():
+	async def main():
+		backend = CountingBackend()
+		client = LLMClient(backend, model="fake", batch_size=4, batch_window=0.05)
+		replies = await client.complete_many([_prompt(f"prompt {i}") for i in range(10)])
+		return backend, client, replies
+
+	backend, client, replies = asyncio.run(main())
+	assert sorted(backend.batches) == [2, 4, 4]
+	assert client.stats["batches"] == 3
+	assert [r.split("] ", 1)[1] for r in replies] == [f"prompt {i}" for i in range(10)]
+	assert not client._sending
+
+def test_backend_errors_reach_every_caller():
+	async def main():
+		client = LLMClient(CountingBackend(fail=True), model="fake")
+		results = await asyncio.gather(*(client.complete(_prompt(f"p{i}")) for i in range(3)), return_exceptions=True)
+		return client, results
+
+	client, results = asyncio.run(main())
+	assert all(isinstance(r, TimeoutError) for r in results)
+	assert client.stats["errors"] == 1
+	assert not client._inflight
+
+def test_cached_replies_skip_the_backend(tmp_path):
+	async def main():
+		backend = CountingBackend()
+		client = LLMClient(backend, model="fake", cache=PromptCache(str(tmp_path / "cache.sqlite")))
+		first = await client.complete(_prompt("cached"))
+		second = await client.complete(_prompt("cached"))
+		return backend, client, first, second
+
+	backend, client, first, second = asyncio.run(main())
+	assert first == second
+	assert backend.batches == [1]
+	assert client.stats["cache_hits"] == 1
+
+def test_token_bucket_limits_the_rate():
+	async def main():
+		bucket = TokenBucket(rate=50.0, capacity=1.0)
+		start = time.monotonic()
+		for _ in range(6):
+			await bucket.acquire()
+		return time.monotonic() - start
+
+	# The first token is in the bucket; the other five arrive at 50 per second
+	assert asyncio.run(main()) >= 0.09
+
+def test_request_rate_limit_spaces_out_batches():
+	async def main():
+		backend = CountingBackend()
+		# 600 requests a minute is 10 a second, with a burst of 10
+		client = LLMClient(backend, model="fake", batch_size=1, requests_per_minute=600)
+		start = time.monotonic()
+		await client.complete_many([_prompt(f"p{i}") for i in range(12)])
+		return backend, time.monotonic() - start
+
+	backend, elapsed = asyncio.run(main())
+	# The two requests past the burst wait 0.1s and 0.2s
+	assert len(backend.batches) == 12
+	assert elapsed >= 0.18
@@ -0,0 +1,88 @@
+import sys
+from pydantic import BaseModel
+from graphs import memo
+from graphs.memo import NodeCache, code_version, fingerprint, memoize_node
+
+class State(BaseModel):
+	project_id: str
+	documents: list = []
+	ignored: str = ""
+
+def _counting_node(calls, error=False):
+	@memoize_node("counting", fields=("project_id", "documents"))
+	def node(state):
+		calls.append(state.project_id)
+		return {"error": "failed"} if error else {"result": [state.project_id, len(state.documents)]}
+	return node
+
+def test_key_covers_only_the_listed_fields(monkeypatch):
+	monkeypatch.setattr(memo, "node_cache", NodeCache())
+	calls = []
+	node = _counting_node(calls)
+	assert node(State(project_id="p1", documents=[1])) == {"result": ["p1", 1]}
+	assert node(State(project_id="p1", documents=[1], ignored="x")) == {"result": ["p1", 1]}
+	node(State(project_id="p1", documents=[1, 2]))
+	node(State(project_id="p2", documents=[1]))
+	assert calls == ["p1", "p1", "p2"]
+	assert memo.node_cache.report()["nodes"]["counting"]["hits"] == 1
+
+def test_hits_are_copies(monkeypatch):
+	monkeypatch.setattr(memo, "node_cache", NodeCache())
+	node = _counting_node([])
+	first = node(State(project_id="p1"))
+	first["result"].append("mutated")
+	assert node(State(project_id="p1")) == {"result": ["p1", 0]}
+
+def test_errors_are_not_cached(monkeypatch):
+	monkeypatch.setattr(memo, "node_cache", NodeCache())
+	calls = []
+	node = _counting_node(calls, error=True)
+	node(State(project_id="p1"))
+	node(State(project_id="p1"))
+	assert calls == ["p1", "p1"]
+
+def test_code_version_changes_with_dependency_source(tmp_path, monkeypatch):
+	monkeypatch.syspath_prepend(str(tmp_path))
+	module = tmp_path / "memo_dependency.py"
+	module.write_text("THRESHOLD = 1\n")
+	try:
+		before = code_version(["memo_dependency"])
+		module.write_text("THRESHOLD = 2\n")
+		assert code_version(["memo_dependency"]) != before
+	finally:
+		sys.modules.pop("memo_dependency", None)
+
+def test_fingerprint_is_order_independent():
+	assert fingerprint({"a": 1, "b": [1, 2]}) == fingerprint({"b": [1, 2], "a": 1})
+	assert fingerprint({"a": 1}) != fingerprint({"a": 2})
+
+def test_memory_tier_is_bounded_by_entries_and_bytes():
+	cache = NodeCache(max_entries=2)
+	for key in "abc":
+		cache.put("n", "v1", key, key)
+	assert cache.get("n", "v1", "a") is None
+	assert cache.get("n", "v1", "c") == "c"
+
+	cache = NodeCache(max_bytes=200)
+	cache.put("n", "v1", "big", "x" * 150)
+	cache.put("n", "v1", "other", "y" * 150)
+	assert cache.report()["entries"] == 1 and cache.size <= 200
+
+def test_disk_tier_survives_a_new_cache_and_drops_other_versions(tmp_path):
+	NodeCache(disk_dir=str(tmp_path)).put("n", "v1", "k", {"value": 1})
+	cache = NodeCache(disk_dir=str(tmp_path))
+	assert cache.get("n", "v1", "k") == {"value": 1}
+	assert cache.report()["nodes"]["n"]["disk_hits"] == 1
+	# Then served from memory
+	assert cache.get("n", "v1", "k") == {"value": 1}
+	assert cache.report()["nodes"]["n"]["hits"] == 1
+
+	# The first use of a new code version removes the old version's entries
+	assert NodeCache(disk_dir=str(tmp_path)).get("n", "v2", "k") is None
+	assert not (tmp_path / "n" / "v1").exists()
+
+def test_corrupt_disk_entries_are_misses(tmp_path):
+	cache = NodeCache(disk_dir=str(tmp_path))
+	cache.put("n", "v1", "k", 1)
+	(tmp_path / "n" / "v1" / "k.pkl").write_bytes(b"not a pickle")
+	assert NodeCache(disk_dir=str(tmp_path)).get("n", "v1", "k") is None
@@ -0,0 +1,17 @@
+import asyncio
+from graphs.orchestrator import OrchestratorState, wbs_extraction_step
+
+DOCUMENTS = [{"id": "d1", "content": "Civil earthworks, drainage and pavement; electrical cabling and lighting."}]
+
+def _parent_edges(project_id):
+	state = OrchestratorState(project_id=project_id, txt_project_documents=DOCUMENTS)
+	update = asyncio.run(wbs_extraction_step(state))
+	return [edge for edge in update["edges"] if edge["edge_type"] == "PARENT_OF"]
+
+def test_wbs_parent_edges_are_keyed_per_project():
+	p1, p2 = _parent_edges("p1"), _parent_edges("p2")
+	assert p1 and len(p1) == len(p2)
+	# WBS node ids only depend on names, so the project keeps the edges apart
+	assert {e["properties"]["child_wbs_id"] for e in p1} == {e["properties"]["child_wbs_id"] for e in p2}
+	assert not {e["idempotency_key"] for e in p1} & {e["idempotency_key"] for e in p2}
+	assert all(e["idempotency_key"].startswith("wbs_edge:p1:") for e in p1)
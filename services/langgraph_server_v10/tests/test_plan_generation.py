@@ -0,0 +1,69 @@
+import asyncio
+import threading
+from graphs import memo
+from graphs.events import emit_run_event, run_event_handler
+from graphs.memo import NodeCache
+from graphs.plan_generation import PlanGenerationState, render_plan_sections, assemble_plans_node, create_plan_asset_specs
+from graphs.plan_templates import PLAN_TYPES, SECTIONS
+
+INPUTS = {
+	"project_details": {"project_name": "Bridge <Upgrade>"},
+	"standards_from_project_documents": [{"standard_code": "AS 3600", "spec_name": "Concrete structures", "category": "Structural"}],
+	"wbs_structure": {"nodes": [{"id": "n1", "parentId": None, "node_type": "discipline", "name": "Civil", "itp_required": True}]},
+	"generated_itps": []
+}
+
+def _render(inputs, events=None):
+	async def main():
+		handler = events.append if events is not None else (lambda event: None)
+		with run_event_handler(handler):
+			return await render_plan_sections(inputs)
+	return asyncio.run(main())
+
+def test_sections_render_in_order_and_are_cached(monkeypatch):
+	monkeypatch.setattr(memo, "node_cache", NodeCache())
+	first = _render(INPUTS)
+	assert [(s["plan_type"], s["section_id"]) for s in first] == [(s["plan_type"], s["section_id"]) for s in SECTIONS]
+	assert not any(s["cached"] for s in first)
+	assert "Bridge &lt;Upgrade&gt;" in first[0]["html"]
+
+	second = _render(INPUTS)
+	assert all(s["cached"] for s in second)
+	assert [s["html"] for s in second] == [s["html"] for s in first]
+
+def test_only_sections_whose_inputs_changed_re_render(monkeypatch):
+	monkeypatch.setattr(memo, "node_cache", NodeCache())
+	_render(INPUTS)
+	changed = _render({**INPUTS, "project_details": {"project_name": "Tunnel"}})
+	rendered = {s["section_id"] for s in changed if not s["cached"]}
+	# Every plan type has an overview; nothing else reads the project details
+	assert rendered == {"overview"}
+	assert sum(not s["cached"] for s in changed) == len(PLAN_TYPES)
+
+def test_every_section_is_published_as_an_event(monkeypatch):
+	monkeypatch.setattr(memo, "node_cache", NodeCache())
+	events = []
+	sections = _render(INPUTS, events)
+	assert len(events) == len(SECTIONS)
+	assert all(event["type"] == "plan_section" for event in events)
+	assert sorted((e["plan_type"], e["section_id"]) for e in events) == sorted((s["plan_type"], s["section_id"]) for s in sections)
+
+def test_events_reach_the_handler_from_executor_threads():
+	events = []
+	async def main():
+		with run_event_handler(events.append):
+			# asyncio.to_thread copies the context, as LangGraph does for sync nodes
+			await asyncio.to_thread(emit_run_event, {"from": threading.current_thread().name})
+		# Outside the block nobody is listening
+		emit_run_event({"dropped": True})
+	asyncio.run(main())
+	assert len(events) == 1
+
+def test_plans_are_assembled_per_type():
+	state = PlanGenerationState(project_id="p1", plan_sections=_render(INPUTS))
+	update = assemble_plans_node(state)
+	assert set(update["plans"]) == set(PLAN_TYPES)
+	assert update["plan_html"] == update["plans"]["quality"]
+	assert update["plans"]["safety"].count('class="plan-section"') == sum(s["plan_type"] == "safety" for s in SECTIONS)
+	specs = create_plan_asset_specs(state.model_copy(update=update))
+	assert [spec["idempotency_key"] for spec in specs] == [f"plan:p1:{plan_type}" for plan_type in PLAN_TYPES]
@@ -0,0 +1,18 @@
+import tracemalloc
+from server.profiling import RunProfiler
+
+def test_profiling_stops_only_the_tracing_it_started():
+	profiler = RunProfiler()
+	profiler.start()
+	artifact = profiler.stop()
+	assert not tracemalloc.is_tracing()
+	assert "summary" in artifact
+
+	tracemalloc.start()
+	try:
+		profiler = RunProfiler()
+		profiler.start()
+		profiler.stop()
+		assert tracemalloc.is_tracing()
+	finally:
+		tracemalloc.stop()
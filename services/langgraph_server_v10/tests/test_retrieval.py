@@ -0,0 +1,105 @@
+from collections import OrderedDict
+import numpy as np
+import pytest
+from graphs import retrieval
+from graphs.retrieval import ChunkIndex, HashingEmbedder, TfidfEmbedder, chunk_document, create_embedder, get_chunk_index
+
+DOC = {"id": "d1", "content": " ".join(f"w{i}" for i in range(100))}
+
+def test_chunks_overlap_and_cover_the_document():
+	chunks = chunk_document(DOC, max_words=40, overlap=10)
+	words = [chunk["text"].split() for chunk in chunks]
+	assert [len(w) for w in words] == [40, 40, 40]
+	assert words[1][:10] == words[0][-10:]
+	assert words[-1][-1] == "w99"
+
+@pytest.mark.parametrize("overlap", [40, 50, -1])
+def test_overlap_must_be_smaller_than_the_window(overlap):
+	with pytest.raises(ValueError):
+		chunk_document(DOC, max_words=40, overlap=overlap)
+
+TOPICS = [
+	"concrete pour slump test and cylinder strength for the bridge deck",
+	"electrical cabling, switchboard installation and lighting circuits",
+	"earthworks compaction testing of the subgrade and pavement layers",
+	"drainage pipes, culverts and stormwater pits along the road",
+	"steel reinforcement inspection before the concrete pour",
+]
+
+def _chunks():
+	return [{"id": f"c{i}", "document_id": "d1", "index": i, "text": text} for i, text in enumerate(TOPICS)]
+
+def _ids(hits):
+	return [chunk["id"] for chunk, _ in hits]
+
+@pytest.mark.parametrize("name", ["hashing", "tfidf"])
+def test_embedders_give_stable_unit_vectors(name):
+	texts = TOPICS + [""]
+	first = create_embedder(name, dim=256).fit(texts).embed(texts)
+	again = create_embedder(name, dim=256).fit(texts).embed(texts)
+	assert first.shape == (len(texts), 256) and first.dtype == np.float32
+	np.testing.assert_array_equal(first, again)
+	np.testing.assert_allclose(np.linalg.norm(first[:-1], axis=1), 1.0, rtol=1e-5)
+	assert not first[-1].any()
+
+def test_tfidf_weights_rare_terms_above_common_ones():
+	texts = [f"common rare{i}" for i in range(10)]
+	embedder = TfidfEmbedder(dim=4096).fit(texts)
+	common, _ = embedder._buckets("common")
+	rare, _ = embedder._buckets("rare3")
+	assert embedder.idf[common[0]] == pytest.approx(1.0)
+	assert embedder.idf[rare[0]] > embedder.idf[common[0]]
+	# The hashing embedder has nothing to fit
+	assert HashingEmbedder(64).fit(texts).state() == {"name": "hashing", "dim": 64}
+
+def test_unknown_embedder():
+	with pytest.raises(ValueError):
+		create_embedder("bert")
+
+@pytest.mark.parametrize("name", ["hashing", "tfidf"])
+def test_search_ranks_the_matching_chunk_first(name):
+	index = ChunkIndex.build(_chunks(), create_embedder(name, dim=1024))
+	concrete, cabling = index.search(["concrete pour", "switchboard cabling"], k=2)
+	assert set(_ids(concrete)) == {"c0", "c4"}
+	assert _ids(cabling)[0] == "c1"
+	for hits in (concrete, cabling):
+		scores = [score for _, score in hits]
+		assert scores == sorted(scores, reverse=True)
+
+def test_blocked_search_matches_a_single_block():
+	index = ChunkIndex.build(_chunks(), create_embedder("tfidf", dim=1024))
+	queries = ["concrete pour", "compaction of pavement", "stormwater"]
+	whole = index.search(queries, k=3)
+	blocked = index.search(queries, k=3, block_rows=2)
+	# Chunks sharing no term with a query tie at zero, in any order
+	for blocked_hits, whole_hits in zip(blocked, whole):
+		assert [score for _, score in blocked_hits] == pytest.approx([score for _, score in whole_hits])
+	assert [_ids(hits)[0] for hits in blocked] == [_ids(hits)[0] for hits in whole] == ["c4", "c2", "c3"]
+	assert [len(hits) for hits in index.search(queries[:1], k=50)] == [len(TOPICS)]
+	assert index.search([], k=3) == []
+
+def test_saved_index_is_memory_mapped_and_reloads(tmp_path):
+	path = str(tmp_path / "index")
+	built = ChunkIndex.build(_chunks(), create_embedder("tfidf", dim=512), path)
+	assert isinstance(built.vectors, np.memmap)
+
+	loaded = ChunkIndex.load(path)
+	assert isinstance(loaded.vectors, np.memmap)
+	assert loaded.chunks == _chunks()
+	np.testing.assert_array_equal(loaded.embedder.idf, built.embedder.idf)
+	assert loaded.search(["compaction testing"], k=2) == built.search(["compaction testing"], k=2)
+
+def test_indexes_are_reloaded_from_the_index_dir(monkeypatch, tmp_path):
+	monkeypatch.setattr(retrieval, "_indexes", OrderedDict())
+	monkeypatch.setattr(retrieval, "_settings", {"index_dir": str(tmp_path), "embedder": "tfidf", "dim": 512, "max_indexes": 1})
+	documents = [{"id": "d1", "content": " ".join(TOPICS)}]
+	other = [{"id": "d2", "content": "unrelated text"}]
+	first = get_chunk_index(documents)
+	assert get_chunk_index(documents) is first
+
+	# Evicted from memory by another corpus, then loaded from disk instead of rebuilt
+	get_chunk_index(other)
+	monkeypatch.setattr(ChunkIndex, "build", classmethod(lambda cls, *args: pytest.fail("rebuilt")))
+	reloaded = get_chunk_index(documents)
+	assert reloaded is not first
+	assert reloaded.search(["concrete"], k=1) == first.search(["concrete"], k=1)
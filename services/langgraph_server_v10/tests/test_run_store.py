@@ -0,0 +1,143 @@
+import asyncio
+import json
+import pytest
+from server.run_store import SqliteRunStore
+
+@pytest.fixture
+def store(tmp_path):
+	store = SqliteRunStore(str(tmp_path / "runs.sqlite"))
+	yield store
+	asyncio.run(store.close())
+
+def run(coro):
+	return asyncio.run(coro)
+
+async def _enqueue(store, *run_ids):
+	for run_id in run_ids:
+		await store.create_run({"id": run_id, "graph_id": "g", "status": "running"})
+		await store.enqueue(run_id, "g", {"project_id": "p1"})
+
+def _age_heartbeats(store, seconds: float) -> None:
+	store.conn.execute("UPDATE run_queue SET heartbeat_at = heartbeat_at - ?", (seconds,))
+
+def test_claim_takes_oldest_runs_once(store):
+	async def main():
+		await _enqueue(store, "r1", "r2", "r3")
+		first = await store.claim("w1", 2)
+		second = await store.claim("w2", 2)
+		third = await store.claim("w3", 2)
+		return first, second, third
+
+	first, second, third = run(main())
+	assert [job["run_id"] for job in first] == ["r1", "r2"]
+	assert first[0]["input"] == {"project_id": "p1"}
+	assert [job["run_id"] for job in second] == ["r3"]
+	assert third == []
+
+def test_claims_do_not_overlap_across_connections(tmp_path):
+	path = str(tmp_path / "runs.sqlite")
+	stores = [SqliteRunStore(path) for _ in range(4)]
+
+	async def main():
+		await _enqueue(stores[0], *[f"r{i}" for i in range(40)])
+		claimed = await asyncio.gather(*(s.claim(f"w{i}", 40) for i, s in enumerate(stores)))
+		return [job["run_id"] for jobs in claimed for job in jobs]
+
+	run_ids = run(main())
+	assert sorted(run_ids) == sorted(f"r{i}" for i in range(40))
+
+def test_stale_claims_are_requeued(store):
+	async def main():
+		await _enqueue(store, "r1", "r2")
+		await store.claim("w1", 2)
+		_age_heartbeats(store, 120)
+		# w1 still reports r2, so only r1 goes back on the queue
+		held = await store.heartbeat("w1", ["r2"])
+		requeued = await store.requeue_stale(60)
+		reclaimed = await store.claim("w2", 2)
+		return held, requeued, reclaimed
+
+	held, requeued, reclaimed = run(main())
+	assert held == ["r2"]
+	assert requeued == ["r1"]
+	assert [job["run_id"] for job in reclaimed] == ["r1"]
+
+def test_release_hands_runs_back(store):
+	async def main():
+		await _enqueue(store, "r1", "r2")
+		await store.claim("w1", 2)
+		await store.release("w1")
+		return await store.claim("w2", 2), await store.is_queued("r1")
+
+	reclaimed, queued = run(main())
+	assert [job["run_id"] for job in reclaimed] == ["r1", "r2"]
+	assert queued
+
+def test_only_the_claim_holder_finishes_a_run(store):
+	async def main():
+		await _enqueue(store, "r1")
+		await store.claim("w1", 1)
+		# w1 misses its heartbeats; the run is requeued and w2 takes it over
+		_age_heartbeats(store, 120)
+		await store.requeue_stale(60)
+		await store.claim("w2", 1)
+		held = await store.heartbeat("w1", ["r1"])
+		stale = await store.finish_run("r1", "w1", {"edges": ["stale"]}, status="completed")
+		stale_complete = await store.complete("r1", "w1")
+		owner = await store.finish_run("r1", "w2", {"edges": ["fresh"]}, status="completed")
+		result = await store.get_result_json("r1")
+		queued = await store.is_queued("r1")
+		completed = await store.complete("r1", "w2")
+		return held, stale, stale_complete, owner, result, queued, completed, await store.is_queued("r1"), await store.get_run("r1")
+
+	held, stale, stale_complete, owner, result, queued, completed, still_queued, record = run(main())
+	assert held == []
+	assert (stale, stale_complete) == (False, False)
+	assert owner and queued
+	assert json.loads(result["edges"]) == ["fresh"]
+	assert completed and not still_queued
+	assert record["status"] == "completed"
+
+def test_result_fields_and_pages(store):
+	result = {
+		"project_id": "p1",
+		"txt_project_documents": [{"id": f"d{i}"} for i in range(5)],
+		"wbs_structure": {"name": "WBS", "nodes": [{"id": "n1"}, {"id": "n2"}]}
+	}
+
+	async def main():
+		await _enqueue(store, "r1")
+		await store.claim("w1", 1)
+		await store.finish_run("r1", "w1", result, status="completed")
+		full = await store.get_result_json("r1")
+		nested = await store.get_result_json("r1", ["wbs_structure.nodes", "wbs_structure.name"])
+		page = await store.get_result_items("r1", "txt_project_documents", 2, 2)
+		return full, nested, page, await store.get_result_items("r1", "project_id", 0, 10)
+
+	full, nested, page, not_a_list = run(main())
+	assert {key: json.loads(text) for key, text in full.items()} == result
+	assert json.loads(nested["wbs_structure.nodes"]) == [{"id": "n1"}, {"id": "n2"}]
+	assert json.loads(nested["wbs_structure.name"]) == "WBS"
+	assert page[0] == 5
+	assert [json.loads(item) for item in page[1]] == [{"id": "d2"}, {"id": "d3"}]
+	assert not_a_list is None
+
+def test_latest_result_of_a_project(store):
+	async def finish(run_id, project_id, result, status="completed"):
+		await store.create_run({"id": run_id, "graph_id": "wbs_extraction", "status": "running", "project_id": project_id})
+		await store.enqueue(run_id, "wbs_extraction", {})
+		await store.claim("w1", 1)
+		await store.finish_run(run_id, "w1", result, status=status)
+
+	async def main():
+		await finish("r1", "p1", {"wbs_structure": {"nodes": [{"id": "old"}]}})
+		await finish("r2", "p1", {"wbs_structure": {"nodes": [{"id": "new"}]}})
+		# Failed runs, runs of other projects and results without the field do not count
+		await finish("r3", "p1", {"wbs_structure": {"nodes": [{"id": "failed"}]}}, status="failed")
+		await finish("r4", "p2", {"wbs_structure": {"nodes": [{"id": "other"}]}})
+		await finish("r5", "p1", {"lbs_structure": {}})
+		return await store.latest_result_json("p1", "wbs_structure"), await store.latest_result_json("p3", "wbs_structure")
+
+	latest, missing = run(main())
+	assert json.loads(latest) == {"nodes": [{"id": "new"}]}
+	assert missing is None
@@ -0,0 +1,40 @@
+import pytest
+from graphs.scope_scoring import DISCIPLINE_MIN_SHARE, count_terms, score_scope
+
+def test_disciplines_are_ranked_by_term_share():
+	scores = score_scope(["civil earthworks drainage pavement civil", "electrical cabling lighting"])
+	assert scores["disciplines"] == ["Civil", "Electrical"]
+	assert scores["discipline_weights"] == {"Civil": 0.625, "Electrical": 0.375}
+
+def test_shared_terms_split_their_weight():
+	scores = score_scope(["concrete concrete"])
+	assert scores["discipline_weights"] == {"Civil": 0.5, "Structural": 0.5}
+
+def test_disciplines_below_the_minimum_share_get_no_branch():
+	# One mechanical hit against nineteen civil ones is a 5% share
+	scores = score_scope(["civil " * 19 + "hvac"])
+	assert scores["discipline_weights"]["Mechanical"] == pytest.approx(0.05)
+	assert 0.05 < DISCIPLINE_MIN_SHARE
+	assert scores["disciplines"] == ["Civil"]
+	# At exactly the minimum share it is kept
+	assert score_scope(["civil " * 9 + "hvac"])["disciplines"] == ["Civil", "Mechanical"]
+
+def test_terms_match_whole_words_only():
+	assert score_scope(["civilisation powerful"])["disciplines"] == []
+
+def test_specifications_are_ranked_by_citations():
+	scores = score_scope(["AS 1289.5.4.1 and AS 3600", "AS 3600 again, ISO 9001"])
+	assert scores["specifications"] == ["AS 3600", "AS 1289.5.4.1", "ISO 9001"]
+
+def test_work_types_and_term_counts():
+	counts = count_terms(["Testing: compaction test", ""])
+	assert counts["token_totals"].tolist() == [3, 0]
+	scores = score_scope(["compaction testing and installation"])
+	assert scores["work_type_weights"] == {"Construction": 0.3333, "Testing": 0.6667}
+
+def test_complexity_grows_with_diversity_and_size():
+	empty = score_scope([])
+	assert empty["disciplines"] == [] and empty["complexity_score"] == 1.0
+	narrow = score_scope(["civil earthworks"])["complexity_score"]
+	broad = score_scope(["civil earthworks electrical cabling mechanical hvac AS 3600 AS 1289"])["complexity_score"]
+	assert 1.0 < narrow < broad <= 4.0
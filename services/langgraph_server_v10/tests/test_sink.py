@@ -0,0 +1,71 @@
+import asyncio
+from server.sink import AssetSink, SqliteSpecStore
+
+def _asset(key: str) -> dict:
+	return {"asset": {"type": "wbs_node", "name": key, "project_id": "p1", "content": {}}, "idempotency_key": key}
+
+def _edge(key: str) -> dict:
+	return {"from_asset_id": "", "to_asset_id": "", "edge_type": "PARENT_OF", "properties": {}, "idempotency_key": key}
+
+class FlakyStore:
+	"""Fails the first `failures` writes, then records the batches"""
+
+	def __init__(self, failures: int):
+		self.failures = failures
+		self.batches = []
+
+	async def write_batch(self, assets, edges):
+		if self.failures:
+			self.failures -= 1
+			raise ConnectionError("connection reset")
+		self.batches.append((assets, edges))
+
+	async def close(self):
+		pass
+
+def test_specs_are_written_in_batches(tmp_path):
+	async def main():
+		store = SqliteSpecStore(str(tmp_path / "specs.sqlite"))
+		sink = AssetSink(store, batch_size=2)
+		assets, edges = await sink.put_update("run-1", {"wbs_asset_specs": [_asset("a"), _asset("b")], "wbs_edge_specs": [_edge("e")]})
+		await sink.flush()
+		rows = store.conn.execute("SELECT COUNT(*) FROM graph_asset_specs").fetchone()[0], store.conn.execute("SELECT COUNT(*) FROM graph_edge_specs").fetchone()[0]
+		await sink.close()
+		return (assets, edges), rows, sink.pop_failures("run-1")
+
+	counts, rows, failures = asyncio.run(main())
+	assert counts == (2, 1)
+	assert rows == (2, 1)
+	assert failures is None
+
+def test_failed_batch_is_retried():
+	async def main():
+		store = FlakyStore(failures=2)
+		sink = AssetSink(store, max_attempts=3, retry_delay=0)
+		await sink.put_specs("run-1", [_asset("a")], [_edge("e")])
+		await sink.flush()
+		await sink.close()
+		return store, sink
+
+	store, sink = asyncio.run(main())
+	assert len(store.batches) == 1
+	assert sink.stats["retries"] == 2
+	assert sink.pop_failures("run-1") is None
+
+def test_specs_that_never_land_are_reported_per_run():
+	async def main():
+		store = FlakyStore(failures=3)
+		sink = AssetSink(store, max_attempts=3, retry_delay=0)
+		await sink.put_specs("run-1", [_asset("a"), _asset("b")], [_edge("e")])
+		await sink.flush()
+		# The next batch goes through and is not charged to run-1
+		await sink.put_specs("run-2", [_asset("c")], [])
+		await sink.flush()
+		await sink.close()
+		return sink
+
+	sink = asyncio.run(main())
+	assert sink.pop_failures("run-1") == {"assets": 2, "edges": 1, "error": "connection reset"}
+	assert sink.pop_failures("run-1") is None
+	assert sink.pop_failures("run-2") is None
+	assert sink.stats["failed_batches"] == 1
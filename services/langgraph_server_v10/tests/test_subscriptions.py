@@ -0,0 +1,139 @@
+import asyncio
+import json
+from server import subscriptions
+from server.run_store import SqliteRunStore
+from server.subscriptions import Subscriber, SubscriptionHub
+
+def _insert(store, seq, run_id, event):
+	store.conn.execute("INSERT INTO run_events (seq, run_id, event) VALUES (?, ?, ?)", (seq, run_id, json.dumps(event)))
+
+def test_events_committed_out_of_seq_order_are_pushed_once(tmp_path, monkeypatch):
+	store = SqliteRunStore(str(tmp_path / "runs.sqlite"))
+	hub = SubscriptionHub(store)
+	subscriber = Subscriber(None, max_pending=100)
+
+	async def main():
+		await store.create_run({"id": "r1", "graph_id": "g", "status": "running", "project_id": "p1"})
+		await hub._poll_once()
+		await hub.handle(subscriber, {"action": "subscribe", "run_ids": ["r1"]})
+
+		# seq 2 is taken first but commits after seq 3, as bigserial allows on Postgres
+		_insert(store, 3, "r1", {"n": 3})
+		await hub._poll_once()
+		_insert(store, 2, "r1", {"n": 2})
+		await hub._poll_once()
+		await hub._poll_once()
+		seen = [e["seq"] for e in subscriber.events]
+
+		# Once the window has passed the floor moves up and nothing is re-read
+		monkeypatch.setattr(subscriptions, "_EVENT_OVERLAP", 0.0)
+		await hub._poll_once()
+		_insert(store, 4, "r1", {"n": 4})
+		await hub._poll_once()
+		await hub._poll_once()
+		return seen, [e["seq"] for e in subscriber.events], hub.event_seq, hub.pushed_events
+
+	try:
+		seen, after, floor, pushed = asyncio.run(main())
+	finally:
+		asyncio.run(store.close())
+	assert seen == [3, 2]
+	assert after == [3, 2, 4]
+	assert floor == 4
+	assert pushed == set()
+
+def _run_hub(tmp_path, main):
+	store = SqliteRunStore(str(tmp_path / "runs.sqlite"))
+	try:
+		return asyncio.run(main(store, SubscriptionHub(store)))
+	finally:
+		asyncio.run(store.close())
+
+def _runs_of(subscriber):
+	return [e["run_id"] for e in subscriber.events]
+
+def test_events_reach_run_and_project_subscribers_only(tmp_path):
+	by_run, by_project = Subscriber(None, max_pending=100), Subscriber(None, max_pending=100)
+
+	async def main(store, hub):
+		for run_id, project_id in (("r1", "p1"), ("r2", "p1"), ("r3", "p2")):
+			await store.create_run({"id": run_id, "graph_id": "g", "status": "running", "project_id": project_id})
+		await hub._poll_once()
+		await hub.handle(by_run, {"action": "subscribe", "run_ids": ["r1"]})
+		await hub.handle(by_project, {"action": "subscribe", "project_id": "p1"})
+		for run_id in ("r1", "r2", "r3"):
+			await store.append_events(run_id, [{"node": "a"}])
+		await hub._poll_once()
+		routed = _runs_of(by_run), _runs_of(by_project)
+
+		await hub.handle(by_run, {"action": "unsubscribe", "run_ids": ["r1"]})
+		await hub.handle(by_project, {"action": "unsubscribe", "project_id": "p1"})
+		by_run.events.clear()
+		by_project.events.clear()
+		await store.append_events("r1", [{"node": "b"}])
+		await hub._poll_once()
+		return routed, _runs_of(by_run) + _runs_of(by_project), dict(hub.by_run), dict(hub.by_project)
+
+	routed, after_unsubscribe, by_run_index, by_project_index = _run_hub(tmp_path, main)
+	assert routed == (["r1"], ["r1", "r2"])
+	assert after_unsubscribe == []
+	assert by_run_index == by_project_index == {}
+	assert [reply["type"] for reply in by_run.replies] == ["subscribed", "unsubscribed"]
+
+def test_bad_messages_get_an_error_reply(tmp_path):
+	subscriber = Subscriber(None, max_pending=100)
+
+	async def main(store, hub):
+		await hub.handle(subscriber, {"action": "subscribe"})
+		await hub.handle(subscriber, ["subscribe"])
+
+	_run_hub(tmp_path, main)
+	assert [reply["type"] for reply in subscriber.take()] == ["error", "error"]
+
+def test_statuses_are_coalesced_per_run(tmp_path):
+	subscriber = Subscriber(None, max_pending=100)
+
+	async def main(store, hub):
+		await store.create_run({"id": "r1", "graph_id": "g", "status": "running", "project_id": "p1"})
+		await hub._poll_once()
+		await hub.handle(subscriber, {"action": "subscribe", "project_id": "p1"})
+		await store.update_run("r1", last_event="extract")
+		await hub._poll_once()
+		await store.update_run("r1", status="completed", last_event="completed")
+		await hub._poll_once()
+		return subscriber.take()
+
+	[reply, batch] = _run_hub(tmp_path, main)
+	assert reply["type"] == "subscribed"
+	# Two changes since the last send go out as the latest status only
+	assert [(run["run_id"], run["status"], run["last_event"]) for run in batch["runs"]] == [("r1", "completed", "completed")]
+	assert batch["events"] == [] and "dropped" not in batch
+
+def test_subscribing_sends_the_current_status(tmp_path):
+	subscriber = Subscriber(None, max_pending=100)
+
+	async def main(store, hub):
+		await store.create_run({"id": "r1", "graph_id": "g", "status": "failed", "error": "boom"})
+		await hub.handle(subscriber, {"action": "subscribe", "run_ids": ["r1", "missing"]})
+
+	_run_hub(tmp_path, main)
+	assert [(run["run_id"], run["status"], run["error"]) for run in subscriber.runs.values()] == [("r1", "failed", "boom")]
+
+def test_a_slow_subscriber_drops_its_oldest_events():
+	subscriber = Subscriber(None, max_pending=2)
+	for seq in range(1, 6):
+		subscriber.push_event({"seq": seq, "run_id": "r1", "event": {}})
+	subscriber.push_status({"run_id": "r1", "status": "running"})
+	subscriber.push_status({"run_id": "r2", "status": "running"})
+
+	[batch] = subscriber.take()
+	assert [e["seq"] for e in batch["events"]] == [4, 5]
+	assert batch["dropped"] == 3
+	# Statuses are never dropped
+	assert [run["run_id"] for run in batch["runs"]] == ["r1", "r2"]
+
+	# The count is per batch
+	subscriber.push_event({"seq": 6, "run_id": "r1", "event": {}})
+	[batch] = subscriber.take()
+	assert "dropped" not in batch and [e["seq"] for e in batch["events"]] == [6]
+	assert subscriber.take() == []
@@ -0,0 +1,86 @@
+import copy
+from graphs.wbs_diff import stable_node_id, node_content_hash, diff_wbs
+from graphs.wbs_extraction import (
+	WbsExtractionState, wbs_extraction_node, create_wbs_asset_specs, create_wbs_edge_specs,
+	create_document_reference_edges
+)
+
+CIVIL = {"id": "d1", "content": "Civil earthworks, drainage and pavement construction to AS 1289.5.4.1."}
+ELECTRICAL = {"id": "d2", "content": "Electrical cabling, lighting and power supply; electrical testing and commissioning."}
+
+def _extract(documents, previous=None, project_id="p1"):
+	state = WbsExtractionState(project_id=project_id, txt_project_documents=documents, previous_wbs_structure=previous)
+	update = wbs_extraction_node(state)
+	assert not update.get("error")
+	return state.model_copy(update=update)
+
+def test_stable_ids_follow_the_name_path():
+	assert stable_node_id(["Civil", "Civil Design"]) == stable_node_id([" civil ", "CIVIL DESIGN"])
+	assert stable_node_id(["Civil", "Civil Design"]) != stable_node_id(["Civil Design"])
+	assert len(stable_node_id(["Civil"])) == 12
+
+def test_content_hash_ignores_identity_fields():
+	node = {"id": "a", "name": "Civil", "itp_required": True}
+	assert node_content_hash(node) == node_content_hash({**node, "id": "b", "content_hash": "x"})
+	assert node_content_hash(node) != node_content_hash({**node, "itp_required": False})
+
+def test_re_extraction_keeps_node_ids():
+	first = _extract([CIVIL]).wbs_structure
+	again = _extract([copy.deepcopy(CIVIL)]).wbs_structure
+	assert [n["id"] for n in first["nodes"]] == [n["id"] for n in again["nodes"]]
+	ids = {n["id"] for n in first["nodes"]}
+	assert all(n["parentId"] in ids for n in first["nodes"] if n["parentId"])
+
+def test_diff_classifies_added_changed_removed():
+	previous = {"nodes": [
+		{"id": "a", "name": "A"},
+		{"id": "b", "name": "B"},
+		{"id": "c", "name": "C"},
+	]}
+	current = {"nodes": [
+		{"id": "a", "name": "A"},
+		{"id": "b", "name": "B renamed"},
+		{"id": "d", "name": "D"},
+	]}
+	diff = diff_wbs(previous, current)
+	assert [n["id"] for n in diff["added"]] == ["d"]
+	assert [n["id"] for n in diff["changed"]] == ["b"]
+	assert [n["id"] for n in diff["removed"]] == ["c"]
+	assert diff["unchanged_count"] == 1
+	assert diff_wbs(None, None) == {"added": [], "changed": [], "removed": [], "unchanged_count": 0}
+
+def test_unchanged_documents_emit_nothing():
+	previous = _extract([CIVIL]).wbs_structure
+	state = _extract([CIVIL], previous=previous)
+	assert state.wbs_diff["unchanged_count"] == len(previous["nodes"])
+	assert create_wbs_asset_specs(state) == []
+	assert create_wbs_edge_specs(state) == []
+	assert create_document_reference_edges(state) == []
+
+def test_first_extraction_writes_every_node_and_link():
+	state = _extract([CIVIL])
+	nodes = state.wbs_structure["nodes"]
+	specs = create_wbs_asset_specs(state)
+	assert len(specs) == len(nodes)
+	assert all("operation" not in spec for spec in specs)
+	assert {spec["idempotency_key"] for spec in specs} == {f"wbs_node:p1:{n['id']}" for n in nodes}
+	assert len(create_wbs_edge_specs(state)) == sum(1 for n in nodes if n["parentId"])
+
+def test_dropped_discipline_is_deleted():
+	previous = _extract([CIVIL, ELECTRICAL]).wbs_structure
+	state = _extract([CIVIL], previous=previous)
+	removed = state.wbs_diff["removed"]
+	assert removed and {n["name"] for n in removed if n["node_type"] == "discipline"} == {"Electrical"}
+
+	deletes = [spec for spec in create_wbs_asset_specs(state) if spec.get("operation") == "delete"]
+	assert {spec["idempotency_key"] for spec in deletes} == {f"wbs_node:p1:{n['id']}" for n in removed}
+	edge_deletes = [edge for edge in create_wbs_edge_specs(state) if edge.get("operation") == "delete"]
+	assert {edge["properties"]["child_wbs_id"] for edge in edge_deletes} == {n["id"] for n in removed if n["parentId"]}
+
+def test_document_reference_edges_follow_the_documents():
+	previous = _extract([CIVIL, ELECTRICAL]).wbs_structure
+	state = _extract([CIVIL], previous=previous)
+	edges = create_document_reference_edges(state)
+	# d2 is no longer a source, and the Electrical discipline went with it
+	assert edges and all(edge["operation"] == "delete" for edge in edges)
+	assert "d2" in {edge["to_asset_id"] for edge in edges}
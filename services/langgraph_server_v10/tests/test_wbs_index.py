@@ -0,0 +1,73 @@
+import pytest
+from graphs.wbs_index import build_wbs_index
+
+# root
+# ├── a (itp)
+# │   ├── a1 (itp)
+# │   └── a2
+# │       └── a2x (itp)
+# └── b
+# other root, and an orphan whose parent is missing
+NODES = [
+	{"id": "root", "parentId": None},
+	{"id": "a", "parentId": "root", "itp_required": True},
+	{"id": "a1", "parentId": "a", "itp_required": True},
+	{"id": "a2", "parentId": "a"},
+	{"id": "a2x", "parentId": "a2", "itp_required": True},
+	{"id": "b", "parentId": "root"},
+	{"id": "other", "parentId": None},
+	{"id": "orphan", "parentId": "missing"},
+]
+
+@pytest.fixture
+def index():
+	return build_wbs_index({"nodes": NODES})
+
+def test_preorder_ranges_make_subtrees_contiguous(index):
+	assert index.order == ["root", "a", "a1", "a2", "a2x", "b", "other", "orphan"]
+	assert index.get_subtree("a") == ["a", "a1", "a2", "a2x"]
+	assert index.get_subtree("a2x") == ["a2x"]
+	assert index.get_subtree("root") == index.order[:6]
+	for node_id in index.order:
+		assert index.order[index.tin[node_id]] == node_id
+		assert index.tout[node_id] - index.tin[node_id] == len(index.get_subtree(node_id))
+
+def test_ancestors_paths_and_depth(index):
+	assert index.get_ancestors("a2x") == ["root", "a", "a2"]
+	assert index.get_path("a2x") == ("root", "a", "a2", "a2x")
+	assert index.get_ancestors("root") == []
+	assert index.depth["a2x"] == 3
+	assert index.is_ancestor("root", "a2x")
+	assert index.is_ancestor("a", "a1")
+	assert not index.is_ancestor("a1", "a")
+	assert not index.is_ancestor("a", "a")
+	assert not index.is_ancestor("b", "a1")
+
+def test_orphans_become_roots(index):
+	assert index.roots == ["root", "other", "orphan"]
+	assert index.get_ancestors("orphan") == []
+
+def test_leaves_and_itp_required_under_a_node(index):
+	assert index.get_leaves_under("root") == ["a1", "a2x", "b"]
+	assert index.get_leaves_under("a2") == ["a2x"]
+	assert index.get_leaves_under("b") == ["b"]
+	assert index.get_itp_required_under("root") == ["a", "a1", "a2x"]
+	assert index.get_itp_required_under("a2") == ["a2x"]
+	assert index.get_itp_required_under("b") == []
+	assert index.get_children("a") == ["a1", "a2"]
+
+def test_unknown_nodes_raise_key_error(index):
+	with pytest.raises(KeyError):
+		index.get_subtree("nope")
+	with pytest.raises(KeyError):
+		index.is_ancestor("root", "nope")
+
+def test_deep_trees_do_not_recurse():
+	nodes = [{"id": "n0", "parentId": None}] + [{"id": f"n{i}", "parentId": f"n{i - 1}"} for i in range(1, 5000)]
+	index = build_wbs_index({"nodes": nodes})
+	assert index.get_leaves_under("n0") == ["n4999"]
+	assert len(index.get_ancestors("n4999")) == 4999
+
+def test_empty_structure():
+	index = build_wbs_index(None)
+	assert index.order == []